@@ -0,0 +1,602 @@
+#!/usr/bin/env python3
+"""
+Module d'envoi des alertes d'urgence aux aidants
+File asyncio dans un thread dédié, destinations multiples, boîte d'envoi persistante (SQLite)
+
+Test local avec des serveurs de substitution: python alert_dispatcher.py --self-test
+"""
+
+import asyncio
+import json
+import os
+import shlex
+import sqlite3
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+from app_config import load_section, section_defaults
+from emergency_rules import SEVERITY_LEVELS
+
+CONFIG_FILE = "config.json"
+
+# Valeurs par défaut, types et bornes: section "alerts" de app_config.SECTIONS
+DEFAULT_ALERT_CONFIG = section_defaults('alerts')
+
+# Réglages communs, surchargeables pour chaque destination
+DEFAULT_SINK_SETTINGS = {
+    'enabled': True,
+    'timeout': 5.0,               # Durée maximum d'une tentative (secondes)
+    'max_attempts': 8,            # Au-delà, l'envoi est marqué en échec
+    'backoff_base': 2.0,          # Attente avant le 1er nouvel essai, doublée ensuite
+    'backoff_max': 300.0,
+    'dedup_seconds': 60.0         # Alerte identique ignorée pendant cette fenêtre
+}
+
+
+def load_alert_config(config_file=CONFIG_FILE):
+    """Configuration des alertes (section "alerts" de config.json, validée au chargement)"""
+    return load_section('alerts', config_file)
+
+
+def format_alert_text(alert):
+    """Message lisible d'une alerte (courriel, commande)"""
+    when = datetime.fromtimestamp(alert['time']).strftime('%d/%m/%Y %H:%M:%S')
+    lines = [
+        f"🚨 Alerte {alert['severity']} à {when}",
+        f"Mots détectés: {', '.join(alert['keywords'])}"
+    ]
+    if alert.get('text'):
+        lines.append(f"Phrase: {alert['text']}")
+    return '\n'.join(lines)
+
+
+# --- Destinations ---
+
+class AlertSink:
+    """Destination d'alerte (une tentative d'envoi par appel de send)"""
+
+    def __init__(self, name, settings):
+        self.name = name
+        self.settings = dict(DEFAULT_SINK_SETTINGS)
+        self.settings.update(settings)
+        self.sent = 0
+        self.failed = 0
+        self.retries = 0
+        self.deduplicated = 0
+        self.last_error = None
+
+    async def send(self, alert):
+        raise NotImplementedError
+
+
+class WebhookSink(AlertSink):
+    """POST JSON vers une URL (serveur domotique local, passerelle SMS...)"""
+
+    async def send(self, alert):
+        body = json.dumps(alert, ensure_ascii=False).encode('utf-8')
+        await asyncio.get_running_loop().run_in_executor(None, self._post, body)
+
+    def _post(self, body):
+        import urllib.request  # Importé seulement si une destination webhook est configurée
+        headers = {'Content-Type': 'application/json'}
+        headers.update(self.settings.get('headers', {}))
+        request = urllib.request.Request(self.settings['url'], data=body, headers=headers, method='POST')
+        with urllib.request.urlopen(request, timeout=self.settings['timeout']) as response:
+            if response.status >= 300:
+                raise RuntimeError(f"HTTP {response.status}")
+
+
+class SmtpSink(AlertSink):
+    """Courriel via un relais SMTP"""
+
+    async def send(self, alert):
+        await asyncio.get_running_loop().run_in_executor(None, self._send_mail, alert)
+
+    def _send_mail(self, alert):
+        import smtplib  # Importés seulement si une destination courriel est configurée
+        from email.message import EmailMessage
+        message = EmailMessage()
+        message['Subject'] = f"🚨 Alerte {alert['severity']}: {', '.join(alert['keywords'])}"
+        message['From'] = self.settings['sender']
+        message['To'] = ', '.join(self.settings['recipients'])
+        message.set_content(format_alert_text(alert))
+
+        with smtplib.SMTP(self.settings.get('host', 'localhost'), self.settings.get('port', 25),
+                          timeout=self.settings['timeout']) as smtp:
+            if self.settings.get('starttls', False):
+                smtp.starttls()
+            if self.settings.get('username'):
+                smtp.login(self.settings['username'], self.settings.get('password', ''))
+            smtp.send_message(message)
+
+
+class CommandSink(AlertSink):
+    """Commande shell: alerte JSON sur l'entrée standard, résumé en variables d'environnement"""
+
+    async def send(self, alert):
+        command = self.settings['command']
+        if isinstance(command, str):
+            command = shlex.split(command)
+        env = dict(os.environ)
+        env.update({
+            'ALERT_SEVERITY': alert['severity'],
+            'ALERT_KEYWORDS': ','.join(alert['keywords']),
+            'ALERT_TEXT': format_alert_text(alert)
+        })
+        process = await asyncio.create_subprocess_exec(
+            *command, stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.PIPE, env=env
+        )
+        try:
+            _, stderr = await process.communicate(json.dumps(alert, ensure_ascii=False).encode('utf-8'))
+        except asyncio.CancelledError:
+            process.kill()
+            raise
+        if process.returncode != 0:
+            raise RuntimeError(f"code {process.returncode}: {stderr.decode(errors='replace').strip()[:200]}")
+
+
+def _mqtt_length(n):
+    """Longueur restante MQTT (entier à longueur variable)"""
+    encoded = bytearray()
+    while True:
+        byte, n = n % 128, n // 128
+        encoded.append(byte | (0x80 if n else 0))
+        if not n:
+            return bytes(encoded)
+
+
+def _mqtt_string(value):
+    data = value.encode('utf-8')
+    return len(data).to_bytes(2, 'big') + data
+
+
+class BrokerSink(AlertSink):
+    """Publication sur un broker local de type MQTT (3.1.1, QoS 0, sans dépendance)"""
+
+    async def send(self, alert):
+        reader, writer = await asyncio.open_connection(self.settings.get('host', '127.0.0.1'),
+                                                       self.settings.get('port', 1883))
+        try:
+            client_id = self.settings.get('client_id', 'speech-to-text')
+            flags = 0x02  # Session propre
+            payload = _mqtt_string(client_id)
+            if self.settings.get('username'):
+                flags |= 0xC0  # Identifiant et mot de passe présents
+                payload += _mqtt_string(self.settings['username']) + _mqtt_string(self.settings.get('password', ''))
+            variable = _mqtt_string('MQTT') + bytes([4, flags]) + (60).to_bytes(2, 'big')
+            writer.write(b'\x10' + _mqtt_length(len(variable) + len(payload)) + variable + payload)
+            await writer.drain()
+
+            connack = await reader.readexactly(4)
+            if connack[0] != 0x20 or connack[3] != 0:
+                raise RuntimeError(f"connexion refusée par le broker (code {connack[3]})")
+
+            topic = _mqtt_string(self.settings.get('topic', 'grand-mere/alertes'))
+            message = json.dumps(alert, ensure_ascii=False).encode('utf-8')
+            writer.write(b'\x30' + _mqtt_length(len(topic) + len(message)) + topic + message)
+            writer.write(b'\xe0\x00')  # DISCONNECT
+            await writer.drain()
+        finally:
+            writer.close()
+
+
+SINK_TYPES = {
+    'webhook': WebhookSink,
+    'smtp': SmtpSink,
+    'command': CommandSink,
+    'broker': BrokerSink
+}
+
+
+# --- Répartiteur ---
+
+class AlertDispatcher:
+    """Envoi des alertes hors du thread de reconnaissance, avec nouvelles tentatives"""
+
+    def __init__(self, alert_config=None):
+        self.config = dict(DEFAULT_ALERT_CONFIG)
+        self.config.update(alert_config or {})
+        self.outbox_path = self.config['outbox_path']
+
+        self.sinks = {}
+        for index, settings in enumerate(self.config['sinks']):
+            sink_class = SINK_TYPES.get(settings.get('type'))
+            if sink_class is None:
+                print(f"⚠️  Type de destination d'alerte inconnu: {settings.get('type')}")
+                continue
+            name = settings.get('name', f"{settings['type']}-{index}")
+            sink = sink_class(name, settings)
+            if sink.settings['enabled']:
+                self.sinks[name] = sink
+
+        self._loop = None
+        self._thread = None
+        self._ready = threading.Event()
+        self._tasks = set()
+        self._last_sent = {}  # (destination, clé de l'alerte) -> time.monotonic()
+
+        self.submitted = 0
+        self.below_severity = 0
+        self._outbox_ready = False  # Fichier créé au démarrage seulement (alertes activées)
+
+    @contextmanager
+    def _connect(self):
+        """Connexion à la boîte d'envoi (une par appel, écritures rares)"""
+        conn = sqlite3.connect(self.outbox_path, timeout=5)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+            conn.commit()
+        finally:
+            conn.close()
+
+    def _ensure_outbox(self):
+        """Créer la boîte d'envoi au premier démarrage (jamais si les alertes sont désactivées)"""
+        if self._outbox_ready:
+            return
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS deliveries (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    sink TEXT NOT NULL,
+                    alert TEXT NOT NULL,
+                    status TEXT NOT NULL DEFAULT 'pending',
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    next_attempt REAL NOT NULL,
+                    created REAL NOT NULL,
+                    last_error TEXT
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_deliveries_status ON deliveries(status)")
+        self._outbox_ready = True
+
+    # --- Cycle de vie ---
+
+    def start(self):
+        """Démarrer la boucle asyncio et reprendre les envois en attente"""
+        if self._thread and self._thread.is_alive():
+            return
+        if not self.config['enabled']:
+            print("ℹ️  Alertes désactivées")
+            return
+        if not self.sinks:
+            print("ℹ️  Aucune destination d'alerte configurée")
+            return
+        self._ensure_outbox()
+        self._ready.clear()
+        self._thread = threading.Thread(target=self._run_loop, name='alert-dispatcher', daemon=True)
+        self._thread.start()
+        self._ready.wait(timeout=5)
+
+    def stop(self):
+        """Arrêter la boucle (les envois non aboutis restent dans la boîte d'envoi)"""
+        loop = self._loop
+        if loop is not None and loop.is_running():
+            loop.call_soon_threadsafe(self._cancel_tasks)
+
+    def _cancel_tasks(self):
+        for task in list(self._tasks):
+            task.cancel()
+        self._loop.stop()
+
+    def _run_loop(self):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        self._loop.call_soon(self._resume_outbox)
+        self._loop.call_soon(self._ready.set)
+        try:
+            self._loop.run_forever()
+            # Laisser les envois annulés se terminer proprement
+            self._loop.run_until_complete(asyncio.gather(*self._tasks, return_exceptions=True))
+        finally:
+            self._loop.close()
+            self._loop = None
+
+    def _resume_outbox(self):
+        """Relancer les envois interrompus par un arrêt (ou une coupure de courant)"""
+        cutoff = time.time() - self.config['keep_sent_days'] * 86400
+        with self._connect() as conn:
+            conn.execute("DELETE FROM deliveries WHERE status != 'pending' AND created < ?", (cutoff,))
+            rows = conn.execute("SELECT * FROM deliveries WHERE status = 'pending'").fetchall()
+
+        resumed = 0
+        for row in rows:
+            sink = self.sinks.get(row['sink'])
+            if sink is None:
+                continue  # Destination retirée de la configuration
+            self._spawn(row['id'], sink, json.loads(row['alert']), row['attempts'], row['next_attempt'])
+            resumed += 1
+        if resumed:
+            print(f"📤 {resumed} alerte(s) en attente reprise(s)")
+
+    # --- Soumission (n'importe quel thread) ---
+
+    def submit(self, alert):
+        """Confier une alerte au répartiteur (ne bloque jamais l'appelant)"""
+        loop = self._loop
+        if loop is None or not loop.is_running():
+            return False
+
+        severity = alert.get('severity') or 'high'
+        if SEVERITY_LEVELS.get(severity, 0) < SEVERITY_LEVELS.get(self.config['min_severity'], 0):
+            self.below_severity += 1
+            return False
+
+        alert = {
+            'keywords': list(alert.get('keywords') or alert.get('emergency_words') or []),
+            'severity': severity,
+            'source': alert.get('source', 'final'),
+            'text': alert.get('text', ''),
+            'transcription_id': alert.get('id'),
+            'time': time.time()
+        }
+        self.submitted += 1
+        loop.call_soon_threadsafe(self._accept, alert)
+        return True
+
+    # --- Boucle asyncio ---
+
+    def _accept(self, alert):
+        """Enregistrer l'alerte dans la boîte d'envoi puis lancer un envoi par destination"""
+        key = ','.join(sorted(alert['keywords']))
+        now = time.monotonic()
+        targets = []
+        for name, sink in self.sinks.items():
+            last = self._last_sent.get((name, key))
+            if last is not None and now - last < sink.settings['dedup_seconds']:
+                sink.deduplicated += 1
+                continue
+            self._last_sent[(name, key)] = now
+            targets.append(sink)
+        if not targets:
+            return
+
+        payload = json.dumps(alert, ensure_ascii=False)
+        with self._connect() as conn:
+            ids = [conn.execute(
+                "INSERT INTO deliveries (sink, alert, next_attempt, created) VALUES (?, ?, ?, ?)",
+                (sink.name, payload, alert['time'], alert['time'])
+            ).lastrowid for sink in targets]
+
+        for delivery_id, sink in zip(ids, targets):
+            self._spawn(delivery_id, sink, alert, 0, alert['time'])
+
+    def _spawn(self, delivery_id, sink, alert, attempts, next_attempt):
+        task = self._loop.create_task(self._deliver(delivery_id, sink, alert, attempts, next_attempt))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _deliver(self, delivery_id, sink, alert, attempts, next_attempt):
+        """Tentatives successives avec attente exponentielle"""
+        settings = sink.settings
+        while True:
+            delay = next_attempt - time.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+            attempts += 1
+            try:
+                await asyncio.wait_for(sink.send(alert), timeout=settings['timeout'])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                error = str(e) or type(e).__name__
+                sink.last_error = error
+                if attempts >= settings['max_attempts']:
+                    sink.failed += 1
+                    self._update(delivery_id, 'failed', attempts, next_attempt, error)
+                    print(f"❌ Alerte non envoyée ({sink.name}) après {attempts} tentatives: {error}")
+                    return
+                sink.retries += 1
+                backoff = min(settings['backoff_base'] * 2 ** (attempts - 1), settings['backoff_max'])
+                next_attempt = time.time() + backoff
+                self._update(delivery_id, 'pending', attempts, next_attempt, error)
+                print(f"⚠️  Alerte ({sink.name}) en échec: {error} - nouvel essai dans {backoff:.1f}s")
+                continue
+
+            sink.sent += 1
+            self._update(delivery_id, 'sent', attempts, next_attempt, None)
+            print(f"📣 Alerte envoyée ({sink.name})")
+            return
+
+    def _update(self, delivery_id, status, attempts, next_attempt, error):
+        with self._connect() as conn:
+            conn.execute("""
+                UPDATE deliveries SET status = ?, attempts = ?, next_attempt = ?, last_error = ?
+                WHERE id = ?
+            """, (status, attempts, next_attempt, error, delivery_id))
+
+    def get_status(self):
+        """État du répartiteur et de chaque destination"""
+        counts = {}
+        if self._outbox_ready or os.path.exists(self.outbox_path):
+            with self._connect() as conn:
+                exists = conn.execute(
+                    "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'deliveries'"
+                ).fetchone()
+                if exists:
+                    counts = dict(conn.execute(
+                        "SELECT status, COUNT(*) FROM deliveries GROUP BY status"
+                    ).fetchall())
+        return {
+            'enabled': self.config['enabled'],
+            'running': bool(self._thread and self._thread.is_alive()),
+            'submitted': self.submitted,
+            'below_severity': self.below_severity,
+            'in_flight': len(self._tasks),
+            'outbox': {
+                'pending': counts.get('pending', 0),
+                'sent': counts.get('sent', 0),
+                'failed': counts.get('failed', 0)
+            },
+            'sinks': {
+                name: {
+                    'type': sink.settings.get('type'),
+                    'sent': sink.sent,
+                    'failed': sink.failed,
+                    'retries': sink.retries,
+                    'deduplicated': sink.deduplicated,
+                    'last_error': sink.last_error
+                } for name, sink in self.sinks.items()
+            }
+        }
+
+
+# Instance globale
+_alert_dispatcher_instance = None
+
+
+def get_alert_dispatcher(alert_config=None):
+    """Obtenir l'instance du répartiteur d'alertes"""
+    global _alert_dispatcher_instance
+    if _alert_dispatcher_instance is None:
+        _alert_dispatcher_instance = AlertDispatcher(alert_config or load_alert_config())
+    return _alert_dispatcher_instance
+
+
+# --- Serveurs de substitution (test local, sans réseau) ---
+
+async def _stand_in_http(received, fail_first):
+    """Webhook de substitution (répond 503 aux fail_first premières requêtes)"""
+    async def handle(reader, writer):
+        headers = await reader.readuntil(b'\r\n\r\n')
+        length = 0
+        for line in headers.decode().split('\r\n'):
+            if line.lower().startswith('content-length:'):
+                length = int(line.split(':', 1)[1])
+        body = await reader.readexactly(length)
+        if fail_first[0] > 0:
+            fail_first[0] -= 1
+            writer.write(b'HTTP/1.1 503 Service Unavailable\r\nContent-Length: 0\r\nConnection: close\r\n\r\n')
+        else:
+            received.append(('webhook', json.loads(body)))
+            writer.write(b'HTTP/1.1 204 No Content\r\nConnection: close\r\n\r\n')
+        await writer.drain()
+        writer.close()
+    return await asyncio.start_server(handle, '127.0.0.1', 0)
+
+
+async def _stand_in_smtp(received):
+    """Relais SMTP de substitution (accepte tout, garde le message)"""
+    async def handle(reader, writer):
+        writer.write(b'220 stand-in ESMTP\r\n')
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            command = line.decode(errors='replace').strip().upper()
+            if command.startswith('DATA'):
+                writer.write(b'354 End data with <CR><LF>.<CR><LF>\r\n')
+                await writer.drain()
+                data = await reader.readuntil(b'\r\n.\r\n')
+                received.append(('smtp', data.decode(errors='replace')))
+                writer.write(b'250 OK\r\n')
+            elif command.startswith('QUIT'):
+                writer.write(b'221 Bye\r\n')
+                await writer.drain()
+                break
+            else:
+                writer.write(b'250 OK\r\n')
+            await writer.drain()
+        writer.close()
+    return await asyncio.start_server(handle, '127.0.0.1', 0)
+
+
+async def _stand_in_broker(received):
+    """Broker de substitution (CONNECT -> CONNACK, garde les PUBLISH)"""
+    async def read_packet(reader):
+        header = (await reader.readexactly(1))[0]
+        length, shift = 0, 0
+        while True:
+            byte = (await reader.readexactly(1))[0]
+            length += (byte & 0x7F) << shift
+            shift += 7
+            if not byte & 0x80:
+                break
+        return header, await reader.readexactly(length)
+
+    async def handle(reader, writer):
+        try:
+            while True:
+                header, body = await read_packet(reader)
+                if header >> 4 == 1:
+                    writer.write(b'\x20\x02\x00\x00')
+                    await writer.drain()
+                elif header >> 4 == 3:
+                    topic_length = int.from_bytes(body[:2], 'big')
+                    topic = body[2:2 + topic_length].decode()
+                    received.append(('broker', topic, json.loads(body[2 + topic_length:])))
+                elif header >> 4 == 14:
+                    break
+        except asyncio.IncompleteReadError:
+            pass
+        writer.close()
+    return await asyncio.start_server(handle, '127.0.0.1', 0)
+
+
+def _self_test():
+    """Envoyer une alerte vers des serveurs de substitution locaux et vérifier la réception"""
+    import tempfile
+
+    received = []
+    loop = asyncio.new_event_loop()
+
+    async def start_servers():
+        return await asyncio.gather(
+            _stand_in_http(received, [1]), _stand_in_smtp(received), _stand_in_broker(received)
+        )
+    servers = loop.run_until_complete(start_servers())
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+    http_port, smtp_port, broker_port = (s.sockets[0].getsockname()[1] for s in servers)
+
+    workdir = tempfile.mkdtemp(prefix='alert-test-')
+    marker = os.path.join(workdir, 'command.json')
+    fast = {'timeout': 2.0, 'backoff_base': 0.2, 'max_attempts': 3}
+    dispatcher = AlertDispatcher({
+        'enabled': True,
+        'outbox_path': os.path.join(workdir, 'outbox.db'),
+        'sinks': [
+            dict(fast, type='webhook', name='webhook', url=f'http://127.0.0.1:{http_port}/alert'),
+            dict(fast, type='smtp', name='smtp', port=smtp_port, sender='stt@localhost',
+                 recipients=['aidant@localhost']),
+            dict(fast, type='command', name='command',
+                 command=[sys.executable, '-c', f'import shutil,sys; shutil.copyfileobj(sys.stdin, open({marker!r}, "w"))']),
+            dict(fast, type='broker', name='broker', port=broker_port)
+        ]
+    })
+    dispatcher.start()
+
+    alert = {'keywords': ['au secours'], 'severity': 'critical', 'source': 'self-test',
+             'text': 'Au secours, je suis tombée !'}
+    dispatcher.submit(alert)
+    dispatcher.submit(alert)  # Doublon: doit être ignoré
+
+    deadline = time.monotonic() + 10
+    time.sleep(0.2)
+    while time.monotonic() < deadline and dispatcher.get_status()['in_flight']:
+        time.sleep(0.1)
+    status = dispatcher.get_status()
+    dispatcher.stop()
+
+    checks = {
+        'webhook (après un 503)': any(r[0] == 'webhook' for r in received),
+        'smtp': any(r[0] == 'smtp' for r in received),
+        'broker': any(r[0] == 'broker' for r in received),
+        'commande': os.path.exists(marker),
+        'doublon ignoré': all(s['deduplicated'] == 1 for s in status['sinks'].values()),
+        'boîte d\'envoi vide': status['outbox']['pending'] == 0
+    }
+    for name, ok in checks.items():
+        print(f"  {'✅' if ok else '❌'} {name}")
+    return all(checks.values())
+
+
+if __name__ == '__main__':
+    if '--self-test' in sys.argv:
+        sys.exit(0 if _self_test() else 1)
+    print(json.dumps(get_alert_dispatcher().get_status(), indent=2, ensure_ascii=False))
@@ -1,175 +1,164 @@
 #!/usr/bin/env python3
-import json
+# Suivi du démarrage en premier: origine des temps et profil des imports
+from startup_monitor import get_startup_monitor, AUDIO_DEVICE_TIMEOUT
+startup = get_startup_monitor()
+startup.start_import_profile()
+
+# Plafonner les pools de threads BLAS avant l'import de numpy (via vosk, audio_utils...)
+from resource_manager import apply_thread_limits
+resources = apply_thread_limits()
+
+# Lecture séquentielle du modèle (cache de pages) pendant les imports et le démarrage
+from model_warmup import start_model_warmup
+warmer = start_model_warmup()
+
 import os
-import queue
-import sounddevice as sd
-import vosk
-from flask import Flask, render_template, jsonify, request
+import time
+from flask import Flask, render_template, jsonify, request, Response
 from flask_socketio import SocketIO, emit
 import threading
-import numpy as np
-
-from audio_utils import (
-    VoiceActivityDetector,
-    NoiseReducer,
-    AudioLevelMeter,
-    SmartPunctuator,
-    EmergencyDetector
-)
+
 from database import get_database
 from stats_manager import get_stats_manager
+from retention_manager import get_retention_manager
+from recognition_engine import RecognitionEngine
+from engine_process import EngineProcess
+from split_pipeline import SplitEngineProcess
+from redecoder import get_redecode_worker
+from alert_dispatcher import get_alert_dispatcher
+from quality_governor import get_quality_governor
+from audio_archive import get_audio_archiver
+from model_manager import get_model_manager
+from memory_monitor import get_memory_monitor
+from metrics_store import get_metrics_recorder, METRICS
+from app_config import get_config_store, ConfigError, PROFILES
+from cluster import get_cluster_node, ClusterEngine
+
+startup.stop_import_profile()
+startup.mark('imports')
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'votre_cle_secrete_changez_moi'
-socketio = SocketIO(app, cors_allowed_origins="*")
 
-SAMPLE_RATE = 16000
-BLOCK_SIZE = 960  # 60ms - Compatible avec VAD (multiple de 480)
-MODEL_PATH = "models/vosk-model-small-fr-0.22"
-MAX_QUEUE_SIZE = 10
+# Mode multi-processus (python cluster.py): clients partagés avec les autres processus web
+cluster = get_cluster_node()
+socketio = SocketIO(app, cors_allowed_origins="*", **({'client_manager': cluster.manager} if cluster else {}))
+
+# Modèle Vosk chargé en arrière-plan (remplaçable à chaud via /models/swap)
+models = get_model_manager()
+MODEL_PATH = models.policy['model_path']
 
 # Variables globales
-model = None
-audio_queue = queue.Queue()
-is_recording = False
-
-# Instances des utilitaires
-vad = VoiceActivityDetector(sample_rate=SAMPLE_RATE, aggressiveness=1)  # 1 = peu agressif, meilleure détection
-noise_reducer = NoiseReducer(sample_rate=SAMPLE_RATE)
-audio_meter = AudioLevelMeter()
-punctuator = SmartPunctuator()
-emergency_detector = EmergencyDetector()
+model = None  # Chemin du modèle demandé au démarrage (None si absent)
+
 db = get_database()
 stats = get_stats_manager()
+retention = get_retention_manager(db)
+
+# Configuration validée de config.json (instantanés immuables, rechargée si le fichier change)
+settings = get_config_store()
+config = settings.snapshot
 
-# Configuration équilibrée (peut être modifié par l'utilisateur)
-config = {
-    'enable_vad': True,                      # ✅ VAD activé
-    'enable_noise_reduction': True,          # ✅ Actif pour meilleure qualité
-    'enable_punctuation': True,              # ✅ Actif pour lisibilité
-    'enable_emergency_detection': True       # ✅ Actif pour sécurité
-}
+# Moteur de reconnaissance (capture + Vosk dans un thread dédié, un processus séparé ou le cluster)
+if cluster:
+    engine = ClusterEngine(cluster, stats)
+elif config['engine_mode'] in ('process', 'split'):
+    engine_class = SplitEngineProcess if config['engine_mode'] == 'split' else EngineProcess
+    engine = engine_class(config, MODEL_PATH, start_method=models.process_start_method(), model_manager=models)
+else:
+    engine = RecognitionEngine(config, model_manager=models)
+settings.subscribe(engine.update_config)  # Appliquée par le moteur entre deux blocs
 
 
 def load_model():
     """Charge le modèle Vosk"""
     global model
+    if cluster:
+        model = MODEL_PATH  # Chargé par les processus moteur
+        return True
     if not os.path.exists(MODEL_PATH):
         print(f"ERREUR: Le modèle n'existe pas à {MODEL_PATH}")
         print("Téléchargez-le depuis https://alphacephei.com/vosk/models")
         print("Utilisez le modèle 'vosk-model-small-fr-0.22' pour le français")
         return False
 
-    print(f"Chargement du modèle depuis {MODEL_PATH}...")
-    model = vosk.Model(MODEL_PATH)
-    print("✅ Modèle chargé avec succès!")
+    model = MODEL_PATH
+    if isinstance(engine, EngineProcess):
+        if engine.start_method == 'fork':
+            # Préchargé ici: les processus moteur créés par fork partagent ses pages
+            models.load_async(MODEL_PATH)
+        engine.launch()
+        return True
+
+    # En arrière-plan: le serveur démarre pendant le chargement, la reconnaissance l'attend
+    print(f"Chargement du modèle depuis {MODEL_PATH} (en arrière-plan)...")
+    models.load_async(MODEL_PATH)
     return True
 
 
-def audio_callback(indata, frames, time, status):
-    """Callback pour capturer l'audio"""
-    if status:
-        print(f"Statut audio: {status}")
+def emit_audio_level(level):
+    """Émettre le niveau audio au client"""
+    socketio.emit('audio_level', {'level': level})
 
-    # Gestion intelligente de la queue (limite la taille)
-    if audio_queue.qsize() > MAX_QUEUE_SIZE:
-        try:
-            audio_queue.get_nowait()  # Supprimer le plus ancien
-        except queue.Empty:
-            pass
-
-    audio_queue.put(bytes(indata))
-
-
-def recognition_thread():
-    """Thread pour la reconnaissance vocale continue AMÉLIORÉE"""
-    global is_recording, model
-
-    rec = vosk.KaldiRecognizer(model, SAMPLE_RATE)
-    rec.SetWords(True)
-
-    with sd.RawInputStream(
-        samplerate=SAMPLE_RATE,
-        blocksize=BLOCK_SIZE,
-        dtype='int16',
-        channels=1,
-        callback=audio_callback
-    ):
-        print("🎤 Reconnaissance vocale démarrée avec améliorations...")
-        print(f"  VAD: {config['enable_vad']}")
-        print(f"  Réduction bruit: {config['enable_noise_reduction']}")
-        print(f"  Ponctuation: {config['enable_punctuation']}")
-        print(f"  Détection urgence: {config['enable_emergency_detection']}")
-
-        while is_recording:
-            try:
-                data = audio_queue.get(timeout=1)
-            except queue.Empty:
-                continue
-
-            # Mesurer le niveau audio
-            audio_level = audio_meter.get_level(data)
-
-            # Émettre le niveau audio au client
-            socketio.emit('audio_level', {'level': audio_level})
-
-            # VAD: Ne traiter que si c'est de la parole
-            if config['enable_vad']:
-                if not vad.is_speech(data):
-                    continue  # Ignorer le silence
-
-            # Réduction de bruit
-            if config['enable_noise_reduction']:
-                data = noise_reducer.reduce_noise(data)
-
-            # Reconnaissance Vosk
-            if rec.AcceptWaveform(data):
-                result = json.loads(rec.Result())
-                if result.get('text'):
-                    text = result['text']
-
-                    # Ponctuation automatique
-                    if config['enable_punctuation']:
-                        # Ponctuation ML (avancée mais gourmande)
-                        text = punctuator.add_punctuation(text)
-                    else:
-                        # Ponctuation basique (légère)
-                        text = punctuator._basic_punctuation(text)
-
-                    # Détection d'urgence
-                    is_emergency = False
-                    emergency_words = []
-                    if config['enable_emergency_detection']:
-                        is_emergency = emergency_detector.check_emergency(text)
-                        if is_emergency:
-                            emergency_words = emergency_detector.get_emergency_words(text)
-                            print(f"⚠️ URGENCE DÉTECTÉE: {emergency_words}")
-
-                    # Sauvegarder dans la base de données
-                    db.add_transcription(
-                        text,
-                        has_emergency=is_emergency,
-                        emergency_words=emergency_words,
-                        audio_level=audio_level
-                    )
-
-                    # Mettre à jour les statistiques
-                    stats.increment_transcription(text, audio_level)
-
-                    # Émettre au client
-                    socketio.emit('transcription', {
-                        'text': text,
-                        'final': True,
-                        'is_emergency': is_emergency,
-                        'emergency_words': emergency_words
-                    })
-            else:
-                partial = json.loads(rec.PartialResult())
-                if partial.get('partial'):
-                    socketio.emit('transcription', {
-                        'text': partial['partial'],
-                        'final': False
-                    })
+
+def emit_partial(text):
+    """Émettre un résultat partiel au client"""
+    startup.mark('first_partial')
+    socketio.emit('transcription', {
+        'text': text,
+        'final': False
+    })
+
+
+def emit_final(result):
+    """Émettre un résultat final au client"""
+    startup.mark('first_final')
+    socketio.emit('transcription', result)
+
+
+def emit_quality_tier(event):
+    """Changement de palier du régulateur de qualité"""
+    socketio.emit('quality_tier', event)
+
+
+def emit_emergency(alert):
+    """Émettre une alerte d'urgence rapide (avant le résultat final)"""
+    socketio.emit('emergency_alert', alert)
+
+
+engine.on_level = emit_audio_level
+engine.on_partial = emit_partial
+engine.on_final = emit_final
+engine.on_emergency = emit_emergency
+models.on_swap = lambda event: socketio.emit('model_swapped', event)
+
+
+def model_memory():
+    """Mémoire du modèle Vosk (mesurée au chargement, héritée par fork ou chargée par le processus moteur)"""
+    if isinstance(engine, (EngineProcess, ClusterEngine)):
+        return engine.remote_model
+    status = models.get_status()
+    return {key: status[key] for key in ('active_path', 'rss_delta_mb', 'load_seconds')}
+
+
+def cache_memory():
+    """Tailles des caches et historiques du processus principal"""
+    return {
+        'latency_samples': sum(len(values) for values in stats.latency_history.values()),
+        'statement_cache_size': db.statement_cache_size,
+        'rings': engine.get_status()['rings'] if isinstance(engine, EngineProcess) else []
+    }
+
+
+# Surveillance mémoire: tendance de la RSS et estimations par composant (/debug/memory)
+memory = get_memory_monitor()
+memory.register_component('model', model_memory)
+memory.register_component('engine', engine.memory_estimates)
+memory.register_component('recognizer', engine.get_recognizer_status)
+memory.register_component('caches', cache_memory)
+
+# Séries temporelles des mesures (1 s / 1 min / 1 h), graphiques de /metrics
+metrics = get_metrics_recorder(engine, stats=engine.stats if cluster else None)
 
 
 @app.route('/')
@@ -181,92 +170,224 @@ def index():
 @app.route('/status')
 def status():
     """Vérifier le statut de l'application"""
+    if isinstance(engine, (EngineProcess, ClusterEngine)):
+        model_loaded = bool(engine.remote_model.get('active_path'))
+    else:
+        model_loaded = models.model is not None
     return jsonify({
-        'model_loaded': model is not None,
-        'is_recording': is_recording,
-        'config': config
+        'model_loaded': model_loaded,
+        'is_recording': engine.is_running,
+        'config': settings.snapshot.to_dict(),
+        'startup': startup.get_report()
     })
 
 
 @app.route('/stats')
 def get_stats():
     """Obtenir les statistiques"""
-    return jsonify(stats.get_all_stats())
+    all_stats = stats.get_all_stats()
+    all_stats['database'] = db.get_pool_stats()
+    all_stats['retention'] = retention.get_status()
+    if cluster:
+        all_stats['cluster'] = cluster.get_status()  # Alertes et flux par processus moteur
+    else:
+        all_stats['alerts'] = engine.alert_dispatcher.get_status()
+        all_stats['quality'] = get_quality_governor(engine).get_status()
+    all_stats['resources'] = resources.get_layout()
+    all_stats['model'] = models.get_status()
+    all_stats['warmup'] = warmer.get_status()
+    all_stats['config'] = settings.get_status()
+    all_stats['memory'] = memory.get_status()
+    all_stats['metrics'] = metrics.get_status()
+    if isinstance(engine, EngineProcess):
+        all_stats['engine'] = engine.get_status()
+    config = settings.snapshot
+    if config.get('enable_audio_archive', False):
+        all_stats['audio_archive'] = get_audio_archiver().get_status()
+        if config.get('enable_redecoding', False) and not cluster:
+            all_stats['redecode'] = get_redecode_worker(engine).get_status()
+    return jsonify(all_stats)
+
+
+@app.route('/models')
+def get_models():
+    """Modèle actif (temps de chargement, mémoire résidente) et modèles disponibles"""
+    models_dir = os.path.dirname(MODEL_PATH) or '.'
+    available = sorted(
+        os.path.join(models_dir, name) for name in os.listdir(models_dir)
+        if os.path.isdir(os.path.join(models_dir, name))
+    ) if os.path.isdir(models_dir) else []
+    status_data = {'manager': models.get_status(), 'available': available}
+    if isinstance(engine, (EngineProcess, ClusterEngine)):
+        status_data['engine'] = engine.remote_model
+    return jsonify(status_data)
+
+
+@app.route('/models/swap', methods=['POST'])
+def swap_model():
+    """Remplacer le modèle à chaud (bascule à la fin de l'énoncé en cours)"""
+    data = request.get_json() or {}
+    path = data.get('path')
+    if not path or not os.path.isdir(path):
+        return jsonify({'status': 'error', 'message': 'Dossier de modèle introuvable'}), 400
+    if not engine.swap_model(path):
+        return jsonify({'status': 'error', 'message': 'Remplacement impossible (chargement en cours?)'}), 409
+    return jsonify({'status': 'loading', 'path': path}), 202
 
 
 @app.route('/config', methods=['GET', 'POST'])
 def handle_config():
-    """Gérer la configuration"""
-    global config
+    """Gérer la configuration (validée, appliquée par le moteur entre deux blocs)"""
     if request.method == 'POST':
-        data = request.get_json()
-        config.update(data)
-        return jsonify({'status': 'ok', 'config': config})
-    return jsonify(config)
+        try:
+            snapshot = settings.update(request.get_json(silent=True), source='web')
+        except ConfigError as e:
+            return jsonify({'status': 'error', 'errors': e.errors}), 400
+        return jsonify({'status': 'ok', 'config': snapshot.to_dict()})
+    return jsonify(settings.snapshot.to_dict())
+
+
+@app.route('/config/profiles', methods=['GET', 'POST'])
+def handle_profiles():
+    """Profils nommés (GET) ou application d'un profil (POST {"name": ...})"""
+    if request.method == 'POST':
+        data = request.get_json(silent=True) or {}
+        try:
+            snapshot = settings.apply_profile(data.get('name'))
+        except ConfigError as e:
+            return jsonify({'status': 'error', 'errors': e.errors}), 400
+        return jsonify({'status': 'ok', 'profile': snapshot['profile']})
+    return jsonify({'active': settings.snapshot['profile'], 'profiles': PROFILES})
+
+
+@app.route('/metrics')
+def get_metrics():
+    """Séries temporelles (?metrics=cpu_percent,rtf&range=secondes ou start/end Unix, &points=N)"""
+    names = [name for name in request.args.get('metrics', '').split(',') if name]
+    unknown = [name for name in names if name not in METRICS]
+    if unknown:
+        return jsonify({'status': 'error', 'message': f"Mesures inconnues: {', '.join(unknown)}",
+                        'metrics': METRICS}), 400
+    end = request.args.get('end', type=float)
+    start = request.args.get('start', type=float)
+    seconds = request.args.get('range', type=float)
+    if start is None and seconds is not None:
+        start = (end or time.time()) - seconds
+    result = metrics.store.query(names or None, start=start, end=end,
+                                 resolution=request.args.get('resolution', type=int),
+                                 max_points=request.args.get('points', 300, type=int))
+    result['labels'] = {name: METRICS[name] for name in result['series']}
+    return jsonify(result)
+
+
+@app.route('/debug/memory', methods=['GET', 'POST'])
+def debug_memory():
+    """Rapport mémoire (?top=N&group=lineno|filename|traceback) ou pilotage de tracemalloc (POST)"""
+    if request.method == 'POST':
+        data = request.get_json(silent=True) or {}
+        action = data.get('tracemalloc')
+        if action == 'start':
+            memory.start_tracing(data.get('frames'))
+        elif action == 'stop':
+            memory.stop_tracing()
+        elif action == 'baseline':
+            memory.take_baseline()
+        else:
+            return jsonify({'status': 'error', 'message': "tracemalloc: 'start', 'stop' ou 'baseline'"}), 400
+        return jsonify({'status': 'ok', 'tracemalloc': memory.tracing_status()})
+
+    top = request.args.get('top', 0, type=int)
+    group_by = request.args.get('group', 'lineno')
+    if group_by not in ('lineno', 'filename', 'traceback'):
+        return jsonify({'status': 'error', 'message': 'group: lineno, filename ou traceback'}), 400
+    return jsonify(memory.get_report(top=top, group_by=group_by))
 
 
 @app.route('/history')
 def get_history():
     """Récupérer l'historique des transcriptions"""
     limit = request.args.get('limit', 50, type=int)
-    transcriptions = db.get_recent_transcriptions(limit)
+    before_id = request.args.get('before_id', type=int)  # Chargement des entrées plus anciennes
+    transcriptions = db.get_recent_transcriptions(limit, before_id=before_id)
     return jsonify(transcriptions)
 
 
+@app.route('/transcriptions/<int:transcription_id>/words')
+def get_word_timings(transcription_id):
+    """Horodatage des mots d'une transcription"""
+    timings = db.get_word_timings(transcription_id)
+    if timings is None:
+        return jsonify({'status': 'error', 'message': 'Horodatage indisponible'}), 404
+    return jsonify(timings)
+
+
+@app.route('/transcriptions/<int:transcription_id>/audio')
+def get_transcription_audio(transcription_id):
+    """Réécouter l'audio archivé d'une transcription (WAV)"""
+    if not settings.snapshot.get('enable_audio_archive', False):
+        return jsonify({'status': 'error', 'message': 'Archive audio désactivée'}), 404
+    wav = get_audio_archiver().get_wav(transcription_id)
+    if wav is None:
+        return jsonify({'status': 'error', 'message': 'Audio indisponible'}), 404
+    return Response(wav, mimetype='audio/wav')
+
+
 @app.route('/export')
 def export_history():
-    """Exporter l'historique"""
+    """Exporter l'historique (texte, ou sous-titres avec ?format=srt|vtt)"""
     from datetime import datetime
-    filename = f"export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt"
-    count = db.export_to_text(filename)
+    fmt = request.args.get('format', 'txt')
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+
+    if fmt in ('srt', 'vtt'):
+        filename = f"export_{timestamp}.{fmt}"
+        session_id = request.args.get('session', type=int)
+        count = resources.run_background(db.export_subtitles, filename, session_id=session_id, fmt=fmt)
+        return jsonify({'status': 'ok', 'filename': filename, 'count': count})
+
+    filename = f"export_{timestamp}.txt"
+    count = resources.run_background(db.export_to_text, filename)
     return jsonify({'status': 'ok', 'filename': filename, 'count': count})
 
 
 @socketio.on('start_recording')
 def handle_start_recording():
     """Démarre l'enregistrement"""
-    global is_recording
-
     if model is None:
         emit('error', {'message': 'Modèle non chargé'})
         return
 
-    if not is_recording:
-        is_recording = True
-        thread = threading.Thread(target=recognition_thread)
-        thread.daemon = True
-        thread.start()
+    if engine.start():
         emit('recording_started', {'status': 'ok'})
 
 
 @socketio.on('stop_recording')
 def handle_stop_recording():
     """Arrête l'enregistrement"""
-    global is_recording
-    is_recording = False
+    engine.stop()
     emit('recording_stopped', {'status': 'ok'})
 
 
 @socketio.on('update_config')
 def handle_update_config(data):
     """Mettre à jour la configuration"""
-    global config
-    config.update(data)
-    emit('config_updated', {'status': 'ok', 'config': config})
+    try:
+        snapshot = settings.update(data, source='web')
+    except ConfigError as e:
+        emit('config_updated', {'status': 'error', 'errors': e.errors})
+        return
+    emit('config_updated', {'status': 'ok', 'config': snapshot.to_dict()})
 
 
 def auto_start_recording():
-    """Démarre automatiquement la reconnaissance au lancement"""
-    global is_recording
-    import time
-    time.sleep(2)  # Attendre que le serveur soit prêt
-
-    if model is not None and not is_recording:
-        is_recording = True
-        thread = threading.Thread(target=recognition_thread)
-        thread.daemon = True
-        thread.start()
+    """Démarre la reconnaissance dès que le micro répond (le moteur attend lui-même le modèle)"""
+    if not startup.wait_for('audio_device', timeout=AUDIO_DEVICE_TIMEOUT):
+        print("⚠️  Micro toujours absent, tentative de démarrage quand même")
+
+    if engine.start():
         print("✅ Reconnaissance vocale démarrée automatiquement")
+        if startup.wait_for('audio_stream', timeout=300):
+            startup.report()
 
 
 if __name__ == '__main__':
@@ -282,17 +403,58 @@ if __name__ == '__main__':
     print("  ✅ Statistiques en temps réel")
     print("  ✅ Optimisations performances\n")
 
+    # Décodeur sur son coeur, le reste du processus sur les autres
+    resources.apply_process_layout()
+    resources.report()
+
     if load_model():
-        # Démarrer automatiquement la reconnaissance (comme app_desktop.py)
-        auto_start_thread = threading.Thread(target=auto_start_recording)
-        auto_start_thread.daemon = True
-        auto_start_thread.start()
+        startup.probe_audio_device()
+
+        # Rechargement de config.json à chaud
+        settings.start_watching()
+
+        # Nettoyage de la base en arrière-plan
+        retention.start()
+
+        # Tendance de la mémoire (fuites repérées avant l'OOM killer)
+        memory.start()
 
-        print("\nDémarrage du serveur sur http://localhost:5001")
-        print("🎤 La reconnaissance démarre automatiquement")
+        # Mesures chaque seconde, conservées un an (résolution réduite avec l'âge)
+        metrics.start()
+
+        # Envoi des alertes d'urgence aux aidants
+        alerts = get_alert_dispatcher()
+        if alerts.config['enabled']:
+            alerts.start()
+
+        # Régulation automatique de la qualité selon la charge
+        governor = get_quality_governor(engine)
+        governor.on_tier_change = emit_quality_tier
+        if governor.policy['enabled']:
+            governor.start()
+
+        # Ré-décodage des segments archivés pendant les périodes calmes
+        if config['enable_audio_archive'] and config['enable_redecoding']:
+            get_redecode_worker(engine, mode=config['redecode_mode']).start()
+
+        # Démarrer automatiquement la reconnaissance (comme app_desktop.py)
+        server = config['app']
+        if server['auto_start']:
+            auto_start_thread = threading.Thread(target=auto_start_recording)
+            auto_start_thread.daemon = True
+            auto_start_thread.start()
+
+        print(f"\nDémarrage du serveur sur http://localhost:{server['port']}")
+        if server['auto_start']:
+            print("🎤 La reconnaissance démarre automatiquement")
+        print(f"⚙️  Profil: {config['profile'] or 'personnalisé'}")
         print("Appuyez sur Ctrl+C pour arrêter")
         print(f"💾 Base de données: {db.get_total_count()} transcriptions sauvegardées\n")
-        socketio.run(app, host='0.0.0.0', port=5001, debug=False, allow_unsafe_werkzeug=True)
+        try:
+            socketio.run(app, host=server['host'], port=server['port'], debug=server['debug'],
+                         allow_unsafe_werkzeug=True)
+        finally:
+            metrics.stop()  # Dernières cases des séries temporelles sur disque
     else:
         print("\n❌ Impossible de démarrer sans le modèle Vosk")
         print("Voir le README.md pour les instructions d'installation")
@@ -0,0 +1,593 @@
+#!/usr/bin/env python3
+"""
+Module de configuration partagé par app.py et app_desktop.py
+Valeurs typées et validées, instantanés immuables remplacés d'un bloc (jamais modifiés sur place),
+rechargement à chaud quand config.json change, profils nommés.
+
+Le moteur lit l'instantané courant et n'applique le suivant qu'entre deux blocs audio
+(entre deux énoncés si possible): une modification ne le surprend jamais au milieu d'un bloc.
+"""
+
+import copy
+import json
+import os
+import threading
+import time
+from collections import namedtuple
+from collections.abc import Mapping
+from types import MappingProxyType
+
+CONFIG_FILE = "config.json"
+WATCH_INTERVAL = 2.0     # Secondes entre deux vérifications de config.json
+VAD_FRAME_MS = 30        # Les blocs doivent contenir un nombre entier de trames du VAD
+MAX_BLOCK_SIZE = 4800    # Échantillons (300 ms à 16 kHz): taille des cases de l'anneau audio
+
+# kind: bool, int, float, str, tuple (liste de nombres de longueur `length`),
+# list (éléments de type `item`, bornés par minimum/maximum s'ils sont numériques) ou dict
+Setting = namedtuple('Setting', 'kind default minimum maximum choices optional length item',
+                     defaults=(None, None, None, False, None, None))
+
+# Réglages à la racine de config.json (lus par le moteur et les interfaces)
+SETTINGS = {
+    # Moteur
+    'profile': Setting(str, 'balanced', optional=True),  # None: réglages personnalisés
+    'engine_mode': Setting(str, 'thread', choices=('thread', 'process', 'split')),
+    'enable_vad': Setting(bool, True),
+    'vad_aggressiveness': Setting(int, 1, 0, 3),          # 1 = peu agressif, meilleure détection
+    'enable_noise_reduction': Setting(bool, True),
+    'enable_punctuation': Setting(bool, True),
+    'enable_emergency_detection': Setting(bool, True),
+    'enable_keyword_spotting': Setting(bool, True),      # Alerte d'urgence dès les résultats partiels
+    'min_word_confidence': Setting(float, 0.3, 0.0, 1.0),  # Mots moins fiables non horodatés
+    'enable_audio_archive': Setting(bool, False),        # Archive audio des segments de parole (opt-in)
+    'enable_redecoding': Setting(bool, False),           # Ré-décodage des segments archivés (modèle plus grand)
+    'redecode_mode': Setting(str, 'annotate', choices=('annotate', 'replace')),
+    'endpoint_silence_ms': Setting(int, 600, 90, 5000),   # Silence (VAD) avant de forcer le résultat final
+    'vad_hangover_ms': Setting(int, 240, 0, 2000),       # Silence encore transmis à Vosk après la parole
+    'vosk_endpointer_mode': Setting(str, None, choices=('default', 'short', 'long', 'very_long'),
+                                    optional=True),      # vosk récent
+    'vosk_endpointer_delays': Setting(tuple, None, 0.0, 120.0, optional=True,
+                                      length=3),         # [t_start_max, t_end, t_max] en secondes
+    'measure_endpoint_latency': Setting(bool, False),    # Mesurer fin de parole -> résultat final (/stats)
+    # Reconnaisseur recréé entre deux énoncés (0 = jamais): mémoire de Kaldi bornée sur des semaines
+    'recognizer_recycle_audio_seconds': Setting(int, 1800, 0, 86400),  # Audio décodé par le reconnaisseur
+    'recognizer_recycle_minutes': Setting(int, 240, 0, 10080),         # Âge du reconnaisseur
+    # Interface bureau
+    'font_size': Setting(int, 60, 10, 200),
+    'theme': Setting(str, 'light', choices=('light', 'dark')),
+    'auto_clear_delay': Setting(int, 30, 0, 3600),
+    'auto_scroll': Setting(bool, True),
+    'max_history_entries': Setting(int, 200, 10, 10000),  # Historique affiché (les plus anciens retirés)
+    'history_trim_batch': Setting(int, 50, 1, 1000),      # Entrées retirées d'un coup (rares suppressions)
+    'partial_frame_ms': Setting(int, 100, 0, 1000)        # Au plus un rafraîchissement du texte partiel par intervalle
+}
+
+# Sections validées ici: app et audio, puis les politiques des modules (DEFAULT_*_POLICY en dérivent);
+# les sections inconnues sont conservées telles quelles
+SECTIONS = {
+    'app': {
+        'name': Setting(str, 'Speech-to-Text pour Grand-Mère'),
+        'host': Setting(str, '0.0.0.0'),
+        'port': Setting(int, 5001, 1, 65535),
+        'debug': Setting(bool, False),
+        'auto_start': Setting(bool, True)
+    },
+    'audio': {
+        'sample_rate': Setting(int, 16000, choices=(8000, 16000, 32000, 48000)),  # Fréquences du VAD
+        'block_size': Setting(int, 960, 80, MAX_BLOCK_SIZE),  # 60 ms à 16 kHz
+        # Capture: None = fréquence et canaux natifs du micro (convertis par audio_resampler)
+        'capture_rate': Setting(int, None, 8000, 192000, optional=True),
+        'channels': Setting(int, None, 1, 8, optional=True),
+        'device': Setting(str, None, optional=True),        # Index ou nom du micro (None: par défaut)
+        'resample_taps': Setting(int, 96, 16, 512)          # Coefficients du filtre par échantillon produit
+    },
+    'vosk': {
+        'model_path': Setting(str, 'models/vosk-model-small-fr-0.22'),  # Seul emplacement du chemin du modèle
+        'language': Setting(str, 'fr')
+    },
+    'retention': {
+        'enabled': Setting(bool, True),
+        'days': Setting(int, 30, 1, 36500),                  # Âge maximum des transcriptions
+        'max_rows': Setting(int, None, 0, optional=True),    # Nombre maximum de transcriptions (None = illimité)
+        'max_bytes': Setting(int, None, 0, optional=True),   # Taille maximum de la base (None = illimitée)
+        'interval_seconds': Setting(int, 3600, 60, 86400 * 7),  # Fréquence du nettoyage planifié
+        'batch_size': Setting(int, 500, 1, 100000),          # Lignes supprimées par transaction
+        'batch_pause': Setting(float, 0.05, 0.0, 10.0),      # Pause entre deux lots (secondes)
+        'vacuum_pages': Setting(int, 256, 1, 1000000),       # Pages rendues au système par passe
+        'disk_path': Setting(str, '/'),                      # Partition surveillée (carte SD)
+        'min_free_disk_mb': Setting(int, 500, 0),            # Seuil de déclenchement d'urgence
+        'disk_check_interval': Setting(int, 60, 1, 86400),   # Fréquence de vérification du disque
+        'min_keep_rows': Setting(int, 1000, 0),              # Jamais en dessous, même sous pression disque
+        'archive_enabled': Setting(bool, True),              # Déplacer les mois révolus vers des archives compressées
+        'archive_after_days': Setting(int, 30, 1, 36500),    # Fenêtre conservée dans la base chaude
+        'archive_dir': Setting(str, 'archives')
+    },
+    'alerts': {
+        'enabled': Setting(bool, False),
+        'outbox_path': Setting(str, 'alerts_outbox.db'),
+        'min_severity': Setting(str, 'high', choices=('low', 'medium', 'high', 'critical')),  # Envoyée aux aidants
+        'keep_sent_days': Setting(float, 7, 0.0, 3650.0),   # Historique des envois conservé dans la boîte d'envoi
+        'sinks': Setting(list, [], item=dict)               # Destinations (réglages: alert_dispatcher)
+    },
+    'governor': {
+        'enabled': Setting(bool, True),
+        'interval_seconds': Setting(float, 2.0, 0.1, 3600.0),  # Fréquence des mesures
+        'degrade_after': Setting(int, 2, 1, 1000),           # Mesures sous pression consécutives avant de descendre
+        'upgrade_after': Setting(int, 5, 1, 1000),           # Mesures avec de la marge consécutives avant de remonter
+        'min_dwell_seconds': Setting(float, 10.0, 0.0, 86400.0),  # Durée minimum sur un palier
+        # Seuils de pression (haut) et de marge (bas): l'écart évite les oscillations
+        'queue_high': Setting(int, 4, 0), 'queue_low': Setting(int, 1, 0),
+        'rtf_high': Setting(float, 0.8, 0.0), 'rtf_low': Setting(float, 0.5, 0.0),
+        'cpu_high': Setting(float, 90.0, 0.0, 100.0), 'cpu_low': Setting(float, 60.0, 0.0, 100.0),
+        'temperature_high': Setting(float, 78.0, 0.0, 150.0), 'temperature_low': Setting(float, 70.0, 0.0, 150.0)
+    },
+    'resources': {
+        'enabled': Setting(bool, True),
+        'decoder_cores': Setting(list, None, 0, 1023, optional=True, item=int),  # None = dernier coeur (si >= 3)
+        'dsp_cores': Setting(list, None, 0, 1023, optional=True, item=int),  # Mode 'split': None = avant-dernier (si >= 4)
+        'background_cores': Setting(list, None, 0, 1023, optional=True, item=int),  # None = tous sauf le décodeur
+        'decoder_nice': Setting(int, -5, -20, 19),           # Priorité élevée (nécessite CAP_SYS_NICE, sinon inchangée)
+        'background_nice': Setting(int, 15, -20, 19),        # Rétention, exports, ré-décodage, archive audio
+        'torch_threads': Setting(int, 1, 1, 256),            # Modèle de ponctuation
+        'blas_threads': Setting(int, 1, 1, 256)              # numpy / noisereduce (OpenBLAS, MKL, OpenMP)
+    },
+    'models': {
+        'preload_before_fork': Setting(bool, False)          # True: processus moteur créés par fork après le chargement
+    },
+    'warmup': {
+        'enabled': Setting(bool, True),
+        'method': Setting(str, 'read', choices=('read', 'fadvise')),  # Lecture séquentielle ou indication au noyau
+        'verify': Setting(str, 'changed', choices=('changed', 'always', 'never')),  # Sommes de contrôle
+        'manifest_file': Setting(str, None, optional=True),  # None = .<nom du modèle>.manifest.json à côté du modèle
+        'chunk_kb': Setting(int, 1024, 4, 65536),
+        'max_wait_before_load': Setting(float, 120.0, 0.0, 3600.0)  # Le chargement attend la fin du préchauffage
+    },
+    'memory': {
+        'enabled': Setting(bool, True),
+        'interval_seconds': Setting(float, 60.0, 1.0, 86400.0),
+        'history_hours': Setting(int, 48, 1, 24 * 365),
+        'growth_warning_mb_per_hour': Setting(float, 5.0, 0.0),  # Tendance sur 6 h au-delà de laquelle on avertit
+        'min_trend_hours': Setting(float, 2.0, 0.0),         # Historique minimum avant d'avertir
+        'tracemalloc_frames': Setting(int, 10, 1, 100),
+        'trace_on_start': Setting(bool, False)               # tracemalloc coûte du CPU et de la mémoire: à la demande
+    },
+    'metrics': {
+        'enabled': Setting(bool, True),
+        'path': Setting(str, 'metrics.tsdb'),
+        'sample_interval': Setting(float, 1.0, 0.1, 3600.0),   # Secondes entre deux mesures
+        'persist_interval': Setting(float, 600.0, 1.0, 86400.0)  # Secondes entre deux écritures des cases modifiées
+    },
+    'cluster': {
+        'message_queue': Setting(str, 'local://127.0.0.1:5098'),  # Broker local intégré, ou redis://..., amqp://...
+        'channel': Setting(str, 'speech-to-text'),
+        'web_workers': Setting(int, 2, 1, 64),               # Processus web: ports app.port, app.port + 1...
+        'engine_workers': Setting(int, 1, 1, 64),            # Processus moteur (chacun peut porter plusieurs flux)
+        'streams': Setting(dict, {'micro': {}}),             # Flux -> réglages surchargés (ex: {"audio": {"device": "hw:1,0"}})
+        'heartbeat_seconds': Setting(float, 2.0, 0.1, 60.0),
+        'worker_timeout_seconds': Setting(float, 10.0, 0.5, 3600.0),  # Sans battement: processus considéré arrêté
+        'join_grace_seconds': Setting(float, 5.0, 0.0, 3600.0),  # Attente des autres avant de prendre un flux
+        'broker_queue_size': Setting(int, 10000, 1)          # Messages en attente par abonné du broker local
+    }
+}
+
+# Sections des modules lues une fois, au démarrage de leur thread ou processus
+POLICY_SECTIONS = ('vosk', 'retention', 'alerts', 'governor', 'resources', 'models', 'warmup', 'memory',
+                   'metrics', 'cluster')
+
+# Ancienne section "ui" (plus lue): reprise dans les réglages de la racine au chargement (migrate_legacy)
+LEGACY_UI_KEYS = {'default_font_size': 'font_size', 'default_theme': 'theme',
+                  'auto_scroll': 'auto_scroll', 'auto_clear_delay': 'auto_clear_delay'}
+
+# Profils nommés: taille de bloc, VAD, réduction de bruit et ponctuation réglés ensemble
+PROFILES = {
+    'low-latency': {
+        'audio': {'block_size': 480},           # 30 ms: parole transmise au plus tôt
+        'vad_aggressiveness': 1,
+        'enable_noise_reduction': False,        # Pas de traitement par bloc avant Vosk
+        'enable_punctuation': False             # Résultat final sans le modèle de ponctuation
+    },
+    'balanced': {
+        'audio': {'block_size': 960},
+        'vad_aggressiveness': 1,
+        'enable_noise_reduction': True,
+        'enable_punctuation': True
+    },
+    'low-CPU': {
+        'audio': {'block_size': 1920},          # 120 ms: deux fois moins de blocs à traiter
+        'vad_aggressiveness': 3,                # Moins d'audio envoyé au décodeur
+        'enable_noise_reduction': False,
+        'enable_punctuation': False
+    }
+}
+
+# Pris en compte au prochain démarrage seulement
+RESTART_SETTINGS = (('app', 'host'), ('app', 'port'), ('app', 'debug'), ('audio', 'sample_rate'),
+                    ('engine_mode',)) + tuple((section,) for section in POLICY_SECTIONS)
+
+
+class ConfigError(ValueError):
+    """Configuration refusée (liste des erreurs dans errors)"""
+
+    def __init__(self, errors):
+        self.errors = list(errors)
+        super().__init__('; '.join(self.errors))
+
+
+class ConfigSnapshot(Mapping):
+    """Configuration validée et immuable (sections en lecture seule)"""
+
+    def __init__(self, data, version=0):
+        self._data = data
+        self.version = version
+
+    def __getitem__(self, key):
+        value = self._data[key]
+        return MappingProxyType(value) if isinstance(value, dict) else value
+
+    def __iter__(self):
+        return iter(self._data)
+
+    def __len__(self):
+        return len(self._data)
+
+    def section(self, name):
+        return self[name] if isinstance(self._data.get(name), dict) else MappingProxyType({})
+
+    def to_dict(self):
+        """Copie modifiable (JSON, envoi par Pipe)"""
+        return copy.deepcopy(self._data)
+
+
+def _validate_value(name, spec, value):
+    """Valeur convertie au type du réglage (ValueError sinon)"""
+    if value is None:
+        if spec.optional:
+            return None
+        raise ValueError(f"{name}: valeur requise")
+
+    kind = spec.kind
+    if kind is bool:
+        if not isinstance(value, bool):
+            raise ValueError(f"{name}: booléen attendu")
+    elif kind in (int, float):
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            raise ValueError(f"{name}: nombre attendu")
+        if kind is int:
+            if value != int(value):
+                raise ValueError(f"{name}: entier attendu")
+            value = int(value)
+        value = kind(value)
+    elif kind is str:
+        if not isinstance(value, str):
+            raise ValueError(f"{name}: texte attendu")
+    elif kind is tuple:
+        if not isinstance(value, (list, tuple)) or len(value) != spec.length or \
+                any(isinstance(v, bool) or not isinstance(v, (int, float)) for v in value):
+            raise ValueError(f"{name}: liste de {spec.length} nombres attendue")
+        value = tuple(float(v) for v in value)
+    elif kind is list:
+        if not isinstance(value, list):
+            raise ValueError(f"{name}: liste attendue")
+        if spec.item is not None:
+            for item in value:
+                if not isinstance(item, spec.item) or isinstance(item, bool) and spec.item is not bool:
+                    raise ValueError(f"{name}: éléments de type {spec.item.__name__} attendus")
+        value = copy.deepcopy(value)
+    elif kind is dict:
+        if not isinstance(value, dict):
+            raise ValueError(f"{name}: objet attendu")
+        value = copy.deepcopy(value)
+
+    if spec.choices is not None and value not in spec.choices:
+        raise ValueError(f"{name}: {value!r} hors des valeurs permises {list(spec.choices)}")
+    numbers = value if kind in (tuple, list) else (value,)
+    for number in (n for n in numbers if isinstance(n, (int, float))):
+        if spec.minimum is not None and number < spec.minimum or \
+                spec.maximum is not None and number > spec.maximum:
+            raise ValueError(f"{name}: {number} hors de [{spec.minimum}, {spec.maximum}]")
+    return value
+
+
+def default_config():
+    """Document complet avec les valeurs par défaut"""
+    data = {name: spec.default for name, spec in SETTINGS.items()}
+    for section in SECTIONS:
+        data[section] = section_defaults(section)
+    return data
+
+
+def section_defaults(section):
+    """Valeurs par défaut d'une section (copie modifiable)"""
+    return {name: copy.deepcopy(spec.default) for name, spec in SECTIONS[section].items()}
+
+
+def load_section(section, config_file=CONFIG_FILE):
+    """Section validée de la configuration partagée (copie modifiable, valeurs par défaut complétées)"""
+    return copy.deepcopy(dict(get_config_store(config_file).snapshot.section(section)))
+
+
+def migrate_legacy(document):
+    """Reprendre les anciens emplacements de réglages (retourne les clés reprises)
+
+    - section "ui" -> réglages de la racine
+    - models.model_path -> vosk.model_path (models.model_path l'emportait quand les deux existaient)
+    """
+    moved = []
+    legacy = document.pop('ui', None)
+    if isinstance(legacy, dict):
+        for old, new in LEGACY_UI_KEYS.items():
+            if old in legacy and new not in document:
+                document[new] = legacy[old]
+                moved.append(f"ui.{old} -> {new}")
+
+    models = document.get('models')
+    if isinstance(models, dict) and 'model_path' in models:
+        vosk = document.setdefault('vosk', {})
+        if isinstance(vosk, dict):
+            vosk['model_path'] = models.pop('model_path')
+            moved.append("models.model_path -> vosk.model_path")
+    return moved
+
+
+def matching_profile(data):
+    """Nom du profil dont toutes les valeurs sont appliquées (None: réglages personnalisés)"""
+    for name, values in PROFILES.items():
+        if all(data.get(section, {}).get(key) == value
+               for section, section_values in values.items() if isinstance(section_values, dict)
+               for key, value in section_values.items()) and \
+                all(data.get(key) == value for key, value in values.items() if not isinstance(value, dict)):
+            return name
+    return None
+
+
+def validate_config(data, strict=False):
+    """Valider un document complet (strict: refuser les réglages inconnus), retourne une copie convertie"""
+    errors = []
+    result = {}
+    for key, value in data.items():
+        if key in SECTIONS:
+            if not isinstance(value, dict):
+                errors.append(f"{key}: section attendue")
+                continue
+            section = {}
+            for name, item in value.items():
+                spec = SECTIONS[key].get(name)
+                if spec is None:
+                    if strict:
+                        errors.append(f"{key}.{name}: réglage inconnu")
+                    section[name] = copy.deepcopy(item)
+                    continue
+                try:
+                    section[name] = _validate_value(f"{key}.{name}", spec, item)
+                except ValueError as e:
+                    errors.append(str(e))
+            result[key] = section
+        elif key in SETTINGS:
+            try:
+                result[key] = _validate_value(key, SETTINGS[key], value)
+            except ValueError as e:
+                errors.append(str(e))
+        elif strict and not isinstance(value, dict):
+            errors.append(f"{key}: réglage inconnu")
+        else:
+            result[key] = copy.deepcopy(value)  # Section d'un autre module
+
+    if result.get('profile') is not None and result['profile'] not in PROFILES:
+        errors.append(f"profile: profil inconnu {result['profile']!r} ({', '.join(PROFILES)})")
+
+    audio = result.get('audio', {})
+    if 'sample_rate' in audio and 'block_size' in audio:
+        frame = audio['sample_rate'] * VAD_FRAME_MS // 1000
+        if audio['block_size'] % frame:
+            errors.append(f"audio.block_size: multiple de {frame} attendu (trames de {VAD_FRAME_MS} ms du VAD)")
+
+    if errors:
+        raise ConfigError(errors)
+    return result
+
+
+def _merge(base, changes):
+    """Fusion sur un niveau (les sections sont fusionnées clé par clé)"""
+    merged = copy.deepcopy(base)
+    for key, value in changes.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key].update(copy.deepcopy(value))
+        else:
+            merged[key] = copy.deepcopy(value)
+    return merged
+
+
+def derive_snapshot(snapshot, overrides):
+    """Instantané dérivé avec des réglages surchargés (ex: le micro d'un flux), validé (ConfigError)"""
+    if not overrides:
+        return snapshot
+    return ConfigSnapshot(validate_config(_merge(snapshot.to_dict(), overrides)), snapshot.version)
+
+
+class ConfigStore:
+    """Instantané courant, modifications validées et rechargement de config.json"""
+
+    def __init__(self, config_file=CONFIG_FILE):
+        self.config_file = config_file
+        self._snapshot = ConfigSnapshot(default_config())
+        self._listeners = []
+        self._lock = threading.RLock()
+        self._file_stamp = None
+
+        self.reloads = 0
+        self.last_error = None
+        self.last_change = None
+        self.restart_required = []  # Réglages modifiés qui attendent un redémarrage
+
+        self._watcher = None
+        self._stop_event = threading.Event()
+
+    @property
+    def snapshot(self):
+        """Configuration courante (lecture sans verrou: l'instantané n'est jamais modifié)"""
+        return self._snapshot
+
+    def subscribe(self, listener):
+        """listener(snapshot) appelé après chaque changement, dans l'ordre des versions"""
+        self._listeners.append(listener)
+
+    # --- Modifications ---
+
+    def update(self, changes, source='api'):
+        """Valider et appliquer des modifications (ConfigError si refusées), retourne l'instantané"""
+        if not isinstance(changes, dict):
+            raise ConfigError(["objet JSON attendu"])
+        with self._lock:
+            current = self._snapshot.to_dict()
+            profile = changes.get('profile')
+            if profile is not None and profile not in PROFILES:
+                raise ConfigError([f"profile: profil inconnu {profile!r} ({', '.join(PROFILES)})"])
+            # Le profil d'abord, les réglages explicites de la même requête ensuite
+            data = _merge(current, PROFILES[profile]) if profile else current
+            data = validate_config(_merge(data, changes), strict=True)
+            data['profile'] = matching_profile(data)
+            return self._swap(data, source)
+
+    def apply_profile(self, name):
+        """Appliquer un profil nommé (ConfigError s'il est inconnu)"""
+        if name not in PROFILES:
+            raise ConfigError([f"profile: profil inconnu {name!r} ({', '.join(PROFILES)})"])
+        return self.update({'profile': name}, source='profile')
+
+    def _swap(self, data, source):
+        previous = self._snapshot
+        if data == previous.to_dict():
+            return previous
+        snapshot = ConfigSnapshot(data, previous.version + 1)
+        self._snapshot = snapshot
+
+        # Premier chargement de config.json: valeurs par défaut remplacées avant le démarrage
+        # (la version reste 0 si le fichier ne change rien: ne pas s'y fier pour la suite)
+        initial = source == 'file' and not previous.version
+        changed = [path for path in RESTART_SETTINGS
+                   if not initial and _lookup(previous, path) != _lookup(snapshot, path)]
+        for path in changed:
+            name = '.'.join(path)
+            if name not in self.restart_required:
+                self.restart_required.append(name)
+            print(f"⚠️  Réglage {name} pris en compte au prochain démarrage")
+        self.last_change = {'version': snapshot.version, 'source': source, 'profile': data.get('profile'),
+                            'time': time.time()}
+        if source in ('file', 'reload') or data.get('profile') != previous.get('profile'):
+            print(f"⚙️  Configuration v{snapshot.version} ({source}, "
+                  f"profil {data.get('profile') or 'personnalisé'})")
+
+        for listener in self._listeners:
+            try:
+                listener(snapshot)
+            except Exception as e:
+                print(f"Erreur lors de l'application de la configuration: {e}")
+        return snapshot
+
+    # --- Fichier ---
+
+    def _stamp(self):
+        try:
+            stat = os.stat(self.config_file)
+            return (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            return None
+
+    def load(self, source='file'):
+        """Lire config.json (les erreurs gardent la configuration courante), retourne True si appliqué"""
+        with self._lock:
+            self._file_stamp = self._stamp()
+            if self._file_stamp is None:
+                return False
+            try:
+                with open(self.config_file, 'r') as f:
+                    document = json.load(f)
+                if not isinstance(document, dict):
+                    raise ConfigError(["objet JSON attendu"])
+                moved = migrate_legacy(document)
+                if moved:
+                    print(f"ℹ️  config.json: anciens réglages repris ({', '.join(moved)})")
+                data = validate_config(_merge(default_config(), document))
+            except (OSError, ValueError) as e:
+                self.last_error = str(e)
+                print(f"❌ config.json refusé, configuration précédente conservée: {e}")
+                return False
+            # Profil changé dans le fichier: ses valeurs l'emportent sur les réglages isolés
+            if data.get('profile') and data['profile'] != self._snapshot.get('profile'):
+                data = _merge(data, PROFILES[data['profile']])
+            data['profile'] = matching_profile(data)
+            self.last_error = None
+            self._swap(data, source)
+            return True
+
+    def save(self):
+        """Écriture atomique de la configuration courante (fichier temporaire puis renommage)"""
+        with self._lock:
+            temporary = f"{self.config_file}.tmp"
+            try:
+                with open(temporary, 'w') as f:
+                    json.dump(self._snapshot.to_dict(), f, indent=2, ensure_ascii=False)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(temporary, self.config_file)
+                self._file_stamp = self._stamp()  # Notre propre écriture: pas de rechargement
+                return True
+            except OSError as e:
+                print(f"Erreur lors de la sauvegarde de la config: {e}")
+                return False
+
+    # --- Rechargement à chaud ---
+
+    def start_watching(self, interval=WATCH_INTERVAL):
+        """Surveiller config.json (date et taille) dans un thread"""
+        if self._watcher and self._watcher.is_alive():
+            return
+        self._stop_event.clear()
+        self._watcher = threading.Thread(target=self._watch, args=(interval,), name='config-watch', daemon=True)
+        self._watcher.start()
+
+    def stop_watching(self):
+        self._stop_event.set()
+
+    def _watch(self, interval):
+        while not self._stop_event.wait(interval):
+            stamp = self._stamp()
+            if stamp is not None and stamp != self._file_stamp:
+                print("🔄 config.json modifié, rechargement")
+                if self.load(source='reload'):
+                    self.reloads += 1
+
+    # --- État ---
+
+    def get_status(self):
+        snapshot = self._snapshot
+        return {
+            'version': snapshot.version,
+            'profile': snapshot.get('profile'),
+            'profiles': list(PROFILES),
+            'watching': bool(self._watcher and self._watcher.is_alive()),
+            'reloads': self.reloads,
+            'last_change': self.last_change,
+            'last_error': self.last_error,
+            'restart_required': list(self.restart_required)
+        }
+
+
+def _lookup(snapshot, path):
+    value = snapshot
+    for key in path:
+        value = value.get(key) if isinstance(value, Mapping) else None
+    return value
+
+
+# Instance globale
+_config_instance = None
+
+
+def get_config_store(config_file=CONFIG_FILE):
+    """Obtenir la configuration partagée (config.json lu au premier appel)"""
+    global _config_instance
+    if _config_instance is None:
+        _config_instance = ConfigStore(config_file)
+        _config_instance.load()
+    return _config_instance
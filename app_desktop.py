@@ -1,46 +1,57 @@
 #!/usr/bin/env python3
-import json
+# Suivi du démarrage en premier: origine des temps et profil des imports
+from startup_monitor import get_startup_monitor, AUDIO_DEVICE_TIMEOUT
+startup = get_startup_monitor()
+startup.start_import_profile()
+
+# Plafonner les pools de threads BLAS avant l'import de numpy (via vosk, audio_utils...)
+from resource_manager import apply_thread_limits
+resources = apply_thread_limits()
+
+# Lecture séquentielle du modèle (cache de pages) pendant les imports et le démarrage
+from model_warmup import start_model_warmup
+warmer = start_model_warmup()
+
 import os
-import queue
-import sounddevice as sd
-import vosk
+import threading
+import time
 import tkinter as tk
 from tkinter import ttk, scrolledtext, messagebox
-import threading
 from datetime import datetime
-import numpy as np
-
-from audio_utils import (
-    VoiceActivityDetector,
-    NoiseReducer,
-    AudioLevelMeter,
-    SmartPunctuator,
-    EmergencyDetector
-)
+
 from database import get_database
 from stats_manager import get_stats_manager
-
-SAMPLE_RATE = 16000
-BLOCK_SIZE = 960  # 60ms - Compatible avec VAD (multiple de 480)
-MODEL_PATH = "models/vosk-model-small-fr-0.22"
-CONFIG_FILE = "config.json"
-MAX_QUEUE_SIZE = 10
+from retention_manager import get_retention_manager
+from recognition_engine import RecognitionEngine
+from engine_process import EngineProcess
+from split_pipeline import SplitEngineProcess
+from redecoder import get_redecode_worker
+from alert_dispatcher import get_alert_dispatcher
+from quality_governor import get_quality_governor
+from model_manager import get_model_manager
+from memory_monitor import get_memory_monitor
+from metrics_store import get_metrics_recorder, METRICS
+from app_config import get_config_store, PROFILES
+
+startup.stop_import_profile()
+startup.mark('imports')
+
+models = get_model_manager()
+MODEL_PATH = models.policy['model_path']
 STATS_UPDATE_INTERVAL = 1.0  # Mise à jour stats toutes les 1s
+CHART_RANGES = {'1 heure': 3600, '24 heures': 86400, '7 jours': 7 * 86400, '1 an': 365 * 86400}
+CHART_WIDTH, CHART_HEIGHT = 460, 140
 
 # Variables globales
-model = None
-audio_queue = queue.Queue()
-is_recording = False
-recognition_thread_obj = None
-
-# Instances des utilitaires
-vad = VoiceActivityDetector(sample_rate=SAMPLE_RATE, aggressiveness=1)  # 1 = peu agressif, meilleure détection
-noise_reducer = NoiseReducer(sample_rate=SAMPLE_RATE)
-audio_meter = AudioLevelMeter()
-punctuator = SmartPunctuator()
-emergency_detector = EmergencyDetector()
+engine = None
+
 db = get_database()
 stats = get_stats_manager()
+retention = get_retention_manager(db)
+memory = get_memory_monitor()
+
+# Configuration validée de config.json (instantanés immuables, rechargée si le fichier change)
+settings = get_config_store()
 
 
 class SpeechToTextApp:
@@ -48,21 +59,39 @@ class SpeechToTextApp:
         self.root = root
         self.root.title("Transcription Vocale - Version Améliorée")
 
-        # Configuration par défaut (équilibrée)
-        self.config = {
-            'font_size': 60,
-            'theme': 'light',
-            'auto_clear_delay': 30,
-            'auto_scroll': True,
-            'enable_vad': True,                      # ✅ VAD activé
-            'enable_noise_reduction': True,          # ✅ Actif pour meilleure qualité
-            'enable_punctuation': True,              # ✅ Actif pour lisibilité
-            'enable_emergency_detection': True       # ✅ Actif pour sécurité
-        }
-        self.load_config()
+        # Moteur de reconnaissance (instantané de configuration remplacé entre deux blocs)
+        global engine
+        if self.config.get('engine_mode') in ('process', 'split'):
+            engine_class = SplitEngineProcess if self.config['engine_mode'] == 'split' else EngineProcess
+            engine = engine_class(self.config, MODEL_PATH, start_method=models.process_start_method(),
+                                  model_manager=models)
+            engine.launch()
+        else:
+            engine = RecognitionEngine(self.config, model_manager=models)
+        settings.subscribe(engine.update_config)
+        settings.subscribe(lambda snapshot: self.root.after(0, self.apply_display_settings))
+        engine.on_partial = self.on_partial_result
+        engine.on_final = self.on_final_result
+        engine.on_emergency = lambda alert: self.root.after(0, self.trigger_emergency_flash)
+        memory.register_component('model', lambda: engine.remote_model if isinstance(engine, EngineProcess)
+                                  else models.get_status())
+        memory.register_component('engine', engine.memory_estimates)
+        memory.register_component('recognizer', engine.get_recognizer_status)
+        self.metrics = get_metrics_recorder(engine)
+
+        # Ré-décodage des segments archivés pendant les périodes calmes
+        if self.config.get('enable_audio_archive') and self.config.get('enable_redecoding'):
+            get_redecode_worker(engine, mode=self.config.get('redecode_mode', 'annotate')).start()
 
         # Variables
         self.auto_clear_timer = None
+        self.history_count = 0
+        self._partial_lock = threading.Lock()
+        self._pending_partial = None
+        self._partial_scheduled = False
+        self._last_partial_redraw = 0.0
+        self.partial_redraws = 0
+        self.skipped_redraws = 0
         self.current_theme = self.config['theme']
         self.stats_window = None
         self.emergency_flash_active = False
@@ -93,7 +122,7 @@ class SpeechToTextApp:
         self.apply_theme()
 
         # Démarrer la reconnaissance automatiquement
-        self.root.after(1000, self.start_recording)
+        threading.Thread(target=self.start_when_ready, name='auto-start', daemon=True).start()
 
         # Rafraîchir les stats toutes les 2 secondes
         self.update_stats_display()
@@ -187,6 +216,11 @@ class SpeechToTextApp:
         # Bind pour quitter en plein écran (Escape)
         self.root.bind('<Escape>', lambda e: self.toggle_fullscreen())
 
+    @property
+    def config(self):
+        """Configuration courante (instantané immuable: modifier avec settings.update)"""
+        return settings.snapshot
+
     def show_settings(self):
         """Affiche la fenêtre de paramètres"""
         settings_window = tk.Toplevel(self.root)
@@ -236,7 +270,7 @@ class SpeechToTextApp:
         def update_font_size(val):
             size = int(float(val))
             font_size_label.config(text=f"{size}px")
-            self.config['font_size'] = size
+            settings.update({'font_size': size}, source='desktop')
             self.apply_font_size()
 
         font_slider = tk.Scale(
@@ -265,36 +299,29 @@ class SpeechToTextApp:
         # --- FONCTIONNALITÉS ---
         tk.Label(frame, text="FONCTIONNALITÉS", font=('Arial', 14, 'bold')).pack(anchor='w', pady=(20, 5))
 
-        # Bouton Mode Performance (toggle rapide)
-        def toggle_performance_mode():
-            # Si on est en mode Qualité (avec features activées), passer en Performance
-            if self.config.get('enable_noise_reduction', True):
-                # Activer Mode Performance (désactiver features gourmandes)
-                self.config['enable_noise_reduction'] = False
-                self.config['enable_punctuation'] = False
-                noise_var.set(False)
-                punct_var.set(False)
-                perf_btn.config(text="⚡ Mode Performance: ON", bg='#2196F3')
-            else:
-                # Activer Mode Qualité (activer features)
-                self.config['enable_noise_reduction'] = True
-                self.config['enable_punctuation'] = True
-                noise_var.set(True)
-                punct_var.set(True)
-                perf_btn.config(text="🎯 Mode Qualité: ON", bg='#4CAF50')
-
-        # Déterminer l'état initial
-        is_quality_mode = self.config.get('enable_noise_reduction', True)
-        perf_btn = tk.Button(
+        # Profil (taille de bloc, VAD, réduction de bruit et ponctuation ensemble)
+        tk.Label(frame, text="Profil:", font=('Arial', 12)).pack(anchor='w', pady=(10, 5))
+        profile_var = tk.StringVar(value=self.config['profile'] or 'personnalisé')
+        profile_combo = ttk.Combobox(
             frame,
-            text="🎯 Mode Qualité: ON" if is_quality_mode else "⚡ Mode Performance: ON",
-            font=('Arial', 12, 'bold'),
-            command=toggle_performance_mode,
-            cursor='hand2',
-            bg='#4CAF50' if is_quality_mode else '#2196F3',
-            fg='white'
+            textvariable=profile_var,
+            values=list(PROFILES),
+            state='readonly',
+            font=('Arial', 11)
         )
-        perf_btn.pack(fill=tk.X, pady=(0, 15))
+        profile_combo.pack(fill=tk.X, pady=(0, 15))
+
+        def update_setting(key, var):
+            settings.update({key: var.get()}, source='desktop')
+            profile_var.set(self.config['profile'] or 'personnalisé')
+
+        def apply_profile(event):
+            # Appliqué par le moteur entre deux énoncés, sans rouvrir le flux audio
+            settings.apply_profile(profile_var.get())
+            noise_var.set(self.config['enable_noise_reduction'])
+            punct_var.set(self.config['enable_punctuation'])
+
+        profile_combo.bind('<<ComboboxSelected>>', apply_profile)
 
         # VAD
         vad_var = tk.BooleanVar(value=self.config.get('enable_vad', True))
@@ -303,7 +330,7 @@ class SpeechToTextApp:
             text="Détection de voix (VAD) - Réduit la charge CPU",
             variable=vad_var,
             font=('Arial', 11),
-            command=lambda: self.config.update({'enable_vad': vad_var.get()})
+            command=lambda: update_setting('enable_vad', vad_var)
         ).pack(anchor='w', pady=5)
 
         # Réduction de bruit
@@ -313,7 +340,7 @@ class SpeechToTextApp:
             text="Réduction de bruit - Meilleure précision",
             variable=noise_var,
             font=('Arial', 11),
-            command=lambda: self.config.update({'enable_noise_reduction': noise_var.get()})
+            command=lambda: update_setting('enable_noise_reduction', noise_var)
         ).pack(anchor='w', pady=5)
 
         # Ponctuation
@@ -323,7 +350,7 @@ class SpeechToTextApp:
             text="Ponctuation automatique - Plus lisible",
             variable=punct_var,
             font=('Arial', 11),
-            command=lambda: self.config.update({'enable_punctuation': punct_var.get()})
+            command=lambda: update_setting('enable_punctuation', punct_var)
         ).pack(anchor='w', pady=5)
 
         # Détection d'urgence
@@ -333,7 +360,7 @@ class SpeechToTextApp:
             text="Détection d'urgence - Alerte visuelle",
             variable=emergency_var,
             font=('Arial', 11),
-            command=lambda: self.config.update({'enable_emergency_detection': emergency_var.get()})
+            command=lambda: update_setting('enable_emergency_detection', emergency_var)
         ).pack(anchor='w', pady=5)
 
         # Effacement automatique
@@ -351,7 +378,7 @@ class SpeechToTextApp:
 
         def update_auto_clear(event):
             delay = int(auto_clear_var.get())
-            self.config['auto_clear_delay'] = delay
+            settings.update({'auto_clear_delay': delay}, source='desktop')
             self.reset_auto_clear_timer()
 
         auto_clear_combo.bind('<<ComboboxSelected>>', update_auto_clear)
@@ -360,7 +387,7 @@ class SpeechToTextApp:
         auto_scroll_var = tk.BooleanVar(value=self.config['auto_scroll'])
 
         def toggle_auto_scroll():
-            self.config['auto_scroll'] = auto_scroll_var.get()
+            settings.update({'auto_scroll': auto_scroll_var.get()}, source='desktop')
 
         auto_scroll_check = tk.Checkbutton(
             frame,
@@ -394,6 +421,16 @@ class SpeechToTextApp:
         )
         export_btn.pack(fill=tk.X, pady=(0, 10))
 
+        # Bouton exporter en sous-titres
+        subtitles_btn = tk.Button(
+            frame,
+            text="💬 Exporter en sous-titres (SRT)",
+            font=('Arial', 12),
+            command=self.export_subtitles,
+            cursor='hand2'
+        )
+        subtitles_btn.pack(fill=tk.X, pady=(0, 10))
+
         # Bouton fermer
         close_btn = tk.Button(
             frame,
@@ -414,7 +451,7 @@ class SpeechToTextApp:
 
         self.stats_window = tk.Toplevel(self.root)
         self.stats_window.title("Statistiques")
-        self.stats_window.geometry("500x600")
+        self.stats_window.geometry("500x820")
         self.stats_window.resizable(False, False)
 
         frame = tk.Frame(self.stats_window, padx=20, pady=20)
@@ -428,8 +465,8 @@ class SpeechToTextApp:
 
         sections = [
             ("📊 Application", ['uptime', 'total_transcriptions', 'total_words', 'avg_words']),
-            ("💻 Système", ['cpu', 'memory', 'disk']),
-            ("🎤 Audio", ['audio_level', 'avg_audio'])
+            ("💻 Système", ['cpu', 'processes', 'memory', 'disk']),
+            ("🎤 Audio", ['audio_level', 'avg_audio', 'quality_tier', 'rendering'])
         ]
 
         for section_name, keys in sections:
@@ -440,6 +477,23 @@ class SpeechToTextApp:
                 label.pack(anchor='w', padx=(10, 0), pady=2)
                 self.stats_labels[key] = label
 
+        # Historique d'une mesure (séries temporelles, résolution adaptée à la durée)
+        tk.Label(frame, text="📈 Historique", font=('Arial', 14, 'bold')).pack(anchor='w', pady=(15, 5))
+        selectors = tk.Frame(frame)
+        selectors.pack(fill=tk.X)
+        labels = {label: name for name, label in METRICS.items()}
+        self.chart_metric = tk.StringVar(value=METRICS['cpu_percent'])
+        self.chart_range = tk.StringVar(value='1 heure')
+        for variable, values in ((self.chart_metric, list(labels)), (self.chart_range, list(CHART_RANGES))):
+            combo = ttk.Combobox(selectors, textvariable=variable, values=values, state='readonly',
+                                 font=('Arial', 10), width=22)
+            combo.pack(side=tk.LEFT, padx=(0, 10))
+            combo.bind('<<ComboboxSelected>>', lambda event: self.draw_metrics_chart())
+        self.chart_metric_names = labels
+        self.chart_canvas = tk.Canvas(frame, width=CHART_WIDTH, height=CHART_HEIGHT, bg='white',
+                                      highlightthickness=0)
+        self.chart_canvas.pack(anchor='w', pady=(5, 0))
+
         # Rafraîchir les stats
         self.refresh_stats_window()
 
@@ -460,18 +514,85 @@ class SpeechToTextApp:
         self.stats_labels['avg_words'].config(text=f"Mots/transcription: {app['avg_words_per_transcription']}")
 
         self.stats_labels['cpu'].config(text=f"CPU: {system['cpu']['percent']}% (moy: {system['cpu']['avg_1min']}%)")
-        self.stats_labels['memory'].config(text=f"Mémoire: {system['memory']['percent']}% ({system['memory']['used_mb']} MB)")
+        if isinstance(engine, EngineProcess):
+            # Utilisation par processus (mode 'process' ou 'split')
+            processes = engine.get_status()['processes']
+            usage = ', '.join(f"{name}: {info.get('cpu_percent', '?')}%" for name, info in processes.items())
+            self.stats_labels['processes'].config(text=f"Processus: {usage or 'démarrage...'}")
+        else:
+            self.stats_labels['processes'].config(text="Processus: moteur dans un thread")
+        # Mémoire de l'application et sa tendance (fuite lente sur plusieurs semaines)
+        footprint = memory.get_status()
+        trend = footprint['trend_mb_per_hour']
+        process_text = f", appli {footprint['rss_mb']} MB" if footprint['rss_mb'] is not None else ""
+        trend_text = f" ({trend:+.1f} MB/h)" if trend is not None else ""
+        self.stats_labels['memory'].config(
+            text=f"Mémoire: {system['memory']['percent']}% ({system['memory']['used_mb']} MB){process_text}{trend_text}")
         self.stats_labels['disk'].config(text=f"Disque: {system['disk']['percent']}% (libre: {system['disk']['free_gb']} GB)")
 
         self.stats_labels['audio_level'].config(text=f"Niveau actuel: {audio['current_level']}%")
         self.stats_labels['avg_audio'].config(text=f"Niveau moyen: {audio['avg_level']}%")
 
+        quality = get_quality_governor(engine).get_status()
+        rtf = quality['last_sample'].get('rtf', 0)
+        self.stats_labels['quality_tier'].config(
+            text=f"Qualité: {quality['tier_name']} (changements: {quality['tier_changes']}, RTF: {rtf})")
+
+        self.stats_labels['rendering'].config(
+            text=f"Affichage: {self.history_count} entrées, {self.partial_redraws} rafraîchissements "
+                 f"({self.skipped_redraws} regroupés)")
+
+        self.draw_metrics_chart()
+
         # Rafraîchir toutes les 2 secondes
         self.stats_window.after(2000, self.refresh_stats_window)
 
+    def draw_metrics_chart(self):
+        """Courbe de la moyenne (et du maximum, en clair) de la mesure choisie"""
+        name = self.chart_metric_names[self.chart_metric.get()]
+        result = self.metrics.store.query([name], start=time.time() - CHART_RANGES[self.chart_range.get()],
+                                          max_points=CHART_WIDTH // 2)
+        series = result['series'][name]
+        canvas = self.chart_canvas
+        canvas.delete('all')
+
+        present = [value for value in series['max'] if value is not None]
+        if not present:
+            canvas.create_text(CHART_WIDTH // 2, CHART_HEIGHT // 2, text="Pas encore de mesures", fill='#888888')
+            return
+        top = max(present) or 1.0
+        margin = 14
+        count = max(1, len(series['mean']) - 1)
+
+        def points(values):
+            # Segments continus seulement (pas de ligne à travers les intervalles sans mesure)
+            segments, current = [], []
+            for i, value in enumerate(values):
+                if value is None:
+                    if len(current) > 2:
+                        segments.append(current)
+                    current = []
+                    continue
+                current += [i * (CHART_WIDTH - 1) / count,
+                            CHART_HEIGHT - margin - value / top * (CHART_HEIGHT - 2 * margin)]
+            if len(current) > 2:
+                segments.append(current)
+            return segments
+
+        for segment in points(series['max']):
+            canvas.create_line(*segment, fill='#F4B183')
+        for segment in points(series['mean']):
+            canvas.create_line(*segment, fill='#2E75B6', width=2)
+        resolution = result['resolution']
+        step = f"{resolution} s" if resolution < 60 else f"{resolution // 60} min" if resolution < 3600 \
+            else f"{resolution // 3600} h"
+        canvas.create_text(4, 2, anchor='nw', text=f"max {top:g}", fill='#555555', font=('Arial', 9))
+        canvas.create_text(CHART_WIDTH - 4, 2, anchor='ne', text=f"pas: {step}", fill='#555555',
+                           font=('Arial', 9))
+
     def update_stats_display(self):
         """Mettre à jour l'affichage des statistiques (barre de niveau audio)"""
-        level = audio_meter.get_average_level()
+        level = engine.audio_meter.get_average_level()
         self.audio_level_bar['value'] = level
 
         # Continuer à rafraîchir (optimisé: 3s au lieu de 100ms)
@@ -488,7 +609,7 @@ class SpeechToTextApp:
             if button:
                 button.config(text="🌙 Mode Sombre")
 
-        self.config['theme'] = self.current_theme
+        settings.update({'theme': self.current_theme}, source='desktop')
         self.apply_theme()
 
     def apply_theme(self):
@@ -502,6 +623,13 @@ class SpeechToTextApp:
         self.stats_btn.config(bg=theme['bg'], fg=theme['settings_btn'], activebackground=theme['bg'])
         self.separator.config(bg=theme['separator'])
 
+    def apply_display_settings(self):
+        """Thème et taille du texte après un changement de configuration (rechargement de config.json)"""
+        if self.current_theme != self.config['theme']:
+            self.current_theme = self.config['theme']
+            self.apply_theme()
+        self.apply_font_size()
+
     def apply_font_size(self):
         """Appliquer la taille de police"""
         self.current_text.config(font=('Arial', self.config['font_size']))
@@ -523,6 +651,8 @@ class SpeechToTextApp:
             display_text = f"⚠️ {text}"
 
         self.history_text.insert('1.0', f"{display_text} [{timestamp}]\n\n", 'emergency' if is_emergency else '')
+        self.history_count += 1
+        self.trim_history()
         self.history_text.config(state=tk.DISABLED)
 
         # Défilement automatique vers le haut
@@ -536,6 +666,16 @@ class SpeechToTextApp:
         if is_emergency:
             self.trigger_emergency_flash()
 
+    def trim_history(self):
+        """Retirer les entrées les plus anciennes (en bas), par lots, au-delà du maximum"""
+        max_entries = self.config.get('max_history_entries', 200)
+        if not max_entries or self.history_count <= max_entries:
+            return
+        keep = max(max_entries - self.config.get('history_trim_batch', 50), 0)
+        # Chaque entrée occupe deux lignes logiques (texte + ligne vide)
+        self.history_text.delete(f'{keep * 2 + 1}.0', tk.END)
+        self.history_count = keep
+
     def trigger_emergency_flash(self):
         """Déclencher un flash visuel d'urgence"""
         if self.emergency_flash_active:
@@ -567,6 +707,7 @@ class SpeechToTextApp:
         self.history_text.config(state=tk.NORMAL)
         self.history_text.delete('1.0', tk.END)
         self.history_text.config(state=tk.DISABLED)
+        self.history_count = 0
         self.reset_auto_clear_timer()
 
     def reset_auto_clear_timer(self):
@@ -579,168 +720,107 @@ class SpeechToTextApp:
         if delay > 0:
             self.auto_clear_timer = self.root.after(delay * 1000, self.clear_history)
 
+    def on_partial_result(self, text):
+        """Résultat partiel (appelé depuis le thread de reconnaissance)"""
+        startup.mark('first_partial')
+        self.schedule_current_text(text)
+
+    def on_final_result(self, result):
+        """Résultat final (appelé depuis le thread de reconnaissance)"""
+        startup.mark('first_final')
+        self.root.after(0, self.add_to_history, result['text'], result['is_emergency'])
+        self.schedule_current_text("")
+
+    def schedule_current_text(self, text):
+        """Regrouper les mises à jour du texte courant: un seul rafraîchissement par intervalle"""
+        with self._partial_lock:
+            self._pending_partial = text
+            if self._partial_scheduled:
+                self.skipped_redraws += 1  # Remplacé avant d'avoir été affiché
+                return
+            self._partial_scheduled = True
+            # Premier texte après un calme: tout de suite; sinon à la fin de l'intervalle
+            frame = self.config.get('partial_frame_ms', 100) / 1000
+            delay = max(0.0, frame - (time.monotonic() - self._last_partial_redraw))
+        self.root.after(int(delay * 1000), self.flush_current_text)
+
+    def flush_current_text(self):
+        """Afficher le dernier texte reçu (boucle Tk)"""
+        with self._partial_lock:
+            text = self._pending_partial
+            self._partial_scheduled = False
+            self._last_partial_redraw = time.monotonic()
+        self.partial_redraws += 1
+        self.update_current_text(text)
+
     def update_current_text(self, text):
         """Mettre à jour le texte courant"""
         self.current_text.config(text=text)
 
+    def start_when_ready(self):
+        """Démarrer dès que le micro répond (le moteur attend lui-même le modèle)"""
+        if not startup.wait_for('audio_device', timeout=AUDIO_DEVICE_TIMEOUT):
+            print("⚠️  Micro toujours absent, tentative de démarrage quand même")
+        self.root.after(0, self.start_recording)
+        if startup.wait_for('audio_stream', timeout=300):
+            startup.report()
+
     def start_recording(self):
         """Démarrer la reconnaissance vocale"""
-        global is_recording, recognition_thread_obj
-
-        if not is_recording and model is not None:
-            is_recording = True
-            recognition_thread_obj = threading.Thread(target=recognition_loop, args=(self,), daemon=True)
-            recognition_thread_obj.start()
+        if engine.start():
             print("Reconnaissance vocale démarrée avec améliorations")
 
     def stop_recording(self):
         """Arrêter la reconnaissance vocale"""
-        global is_recording
-        is_recording = False
+        engine.stop()
 
     def export_history(self):
         """Exporter l'historique en fichier texte"""
         try:
             filename = f"transcription_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt"
-            count = db.export_to_text(filename)
+            count = resources.run_background(db.export_to_text, filename)
             messagebox.showinfo("Export réussi", f"{count} transcriptions exportées dans {filename}")
         except Exception as e:
             messagebox.showerror("Erreur", f"Erreur lors de l'export: {e}")
 
-    def load_config(self):
-        """Charger la configuration depuis le fichier"""
-        if os.path.exists(CONFIG_FILE):
-            try:
-                with open(CONFIG_FILE, 'r') as f:
-                    saved_config = json.load(f)
-                    self.config.update(saved_config)
-            except Exception as e:
-                print(f"Erreur lors du chargement de la config: {e}")
-
-    def save_config(self):
-        """Sauvegarder la configuration"""
+    def export_subtitles(self):
+        """Exporter la dernière session en sous-titres SRT"""
         try:
-            with open(CONFIG_FILE, 'w') as f:
-                json.dump(self.config, f, indent=2)
+            filename = f"transcription_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.srt"
+            count = resources.run_background(db.export_subtitles, filename, fmt='srt')
+            messagebox.showinfo("Export réussi", f"{count} sous-titres exportés dans {filename}")
         except Exception as e:
-            print(f"Erreur lors de la sauvegarde de la config: {e}")
+            messagebox.showerror("Erreur", f"Erreur lors de l'export: {e}")
+
+    def save_config(self):
+        """Sauvegarder la configuration (écriture atomique de config.json)"""
+        settings.stop_watching()
+        settings.save()
 
     def on_closing(self):
         """Actions à effectuer lors de la fermeture"""
         self.stop_recording()
+        if isinstance(engine, EngineProcess):
+            engine.shutdown()
+        self.metrics.stop()
         self.save_config()
         self.root.destroy()
 
 
-def audio_callback(indata, frames, time, status):
-    """Callback pour capturer l'audio"""
-    if status:
-        print(f"Statut audio: {status}")
-
-    # Gestion intelligente de la queue (limite la taille)
-    if audio_queue.qsize() > MAX_QUEUE_SIZE:
-        try:
-            audio_queue.get_nowait()  # Supprimer le plus ancien
-        except queue.Empty:
-            pass
-
-    audio_queue.put(bytes(indata))
-
-
-def recognition_loop(app):
-    """Boucle de reconnaissance vocale AMÉLIORÉE"""
-    global is_recording, model
-
-    rec = vosk.KaldiRecognizer(model, SAMPLE_RATE)
-    rec.SetWords(True)
-
-    with sd.RawInputStream(
-        samplerate=SAMPLE_RATE,
-        blocksize=BLOCK_SIZE,
-        dtype='int16',
-        channels=1,
-        callback=audio_callback
-    ):
-        print("🎤 Écoute en cours avec améliorations...")
-        print(f"  VAD: {app.config.get('enable_vad', True)}")
-        print(f"  Réduction bruit: {app.config.get('enable_noise_reduction', True)}")
-        print(f"  Ponctuation: {app.config.get('enable_punctuation', True)}")
-        print(f"  Détection urgence: {app.config.get('enable_emergency_detection', True)}")
-
-        while is_recording:
-            try:
-                data = audio_queue.get(timeout=1)
-            except queue.Empty:
-                continue
-
-            # Mesurer le niveau audio
-            audio_level = audio_meter.get_level(data)
-
-            # VAD: Ne traiter que si c'est de la parole
-            if app.config.get('enable_vad', True):
-                if not vad.is_speech(data):
-                    continue  # Ignorer le silence
-
-            # Réduction de bruit
-            if app.config.get('enable_noise_reduction', True):
-                data = noise_reducer.reduce_noise(data)
-
-            # Reconnaissance Vosk
-            if rec.AcceptWaveform(data):
-                result = json.loads(rec.Result())
-                if result.get('text'):
-                    text = result['text']
-
-                    # Ponctuation automatique
-                    if app.config.get('enable_punctuation', True):
-                        # Ponctuation ML (avancée mais gourmande)
-                        text = punctuator.add_punctuation(text)
-                    else:
-                        # Ponctuation basique (légère)
-                        text = punctuator._basic_punctuation(text)
-
-                    # Détection d'urgence
-                    is_emergency = False
-                    emergency_words = []
-                    if app.config.get('enable_emergency_detection', True):
-                        is_emergency = emergency_detector.check_emergency(text)
-                        if is_emergency:
-                            emergency_words = emergency_detector.get_emergency_words(text)
-                            print(f"⚠️ URGENCE DÉTECTÉE: {emergency_words}")
-
-                    # Sauvegarder dans la base de données
-                    db.add_transcription(
-                        text,
-                        has_emergency=is_emergency,
-                        emergency_words=emergency_words,
-                        audio_level=audio_level
-                    )
-
-                    # Mettre à jour les statistiques
-                    stats.increment_transcription(text, audio_level)
-
-                    # Afficher dans l'interface
-                    app.root.after(0, app.add_to_history, text, is_emergency)
-                    app.root.after(0, app.update_current_text, "")
-            else:
-                partial = json.loads(rec.PartialResult())
-                if partial.get('partial'):
-                    # Texte partiel
-                    app.root.after(0, app.update_current_text, partial['partial'])
-
-
 def load_model():
-    """Charge le modèle Vosk"""
-    global model
-
+    """Charge le modèle Vosk (en arrière-plan: l'interface s'affiche pendant le chargement)"""
     if not os.path.exists(MODEL_PATH):
         print(f"ERREUR: Le modèle n'existe pas à {MODEL_PATH}")
         print("Téléchargez-le avec ./download_model.sh")
         return False
 
-    print(f"Chargement du modèle depuis {MODEL_PATH}...")
-    model = vosk.Model(MODEL_PATH)
-    print("✅ Modèle chargé avec succès!")
+    if settings.snapshot['engine_mode'] in ('process', 'split') and models.process_start_method() != 'fork':
+        print("Le modèle sera chargé par le processus moteur")
+        return True
+
+    # Mode thread, ou préchargement partagé avec les processus moteur (fork)
+    print(f"Chargement du modèle depuis {MODEL_PATH} (en arrière-plan)...")
+    models.load_async(MODEL_PATH)
     return True
 
 
@@ -758,16 +838,42 @@ def main():
     print("  ✅ Statistiques en temps réel")
     print("  ✅ Optimisations performances\n")
 
+    # Décodeur sur son coeur, le reste du processus sur les autres
+    resources.apply_process_layout()
+    resources.report()
+
     if not load_model():
         print("\n❌ Impossible de démarrer sans le modèle Vosk")
         return
+    startup.probe_audio_device()
+
+    # Rechargement de config.json à chaud
+    settings.start_watching()
+
+    # Nettoyage de la base en arrière-plan
+    retention.start()
+
+    # Tendance de la mémoire (fuites repérées avant l'OOM killer)
+    memory.start()
 
-    # Charger le modèle de ponctuation (optionnel, peut prendre du temps)
-    print("Chargement du modèle de ponctuation...")
+    # Envoi des alertes d'urgence aux aidants
+    alerts = get_alert_dispatcher()
+    if alerts.config['enabled']:
+        alerts.start()
+
+    # Modèle de ponctuation et réduction de bruit: importés en arrière-plan une fois le flux ouvert
 
     root = tk.Tk()
     app = SpeechToTextApp(root)
 
+    # Régulation automatique de la qualité selon la charge
+    governor = get_quality_governor(engine)
+    if governor.policy['enabled']:
+        governor.start()
+
+    # Mesures chaque seconde, conservées un an (résolution réduite avec l'âge)
+    app.metrics.start()
+
     # Gérer la fermeture proprement
     root.protocol("WM_DELETE_WINDOW", app.on_closing)
 
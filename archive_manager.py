@@ -0,0 +1,313 @@
+#!/usr/bin/env python3
+"""
+Module d'archivage des anciennes transcriptions
+Segments mensuels immuables, compressés par blocs (JSONL + zlib) avec un petit index
+"""
+
+import heapq
+import json
+import os
+import threading
+import zlib
+from datetime import datetime, timedelta
+
+
+ARCHIVE_DIR = "archives"
+BLOCK_ROWS = 256  # Lignes par bloc compressé
+
+# Colonnes conservées dans les archives (ajouts en fin de liste: absentes des anciens segments)
+ARCHIVE_COLUMNS = ('id', 'text', 'timestamp', 'has_emergency', 'emergency_words',
+                   'audio_level', 'word_count', 'redecoded_text', 'redecoded_model', 'original_text',
+                   'session_id', 'words')  # words: horodatage des mots [{word, start, end, conf}] ou None
+
+
+class TranscriptionArchive:
+    """Segments d'archive mensuels en lecture seule"""
+
+    def __init__(self, archive_dir=ARCHIVE_DIR, block_rows=BLOCK_ROWS, compression_level=6):
+        self.archive_dir = archive_dir
+        self.block_rows = block_rows
+        self.compression_level = compression_level
+        self._lock = threading.Lock()
+        self._segments = []  # Index des segments, triés du plus ancien au plus récent
+
+        os.makedirs(self.archive_dir, exist_ok=True)
+        self._load_indexes()
+
+    def _load_indexes(self):
+        """Charger les index de tous les segments présents sur disque"""
+        segments = []
+        for name in sorted(os.listdir(self.archive_dir)):
+            if not name.endswith('.idx.json'):
+                continue
+            try:
+                with open(os.path.join(self.archive_dir, name), 'r') as f:
+                    segments.append(json.load(f))
+            except Exception as e:
+                print(f"Index d'archive illisible ({name}): {e}")
+        segments.sort(key=lambda seg: (seg['min_ts'], seg['name']))
+        with self._lock:
+            self._segments = segments
+
+    def _snapshot(self):
+        """Copie de la liste des segments (les segments eux-mêmes sont immuables)"""
+        with self._lock:
+            return list(self._segments)
+
+    def get_archived_max_id(self, month):
+        """Plus grand id déjà archivé pour un mois (0 si aucun segment)"""
+        return max((seg['max_id'] for seg in self._snapshot() if seg['month'] == month), default=0)
+
+    # --- Écriture ---
+
+    def write_segment(self, month, rows):
+        """Écrire un nouveau segment immuable pour un mois (rows triées par id)"""
+        if not rows:
+            return None
+
+        with self._lock:
+            existing = [seg for seg in self._segments if seg['month'] == month]
+        name = f"{month}.{len(existing):03d}"
+        data_path = os.path.join(self.archive_dir, name + '.seg')
+        index_path = os.path.join(self.archive_dir, name + '.idx.json')
+
+        blocks = []
+        offset = 0
+        tmp_data_path = data_path + '.tmp'
+        with open(tmp_data_path, 'wb') as f:
+            for start in range(0, len(rows), self.block_rows):
+                chunk = rows[start:start + self.block_rows]
+                payload = '\n'.join(
+                    json.dumps([row.get(col) for col in ARCHIVE_COLUMNS], ensure_ascii=False)
+                    for row in chunk
+                ).encode('utf-8')
+                compressed = zlib.compress(payload, self.compression_level)
+                f.write(compressed)
+
+                # Agrégats par bloc: les statistiques se calculent sans décompresser
+                blocks.append({
+                    'offset': offset,
+                    'length': len(compressed),
+                    'rows': len(chunk),
+                    'min_id': chunk[0]['id'],
+                    'max_id': chunk[-1]['id'],
+                    'min_ts': min(row['timestamp'] for row in chunk),
+                    'max_ts': max(row['timestamp'] for row in chunk),
+                    'words': sum(row['word_count'] or 0 for row in chunk),
+                    'audio_level_sum': sum(row['audio_level'] or 0 for row in chunk),
+                    'emergency_count': sum(1 for row in chunk if row['has_emergency']),
+                    'sessions': sorted({row['session_id'] for row in chunk if row.get('session_id') is not None})
+                })
+                offset += len(compressed)
+            f.flush()
+            os.fsync(f.fileno())
+
+        segment = {
+            'name': name,
+            'month': month,
+            'rows': len(rows),
+            'bytes': offset,
+            'min_id': blocks[0]['min_id'],
+            'max_id': blocks[-1]['max_id'],
+            'min_ts': min(block['min_ts'] for block in blocks),
+            'max_ts': max(block['max_ts'] for block in blocks),
+            'created': datetime.now().isoformat(),
+            'blocks': blocks
+        }
+
+        # Index écrit en dernier: un segment sans index est ignoré (écriture interrompue)
+        os.replace(tmp_data_path, data_path)
+        tmp_index_path = index_path + '.tmp'
+        with open(tmp_index_path, 'w') as f:
+            json.dump(segment, f)
+        os.replace(tmp_index_path, index_path)
+
+        with self._lock:
+            self._segments.append(segment)
+            self._segments.sort(key=lambda seg: (seg['min_ts'], seg['name']))
+        return segment
+
+    def delete_segments_before(self, timestamp):
+        """Supprimer les segments entièrement plus anciens que timestamp"""
+        deleted_rows = 0
+        for segment in self._snapshot():
+            if segment['max_ts'] >= timestamp:
+                continue
+            with self._lock:
+                self._segments.remove(segment)
+            for suffix in ('.idx.json', '.seg'):
+                try:
+                    os.remove(os.path.join(self.archive_dir, segment['name'] + suffix))
+                except OSError:
+                    pass
+            deleted_rows += segment['rows']
+        return deleted_rows
+
+    # --- Lecture ---
+
+    def _read_block(self, segment, block):
+        """Décompresser un bloc et renvoyer ses lignes sous forme de dicts"""
+        with open(os.path.join(self.archive_dir, segment['name'] + '.seg'), 'rb') as f:
+            f.seek(block['offset'])
+            payload = zlib.decompress(f.read(block['length'])).decode('utf-8')
+        rows = []
+        for line in payload.split('\n'):
+            row = dict.fromkeys(ARCHIVE_COLUMNS)  # Colonnes récentes à None pour les anciens segments
+            row.update(zip(ARCHIVE_COLUMNS, json.loads(line)))
+            rows.append(row)
+        return rows
+
+    def _iter_rows_newest_first(self, start_ts=None, end_ts=None):
+        """Parcourir les lignes (plus récentes d'abord) des blocs qui chevauchent l'intervalle"""
+        for segment in reversed(self._snapshot()):
+            if (start_ts and segment['max_ts'] < start_ts) or (end_ts and segment['min_ts'] >= end_ts):
+                continue
+            for block in reversed(segment['blocks']):
+                if (start_ts and block['max_ts'] < start_ts) or (end_ts and block['min_ts'] >= end_ts):
+                    continue
+                for row in reversed(self._read_block(segment, block)):
+                    if (start_ts and row['timestamp'] < start_ts) or (end_ts and row['timestamp'] >= end_ts):
+                        continue
+                    yield row
+
+    def _iter_segment_by_id_desc(self, segment, before_id=None):
+        for block in reversed(segment['blocks']):
+            if before_id is not None and block['min_id'] >= before_id:
+                continue
+            for row in reversed(self._read_block(segment, block)):
+                if before_id is None or row['id'] < before_id:
+                    yield row
+
+    def _iter_rows_by_id_desc(self, before_id=None):
+        """Parcourir les lignes par id décroissant (pagination), blocs déjà dépassés sautés"""
+        segments = [seg for seg in self._snapshot() if before_id is None or seg['min_id'] < before_id]
+        # Fusion: les plages d'id de deux segments peuvent se chevaucher (horloge revenue en arrière)
+        return heapq.merge(*(self._iter_segment_by_id_desc(seg, before_id) for seg in segments),
+                           key=lambda row: row['id'], reverse=True)
+
+    def get_row(self, transcription_id):
+        """Transcription archivée par id (None si absente)"""
+        for segment in self._snapshot():
+            if not segment['min_id'] <= transcription_id <= segment['max_id']:
+                continue
+            for block in segment['blocks']:
+                if block['min_id'] <= transcription_id <= block['max_id']:
+                    for row in self._read_block(segment, block):
+                        if row['id'] == transcription_id:
+                            return row
+        return None
+
+    def get_session_rows(self, session_id):
+        """Transcriptions archivées d'une session (blocs choisis par leur index), triées par id"""
+        rows = []
+        for segment in self._snapshot():
+            for block in segment['blocks']:
+                if session_id in block.get('sessions', ()):
+                    rows.extend(row for row in self._read_block(segment, block) if row['session_id'] == session_id)
+        rows.sort(key=lambda row: row['id'])
+        return rows
+
+    def query_range(self, start_ts=None, end_ts=None, limit=None, before_id=None):
+        """Transcriptions archivées dans [start_ts, end_ts), plus récentes d'abord
+
+        Sans intervalle (pagination de l'historique), l'ordre est celui des id, comme dans la base chaude.
+        """
+        results = []
+        if start_ts is None and end_ts is None:
+            rows = self._iter_rows_by_id_desc(before_id)
+        else:
+            rows = self._iter_rows_newest_first(start_ts, end_ts)
+        for row in rows:
+            if before_id is not None and row['id'] >= before_id:
+                continue
+            results.append(row)
+            if limit is not None and len(results) >= limit:
+                break
+        return results
+
+    def search(self, query, limit=50):
+        """Recherche insensible à la casse dans les archives (comme LIKE %query%)"""
+        needle = query.lower()
+        results = []
+        for row in self._iter_rows_newest_first():
+            if needle in row['text'].lower():
+                results.append(row)
+                if len(results) >= limit:
+                    break
+        return results
+
+    def get_statistics(self, since_ts):
+        """Agrégats depuis since_ts (blocs entiers lus depuis l'index)"""
+        totals = {'rows': 0, 'words': 0, 'audio_level_sum': 0, 'emergency_count': 0}
+        for segment in self._snapshot():
+            if segment['max_ts'] < since_ts:
+                continue
+            for block in segment['blocks']:
+                if block['max_ts'] < since_ts:
+                    continue
+                if block['min_ts'] >= since_ts:
+                    for key in totals:
+                        totals[key] += block[key]
+                    continue
+                # Bloc à cheval sur la borne: décompresser
+                for row in self._read_block(segment, block):
+                    if row['timestamp'] >= since_ts:
+                        totals['rows'] += 1
+                        totals['words'] += row['word_count'] or 0
+                        totals['audio_level_sum'] += row['audio_level'] or 0
+                        totals['emergency_count'] += 1 if row['has_emergency'] else 0
+        return totals
+
+    def get_total_count(self):
+        """Nombre de transcriptions archivées"""
+        return sum(segment['rows'] for segment in self._snapshot())
+
+    def get_status(self):
+        """Résumé des archives"""
+        segments = self._snapshot()
+        return {
+            'segments': len(segments),
+            'rows': sum(segment['rows'] for segment in segments),
+            'bytes': sum(segment['bytes'] for segment in segments),
+            'oldest': segments[0]['min_ts'] if segments else None,
+            'newest': segments[-1]['max_ts'] if segments else None
+        }
+
+
+def archive_old_transcriptions(db, archive, after_days=30, batch_size=500, pause=0.05):
+    """Déplacer les mois complets plus anciens que after_days vers les archives"""
+    # Seuls les mois entièrement révolus sont archivés (un segment par mois)
+    cutoff_day = datetime.utcnow() - timedelta(days=after_days)
+    cutoff = cutoff_day.strftime('%Y-%m-01 00:00:00')
+
+    archived = 0
+    for month in db.get_months_before(cutoff):
+        rows = db.get_transcriptions_for_month(month)
+        if not rows:
+            continue
+        # Lignes déjà dans un segment (arrêt entre l'écriture et la suppression): ne pas les dupliquer
+        archived_max_id = archive.get_archived_max_id(month)
+        pending = [row for row in rows if row['id'] > archived_max_id]
+        if pending:
+            archive.write_segment(month, pending)
+
+        # Supprimer du stock chaud uniquement ce qui est archivé
+        archived += db.delete_month_up_to_id(month, rows[-1]['id'],
+                                             batch_size=batch_size, pause=pause)
+        if len(pending) < len(rows):
+            print(f"📦 Archive {month}: {len(rows) - len(pending)} transcriptions déjà archivées, supprimées")
+        if pending:
+            print(f"📦 Archive {month}: {len(pending)} transcriptions")
+    return archived
+
+
+# Instance globale
+_archive_instance = None
+
+
+def get_archive(archive_dir=ARCHIVE_DIR):
+    """Obtenir l'instance des archives"""
+    global _archive_instance
+    if _archive_instance is None:
+        _archive_instance = TranscriptionArchive(archive_dir)
+    return _archive_instance
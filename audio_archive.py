@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""
+Module d'archivage audio des segments de parole (optionnel)
+Fichiers de segments en ajout seul (PCM compressé zlib) + index SQLite
+"""
+
+import io
+import mmap
+import os
+import queue
+import sqlite3
+import threading
+import time
+import wave
+import zlib
+from contextlib import contextmanager
+
+from resource_manager import get_resource_manager
+
+
+AUDIO_ARCHIVE_DIR = "audio_archive"
+
+
+class AudioSegmentArchiver:
+    """Écrit les segments de parole sur disque, hors du thread de reconnaissance"""
+
+    def __init__(self, archive_dir=AUDIO_ARCHIVE_DIR, max_bytes=500 * 1024 * 1024,
+                 segment_file_bytes=16 * 1024 * 1024, sample_rate=16000,
+                 queue_size=64, compression_level=6):
+        self.archive_dir = archive_dir
+        self.max_bytes = max_bytes
+        self.segment_file_bytes = segment_file_bytes
+        self.sample_rate = sample_rate
+        self.compression_level = compression_level
+
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._thread = None
+        self._stop_event = threading.Event()
+        self._maps_lock = threading.Lock()
+        self._maps = {}  # Fichier -> mmap (lecture)
+
+        self.dropped_segments = 0
+        self.written_segments = 0
+
+        os.makedirs(self.archive_dir, exist_ok=True)
+        self.index_path = os.path.join(self.archive_dir, 'index.db')
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS segments (
+                    transcription_id INTEGER PRIMARY KEY,
+                    file TEXT NOT NULL,
+                    offset INTEGER NOT NULL,
+                    length INTEGER NOT NULL,
+                    samples INTEGER NOT NULL,
+                    created REAL NOT NULL,
+                    redecoded INTEGER DEFAULT 0
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_segments_file ON segments(file)")
+
+            # Migration des index créés avant le ré-décodage
+            columns = [row['name'] for row in conn.execute("PRAGMA table_info(segments)")]
+            if 'redecoded' not in columns:
+                conn.execute("ALTER TABLE segments ADD COLUMN redecoded INTEGER DEFAULT 0")
+
+    @contextmanager
+    def _connect(self):
+        """Connexion à l'index (une par appel, l'index est peu sollicité)"""
+        conn = sqlite3.connect(self.index_path, timeout=5)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+            conn.commit()
+        finally:
+            conn.close()
+
+    # --- Écriture (thread dédié) ---
+
+    def start(self):
+        """Démarrer le thread d'écriture"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._writer_loop, name='audio-archive', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Arrêter le thread d'écriture (les segments en attente sont écrits)"""
+        self._stop_event.set()
+
+    def submit(self, transcription_id, pcm_bytes):
+        """Confier un segment au thread d'écriture (ne bloque jamais)"""
+        if not pcm_bytes:
+            return False
+        try:
+            self._queue.put_nowait((transcription_id, pcm_bytes))
+            return True
+        except queue.Full:
+            self.dropped_segments += 1
+            return False
+
+    def _writer_loop(self):
+        """Vider la queue par lots: compression, ajout en fin de fichier, index"""
+        get_resource_manager().configure_thread('background')
+        while not (self._stop_event.is_set() and self._queue.empty()):
+            try:
+                batch = [self._queue.get(timeout=1)]
+            except queue.Empty:
+                continue
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            try:
+                self._write_batch(batch)
+                self._enforce_quota()
+            except Exception as e:
+                print(f"Erreur d'archivage audio: {e}")
+
+    def _current_file(self):
+        """Fichier de segments courant (rotation au-delà de segment_file_bytes)"""
+        files = self._segment_files()
+        if files:
+            path = os.path.join(self.archive_dir, files[-1])
+            if os.path.getsize(path) < self.segment_file_bytes:
+                return files[-1]
+            number = int(files[-1][4:10]) + 1
+        else:
+            number = 1
+        return f"seg_{number:06d}.bin"
+
+    def _segment_files(self):
+        """Fichiers de segments, du plus ancien au plus récent"""
+        return sorted(name for name in os.listdir(self.archive_dir)
+                      if name.startswith('seg_') and name.endswith('.bin'))
+
+    def _write_batch(self, batch):
+        """Écrire un lot puis l'indexer (l'index ne pointe que vers des données écrites)"""
+        name = self._current_file()
+        path = os.path.join(self.archive_dir, name)
+        entries = []
+        with open(path, 'ab') as f:
+            offset = f.tell()
+            for transcription_id, pcm_bytes in batch:
+                compressed = zlib.compress(pcm_bytes, self.compression_level)
+                f.write(compressed)
+                entries.append((transcription_id, name, offset, len(compressed),
+                                len(pcm_bytes) // 2, time.time()))
+                offset += len(compressed)
+            f.flush()
+            os.fsync(f.fileno())
+
+        with self._connect() as conn:
+            conn.executemany("""
+                INSERT OR REPLACE INTO segments
+                (transcription_id, file, offset, length, samples, created)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, entries)
+        self.written_segments += len(entries)
+
+    def _enforce_quota(self):
+        """Supprimer les fichiers les plus anciens tant que le quota est dépassé"""
+        files = self._segment_files()
+        total = sum(os.path.getsize(os.path.join(self.archive_dir, name)) for name in files)
+        # Le fichier courant n'est jamais supprimé
+        for name in files[:-1]:
+            if total <= self.max_bytes:
+                break
+            path = os.path.join(self.archive_dir, name)
+            total -= os.path.getsize(path)
+            with self._connect() as conn:
+                conn.execute("DELETE FROM segments WHERE file = ?", (name,))
+            with self._maps_lock:
+                mapped = self._maps.pop(name, None)
+                if mapped is not None:
+                    mapped.close()
+                os.remove(path)
+
+    # --- Lecture ---
+
+    def _get_map(self, name, end):
+        """mmap en lecture d'un fichier de segments (re-mappé si le fichier a grandi)"""
+        mapped = self._maps.get(name)
+        if mapped is None or len(mapped) < end:
+            if mapped is not None:
+                mapped.close()
+            with open(os.path.join(self.archive_dir, name), 'rb') as f:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self._maps[name] = mapped
+        return mapped
+
+    def get_audio(self, transcription_id):
+        """PCM int16 mono d'une transcription (None si absent ou évincé)"""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT file, offset, length FROM segments WHERE transcription_id = ?",
+                (transcription_id,)
+            ).fetchone()
+        if row is None:
+            return None
+
+        with self._maps_lock:
+            try:
+                mapped = self._get_map(row['file'], row['offset'] + row['length'])
+            except (OSError, ValueError):
+                return None
+            compressed = mapped[row['offset']:row['offset'] + row['length']]
+        return zlib.decompress(compressed)
+
+    def get_pending_redecode(self, limit=10):
+        """Segments pas encore ré-décodés (plus anciens d'abord)"""
+        with self._connect() as conn:
+            rows = conn.execute("""
+                SELECT transcription_id, samples FROM segments
+                WHERE redecoded = 0
+                ORDER BY transcription_id
+                LIMIT ?
+            """, (limit,)).fetchall()
+        return [dict(row) for row in rows]
+
+    def mark_redecoded(self, transcription_id):
+        """Marquer un segment comme ré-décodé"""
+        with self._connect() as conn:
+            conn.execute("UPDATE segments SET redecoded = 1 WHERE transcription_id = ?",
+                         (transcription_id,))
+
+    def get_wav(self, transcription_id):
+        """Segment au format WAV (pour la réécoute)"""
+        pcm = self.get_audio(transcription_id)
+        if pcm is None:
+            return None
+        buffer = io.BytesIO()
+        with wave.open(buffer, 'wb') as wav:
+            wav.setnchannels(1)
+            wav.setsampwidth(2)
+            wav.setframerate(self.sample_rate)
+            wav.writeframes(pcm)
+        return buffer.getvalue()
+
+    def get_status(self):
+        """État de l'archive audio"""
+        files = self._segment_files()
+        with self._connect() as conn:
+            row = conn.execute("SELECT COUNT(*) AS count, COALESCE(SUM(samples), 0) AS samples FROM segments").fetchone()
+        return {
+            'segments': row['count'],
+            'audio_seconds': round(row['samples'] / self.sample_rate, 1),
+            'files': len(files),
+            'bytes': sum(os.path.getsize(os.path.join(self.archive_dir, name)) for name in files),
+            'max_bytes': self.max_bytes,
+            'pending': self._queue.qsize(),
+            'written': self.written_segments,
+            'dropped': self.dropped_segments
+        }
+
+
+# Instance globale
+_audio_archiver_instance = None
+
+
+def get_audio_archiver(archive_dir=AUDIO_ARCHIVE_DIR, **kwargs):
+    """Obtenir l'instance de l'archive audio (démarrée au premier appel)"""
+    global _audio_archiver_instance
+    if _audio_archiver_instance is None:
+        _audio_archiver_instance = AudioSegmentArchiver(archive_dir, **kwargs)
+        _audio_archiver_instance.start()
+    return _audio_archiver_instance
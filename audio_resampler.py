@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Module de conversion de l'audio capturé au format du modèle (16 kHz mono int16)
+Le micro est ouvert à sa fréquence et son nombre de canaux natifs (beaucoup de micros USB
+n'acceptent que 44,1/48 kHz ou la stéréo): mélange des canaux puis rééchantillonnage par un
+filtre polyphase précalculé, appliqué bloc par bloc avec NumPy en conservant l'état entre blocs.
+Évite la couche « plug » d'ALSA (conversion coûteuse) ou l'échec d'ouverture du flux.
+"""
+
+from math import gcd
+
+import numpy as np
+
+DEFAULT_TAPS = 96        # Coefficients par échantillon de sortie (qualité / coût)
+ROLLOFF = 0.92           # Fréquence de coupure / Nyquist de la fréquence la plus basse
+KAISER_BETA = 8.0        # ~80 dB d'atténuation hors bande
+
+
+def design_polyphase_filter(up, down, taps=DEFAULT_TAPS, rolloff=ROLLOFF, beta=KAISER_BETA):
+    """Filtre passe-bas (sinus cardinal fenêtré) découpé en `up` phases de `taps` coefficients"""
+    length = up * taps
+    # Coupure relative à la fréquence suréchantillonnée (entrée x up)
+    cutoff = rolloff * 0.5 / max(up, down)
+    n = np.arange(length) - (length - 1) / 2
+    prototype = 2 * cutoff * np.sinc(2 * cutoff * n) * np.kaiser(length, beta)
+    prototype *= up / prototype.sum()  # Gain unitaire après insertion des zéros
+    # bank[phase, j] = prototype[phase + j * up]
+    return prototype.reshape(taps, up).T.astype(np.float32).copy()
+
+
+def downmix(samples, channels):
+    """Moyenne des canaux d'un bloc entrelacé (int16) -> float32 mono"""
+    if channels == 1:
+        return samples.astype(np.float32)
+    return samples.reshape(-1, channels).mean(axis=1, dtype=np.float32)
+
+
+class PolyphaseResampler:
+    """Rééchantillonnage rationnel in_rate -> out_rate, bloc par bloc (état conservé entre blocs)"""
+
+    def __init__(self, in_rate, out_rate, taps=DEFAULT_TAPS):
+        divisor = gcd(in_rate, out_rate)
+        self.in_rate = in_rate
+        self.out_rate = out_rate
+        self.up = out_rate // divisor
+        self.down = in_rate // divisor
+        self.taps = taps
+        self.bank = design_polyphase_filter(self.up, self.down, taps)
+        self._offsets = np.arange(taps)
+        self.reset()
+
+    def reset(self):
+        """Oublier l'historique (nouveau flux)"""
+        self._history = np.zeros(self.taps - 1, dtype=np.float32)
+        # Position de la prochaine sortie, en échantillons suréchantillonnés depuis le début de l'historique
+        self._position = (self.taps - 1) * self.up
+
+    def process(self, samples):
+        """float32 mono à in_rate -> float32 mono à out_rate (longueur variable selon la phase)"""
+        x = np.concatenate((self._history, samples))
+        up, down = self.up, self.down
+        last = len(x) * up - 1  # Dernière position dont l'échantillon d'entrée est disponible
+        count = (last - self._position) // down + 1 if last >= self._position else 0
+
+        positions = self._position + np.arange(count) * down
+        base = positions // up
+        phase = positions % up
+        # Fenêtre de `taps` échantillons d'entrée par sortie, pondérée par la phase correspondante
+        windows = x[base[:, None] - self._offsets]
+        output = np.einsum('ij,ij->i', windows, self.bank[phase])
+
+        # État: les taps-1 derniers échantillons, position ramenée au nouvel historique
+        keep = self.taps - 1
+        drop = len(x) - keep
+        self._history = x[drop:].copy()
+        self._position += count * down - drop * up
+        return output
+
+
+class CaptureConverter:
+    """Audio capturé (fréquence et canaux du micro) -> int16 mono à la fréquence du modèle"""
+
+    def __init__(self, capture_rate, channels, target_rate, taps=DEFAULT_TAPS):
+        self.capture_rate = capture_rate
+        self.channels = channels
+        self.target_rate = target_rate
+        self.passthrough = capture_rate == target_rate and channels == 1
+        self.resampler = PolyphaseResampler(capture_rate, target_rate, taps) \
+            if capture_rate != target_rate else None
+
+    def capture_blocksize(self, block_size):
+        """Trames à demander au micro pour des blocs de même durée que le traitement"""
+        return max(1, round(block_size * self.capture_rate / self.target_rate))
+
+    def convert(self, data):
+        """bytes int16 entrelacés -> bytes int16 mono à target_rate"""
+        if self.passthrough:
+            return data
+        samples = downmix(np.frombuffer(data, dtype=np.int16), self.channels)
+        if self.resampler is not None:
+            samples = self.resampler.process(samples)
+        return np.clip(np.rint(samples), -32768, 32767).astype(np.int16).tobytes()
+
+    def describe(self):
+        if self.passthrough:
+            return f"{self.target_rate} Hz mono"
+        return (f"{self.capture_rate} Hz x {self.channels} canal(aux) -> {self.target_rate} Hz mono"
+                + (f" (polyphase {self.resampler.up}/{self.resampler.down}, {self.resampler.taps} coefficients)"
+                   if self.resampler else ""))
+
+
+def capture_device(audio_config=None):
+    """Périphérique d'entrée de la section audio (index ou nom, None: périphérique par défaut)"""
+    device = (audio_config or {}).get('device')
+    return int(device) if isinstance(device, str) and device.isdigit() else device
+
+
+def negotiate_capture(target_rate, audio_config=None, device=None):
+    """Fréquence et canaux natifs du micro (ou imposés par la section audio), retourne un CaptureConverter"""
+    import sounddevice as sd
+
+    audio_config = audio_config or {}
+    capture_rate = audio_config.get('capture_rate')
+    channels = audio_config.get('channels')
+    taps = audio_config.get('resample_taps') or DEFAULT_TAPS
+
+    if capture_rate is None or channels is None:
+        try:
+            info = sd.query_devices(device, kind='input')
+        except Exception as e:
+            print(f"⚠️  Micro non interrogeable ({e}), capture à {target_rate} Hz mono")
+            info = {'default_samplerate': target_rate, 'max_input_channels': 1}
+        if capture_rate is None:
+            # Fréquence par défaut du périphérique: celle que la couche plug d'ALSA n'a pas à convertir
+            capture_rate = int(info['default_samplerate'])
+        if channels is None:
+            channels = 1 if _accepts(sd, device, capture_rate, 1) else max(1, int(info['max_input_channels']))
+    return CaptureConverter(capture_rate, channels, target_rate, taps)
+
+
+def _accepts(sd, device, rate, channels):
+    try:
+        sd.check_input_settings(device=device, samplerate=rate, channels=channels, dtype='int16')
+        return True
+    except Exception:
+        return False
@@ -1,24 +1,54 @@
 #!/usr/bin/env python3
+import threading
 import numpy as np
+import psutil
 import webrtcvad
-import noisereduce as nr
 from collections import deque
 
+from emergency_rules import EmergencyRuleEngine, RULES_FILE, SEVERITY_LEVELS
+from resource_manager import get_resource_manager
+
+# noisereduce (et scipy/librosa) importé à la première réduction de bruit seulement
+nr = None
+
+
+def load_noisereduce():
+    """Importer noisereduce à la demande (ImportError si absent)"""
+    global nr
+    if nr is None:
+        import noisereduce
+        nr = noisereduce
+    return nr
+
 
 class VoiceActivityDetector:
-    def __init__(self, sample_rate=16000, aggressiveness=2):
+    def __init__(self, sample_rate=16000, aggressiveness=2, speech_ratio=0.5):
         self.vad = webrtcvad.Vad(aggressiveness)
+        self.aggressiveness = aggressiveness
         self.sample_rate = sample_rate
         self.frame_duration_ms = 30
         self.frame_size = int(sample_rate * self.frame_duration_ms / 1000)
+        self.speech_ratio = speech_ratio  # Part des trames de 30ms qui doivent être de la parole
 
     def is_speech(self, audio_data):
+        """Vote des trames de 30ms du bloc (webrtcvad n'accepte que 10/20/30ms)"""
+        frame_bytes = self.frame_size * 2
+        n_frames = len(audio_data) // frame_bytes
+        if n_frames == 0:
+            return True
         try:
-            if len(audio_data) != self.frame_size * 2:
-                return True
-            return self.vad.is_speech(audio_data, self.sample_rate)
+            votes = sum(
+                self.vad.is_speech(audio_data[i * frame_bytes:(i + 1) * frame_bytes], self.sample_rate)
+                for i in range(n_frames)
+            )
         except Exception:
             return True
+        return votes >= self.speech_ratio * n_frames
+
+    def set_aggressiveness(self, aggressiveness):
+        """Changer le filtrage (0 = laisse passer, 3 = ne garde que la parole nette)"""
+        self.vad.set_mode(aggressiveness)
+        self.aggressiveness = aggressiveness
 
 
 class NoiseReducer:
@@ -27,6 +57,18 @@ class NoiseReducer:
         self.noise_profile = None
         self.calibration_frames = deque(maxlen=10)
         self.is_calibrated = False
+        self.available = None  # None: noisereduce pas encore importé
+
+    def load_backend(self):
+        """Importer noisereduce (une seule tentative), retourne False s'il est absent"""
+        if self.available is None:
+            try:
+                load_noisereduce()
+                self.available = True
+            except ImportError as e:
+                print(f"⚠️  Réduction de bruit non disponible: {e}")
+                self.available = False
+        return self.available
 
     def calibrate(self, audio_data):
         audio_float = self._bytes_to_float(audio_data)
@@ -40,12 +82,24 @@ class NoiseReducer:
             if not self.is_calibrated:
                 self.calibrate(audio_data)
                 return audio_data
+            if not self.load_backend():
+                return audio_data
             audio_float = self._bytes_to_float(audio_data)
             reduced = nr.reduce_noise(y=audio_float, sr=self.sample_rate, stationary=True, prop_decrease=0.8)
             return self._float_to_bytes(reduced)
         except Exception:
             return audio_data
 
+    def memory_estimate(self):
+        """Profil de bruit et trames de calibration (MB), noisereduce importé ou non"""
+        arrays = list(self.calibration_frames)
+        if self.noise_profile is not None:
+            arrays.append(self.noise_profile)
+        return {
+            'backend_loaded': bool(self.available),
+            'buffers_mb': round(sum(a.nbytes for a in arrays) / 1024 / 1024, 3)
+        }
+
     def _bytes_to_float(self, audio_bytes):
         audio_int16 = np.frombuffer(audio_bytes, dtype=np.int16)
         return audio_int16.astype(np.float32) / 32768.0
@@ -78,21 +132,50 @@ class SmartPunctuator:
     def __init__(self):
         self.model = None
         self._model_loaded = False
+        self._load_lock = threading.Lock()
+        self.load_rss_delta_mb = None  # Mémoire résidente prise par le chargement (torch + modèle)
+        self._parameters_mb = None
 
-    def _load_model(self):
+    def _load_model(self, wait=True):
         """Lazy loading du modèle ML (uniquement si nécessaire)"""
-        if self._model_loaded:
+        # Chargement déjà en cours (préchargement en arrière-plan): ne pas bloquer le décodeur
+        if not self._load_lock.acquire(blocking=wait):
             return
+        try:
+            if not self._model_loaded:
+                self._load_model_locked()
+        finally:
+            self._load_lock.release()
+
+    def _load_model_locked(self):
         try:
             from deepmultilingualpunctuation import PunctuationModel
             print("📥 Chargement du modèle de ponctuation ML...")
+            rss_before = psutil.Process().memory_info().rss
             self.model = PunctuationModel()
-            print("✅ Modèle de ponctuation chargé")
+            get_resource_manager().limit_torch_threads()
+            self.load_rss_delta_mb = round((psutil.Process().memory_info().rss - rss_before) / 1024 / 1024, 1)
+            print(f"✅ Modèle de ponctuation chargé (+{self.load_rss_delta_mb} MB résidents)")
         except Exception as e:
             print(f"⚠️  Modèle de ponctuation ML non disponible: {e}")
             self.model = None
         self._model_loaded = True
 
+    def memory_estimate(self):
+        """Paramètres torch du modèle (MB) et mémoire résidente mesurée au chargement"""
+        if self._parameters_mb is None and self.model is not None:
+            try:
+                model = self.model.pipe.model
+                self._parameters_mb = round(sum(p.numel() * p.element_size() for p in model.parameters())
+                                            / 1024 / 1024, 1)
+            except Exception:
+                pass
+        return {
+            'loaded': self.model is not None,
+            'parameters_mb': self._parameters_mb,
+            'load_rss_delta_mb': self.load_rss_delta_mb
+        }
+
     def add_punctuation(self, text):
         """Ponctuation ML avancée (gourmande en CPU)"""
         if not text or not text.strip():
@@ -100,7 +183,7 @@ class SmartPunctuator:
 
         # Charger le modèle seulement si nécessaire
         if not self._model_loaded:
-            self._load_model()
+            self._load_model(wait=False)
 
         if self.model is None:
             return self._basic_punctuation(text)
@@ -154,17 +237,27 @@ class EmergencyDetector:
         'tombé', 'tombée', 'chute', 'tombe'
     }
 
+    def __init__(self, rules_file=RULES_FILE):
+        # Les mots-clés historiques restent actifs si le fichier de règles est absent ou invalide
+        default_rules = [{'phrase': word, 'severity': 'high'} for word in sorted(self.EMERGENCY_KEYWORDS)]
+        self.rules = EmergencyRuleEngine(rules_file, default_rules=default_rules)
+
+    def find_matches(self, text):
+        """Toutes les règles trouvées en une passe: [{phrase, severity, start, end, text}]"""
+        return self.rules.find_matches(text)
+
     def check_emergency(self, text):
-        if not text:
-            return False
-        words = set(text.lower().split())
-        return bool(words & self.EMERGENCY_KEYWORDS)
+        return bool(self.find_matches(text))
 
     def get_emergency_words(self, text):
-        if not text:
-            return []
-        words = set(text.lower().split())
-        return list(words & self.EMERGENCY_KEYWORDS)
+        return list(dict.fromkeys(m['phrase'] for m in self.find_matches(text)))
+
+    @staticmethod
+    def max_severity(matches):
+        """Gravité la plus élevée d'une liste de correspondances (None si vide)"""
+        if not matches:
+            return None
+        return max((m['severity'] for m in matches), key=SEVERITY_LEVELS.get)
 
 
 def calculate_audio_stats(audio_data):
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Banc d'essai de la conversion de l'audio capturé (audio_resampler)
+- Hors ligne: coût CPU du mélange des canaux + rééchantillonnage polyphase par seconde d'audio,
+  réjection du repliement (ton entre 8 kHz et la moitié de la fréquence d'entrée) et niveau
+  d'un ton à 1 kHz
+- Avec --live: même durée de capture réelle, micro ouvert à 16 kHz mono (conversion par la couche
+  plug d'ALSA, dans le thread de PortAudio de ce processus) puis à sa fréquence native (conversion
+  par audio_resampler); le temps CPU du processus est comparé
+
+Usage:
+    python benchmark_resampling.py
+    python benchmark_resampling.py --rates 44100 48000 --channels 1 2 --taps 64 96 128
+    python benchmark_resampling.py --live --device hw:1,0 --plug-device plughw:1,0 --seconds 20
+"""
+
+import argparse
+import queue
+import time
+
+import numpy as np
+
+from audio_resampler import DEFAULT_TAPS, CaptureConverter, PolyphaseResampler, negotiate_capture
+
+TARGET_RATE = 16000
+BLOCK_SECONDS = 0.06  # Blocs de 60 ms, comme le moteur
+
+
+def _tone(rate, channels, seconds, frequency, amplitude=8000):
+    """Ton entrelacé int16 (même signal sur chaque canal)"""
+    t = np.arange(int(rate * seconds)) / rate
+    mono = (amplitude * np.sin(2 * np.pi * frequency * t)).astype(np.int16)
+    return np.repeat(mono, channels)
+
+
+def _convert_blocks(converter, samples, rate, channels):
+    """Conversion bloc par bloc, retourne (int16 mono, secondes CPU)"""
+    step = int(rate * BLOCK_SECONDS) * channels
+    blocks = [samples[i:i + step].tobytes() for i in range(0, len(samples), step)]
+    started = time.process_time()
+    output = b''.join(converter.convert(block) for block in blocks)
+    return np.frombuffer(output, dtype=np.int16), time.process_time() - started
+
+
+def _level_db(samples, reference):
+    rms = np.sqrt(np.mean(samples.astype(np.float64) ** 2)) if len(samples) else 0.0
+    return 20 * np.log10(max(rms, 1e-9) / reference)
+
+
+def run_offline(rates, channel_counts, taps_list, seconds):
+    print(f"⏱️  Conversion hors ligne ({seconds:.0f}s d'audio par mesure, blocs de {BLOCK_SECONDS * 1000:.0f} ms)")
+    print(f"  {'entrée':>16} {'coeff.':>6} {'CPU ms/s audio':>15} {'% coeur':>8} {'1 kHz':>8} {'repliement':>11}")
+    results = []
+    skip = TARGET_RATE // 10  # Régime transitoire du filtre
+    for rate in rates:
+        for channels in channel_counts:
+            for taps in taps_list:
+                converter = CaptureConverter(rate, channels, TARGET_RATE, taps)
+                tone, cpu = _convert_blocks(converter, _tone(rate, channels, seconds, 1000), rate, channels)
+                reference = 8000 / np.sqrt(2)
+                passband = _level_db(tone[skip:], reference)
+                aliasing = None
+                if rate > TARGET_RATE:
+                    # Ton entre 8 kHz et la moitié de la fréquence d'entrée, mesuré avant l'arrondi int16
+                    frequency = (TARGET_RATE / 2 + rate / 2) / 2
+                    resampler = PolyphaseResampler(rate, TARGET_RATE, taps)
+                    alias = resampler.process(_tone(rate, 1, 2, frequency).astype(np.float32))
+                    aliasing = _level_db(alias[skip:], reference)
+                ms_per_second = cpu * 1000 / seconds
+                results.append({'rate': rate, 'channels': channels, 'taps': taps,
+                                'cpu_ms_per_second': ms_per_second, 'passband_db': passband,
+                                'aliasing_db': aliasing})
+                label = f"{rate} Hz x {channels}"
+                alias_text = f"{aliasing:.1f} dB" if aliasing is not None else '-'
+                print(f"  {label:>16} {taps:>6} {ms_per_second:>15.2f} {ms_per_second / 10:>7.2f}% "
+                      f"{passband:>+7.2f}dB {alias_text:>11}")
+
+    try:
+        from scipy.signal import resample_poly
+    except ImportError:
+        return results
+    # Référence: scipy sur tout le signal d'un coup (sans état entre blocs, non utilisable en direct)
+    print("  Référence scipy.signal.resample_poly (signal entier):")
+    for rate in rates:
+        samples = _tone(rate, 1, seconds, 1000).astype(np.float32)
+        started = time.process_time()
+        resample_poly(samples, TARGET_RATE, rate)
+        cpu = time.process_time() - started
+        print(f"  {f'{rate} Hz x 1':>16} {'-':>6} {cpu * 1000 / seconds:>15.2f}")
+    return results
+
+
+def _measure_stream(sd, device, rate, channels, seconds, converter=None):
+    """Temps CPU du processus pendant `seconds` de capture (conversion incluse si converter)"""
+    blocks = queue.Queue()
+
+    def callback(indata, frames, time_info, status):
+        blocks.put(bytes(indata))
+
+    blocksize = int(rate * BLOCK_SECONDS)
+    with sd.RawInputStream(device=device, samplerate=rate, blocksize=blocksize, dtype='int16',
+                           channels=channels, callback=callback):
+        time.sleep(0.5)  # Ouverture du flux hors mesure
+        while not blocks.empty():
+            blocks.get_nowait()
+        started_cpu = time.process_time()
+        started = time.monotonic()
+        produced = 0
+        while time.monotonic() - started < seconds:
+            try:
+                data = blocks.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            if converter is not None:
+                data = converter.convert(data)
+            produced += len(data) // 2
+        cpu = time.process_time() - started_cpu
+    return cpu, produced
+
+
+def run_live(device, plug_device, seconds, taps):
+    import sounddevice as sd
+
+    converter = negotiate_capture(TARGET_RATE, {'resample_taps': taps}, device=device)
+    print(f"\n🎤 Capture réelle ({seconds:.0f}s par mode), périphérique {device or 'par défaut'}")
+    print(f"  Format natif: {converter.describe()}")
+
+    rows = []
+    try:
+        cpu, produced = _measure_stream(sd, plug_device, TARGET_RATE, 1, seconds)
+        rows.append(('ALSA plug (16 kHz mono demandé)', cpu, produced))
+    except Exception as e:
+        print(f"  ❌ Ouverture à 16 kHz mono refusée ({e}): la conversion logicielle est indispensable")
+    cpu, produced = _measure_stream(sd, device, converter.capture_rate, converter.channels, seconds, converter)
+    rows.append(('natif + audio_resampler', cpu, produced))
+
+    for name, cpu, produced in rows:
+        print(f"  {name:<34} CPU {cpu * 1000 / seconds:7.2f} ms/s ({cpu * 100 / seconds:5.2f}% d'un coeur), "
+              f"{produced / seconds:.0f} échantillons/s produits")
+    if len(rows) == 2 and rows[1][1] > 0:
+        print(f"  Rapport plug / natif: {rows[0][1] / rows[1][1]:.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Coût CPU de la conversion de l'audio capturé vers 16 kHz mono")
+    parser.add_argument('--rates', type=int, nargs='+', default=[44100, 48000, 32000, 22050])
+    parser.add_argument('--channels', type=int, nargs='+', default=[1, 2])
+    parser.add_argument('--taps', type=int, nargs='+', default=[DEFAULT_TAPS])
+    parser.add_argument('--seconds', type=float, default=30.0)
+    parser.add_argument('--live', action='store_true', help="Comparer avec la conversion par ALSA (micro requis)")
+    parser.add_argument('--device', default=None, help="Périphérique d'entrée (ex: hw:1,0 pour éviter plug)")
+    parser.add_argument('--plug-device', default=None, help="Périphérique converti par ALSA (ex: plughw:1,0)")
+    args = parser.parse_args()
+
+    run_offline(args.rates, args.channels, args.taps, args.seconds)
+    if args.live:
+        device, plug_device = (int(name) if name and name.isdigit() else name
+                               for name in (args.device, args.plug_device or args.device))
+        run_live(device, plug_device, args.seconds, args.taps[0])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,864 @@
+#!/usr/bin/env python3
+"""
+Mode multi-processus: plusieurs processus web et plusieurs moteurs de reconnaissance
+Les processus partagent les événements Socket.IO par une file de messages (PubSubManager de
+python-socketio): un moteur émet une transcription, chaque processus web la transmet à ses clients.
+- Broker local intégré (local://127.0.0.1:5098, sans dépendance), ou redis://, amqp://... (kombu)
+- Flux audio (section "streams": un micro par flux) attribués aux moteurs de façon stable: un flux
+  reste à son moteur tant que celui-ci répond; seuls les flux orphelins ou nouveaux sont attribués
+- Un processus peut rejoindre le cluster à tout moment, sans redémarrer les autres
+
+Usage:
+    python cluster.py                      # Broker local, processus web et moteurs (section "cluster")
+    python cluster.py engine --name engine-2   # Moteur supplémentaire qui rejoint le cluster
+    python cluster.py web --index 2        # Processus web supplémentaire (port app.port + 2)
+    python cluster.py broker               # Broker local seul
+"""
+
+import argparse
+import json
+import os
+import queue
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+from urllib.parse import urlparse
+
+import psutil
+import socketio
+
+from app_config import ConfigError, derive_snapshot, get_config_store, load_section, section_defaults
+
+CONFIG_FILE = "config.json"
+WORKER_ENV = 'STT_CLUSTER_WORKER'   # Nom du processus web lancé par ce module (lu par app.py)
+CONTROL_NAMESPACE = '/cluster'      # Messages entre processus, jamais transmis aux clients
+RESTART_DELAY = 2.0                 # Secondes avant de relancer un processus du cluster arrêté
+
+# Valeurs par défaut, types et bornes: section "cluster" de app_config.SECTIONS
+DEFAULT_CLUSTER_POLICY = section_defaults('cluster')
+
+
+def load_cluster_policy(config_file=CONFIG_FILE):
+    """Politique du mode multi-processus (section "cluster" de config.json, validée au chargement)"""
+    return load_section('cluster', config_file)
+
+
+def _local_address(url):
+    parsed = urlparse(url)
+    return parsed.hostname or '127.0.0.1', parsed.port or 5098
+
+
+# --- Broker local ---
+
+class _Subscriber:
+    """Connexion abonnée: écriture dans son propre thread (un client lent ne bloque pas les autres)"""
+
+    def __init__(self, conn, queue_size):
+        self.conn = conn
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.dropped = 0
+        threading.Thread(target=self._write, name='broker-writer', daemon=True).start()
+
+    def push(self, line):
+        try:
+            self.queue.put_nowait(line)
+        except queue.Full:
+            self.dropped += 1
+
+    def _write(self):
+        while True:
+            line = self.queue.get()
+            if line is None:
+                return
+            try:
+                self.conn.sendall(line)
+            except OSError:
+                return
+
+    def close(self):
+        try:
+            self.queue.put_nowait(None)
+        except queue.Full:
+            pass
+
+
+class LocalBroker:
+    """Publication / abonnement sur une socket locale (lignes "SUB canal" et "PUB canal message")"""
+
+    def __init__(self, url=DEFAULT_CLUSTER_POLICY['message_queue'],
+                 queue_size=DEFAULT_CLUSTER_POLICY['broker_queue_size']):
+        self.address = _local_address(url)
+        self.queue_size = queue_size
+        self.subscribers = {}  # Canal -> set de _Subscriber
+        self._lock = threading.Lock()
+        self._server = None
+        self.connections = 0
+        self.published = 0
+        self.delivered = 0
+
+    def start(self):
+        """Écouter (OSError si l'adresse est prise, par exemple par un broker déjà lancé)"""
+        server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        server.bind(self.address)
+        server.listen(64)
+        self._server = server
+        threading.Thread(target=self._accept, name='broker', daemon=True).start()
+        print(f"📮 Broker local sur {self.address[0]}:{self.address[1]}")
+
+    def stop(self):
+        if self._server is not None:
+            self._server.close()
+            self._server = None
+
+    def _accept(self):
+        while self._server is not None:
+            try:
+                conn, _ = self._server.accept()
+            except OSError:
+                return
+            conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            threading.Thread(target=self._serve, args=(conn,), name='broker-client', daemon=True).start()
+
+    def _serve(self, conn):
+        with self._lock:
+            self.connections += 1
+        subscriber = None
+        channels = []
+        try:
+            for line in conn.makefile('rb'):
+                command, _, rest = line.partition(b' ')
+                if command == b'PUB':
+                    channel, _, _ = rest.partition(b' ')
+                    with self._lock:
+                        targets = list(self.subscribers.get(channel, ()))
+                        self.published += 1
+                        self.delivered += len(targets)
+                    for target in targets:
+                        target.push(line[4:])  # "canal message\n"
+                elif command == b'SUB':
+                    channel = rest.strip()
+                    subscriber = subscriber or _Subscriber(conn, self.queue_size)
+                    channels.append(channel)
+                    with self._lock:
+                        self.subscribers.setdefault(channel, set()).add(subscriber)
+        except OSError:
+            pass
+        finally:
+            with self._lock:
+                self.connections -= 1
+                for channel in channels:
+                    self.subscribers.get(channel, set()).discard(subscriber)
+            if subscriber is not None:
+                subscriber.close()
+            conn.close()
+
+    def get_status(self):
+        with self._lock:
+            subscribers = [s for group in self.subscribers.values() for s in group]
+            return {
+                'address': f"{self.address[0]}:{self.address[1]}",
+                'connections': self.connections,
+                'subscribers': len(subscribers),
+                'published': self.published,
+                'delivered': self.delivered,
+                'dropped': sum(s.dropped for s in subscribers)
+            }
+
+
+class LocalPubSubManager(socketio.PubSubManager):
+    """File de messages Socket.IO sur le broker local (même rôle que RedisManager ou KombuManager)"""
+
+    name = 'local'
+
+    def __init__(self, url=DEFAULT_CLUSTER_POLICY['message_queue'], channel='socketio', write_only=False,
+                 logger=None):
+        super().__init__(channel=channel, write_only=write_only, logger=logger)
+        self.address = _local_address(url)
+        self._publisher = None
+        self._publish_lock = threading.Lock()
+        self.lost = 0  # Messages non publiés (broker injoignable)
+
+    def _publish(self, data):
+        line = f"PUB {self.channel} {json.dumps(data, separators=(',', ':'))}\n".encode()
+        with self._publish_lock:
+            for _ in range(2):  # Une reconnexion si le broker a redémarré
+                try:
+                    if self._publisher is None:
+                        self._publisher = socket.create_connection(self.address, timeout=5)
+                        self._publisher.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                    self._publisher.sendall(line)
+                    return
+                except OSError:
+                    if self._publisher is not None:
+                        self._publisher.close()
+                    self._publisher = None
+            self.lost += 1
+
+    def _listen(self):
+        retry = 0.5
+        while True:
+            try:
+                with socket.create_connection(self.address, timeout=5) as conn:
+                    conn.settimeout(None)
+                    conn.sendall(f"SUB {self.channel}\n".encode())
+                    retry = 0.5
+                    for line in conn.makefile('rb'):
+                        _, _, payload = line.partition(b' ')
+                        yield json.loads(payload)
+            except (OSError, ValueError) as e:
+                self._get_logger().warning(f"Broker local injoignable ({e}), nouvel essai")
+            time.sleep(retry)
+            retry = min(retry * 2, 10.0)
+
+
+class _ControlMixin:
+    """Messages de contrôle interceptés à la réception (battements, commandes), jamais transmis aux clients"""
+
+    on_control = None
+
+    def _handle_emit(self, message):
+        if message.get('namespace') != CONTROL_NAMESPACE:
+            return super()._handle_emit(message)
+        if self.on_control is not None:
+            data = message.get('data')
+            self.on_control(message['event'], data[0] if isinstance(data, list) and data else data)
+
+
+_manager_classes = {}
+
+
+def create_client_manager(policy, write_only=False):
+    """Gestionnaire de clients Socket.IO partagé par la file de messages de la politique"""
+    url = policy['message_queue']
+    scheme = urlparse(url).scheme
+    if scheme == 'local':
+        base = LocalPubSubManager
+    elif scheme in ('redis', 'rediss', 'redis+sentinel', 'valkey', 'valkeys'):
+        base = socketio.RedisManager
+    elif scheme == 'kafka':
+        base = socketio.KafkaManager
+    else:
+        base = socketio.KombuManager
+    if base not in _manager_classes:
+        _manager_classes[base] = type(f"Cluster{base.__name__}", (_ControlMixin, base), {})
+    return _manager_classes[base](url, channel=policy['channel'], write_only=write_only)
+
+
+# --- Attribution des flux ---
+
+class StreamAssignment:
+    """Attribution stable des flux aux moteurs, déduite des battements (même calcul dans chaque processus)
+
+    Un flux appartient au moteur vivant qui l'a pris le premier (à égalité: nom le plus petit).
+    Un flux orphelin (moteur arrêté ou flux nouveau) revient au moteur vivant qui porte le moins
+    de flux: un moteur qui rejoint ne prend donc rien aux autres.
+    """
+
+    def __init__(self, timeout):
+        self.timeout = timeout
+        self.workers = {}  # Nom -> dernier battement (+ 'seen': time.monotonic() de réception)
+
+    def update(self, heartbeat):
+        self.workers[heartbeat['worker']] = dict(heartbeat, seen=time.monotonic())
+
+    def remove(self, name):
+        self.workers.pop(name, None)
+
+    def live(self, role='engine'):
+        now = time.monotonic()
+        return {name: worker for name, worker in list(self.workers.items())
+                if worker.get('role') == role and now - worker['seen'] <= self.timeout}
+
+    def owner(self, stream):
+        claims = [(worker['streams'][stream]['claimed_at'], name)
+                  for name, worker in self.live().items() if stream in worker.get('streams', {})]
+        return min(claims)[1] if claims else None
+
+    def orphans(self, streams):
+        return [stream for stream in streams if self.owner(stream) is None]
+
+    def claimant(self):
+        """Moteur vivant qui prend le prochain flux orphelin"""
+        live = self.live()
+        if not live:
+            return None
+        return min(live, key=lambda name: (len(live[name].get('streams', {})), name))
+
+    def prune(self):
+        """Oublier les processus silencieux depuis longtemps"""
+        now = time.monotonic()
+        for name, worker in list(self.workers.items()):
+            if now - worker['seen'] > self.timeout * 6:
+                self.workers.pop(name, None)
+
+
+class ClusterNode:
+    """Participation d'un processus au cluster: battements, commandes, vue des autres processus"""
+
+    def __init__(self, policy, name, role, manager):
+        self.policy = policy
+        self.name = name
+        self.role = role
+        self.manager = manager
+        self.started_at = time.time()
+        self.assignment = StreamAssignment(policy['worker_timeout_seconds'])
+
+        self.on_command = None        # on_command(message) - commande d'un autre processus
+        self.on_heartbeat = []        # Appelés pour chaque battement reçu (le sien compris)
+        self.on_tick = None           # Appelé après chaque battement envoyé
+        self.status_provider = None   # Retourne l'état ajouté au battement
+
+        self._thread = None
+        self._stop_event = threading.Event()
+        manager.on_control = self._handle_control
+
+    def start(self):
+        """Écouter la file de messages et envoyer les battements"""
+        server = self.manager.server
+        if not server.manager_initialized:
+            # Sans attendre le premier client Socket.IO: les battements doivent circuler dès maintenant
+            server.manager_initialized = True
+            self.manager.initialize()
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._loop, name='cluster-heartbeat', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Quitter le cluster: les autres reprennent aussitôt les flux de ce processus"""
+        self._stop_event.set()
+        self.send_control('leave', {'worker': self.name})
+
+    def _loop(self):
+        while True:
+            try:
+                self.send_control('heartbeat', self._heartbeat())
+                self.assignment.prune()
+                if self.on_tick:
+                    self.on_tick()
+            except Exception as e:
+                print(f"Erreur du battement du cluster: {e}")
+            if self._stop_event.wait(self.policy['heartbeat_seconds']):
+                break
+
+    def _heartbeat(self):
+        heartbeat = {'worker': self.name, 'role': self.role, 'pid': os.getpid(),
+                     'started_at': self.started_at, 'time': time.time(), 'streams': {}}
+        if self.status_provider:
+            heartbeat.update(self.status_provider())
+        return heartbeat
+
+    def heartbeat_now(self):
+        """Battement immédiat (après avoir pris ou rendu un flux)"""
+        self.send_control('heartbeat', self._heartbeat())
+
+    def streams(self):
+        """Flux de la configuration courante (nom -> réglages surchargés), suivent config.json à chaud"""
+        section = get_config_store().snapshot.get('cluster') or {}
+        return dict(section.get('streams') or self.policy['streams'])
+
+    def ready(self):
+        """Battements des autres reçus: la vue des flux déjà attribués est complète"""
+        return time.time() - self.started_at >= self.policy['join_grace_seconds']
+
+    # --- Messages ---
+
+    def emit(self, event, data):
+        """Événement pour les clients Socket.IO de tous les processus web"""
+        self.manager.emit(event, data, namespace='/')
+
+    def send_control(self, kind, data):
+        self.manager.emit(kind, dict(data, sender=self.name), namespace=CONTROL_NAMESPACE)
+
+    def send_command(self, action, **arguments):
+        self.send_control('command', dict(arguments, action=action))
+
+    def _handle_control(self, kind, data):
+        if not isinstance(data, dict):
+            return
+        try:
+            if kind == 'heartbeat':
+                self.assignment.update(data)
+                for listener in self.on_heartbeat:
+                    listener(data)
+            elif kind == 'leave':
+                self.assignment.remove(data['worker'])
+                print(f"👋 {data['worker']} a quitté le cluster")
+            elif kind == 'command' and data.get('sender') != self.name and self.on_command:
+                self.on_command(data)
+        except Exception as e:
+            print(f"Erreur de message du cluster ({kind}): {e}")
+
+    def get_status(self):
+        now = time.monotonic()
+        workers = {}
+        for name, worker in sorted(self.assignment.workers.items()):
+            workers[name] = {
+                'role': worker.get('role'),
+                'pid': worker.get('pid'),
+                'alive': now - worker['seen'] <= self.assignment.timeout,
+                'heartbeat_age': round(now - worker['seen'], 1),
+                'streams': worker.get('streams', {}),
+                'memory_mb': worker.get('memory_mb'),
+                'alerts': worker.get('alerts')
+            }
+        return {
+            'worker': self.name,
+            'role': self.role,
+            'message_queue': self.policy['message_queue'],
+            'workers': workers,
+            'assignment': {stream: self.assignment.owner(stream) for stream in self.streams()},
+            'lost_messages': getattr(self.manager, 'lost', 0)
+        }
+
+
+# --- Côté web: le moteur vu à travers le cluster ---
+
+class _ClusterQueue:
+    """Profondeur cumulée des files audio des moteurs (derniers battements)"""
+
+    def __init__(self, assignment):
+        self._assignment = assignment
+
+    def qsize(self):
+        return sum(stream.get('queue_depth', 0) for worker in self._assignment.live().values()
+                   for stream in worker.get('streams', {}).values())
+
+
+class ClusterStats:
+    """Transcriptions et mots comptés par les moteurs (les séries temporelles les différencient)"""
+
+    def __init__(self, local_stats):
+        self._local = local_stats
+        self.transcription_count = 0
+        self.word_count = 0
+
+    def get_cpu_temperature(self):
+        return self._local.get_cpu_temperature()
+
+
+class ClusterEngine:
+    """Même interface que RecognitionEngine pour app.py, commandes transmises aux moteurs du cluster"""
+
+    mode = 'cluster'
+
+    def __init__(self, node, stats):
+        self.node = node
+        self.config = None
+        self.audio_queue = _ClusterQueue(node.assignment)
+        self.stats = ClusterStats(stats)
+        self.on_level = None  # Les moteurs émettent eux-mêmes vers les clients
+        self.on_partial = None
+        self.on_final = None
+        self.on_emergency = None
+
+        # Compteurs cumulés sans retour en arrière (un moteur relancé repart de zéro)
+        self.busy_seconds = 0.0
+        self.processed_audio_seconds = 0.0
+        self._speech = [0.0, 0.0]
+        self._last_counters = {}  # (processus, flux) -> dernières valeurs reçues
+        self._applying_remote = False
+        node.on_heartbeat.append(self._accumulate)
+        node.on_command = self._handle_command
+
+    def _accumulate(self, heartbeat):
+        if heartbeat.get('role') != 'engine':
+            return
+        items = [((heartbeat['worker'], name), (s.get('busy_seconds', 0.0), s.get('audio_seconds', 0.0),
+                                                *s.get('speech_counters', (0.0, 0.0))))
+                 for name, s in heartbeat.get('streams', {}).items()]
+        items.append(((heartbeat['worker'], None), (heartbeat.get('transcriptions', 0),
+                                                    heartbeat.get('words', 0))))
+        for key, values in items:
+            previous = self._last_counters.get(key, (0,) * len(values))
+            deltas = [max(0, value - before) for value, before in zip(values, previous)]
+            self._last_counters[key] = values
+            if key[1] is None:
+                self.stats.transcription_count += deltas[0]
+                self.stats.word_count += deltas[1]
+            else:
+                self.busy_seconds += deltas[0]
+                self.processed_audio_seconds += deltas[1]
+                self._speech[0] += deltas[2]
+                self._speech[1] += deltas[3]
+
+    def _streams(self):
+        return [stream for worker in self.node.assignment.live().values()
+                for stream in worker.get('streams', {}).values()]
+
+    @property
+    def is_running(self):
+        return any(stream.get('is_running') for stream in self._streams())
+
+    @property
+    def remote_model(self):
+        """Modèle du premier moteur qui l'a chargé"""
+        return next((stream['model'] for stream in self._streams() if stream.get('model', {}).get('active_path')),
+                    {})
+
+    def start(self):
+        """Démarrer la reconnaissance sur tous les flux (False sans moteur vivant)"""
+        if not self.node.assignment.live():
+            return False
+        self.node.send_command('start')
+        return True
+
+    def stop(self):
+        self.node.send_command('stop')
+
+    def update_config(self, config):
+        """Instantané transmis aux autres processus (chacun le valide et l'applique)"""
+        self.config = config
+        if not self._applying_remote:
+            self.node.send_command('config', config=config.to_dict())
+
+    def swap_model(self, path):
+        if not os.path.isdir(path):
+            return False
+        self.node.send_command('swap_model', path=path)
+        return True
+
+    def _handle_command(self, message):
+        if message['action'] == 'config':
+            self._applying_remote = True
+            try:
+                get_config_store().update(message['config'], source='cluster')
+            except ConfigError as e:
+                print(f"⚠️  Configuration du cluster refusée: {e}")
+            finally:
+                self._applying_remote = False
+
+    def get_status(self):
+        status = self.node.get_status()
+        status.update({'mode': self.mode, 'rings': []})
+        return status
+
+    def speech_counters(self):
+        return tuple(self._speech)
+
+    def get_recognizer_status(self):
+        return {f"{name}/{stream}": status.get('recognizer')
+                for name, worker in self.node.assignment.live().items()
+                for stream, status in worker.get('streams', {}).items()}
+
+    def memory_estimates(self):
+        return {name: {'memory_mb': worker.get('memory_mb'), 'components': worker.get('components')}
+                for name, worker in self.node.assignment.live().items()}
+
+
+# --- Côté moteur ---
+
+class EngineWorker:
+    """Processus moteur: prend les flux orphelins, les reconnaît et émet les résultats vers le cluster"""
+
+    def __init__(self, node, settings, models, model_path):
+        self.node = node
+        self.settings = settings
+        self.models = models
+        self.model_path = model_path
+        self.engines = {}     # Flux -> moteur (RecognitionEngine ou EngineProcess)
+        self.claimed_at = {}  # Flux -> time.time() de la prise
+        self.recording = settings.snapshot['app']['auto_start']  # État souhaité (commandes start/stop)
+        self._lock = threading.RLock()
+
+        node.on_command = self._handle_command
+        node.on_tick = self.rebalance
+        node.status_provider = self._status
+        settings.subscribe(self._apply_config)
+
+    def _stream_config(self, name, snapshot=None):
+        return derive_snapshot(snapshot or self.settings.snapshot, self.node.streams().get(name) or {})
+
+    def rebalance(self):
+        """Rendre les flux retirés ou pris par un autre, puis prendre au plus un flux orphelin"""
+        with self._lock:
+            streams = self.node.streams()
+            for name in list(self.engines):
+                if name not in streams or self.node.assignment.owner(name) not in (None, self.node.name):
+                    self._release(name)
+            if not self.node.ready():
+                return
+            orphans = self.node.assignment.orphans(streams)
+            if orphans and self.node.assignment.claimant() == self.node.name:
+                self._claim(orphans[0])
+
+    def _claim(self, name):
+        from engine_process import EngineProcess
+        from split_pipeline import SplitEngineProcess
+        from recognition_engine import RecognitionEngine
+
+        config = self._stream_config(name)
+        if config['engine_mode'] in ('process', 'split'):
+            engine_class = SplitEngineProcess if config['engine_mode'] == 'split' else EngineProcess
+            engine = engine_class(config, self.model_path, start_method=self.models.process_start_method(),
+                                  model_manager=self.models)
+            engine.launch()
+        else:
+            engine = RecognitionEngine(config, model_manager=self.models)
+
+        def emit(event, data):
+            self.node.emit(event, dict(data, stream=name))
+
+        engine.on_level = lambda level: emit('audio_level', {'level': level})
+        engine.on_partial = lambda text: emit('transcription', {'text': text, 'final': False})
+        engine.on_final = lambda result: emit('transcription', result)
+        engine.on_emergency = lambda alert: emit('emergency_alert', alert)
+
+        self.engines[name] = engine
+        self.claimed_at[name] = time.time()
+        print(f"🎙️  Flux {name} pris par {self.node.name}")
+        self.node.heartbeat_now()  # Les autres voient la prise avant leur propre calcul
+        if self.recording:
+            engine.start()
+
+    def _release(self, name):
+        engine = self.engines.pop(name)
+        self.claimed_at.pop(name, None)
+        engine.stop()
+        if hasattr(engine, 'shutdown'):
+            engine.shutdown()
+        print(f"↩️  Flux {name} rendu par {self.node.name}")
+
+    def release_all(self):
+        with self._lock:
+            for name in list(self.engines):
+                self._release(name)
+
+    def _apply_config(self, snapshot):
+        with self._lock:
+            for name, engine in self.engines.items():
+                try:
+                    engine.update_config(self._stream_config(name, snapshot))
+                except ValueError as e:
+                    print(f"⚠️  Réglages du flux {name} refusés: {e}")
+
+    def _handle_command(self, message):
+        action = message['action']
+        with self._lock:
+            targets = [engine for name, engine in self.engines.items()
+                       if message.get('stream') in (None, name)]
+            if action == 'start':
+                self.recording = True
+                for engine in targets:
+                    engine.start()
+            elif action == 'stop':
+                self.recording = False
+                for engine in targets:
+                    engine.stop()
+            elif action == 'swap_model':
+                self.model_path = message['path']
+                for engine in targets:
+                    engine.swap_model(message['path'])
+        if action == 'config':
+            try:
+                self.settings.update(message['config'], source='cluster')
+            except ConfigError as e:
+                print(f"⚠️  Configuration du cluster refusée: {e}")
+
+    def _status(self):
+        from alert_dispatcher import get_alert_dispatcher
+        from stats_manager import get_stats_manager
+
+        streams = {}
+        with self._lock:
+            for name, engine in self.engines.items():
+                if hasattr(engine, 'remote_model'):
+                    model = engine.remote_model
+                else:
+                    status = self.models.get_status()
+                    model = {key: status.get(key) for key in ('active_path', 'rss_delta_mb', 'load_seconds')}
+                streams[name] = {
+                    'claimed_at': self.claimed_at[name],
+                    'is_running': engine.is_running,
+                    'session_id': engine.session_id,
+                    'model': model,
+                    'busy_seconds': engine.busy_seconds,
+                    'audio_seconds': engine.processed_audio_seconds,
+                    'speech_counters': list(engine.speech_counters()),
+                    'queue_depth': engine.audio_queue.qsize(),
+                    'recognizer': engine.get_recognizer_status()
+                }
+            first = next(iter(self.engines.values()), None)
+        stats = get_stats_manager()
+        alerts = get_alert_dispatcher().get_status()
+        return {
+            'streams': streams,
+            'transcriptions': stats.transcription_count,
+            'words': stats.word_count,
+            'memory_mb': round(psutil.Process().memory_info().rss / 1024 / 1024, 1),
+            'components': first.memory_estimates() if first else {},
+            'alerts': {key: alerts.get(key) for key in ('enabled', 'running', 'in_flight', 'outbox')}
+        }
+
+
+# --- Points d'entrée ---
+
+def _stop_on_signals(stop_event):
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, lambda *_: stop_event.set())
+
+
+def run_broker(policy):
+    """Broker local seul (jusqu'à Ctrl+C)"""
+    if urlparse(policy['message_queue']).scheme != 'local':
+        print(f"❌ Pas de broker local: la file de messages est {policy['message_queue']}")
+        return 1
+    broker = LocalBroker(policy['message_queue'], policy['broker_queue_size'])
+    broker.start()
+    stop_event = threading.Event()
+    _stop_on_signals(stop_event)
+    while not stop_event.wait(60):
+        print(f"📮 Broker: {broker.get_status()}")
+    broker.stop()
+    return 0
+
+
+def run_web(policy, index):
+    """Processus web: app.py avec ses clients partagés par la file de messages"""
+    name = f"web-{index}"
+    os.environ[WORKER_ENV] = name
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))  # Arrêt par le superviseur: blocs finally exécutés
+    import app as server  # Crée le moteur du cluster et le gestionnaire de clients partagé
+
+    server.load_model()
+    server.settings.start_watching()
+    server.cluster.start()
+    if index == 0:
+        # Tâches uniques du cluster: nettoyage de la base et séries temporelles
+        server.retention.start()
+        server.metrics.start()
+    server.memory.start()
+
+    app_config = server.config['app']
+    port = app_config['port'] + index
+    print(f"🌐 {name} sur http://localhost:{port} (file de messages {policy['message_queue']})")
+    try:
+        server.socketio.run(server.app, host=app_config['host'], port=port, debug=False,
+                            use_reloader=False, allow_unsafe_werkzeug=True)
+    finally:
+        server.cluster.stop()
+        if index == 0:
+            server.metrics.stop()
+    return 0
+
+
+def run_engine(policy, name):
+    """Processus moteur: flux attribués par le cluster, résultats émis par la file de messages"""
+    from resource_manager import apply_thread_limits
+    apply_thread_limits()  # Avant l'import de numpy
+
+    from alert_dispatcher import get_alert_dispatcher, load_alert_config
+    from model_manager import get_model_manager
+
+    settings = get_config_store()
+    models = get_model_manager()
+    model_path = models.policy['model_path']
+    if not os.path.exists(model_path):
+        print(f"❌ Le modèle n'existe pas à {model_path}")
+        return 1
+    if settings.snapshot['engine_mode'] == 'thread' or models.process_start_method() == 'fork':
+        models.load_async(model_path)  # Partagé par les flux de ce processus
+
+    # Boîte d'envoi propre à chaque moteur (les alertes en attente ne sont pas envoyées deux fois)
+    alert_config = load_alert_config()
+    root, extension = os.path.splitext(alert_config['outbox_path'])
+    alert_config['outbox_path'] = f"{root}.{name}{extension}"
+    alerts = get_alert_dispatcher(alert_config)
+    if alerts.config['enabled']:
+        alerts.start()
+
+    manager = create_client_manager(policy)
+    socketio.Server(client_manager=manager, async_mode='threading')
+    node = ClusterNode(policy, name, 'engine', manager)
+    worker = EngineWorker(node, settings, models, model_path)
+    settings.start_watching()
+    node.start()
+    print(f"⚙️  {name} a rejoint le cluster ({policy['message_queue']})")
+
+    stop_event = threading.Event()
+    _stop_on_signals(stop_event)
+    stop_event.wait()
+    node.stop()
+    worker.release_all()
+    alerts.stop()
+    return 0
+
+
+def run_all(policy):
+    """Broker local, processus web et moteurs, relancés s'ils s'arrêtent"""
+    broker = None
+    if urlparse(policy['message_queue']).scheme == 'local':
+        broker = LocalBroker(policy['message_queue'], policy['broker_queue_size'])
+        try:
+            broker.start()
+        except OSError:
+            print("📮 Broker local déjà lancé, utilisé tel quel")
+            broker = None
+
+    script = os.path.abspath(__file__)
+    commands = {f"web-{i}": [sys.executable, script, 'web', '--index', str(i)]
+                for i in range(policy['web_workers'])}
+    commands.update({f"engine-{i}": [sys.executable, script, 'engine', '--name', f"engine-{i}"]
+                     for i in range(policy['engine_workers'])})
+    processes = {}
+    stop_event = threading.Event()
+    _stop_on_signals(stop_event)
+
+    while not stop_event.is_set():
+        for name, command in commands.items():
+            process = processes.get(name)
+            if process is not None and process.poll() is None:
+                continue
+            if process is not None:
+                print(f"⚠️  {name} arrêté (code {process.returncode}), relance")
+            processes[name] = subprocess.Popen(command)
+        stop_event.wait(RESTART_DELAY)
+
+    for process in processes.values():
+        process.terminate()
+    for process in processes.values():
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+    if broker:
+        broker.stop()
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mode multi-processus (processus web et moteurs)")
+    parser.add_argument('role', nargs='?', default='all', choices=('all', 'broker', 'web', 'engine'))
+    parser.add_argument('--index', type=int, default=0, help="Processus web: port app.port + index")
+    parser.add_argument('--name', default=None, help="Nom du moteur (stable: boîte d'envoi des alertes)")
+    args = parser.parse_args()
+
+    policy = load_cluster_policy()
+    if args.role == 'broker':
+        return run_broker(policy)
+    if args.role == 'web':
+        return run_web(policy, args.index)
+    if args.role == 'engine':
+        return run_engine(policy, args.name or f"engine-{socket.gethostname()}-{os.getpid()}")
+    return run_all(policy)
+
+
+# Instance globale (processus web lancé par ce module)
+_cluster_node_instance = None
+
+
+def get_cluster_node(policy=None):
+    """Participation au cluster du processus web courant (None hors mode multi-processus)"""
+    global _cluster_node_instance
+    name = os.environ.get(WORKER_ENV)
+    if _cluster_node_instance is None and name:
+        policy = policy or load_cluster_policy()
+        _cluster_node_instance = ClusterNode(policy, name, 'web', create_client_manager(policy))
+    return _cluster_node_instance
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -4,17 +4,53 @@ Module de gestion de la base de données SQLite
 Sauvegarde et récupération de l'historique des transcriptions
 """
 
+import os
 import sqlite3
 import json
-from datetime import datetime
+from array import array
+import threading
+import time
+import weakref
+from datetime import datetime, timedelta
 from contextlib import contextmanager
 
 
+class _DictRowFactory:
+    """row_factory qui construit des dicts (noms de colonnes mis en cache)"""
+
+    def __init__(self):
+        self._description = None
+        self._fields = ()
+
+    def __call__(self, cursor, row):
+        # cursor.description est le même objet pour toutes les lignes d'une requête
+        description = cursor.description
+        if description is not self._description:
+            self._description = description
+            self._fields = tuple(column[0] for column in description)
+        return dict(zip(self._fields, row))
+
+
 class TranscriptionDatabase:
     """Gestionnaire de base de données pour les transcriptions"""
 
-    def __init__(self, db_path="transcriptions.db"):
+    def __init__(self, db_path="transcriptions.db", read_pool_size=8,
+                 statement_cache_size=64):
         self.db_path = db_path
+        self.read_pool_size = read_pool_size
+        self.statement_cache_size = statement_cache_size
+
+        # Pool de connexions de lecture (une par thread, recyclées à la fin du thread)
+        self._local = threading.local()
+        self._pool_lock = threading.Lock()
+        self._idle_read_connections = []
+        self._open_read_connections = 0
+        self._pool_hits = 0
+        self._pool_misses = 0
+
+        # Archives mensuelles (voir archive_manager), interrogées en complément
+        self.archive = None
+
         self._init_database()
 
     def _init_database(self):
@@ -22,6 +58,14 @@ class TranscriptionDatabase:
         with self._get_connection() as conn:
             cursor = conn.cursor()
 
+            # Vacuum incrémental (effectif seulement sur une base neuve; une base existante
+            # se convertit hors service: python retention_manager.py --enable-incremental-vacuum)
+            cursor.execute("PRAGMA auto_vacuum=INCREMENTAL")
+
+            # WAL: les lectures ne bloquent jamais l'écriture (et inversement)
+            cursor.execute("PRAGMA journal_mode=WAL")
+            cursor.execute("PRAGMA synchronous=NORMAL")
+
             # Table des transcriptions
             cursor.execute("""
                 CREATE TABLE IF NOT EXISTS transcriptions (
@@ -47,7 +91,47 @@ class TranscriptionDatabase:
                 )
             """)
 
+            # Migration: colonnes du ré-décodage avec un modèle plus précis
+            columns = [row['name'] for row in cursor.execute("PRAGMA table_info(transcriptions)")]
+            for column in ('redecoded_text', 'redecoded_model', 'original_text'):
+                if column not in columns:
+                    cursor.execute(f"ALTER TABLE transcriptions ADD COLUMN {column} TEXT")
+            # Session de chaque transcription (même sans mot horodaté assez fiable)
+            session_added = 'session_id' not in columns
+            if session_added:
+                cursor.execute("ALTER TABLE transcriptions ADD COLUMN session_id INTEGER")
+
+            # Horodatage des mots (tableau compact: start, end, conf en float32,
+            # temps relatifs à start_time pour garder la précision sur les longues sessions)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS transcription_words (
+                    transcription_id INTEGER PRIMARY KEY,
+                    session_id INTEGER,
+                    start_time REAL,
+                    end_time REAL,
+                    words TEXT NOT NULL,
+                    timings BLOB NOT NULL
+                )
+            """)
+
+            # Lignes antérieures: temps absolus de session (timings_relative = 0)
+            columns = [row['name'] for row in cursor.execute("PRAGMA table_info(transcription_words)")]
+            if 'timings_relative' not in columns:
+                cursor.execute("ALTER TABLE transcription_words ADD COLUMN timings_relative INTEGER NOT NULL DEFAULT 0")
+            if session_added:
+                # Reprise de la session connue par l'horodatage des mots
+                cursor.execute("""
+                    UPDATE transcriptions SET session_id = (
+                        SELECT session_id FROM transcription_words WHERE transcription_id = transcriptions.id
+                    )
+                """)
+
             # Index pour performances
+            cursor.execute("""
+                CREATE INDEX IF NOT EXISTS idx_words_session
+                ON transcription_words(session_id, start_time)
+            """)
+
             cursor.execute("""
                 CREATE INDEX IF NOT EXISTS idx_timestamp
                 ON transcriptions(timestamp DESC)
@@ -58,6 +142,11 @@ class TranscriptionDatabase:
                 ON transcriptions(has_emergency)
             """)
 
+            cursor.execute("""
+                CREATE INDEX IF NOT EXISTS idx_transcriptions_session
+                ON transcriptions(session_id)
+            """)
+
             conn.commit()
 
     @contextmanager
@@ -70,9 +159,69 @@ class TranscriptionDatabase:
         finally:
             conn.close()
 
+    @contextmanager
+    def _read_connection(self):
+        """Connexion de lecture (query_only) réutilisée par le thread courant"""
+        conn = getattr(self._local, 'read_conn', None)
+        if conn is None:
+            conn = self._acquire_read_connection()
+            self._local.read_conn = conn
+            # Rendre la connexion au pool quand le thread se termine
+            weakref.finalize(threading.current_thread(), self._release_read_connection, conn)
+        else:
+            with self._pool_lock:
+                self._pool_hits += 1
+        yield conn
+
+    def _acquire_read_connection(self):
+        """Prendre une connexion libre dans le pool ou en ouvrir une nouvelle"""
+        with self._pool_lock:
+            if self._idle_read_connections:
+                self._pool_hits += 1
+                return self._idle_read_connections.pop()
+            self._pool_misses += 1
+            self._open_read_connections += 1
+
+        # check_same_thread=False: la connexion change de thread via le pool,
+        # mais n'est jamais utilisée par deux threads à la fois
+        conn = sqlite3.connect(
+            self.db_path,
+            check_same_thread=False,
+            cached_statements=self.statement_cache_size
+        )
+        conn.execute("PRAGMA query_only=ON")
+        conn.execute("PRAGMA busy_timeout=5000")
+        conn.row_factory = _DictRowFactory()
+        return conn
+
+    def _release_read_connection(self, conn):
+        """Remettre une connexion dans le pool (ou la fermer si le pool est plein)"""
+        with self._pool_lock:
+            if len(self._idle_read_connections) < self.read_pool_size:
+                self._idle_read_connections.append(conn)
+                return
+            self._open_read_connections -= 1
+        conn.close()
+
+    def attach_archive(self, archive):
+        """Brancher les archives: les requêtes de lecture s'y étendent automatiquement"""
+        self.archive = archive
+
+    def get_pool_stats(self):
+        """Statistiques du pool de connexions de lecture"""
+        with self._pool_lock:
+            total = self._pool_hits + self._pool_misses
+            return {
+                'hits': self._pool_hits,
+                'misses': self._pool_misses,
+                'hit_rate': round(self._pool_hits / total, 3) if total > 0 else 0,
+                'open_connections': self._open_read_connections,
+                'idle_connections': len(self._idle_read_connections)
+            }
+
     def add_transcription(self, text, has_emergency=False, emergency_words=None,
-                          audio_level=0):
-        """Ajouter une transcription"""
+                          audio_level=0, words=None, session_id=None, min_word_conf=0.0):
+        """Ajouter une transcription (et l'horodatage de ses mots si fourni)"""
         with self._get_connection() as conn:
             cursor = conn.cursor()
 
@@ -81,23 +230,157 @@ class TranscriptionDatabase:
 
             cursor.execute("""
                 INSERT INTO transcriptions
-                (text, has_emergency, emergency_words, audio_level, word_count)
-                VALUES (?, ?, ?, ?, ?)
-            """, (text, has_emergency, emergency_words_json, audio_level, word_count))
+                (text, has_emergency, emergency_words, audio_level, word_count, session_id)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, (text, has_emergency, emergency_words_json, audio_level, word_count, session_id))
+            transcription_id = cursor.lastrowid
+
+            # Filtrer les mots peu fiables avant de les stocker
+            if words:
+                words = [w for w in words if w.get('conf', 1.0) >= min_word_conf]
+            if words:
+                _store_word_timings(cursor, transcription_id, session_id, words)
+
+            conn.commit()
+            return transcription_id
+
+    def set_redecoded_text(self, transcription_id, text, model_name, replace=False,
+                           words=None, emergency_words=None, min_word_conf=0.0):
+        """Enregistrer le texte ré-décodé (annotation, ou remplacement en gardant l'original)
 
+        En remplacement, words (temps de session) remplace l'horodatage des mots; emergency_words
+        (nouvelle détection, None si non refaite) s'ajoute aux mots d'urgence déjà enregistrés:
+        une urgence signalée ne disparaît jamais parce que le second modèle ne l'a pas entendue.
+        """
+        with self._get_connection() as conn:
+            if replace:
+                row = conn.execute(
+                    "SELECT has_emergency, emergency_words, session_id FROM transcriptions WHERE id = ?",
+                    (transcription_id,)
+                ).fetchone()
+                stored = json.loads(row['emergency_words']) if row and row['emergency_words'] else []
+                has_emergency = bool(row and row['has_emergency'])
+                emergency_words = list(dict.fromkeys(stored + list(emergency_words or [])))
+                has_emergency = has_emergency or bool(emergency_words)
+                conn.execute("""
+                    UPDATE transcriptions SET
+                        original_text = COALESCE(original_text, text),
+                        text = ?,
+                        word_count = ?,
+                        has_emergency = ?,
+                        emergency_words = ?,
+                        redecoded_text = ?,
+                        redecoded_model = ?
+                    WHERE id = ?
+                """, (text, len(text.split()), has_emergency,
+                      json.dumps(emergency_words) if emergency_words else None,
+                      text, model_name, transcription_id))
+                if words is not None:
+                    cursor = conn.cursor()
+                    cursor.execute("DELETE FROM transcription_words WHERE transcription_id = ?",
+                                   (transcription_id,))
+                    words = [w for w in words if w.get('conf', 1.0) >= min_word_conf]
+                    if words and row:
+                        _store_word_timings(cursor, transcription_id, row['session_id'], words)
+            else:
+                conn.execute("""
+                    UPDATE transcriptions SET redecoded_text = ?, redecoded_model = ?
+                    WHERE id = ?
+                """, (text, model_name, transcription_id))
+            conn.commit()
+
+    def start_session(self):
+        """Ouvrir une session de reconnaissance"""
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("INSERT INTO sessions DEFAULT VALUES")
             conn.commit()
             return cursor.lastrowid
 
-    def get_recent_transcriptions(self, limit=50):
-        """Récupérer les transcriptions récentes"""
+    def end_session(self, session_id):
+        """Clore une session et enregistrer ses totaux"""
         with self._get_connection() as conn:
+            conn.execute("""
+                UPDATE sessions SET
+                    end_time = CURRENT_TIMESTAMP,
+                    total_transcriptions = (
+                        SELECT COUNT(*) FROM transcriptions WHERE session_id = ?
+                    ),
+                    total_words = (
+                        SELECT COALESCE(SUM(word_count), 0) FROM transcriptions WHERE session_id = ?
+                    )
+                WHERE id = ?
+            """, (session_id, session_id, session_id))
+            conn.commit()
+
+    def get_latest_session_id(self):
+        """Identifiant de la dernière session ayant des mots horodatés"""
+        with self._read_connection() as conn:
+            row = conn.execute("SELECT MAX(session_id) AS session_id FROM transcription_words").fetchone()
+            return row['session_id'] if row else None
+
+    def get_word_timings(self, transcription_id):
+        """Horodatage des mots d'une transcription (secondes depuis le début de session)"""
+        with self._read_connection() as conn:
+            row = conn.execute("""
+                SELECT transcription_id, session_id, start_time, end_time, words, timings,
+                       timings_relative
+                FROM transcription_words
+                WHERE transcription_id = ?
+            """, (transcription_id,)).fetchone()
+
+        if row:
+            return _unpack_word_timings(row)
+        # Transcription archivée: horodatage conservé dans le segment
+        if self.archive is not None:
+            archived = self.archive.get_row(transcription_id)
+            if archived and archived.get('words'):
+                return _archived_word_timings(archived)
+        return None
+
+    def get_session_word_timings(self, session_id):
+        """Horodatage de toutes les transcriptions d'une session, dans l'ordre"""
+        with self._read_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT w.transcription_id, w.session_id, w.start_time, w.end_time,
+                       w.words, w.timings, w.timings_relative, t.text, t.has_emergency
+                FROM transcription_words w
+                JOIN transcriptions t ON t.id = w.transcription_id
+                WHERE w.session_id = ?
+                ORDER BY w.start_time
+            """, (session_id,))
+
+            results = []
+            for row in cursor.fetchall():
+                entry = _unpack_word_timings(row)
+                entry['text'] = row['text']
+                entry['has_emergency'] = bool(row['has_emergency'])
+                results.append(entry)
+
+        # Début de session déjà archivé (session à cheval sur la date d'archivage)
+        if self.archive is not None:
+            for row in self.archive.get_session_rows(session_id):
+                if row.get('words'):
+                    entry = _archived_word_timings(row)
+                    entry['text'] = row['text']
+                    entry['has_emergency'] = bool(row['has_emergency'])
+                    results.append(entry)
+            results.sort(key=lambda entry: entry['start'])
+        return results
+
+    def get_recent_transcriptions(self, limit=50, before_id=None):
+        """Récupérer les transcriptions récentes, par id décroissant (before_id: page suivante)"""
+        with self._read_connection() as conn:
             cursor = conn.cursor()
             cursor.execute("""
-                SELECT id, text, timestamp, has_emergency, emergency_words, audio_level
+                SELECT id, text, timestamp, has_emergency, emergency_words, audio_level,
+                       redecoded_text, redecoded_model, original_text
                 FROM transcriptions
-                ORDER BY timestamp DESC
+                WHERE ? IS NULL OR id < ?
+                ORDER BY id DESC
                 LIMIT ?
-            """, (limit,))
+            """, (before_id, before_id, limit))
 
             results = []
             for row in cursor.fetchall():
@@ -107,30 +390,60 @@ class TranscriptionDatabase:
                     'timestamp': row['timestamp'],
                     'has_emergency': bool(row['has_emergency']),
                     'emergency_words': json.loads(row['emergency_words']) if row['emergency_words'] else [],
-                    'audio_level': row['audio_level']
+                    'audio_level': row['audio_level'],
+                    **_redecode_fields(row)
                 })
 
-            return results
+        # Compléter avec les archives si la base chaude ne suffit pas
+        if self.archive is not None and len(results) < limit:
+            for row in self.archive.query_range(limit=limit - len(results), before_id=before_id):
+                results.append({
+                    'id': row['id'],
+                    'text': row['text'],
+                    'timestamp': row['timestamp'],
+                    'has_emergency': bool(row['has_emergency']),
+                    'emergency_words': row['emergency_words'] or [],
+                    'audio_level': row['audio_level'],
+                    **_redecode_fields(row)
+                })
+
+        return results
 
     def get_transcriptions_by_date(self, date=None):
         """Récupérer les transcriptions d'une date spécifique"""
         if date is None:
             date = datetime.now().strftime('%Y-%m-%d')
 
-        with self._get_connection() as conn:
+        with self._read_connection() as conn:
             cursor = conn.cursor()
             cursor.execute("""
-                SELECT id, text, timestamp, has_emergency, audio_level
+                SELECT id, text, timestamp, has_emergency, audio_level,
+                       redecoded_text, redecoded_model, original_text
                 FROM transcriptions
                 WHERE DATE(timestamp) = ?
                 ORDER BY timestamp DESC
             """, (date,))
 
-            return [dict(row) for row in cursor.fetchall()]
+            results = [dict(row) for row in cursor.fetchall()]
+
+        if self.archive is not None:
+            start = f"{date} 00:00:00"
+            end = (datetime.strptime(date, '%Y-%m-%d') + timedelta(days=1)).strftime('%Y-%m-%d %H:%M:%S')
+            for row in self.archive.query_range(start, end):
+                results.append({
+                    'id': row['id'],
+                    'text': row['text'],
+                    'timestamp': row['timestamp'],
+                    'has_emergency': row['has_emergency'],
+                    'audio_level': row['audio_level'],
+                    **_redecode_fields(row)
+                })
+
+        return results
 
     def get_emergency_transcriptions(self, limit=20):
         """Récupérer les transcriptions marquées comme urgence"""
-        with self._get_connection() as conn:
+        with self._read_connection() as conn:
             cursor = conn.cursor()
             cursor.execute("""
                 SELECT id, text, timestamp, emergency_words
@@ -153,7 +466,7 @@ class TranscriptionDatabase:
 
     def get_statistics(self, days=7):
         """Obtenir des statistiques sur les derniers jours"""
-        with self._get_connection() as conn:
+        with self._read_connection() as conn:
             cursor = conn.cursor()
 
             # Stats globales
@@ -169,16 +482,29 @@ class TranscriptionDatabase:
 
             row = cursor.fetchone()
 
-            return {
-                'total_transcriptions': row['total_transcriptions'] or 0,
-                'total_words': row['total_words'] or 0,
-                'avg_audio_level': round(row['avg_audio_level'] or 0, 2),
-                'emergency_count': row['emergency_count'] or 0
-            }
+        total = row['total_transcriptions'] or 0
+        words = row['total_words'] or 0
+        audio_level_sum = (row['avg_audio_level'] or 0) * total
+        emergency_count = row['emergency_count'] or 0
+
+        if self.archive is not None:
+            since = (datetime.utcnow() - timedelta(days=days)).strftime('%Y-%m-%d %H:%M:%S')
+            archived = self.archive.get_statistics(since)
+            total += archived['rows']
+            words += archived['words']
+            audio_level_sum += archived['audio_level_sum']
+            emergency_count += archived['emergency_count']
+
+        return {
+            'total_transcriptions': total,
+            'total_words': words,
+            'avg_audio_level': round(audio_level_sum / total, 2) if total > 0 else 0,
+            'emergency_count': emergency_count
+        }
 
     def search_transcriptions(self, query, limit=50):
         """Rechercher dans les transcriptions"""
-        with self._get_connection() as conn:
+        with self._read_connection() as conn:
             cursor = conn.cursor()
             cursor.execute("""
                 SELECT id, text, timestamp, has_emergency
@@ -188,21 +514,163 @@ class TranscriptionDatabase:
                 LIMIT ?
             """, (f'%{query}%', limit))
 
-            return [dict(row) for row in cursor.fetchall()]
+            results = [dict(row) for row in cursor.fetchall()]
 
-    def delete_old_transcriptions(self, days=30):
-        """Supprimer les transcriptions de plus de X jours"""
-        with self._get_connection() as conn:
+        if self.archive is not None and len(results) < limit:
+            for row in self.archive.search(query, limit - len(results)):
+                results.append({
+                    'id': row['id'],
+                    'text': row['text'],
+                    'timestamp': row['timestamp'],
+                    'has_emergency': row['has_emergency']
+                })
+
+        return results
+
+    def delete_old_transcriptions(self, days=30, batch_size=500, pause=0.05):
+        """Supprimer les transcriptions de plus de X jours (par petits lots)"""
+        return self._delete_in_batches(
+            "timestamp < datetime('now', '-' || ? || ' days')", (days,),
+            batch_size=batch_size, pause=pause
+        )
+
+    def delete_oldest_transcriptions(self, count, batch_size=500, pause=0.05):
+        """Supprimer les N transcriptions les plus anciennes (par petits lots)"""
+        return self._delete_in_batches("1", (), batch_size=batch_size,
+                                       max_rows=count, pause=pause)
+
+    def get_months_before(self, cutoff):
+        """Mois ('YYYY-MM') ayant des transcriptions antérieures à cutoff"""
+        with self._read_connection() as conn:
             cursor = conn.cursor()
             cursor.execute("""
-                DELETE FROM transcriptions
-                WHERE timestamp < datetime('now', '-' || ? || ' days')
-            """, (days,))
+                SELECT DISTINCT strftime('%Y-%m', timestamp) AS month
+                FROM transcriptions
+                WHERE timestamp < ?
+                ORDER BY month
+            """, (cutoff,))
+            return [row['month'] for row in cursor.fetchall()]
+
+    def get_transcriptions_for_month(self, month):
+        """Toutes les transcriptions d'un mois, triées par id (pour l'archivage)"""
+        start, end = _month_bounds(month)
+        with self._read_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT t.id, t.text, t.timestamp, t.has_emergency, t.emergency_words,
+                       t.audio_level, t.word_count, t.redecoded_text, t.redecoded_model, t.original_text,
+                       t.session_id, w.transcription_id, w.start_time, w.end_time,
+                       w.words, w.timings, w.timings_relative
+                FROM transcriptions t
+                LEFT JOIN transcription_words w ON w.transcription_id = t.id
+                WHERE t.timestamp >= ? AND t.timestamp < ?
+                ORDER BY t.id
+            """, (start, end))
+
+            results = []
+            for row in cursor.fetchall():
+                row['has_emergency'] = bool(row['has_emergency'])
+                row['emergency_words'] = json.loads(row['emergency_words']) if row['emergency_words'] else []
+                # Horodatage des mots archivé avec la ligne (temps de session)
+                row['words'] = _unpack_word_timings(row)['words'] if row['timings'] else None
+                for key in ('transcription_id', 'start_time', 'end_time', 'timings', 'timings_relative'):
+                    del row[key]
+                results.append(row)
+            return results
+
+    def delete_month_up_to_id(self, month, max_id, batch_size=500, pause=0.05):
+        """Supprimer (par lots) les transcriptions d'un mois jusqu'à max_id inclus"""
+        start, end = _month_bounds(month)
+        return self._delete_in_batches(
+            "timestamp >= ? AND timestamp < ? AND id <= ?", (start, end, max_id),
+            batch_size=batch_size, pause=pause
+        )
+
+    def _delete_in_batches(self, where, params, batch_size=500, max_rows=None, pause=0.05):
+        """Supprimer par lots courts pour ne jamais bloquer l'écriture longtemps"""
+        deleted_total = 0
+        while max_rows is None or deleted_total < max_rows:
+            limit = batch_size if max_rows is None else min(batch_size, max_rows - deleted_total)
+            with self._get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(f"""
+                    SELECT id FROM transcriptions
+                    WHERE {where}
+                    ORDER BY id
+                    LIMIT ?
+                """, (*params, limit))
+                ids = [row['id'] for row in cursor.fetchall()]
+                if ids:
+                    placeholders = ','.join('?' * len(ids))
+                    cursor.execute(f"DELETE FROM transcription_words WHERE transcription_id IN ({placeholders})", ids)
+                    cursor.execute(f"DELETE FROM transcriptions WHERE id IN ({placeholders})", ids)
+                    conn.commit()
+                deleted = len(ids)
+
+            deleted_total += deleted
+            if deleted < limit:
+                break
+            # Laisser passer le thread de reconnaissance entre deux lots
+            time.sleep(pause)
+
+        return deleted_total
+
+    def get_database_size(self):
+        """Taille de la base sur disque (fichier principal + WAL), en octets"""
+        size = 0
+        for path in (self.db_path, self.db_path + '-wal'):
+            try:
+                size += os.path.getsize(path)
+            except OSError:
+                pass
+        return size
+
+    def get_used_bytes(self):
+        """Octets occupés par les données (pages utilisées), indépendamment du WAL et du vacuum"""
+        with self._read_connection() as conn:
+            page_count = conn.execute("PRAGMA page_count").fetchone()['page_count']
+            free_pages = conn.execute("PRAGMA freelist_count").fetchone()['freelist_count']
+            page_size = conn.execute("PRAGMA page_size").fetchone()['page_size']
+        return (page_count - free_pages) * page_size
+
+    def get_free_pages(self):
+        """Nombre de pages libres récupérables par le vacuum"""
+        with self._read_connection() as conn:
+            return conn.execute("PRAGMA freelist_count").fetchone()['freelist_count']
+
+    def incremental_vacuum_enabled(self):
+        with self._read_connection() as conn:
+            return conn.execute("PRAGMA auto_vacuum").fetchone()['auto_vacuum'] == 2
+
+    def enable_incremental_vacuum(self):
+        """Activer le vacuum incrémental sur une base existante (maintenance, service arrêté)
+
+        VACUUM réécrit toute la base sous verrou exclusif et demande environ deux fois sa taille
+        en espace libre: jamais lancé automatiquement.
+        """
+        if self.incremental_vacuum_enabled():
+            return False
+        with self._get_connection() as conn:
+            conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+            conn.execute("VACUUM")
+            return True
+
+    def checkpoint(self):
+        """Reporter le WAL dans la base et le tronquer (sa taille ne s'accumule pas entre deux lots)"""
+        with self._get_connection() as conn:
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchall()
 
-            deleted_count = cursor.rowcount
+    def incremental_vacuum(self, pages=256):
+        """Rendre au système un nombre limité de pages libres"""
+        with self._get_connection() as conn:
+            conn.execute(f"PRAGMA incremental_vacuum({int(pages)})").fetchall()
             conn.commit()
 
-            return deleted_count
+    def optimize(self):
+        """Mettre à jour les statistiques du planificateur et tronquer le WAL"""
+        with self._get_connection() as conn:
+            conn.execute("PRAGMA optimize")
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
 
     def export_to_text(self, output_file, date=None):
         """Exporter les transcriptions en fichier texte"""
@@ -225,13 +693,135 @@ class TranscriptionDatabase:
 
         return len(transcriptions)
 
-    def get_total_count(self):
+    def export_subtitles(self, output_file, session_id=None, fmt='srt',
+                         max_words=12, max_duration=6.0):
+        """Exporter une session en sous-titres SRT ou WebVTT (horodatage des mots)"""
+        if session_id is None:
+            session_id = self.get_latest_session_id()
+        if session_id is None:
+            return 0
+
+        # Découper chaque transcription en répliques courtes selon le temps des mots
+        cues = []
+        for entry in self.get_session_word_timings(session_id):
+            # Reprendre le texte ponctué quand il s'aligne mot à mot sur les timings
+            tokens = []
+            for token in entry['text'].split():
+                if tokens and not any(c.isalnum() for c in token):
+                    tokens[-1] += ' ' + token
+                else:
+                    tokens.append(token)
+            if len(tokens) == len(entry['words']):
+                for word, token in zip(entry['words'], tokens):
+                    word['word'] = token
+
+            current = []
+            for word in entry['words']:
+                if current and (len(current) >= max_words or word['end'] - current[0]['start'] > max_duration):
+                    cues.append(current)
+                    current = []
+                current.append(word)
+            if current:
+                cues.append(current)
+
+        with open(output_file, 'w', encoding='utf-8') as f:
+            if fmt == 'vtt':
+                f.write("WEBVTT\n\n")
+            for i, cue in enumerate(cues, 1):
+                start = _format_cue_time(cue[0]['start'], fmt)
+                end = _format_cue_time(cue[-1]['end'], fmt)
+                if fmt == 'srt':
+                    f.write(f"{i}\n")
+                f.write(f"{start} --> {end}\n")
+                f.write(' '.join(w['word'] for w in cue) + "\n\n")
+
+        return len(cues)
+
+    def get_total_count(self, include_archive=True):
         """Obtenir le nombre total de transcriptions"""
-        with self._get_connection() as conn:
+        with self._read_connection() as conn:
             cursor = conn.cursor()
             cursor.execute("SELECT COUNT(*) as count FROM transcriptions")
             row = cursor.fetchone()
-            return row['count'] if row else 0
+            count = row['count'] if row else 0
+
+        if include_archive and self.archive is not None:
+            count += self.archive.get_total_count()
+        return count
+
+
+def _archived_word_timings(row):
+    """Horodatage d'une transcription archivée, au format de _unpack_word_timings"""
+    words = row['words']
+    return {
+        'transcription_id': row['id'],
+        'session_id': row.get('session_id'),
+        'start': words[0]['start'],
+        'end': words[-1]['end'],
+        'words': words
+    }
+
+
+def _redecode_fields(row):
+    """Texte ré-décodé et texte d'origine (base chaude ou archives)"""
+    return {
+        'redecoded_text': row['redecoded_text'],
+        'redecoded_model': row['redecoded_model'],
+        'original_text': row['original_text']
+    }
+
+
+def _store_word_timings(cursor, transcription_id, session_id, words):
+    """Enregistrer l'horodatage des mots (écarts à start_time, qui reste en REAL)"""
+    start_time = words[0]['start']
+    timings = array('f')
+    for w in words:
+        timings.extend((w['start'] - start_time, w['end'] - start_time, w.get('conf', 1.0)))
+    cursor.execute("""
+        INSERT OR REPLACE INTO transcription_words
+        (transcription_id, session_id, start_time, end_time, words, timings, timings_relative)
+        VALUES (?, ?, ?, ?, ?, ?, 1)
+    """, (transcription_id, session_id, start_time, words[-1]['end'],
+          ' '.join(w['word'] for w in words), timings.tobytes()))
+
+
+def _unpack_word_timings(row):
+    """Décoder le tableau compact (start, end, conf) d'une ligne transcription_words"""
+    timings = array('f')
+    timings.frombytes(row['timings'])
+    base = row['start_time'] if row['timings_relative'] else 0.0
+    words = []
+    for i, word in enumerate(row['words'].split(' ')):
+        words.append({
+            'word': word,
+            'start': round(base + timings[3 * i], 3),
+            'end': round(base + timings[3 * i + 1], 3),
+            'conf': round(timings[3 * i + 2], 3)
+        })
+    return {
+        'transcription_id': row['transcription_id'],
+        'session_id': row['session_id'],
+        'start': row['start_time'],
+        'end': row['end_time'],
+        'words': words
+    }
+
+
+def _format_cue_time(seconds, fmt):
+    """Formater un temps en HH:MM:SS,mmm (SRT) ou HH:MM:SS.mmm (WebVTT)"""
+    millis = int(round(seconds * 1000))
+    hours, millis = divmod(millis, 3600000)
+    minutes, millis = divmod(millis, 60000)
+    secs, millis = divmod(millis, 1000)
+    separator = ',' if fmt == 'srt' else '.'
+    return f"{hours:02d}:{minutes:02d}:{secs:02d}{separator}{millis:03d}"
+
+
+def _month_bounds(month):
+    """Bornes [début, fin) d'un mois 'YYYY-MM' au format timestamp SQLite"""
+    start = datetime.strptime(month, '%Y-%m')
+    end = (start + timedelta(days=32)).replace(day=1)
+    return start.strftime('%Y-%m-%d %H:%M:%S'), end.strftime('%Y-%m-%d %H:%M:%S')
 
 
 # Instance globale (singleton)
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Moteur de règles d'urgence
+Phrases configurables compilées en un automate (Aho-Corasick sur mots normalisés)
+"""
+
+import json
+import os
+import re
+import threading
+import time
+import unicodedata
+from collections import deque
+
+
+RULES_FILE = "emergency_rules.json"
+SEVERITY_LEVELS = {'low': 1, 'medium': 2, 'high': 3, 'critical': 4}
+
+# Découpe en mots: les apostrophes et tirets séparent ("j'ai" -> j, ai ; "aidez-moi" -> aidez, moi)
+TOKEN_RE = re.compile(r"[^\W_]+")
+
+
+def normalize_token(token):
+    """Minuscules, sans accents, pluriel et féminin simples retirés (tombées -> tombe)"""
+    token = unicodedata.normalize('NFD', token.lower())
+    token = ''.join(c for c in token if unicodedata.category(c) != 'Mn')
+    if len(token) > 3 and token[-1] in 'sx':
+        token = token[:-1]
+    if len(token) > 3 and token.endswith('ee'):
+        token = token[:-1]
+    return token
+
+
+def tokenize(text):
+    """Mots normalisés avec leurs positions (début, fin) dans le texte d'origine"""
+    return [(normalize_token(m.group()), m.start(), m.end()) for m in TOKEN_RE.finditer(text)]
+
+
+class RuleAutomaton:
+    """Automate d'Aho-Corasick dont l'alphabet est l'ensemble des mots normalisés"""
+
+    def __init__(self, rules):
+        self.rules = rules
+        self._goto = [{}]    # Noeud -> {mot: noeud suivant}
+        self._fail = [0]
+        self._output = [[]]  # Noeud -> [(index de règle, nombre de mots)]
+
+        for index, rule in enumerate(rules):
+            tokens = [t for t, _, _ in tokenize(rule['phrase'])]
+            if not tokens:
+                continue
+            node = 0
+            for token in tokens:
+                if token not in self._goto[node]:
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append([])
+                    self._goto[node][token] = len(self._goto) - 1
+                node = self._goto[node][token]
+            self._output[node].append((index, len(tokens)))
+
+        # Liens d'échec (parcours en largeur)
+        pending = deque(self._goto[0].values())
+        while pending:
+            node = pending.popleft()
+            for token, child in self._goto[node].items():
+                pending.append(child)
+                fail = self._fail[node]
+                while fail and token not in self._goto[fail]:
+                    fail = self._fail[fail]
+                target = self._goto[fail].get(token, 0)
+                self._fail[child] = target if target != child else 0
+                self._output[child] = self._output[child] + self._output[self._fail[child]]
+
+    def search(self, text):
+        """Toutes les occurrences en une passe: [{phrase, severity, start, end, text}]"""
+        tokens = tokenize(text)
+        matches = []
+        node = 0
+        for position, (token, _, end) in enumerate(tokens):
+            while node and token not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(token, 0)
+            for index, length in self._output[node]:
+                rule = self.rules[index]
+                start = tokens[position - length + 1][1]
+                matches.append({
+                    'phrase': rule['phrase'],
+                    'severity': rule.get('severity', 'high'),
+                    'start': start,
+                    'end': end,
+                    'text': text[start:end]
+                })
+        return matches
+
+
+class EmergencyRuleEngine:
+    """Règles d'urgence rechargées à chaud quand le fichier change"""
+
+    def __init__(self, rules_file=RULES_FILE, default_rules=None, reload_interval=2.0):
+        self.rules_file = rules_file
+        self.default_rules = default_rules or []
+        self.reload_interval = reload_interval
+        self.version = 0
+
+        self._lock = threading.Lock()
+        self._mtime = None
+        self._last_check = 0.0
+        self._automaton = RuleAutomaton(self.default_rules)
+        self._load()
+
+    def _load(self):
+        """Compiler le fichier de règles (les règles par défaut restent actives en cas d'erreur)"""
+        try:
+            mtime = os.path.getmtime(self.rules_file)
+        except OSError:
+            return
+        try:
+            with open(self.rules_file, 'r', encoding='utf-8') as f:
+                rules = json.load(f)['rules']
+            for rule in rules:
+                if rule.get('severity', 'high') not in SEVERITY_LEVELS:
+                    raise ValueError(f"gravité inconnue: {rule.get('severity')}")
+            automaton = RuleAutomaton(rules)
+        except Exception as e:
+            print(f"⚠️  Règles d'urgence invalides ({self.rules_file}): {e}")
+            self._mtime = mtime  # Ne pas réessayer avant la prochaine modification
+            return
+
+        # Remplacement atomique: les recherches en cours gardent l'ancien automate
+        with self._lock:
+            self._automaton = automaton
+            self._mtime = mtime
+            self.version += 1
+        print(f"✅ {len(rules)} règles d'urgence chargées")
+
+    def maybe_reload(self):
+        """Recharger si le fichier a changé (vérification au plus toutes les reload_interval s)"""
+        now = time.monotonic()
+        if now - self._last_check < self.reload_interval:
+            return
+        self._last_check = now
+        try:
+            mtime = os.path.getmtime(self.rules_file)
+        except OSError:
+            return
+        if mtime != self._mtime:
+            self._load()
+
+    def find_matches(self, text):
+        """Rechercher toutes les règles dans le texte"""
+        if not text:
+            return []
+        self.maybe_reload()
+        return self._automaton.search(text)
+
+    def get_phrases(self):
+        """Phrases des règles actives (pour la grammaire du détecteur rapide)"""
+        return [rule['phrase'] for rule in self._automaton.rules]
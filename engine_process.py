@@ -0,0 +1,571 @@
+#!/usr/bin/env python3
+"""
+Moteur de reconnaissance dans un processus séparé (option engine_mode='process')
+Capture + décodage hors du GIL de l'interface; niveaux et résultats partiels par un anneau
+en mémoire partagée, résultats finaux et commandes par un canal compact (Pipe).
+Un superviseur relance le processus moteur s'il s'arrête, sans interrompre l'interface.
+"""
+
+import multiprocessing
+import os
+import signal
+import struct
+import sys
+import threading
+import time
+from collections import deque
+from multiprocessing.connection import wait
+
+from alert_dispatcher import get_alert_dispatcher
+from shm_ring import ShmRing
+from startup_monitor import get_startup_monitor
+from stats_manager import get_stats_manager
+
+HEARTBEAT_INTERVAL = 1.0   # Secondes entre deux battements du processus moteur
+HEARTBEAT_TIMEOUT = 15.0   # Processus considéré bloqué au-delà
+MODEL_LOAD_TIMEOUT = 180.0
+MAX_RESTART_DELAY = 30.0
+
+# Messages de l'anneau: 1 octet de type + contenu
+LEVEL_EVENT = b'L'    # float32 (niveau audio, %)
+PARTIAL_EVENT = b'P'  # texte UTF-8
+LEVEL = struct.Struct('<f')
+
+# Instances globales héritées du parent lors d'un fork (connexions SQLite, threads): recréées
+INHERITED_SINGLETONS = (
+    ('database', '_db_instance'),
+    ('stats_manager', '_stats_instance'),
+    ('alert_dispatcher', '_alert_dispatcher_instance'),
+    ('audio_archive', '_audio_archiver_instance'),
+    ('resource_manager', '_resource_instance')
+)
+
+
+class CpuMeter:
+    """Utilisation CPU du processus courant (% d'un coeur) entre deux mesures"""
+
+    def __init__(self):
+        self._last_cpu = time.process_time()
+        self._last_wall = time.monotonic()
+
+    def sample(self):
+        cpu, wall = time.process_time(), time.monotonic()
+        elapsed = wall - self._last_wall
+        percent = (cpu - self._last_cpu) / elapsed * 100 if elapsed > 0 else 0.0
+        self._last_cpu, self._last_wall = cpu, wall
+        return round(percent, 1)
+
+
+def reset_inherited_state():
+    """Au début d'un processus moteur: ne garder du parent que le modèle préchargé"""
+    for module_name, attribute in INHERITED_SINGLETONS:
+        module = sys.modules.get(module_name)
+        if module is not None:
+            setattr(module, attribute, None)
+
+    # PortAudio initialisé par le parent (import de sounddevice): le réinitialiser (fork seulement,
+    # un processus créé par spawn n'a pas encore importé sounddevice).
+    # _terminate()/_initialize() sont privées (Pa_Terminate/Pa_Initialize): présentes dans
+    # sounddevice 0.4.6 à 0.5.x, la plage de requirements.txt; à revérifier avant de la relever.
+    sd = sys.modules.get('sounddevice')
+    if sd is not None and hasattr(sd, '_initialize'):
+        try:
+            sd._terminate()
+            sd._initialize()
+        except Exception as e:
+            print(f"⚠️  Réinitialisation audio après fork impossible: {e}")
+
+
+def load_worker_model(model_path):
+    """Modèle hérité du parent (fork après préchargement) ou chargé par le processus"""
+    from model_manager import get_model_manager
+    manager = get_model_manager()
+    if manager.active_path != model_path:
+        manager.load(model_path)
+    return manager
+
+
+def model_heartbeat(manager):
+    """Résumé du modèle actif pour les battements"""
+    active = manager.loads.get(manager.active_path, {})
+    return {
+        'active_path': manager.active_path,
+        'generation': manager.generation,
+        'loading': manager.loading_path,
+        'load_seconds': active.get('load_seconds'),
+        'rss_delta_mb': active.get('rss_delta_mb'),
+        'inherited': active.get('pid') not in (None, os.getpid()),  # Préchargé par le parent
+        'last_error': manager.last_error
+    }
+
+
+def _engine_main(config, model_path, ring_handle, conn):
+    """Point d'entrée du processus moteur"""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # Ctrl+C géré par le processus principal
+    reset_inherited_state()
+
+    from recognition_engine import RecognitionEngine
+
+    ring = ShmRing.attach(ring_handle)
+    send_lock = threading.Lock()
+
+    def send(message):
+        with send_lock:
+            conn.send(message)
+
+    def on_partial(text):
+        data = text.encode('utf-8')[:ring.slot_size - 1]
+        ring.write(PARTIAL_EVENT + data)
+
+    manager = load_worker_model(model_path)
+    if manager.model is None:
+        os._exit(1)  # Le superviseur relancera (avec délai croissant)
+    engine = RecognitionEngine(config, model_manager=manager)
+    engine.on_level = lambda level: ring.write(LEVEL_EVENT + LEVEL.pack(level))
+    engine.on_partial = on_partial
+    engine.on_final = lambda result: send(('final', result))
+    engine.on_emergency = lambda alert: send(('emergency', alert))
+    send(('ready', os.getpid()))
+
+    cpu_meter = CpuMeter()
+    next_heartbeat = 0.0
+    while True:
+        if conn.poll(HEARTBEAT_INTERVAL / 2):
+            command, argument = conn.recv()
+            if command == 'start':
+                send(('started', engine.start()))
+            elif command == 'stop':
+                engine.stop()
+            elif command == 'config':
+                engine.update_config(argument)  # Appliqué par le thread de reconnaissance
+            elif command == 'overrides':
+                engine.quality_overrides = argument
+            elif command == 'vad':
+                engine.vad.set_aggressiveness(argument)
+            elif command == 'model':
+                engine.swap_model(argument)
+            elif command == 'shutdown':
+                engine.stop()
+                break
+
+        # Thread de reconnaissance mort alors qu'il devrait tourner: laisser le superviseur relancer
+        thread = engine._thread
+        if engine.is_running and thread is not None and not thread.is_alive():
+            print("❌ Thread de reconnaissance arrêté, fin du processus moteur")
+            os._exit(1)
+
+        now = time.monotonic()
+        if now >= next_heartbeat:
+            next_heartbeat = now + HEARTBEAT_INTERVAL
+            send(('heartbeat', {
+                'is_running': engine.is_running,
+                'queue_depth': engine.audio_queue.qsize(),
+                'busy_seconds': engine.busy_seconds,
+                'processed_audio_seconds': engine.processed_audio_seconds,
+                'last_speech_time': engine.last_speech_time,
+                'speech_counters': engine.speech_counters(),
+                'session_id': engine.session_id,
+                'vad_aggressiveness': engine.vad.aggressiveness,
+                'latency': engine.stats.get_latency_stats(),
+                'model': model_heartbeat(manager),
+                'recognizer': engine.get_recognizer_status(),
+                'memory': engine.memory_estimates(),
+                'cpu_percent': cpu_meter.sample()
+            }))
+
+    # Laisser le thread de reconnaissance terminer la session
+    if engine._thread is not None:
+        engine._thread.join(timeout=3)
+    ring.close()
+
+
+class _RemoteQueue:
+    """Profondeur de la file audio du processus moteur (dernier battement)"""
+
+    def __init__(self):
+        self.depth = 0
+
+    def qsize(self):
+        return self.depth
+
+
+class _RemoteVad:
+    """Réglage du VAD du processus moteur"""
+
+    def __init__(self, proxy):
+        self._proxy = proxy
+        self.aggressiveness = proxy.config.get('vad_aggressiveness', 1)
+
+    def set_aggressiveness(self, aggressiveness):
+        self.aggressiveness = aggressiveness
+        self._proxy._send(('vad', aggressiveness))
+
+
+class _RemoteMeter:
+    """Niveaux audio reçus par l'anneau"""
+
+    def __init__(self):
+        self.history = deque(maxlen=20)
+
+    def get_average_level(self):
+        return sum(self.history) / len(self.history) if self.history else 0
+
+
+class EngineProcess:
+    """Même interface que RecognitionEngine, reconnaissance dans un processus supervisé"""
+
+    mode = 'process'
+
+    def __init__(self, config, model_path, ring_slots=256, ring_slot_size=512, start_method='spawn',
+                 model_manager=None):
+        self.config = config  # Instantané immuable (update_config le remplace et le transmet)
+        self.model_path = model_path
+        self.model = model_path  # Le modèle est chargé par le processus moteur
+        self.model_manager = model_manager  # Modèle préchargé par le parent (hérité avec 'fork')
+        self.start_method = start_method
+        self.ring_slots = ring_slots
+        self.ring_slot_size = ring_slot_size
+        self.context = multiprocessing.get_context(start_method)
+
+        # Callbacks de l'interface (appelés depuis le thread du superviseur)
+        self.on_level = None
+        self.on_partial = None
+        self.on_final = None
+        self.on_emergency = None
+
+        # Miroir de l'état du processus moteur (mis à jour à chaque battement)
+        self.is_running = False  # État souhaité: relancé après un redémarrage
+        self.last_speech_time = 0.0
+        self.busy_seconds = 0.0
+        self.processed_audio_seconds = 0.0
+        self.session_id = None
+        self.keyword_spotter = None
+        self.audio_queue = _RemoteQueue()
+        self.vad = _RemoteVad(self)
+        self.audio_meter = _RemoteMeter()
+        self._quality_overrides = {}
+
+        self.stats = get_stats_manager()
+        self.alert_dispatcher = get_alert_dispatcher()
+
+        # Processus en cours: nom -> {'process', 'conn', 'commands', 'last_heartbeat', 'stats'}
+        self._workers = {}
+        self._event_rings = []  # Anneaux de niveaux / partiels lus par le superviseur
+        self._ring = None
+        self._send_lock = threading.Lock()
+        self._supervisor = None
+        self._shutdown = threading.Event()
+
+        self.restarts = 0
+        self.last_exit_code = None
+        self.remote_latency = {}
+        self.remote_model = {}
+        self.remote_recognizer = {}
+        self.remote_speech_counters = (0.0, 0.0)
+        self.remote_memory = {}
+
+    # --- Interface RecognitionEngine ---
+
+    def start(self):
+        """Démarrer la reconnaissance (retourne False si déjà en cours)"""
+        if self.is_running:
+            return False
+        self.is_running = True
+        self._send(('start', None))
+        return True
+
+    def stop(self):
+        """Arrêter la reconnaissance (le processus moteur reste prêt)"""
+        self.is_running = False
+        self._send(('stop', None))
+
+    @property
+    def quality_overrides(self):
+        return self._quality_overrides
+
+    @quality_overrides.setter
+    def quality_overrides(self, overrides):
+        self._quality_overrides = dict(overrides)
+        self._send(('overrides', self._quality_overrides))
+
+    def is_enabled(self, key):
+        return self.config.get(key, True) and self._quality_overrides.get(key, True)
+
+    def update_config(self, config):
+        """Nouvel instantané, appliqué par le processus moteur au prochain point sûr"""
+        if config.get('vad_aggressiveness') != self.config.get('vad_aggressiveness'):
+            self.vad.aggressiveness = config.get('vad_aggressiveness', 1)
+        self.config = config
+        self._send(('config', config))  # Sans processus: transmis au prochain lancement
+
+    def swap_model(self, path):
+        """Remplacer le modèle du processus moteur (bascule à la fin de l'énoncé en cours)"""
+        if not os.path.isdir(path):
+            return False
+        self.model_path = path  # Aussi après une relance
+        self._send(('model', path))
+        return True
+
+    # --- Cycle de vie ---
+
+    def launch(self):
+        """Démarrer le superviseur (qui lance le processus moteur)"""
+        if self._supervisor and self._supervisor.is_alive():
+            return
+        self._shutdown.clear()
+        self._supervisor = threading.Thread(target=self._supervise, name='engine-supervisor', daemon=True)
+        self._supervisor.start()
+
+    def shutdown(self):
+        """Arrêter le processus moteur et le superviseur"""
+        self._shutdown.set()
+        self._send(('shutdown', None))
+
+    def _send(self, message):
+        """Transmettre une commande aux processus qui la traitent"""
+        sent = False
+        with self._send_lock:
+            for worker in list(self._workers.values()):
+                if worker['conn'] is None or (worker['commands'] and message[0] not in worker['commands']):
+                    continue
+                try:
+                    worker['conn'].send(message)
+                    sent = True
+                except (OSError, EOFError, BrokenPipeError):
+                    pass
+        return sent  # False sans processus: l'état est renvoyé au prochain lancement
+
+    def _supervise(self):
+        """Lancer le processus moteur, relayer ses événements, le relancer s'il s'arrête"""
+        delay = 1.0
+        while not self._shutdown.is_set():
+            started = time.monotonic()
+            try:
+                self._run_process()
+            except Exception as e:
+                print(f"Erreur du superviseur du moteur: {e}")
+            finally:
+                self._cleanup_process()
+
+            if self._shutdown.is_set():
+                break
+            self.restarts += 1
+            # Relance rapide après un long fonctionnement, plus espacée si le moteur plante en boucle
+            delay = 1.0 if time.monotonic() - started > 60 else min(delay * 2, MAX_RESTART_DELAY)
+            print(f"🔁 Processus moteur arrêté (code {self.last_exit_code}), relance dans {delay:.0f}s")
+            self._shutdown.wait(delay)
+
+    def _spawn_worker(self, name, target, args, commands=None, timeout=MODEL_LOAD_TIMEOUT):
+        """Lancer un processus et attendre son message 'ready' (False s'il échoue)"""
+        parent_conn, child_conn = self.context.Pipe()
+        process = self.context.Process(target=target, args=args + (child_conn,), name=name, daemon=True)
+        process.start()
+        child_conn.close()
+        worker = {
+            'process': process,
+            'conn': None,
+            'commands': commands,  # None = toutes les commandes
+            'last_heartbeat': 0.0,
+            'stats': {}
+        }
+        self._workers[name] = worker
+
+        try:
+            if not parent_conn.poll(timeout):
+                print(f"❌ Le processus {name} n'est pas prêt à temps")
+                return False
+            message = parent_conn.recv()
+        except (EOFError, OSError):
+            return False  # Arrêté pendant le chargement
+        if message[0] != 'ready':
+            return False
+        print(f"✅ Processus {name} prêt (pid {message[1]})")
+        worker['conn'] = parent_conn
+        worker['last_heartbeat'] = time.monotonic()
+        return True
+
+    def _spawn(self):
+        """Créer l'anneau et lancer le processus moteur"""
+        self._ring = ShmRing(slots=self.ring_slots, slot_size=self.ring_slot_size, create=True,
+                             context=self.context)
+        self._event_rings = [self._ring]
+        return self._spawn_worker('recognition-engine', _engine_main,
+                                  (self.config, self.model_path, self._ring.handle))
+
+    def _run_process(self):
+        manager = self.model_manager
+        if self.start_method == 'fork' and manager is not None and manager.is_loading():
+            # Fork après le préchargement: le processus moteur hérite du modèle
+            manager.wait_ready()
+        if not self._spawn():
+            return
+        get_startup_monitor().mark('engine_ready')
+
+        # Rétablir l'état souhaité (après une relance, ou configuration modifiée pendant le lancement)
+        self._send(('config', self.config))
+        if self._quality_overrides:
+            self._send(('overrides', self._quality_overrides))
+        if self.vad.aggressiveness != self.config.get('vad_aggressiveness', 1):
+            self._send(('vad', self.vad.aggressiveness))
+        if self.is_running:
+            self._send(('start', None))
+
+        connections = {worker['conn']: name for name, worker in self._workers.items()}
+        while not self._shutdown.is_set():
+            for ring in self._event_rings:
+                self._drain_ring(ring)
+
+            try:
+                for conn in wait(list(connections), timeout=0.02):
+                    while conn.poll():
+                        self._handle_event(connections[conn], conn.recv())
+            except (EOFError, OSError):
+                return  # Processus terminé
+
+            now = time.monotonic()
+            for name, worker in self._workers.items():
+                if not worker['process'].is_alive():
+                    print(f"❌ Processus {name} arrêté")
+                    return
+                if now - worker['last_heartbeat'] > HEARTBEAT_TIMEOUT:
+                    print(f"❌ Processus {name} bloqué, arrêt forcé")
+                    worker['process'].kill()
+                    return
+
+    def _cleanup_process(self):
+        """Arrêter tous les processus (l'un est tombé: ils sont relancés ensemble)"""
+        with self._send_lock:
+            workers, self._workers = self._workers, {}
+        for worker in workers.values():
+            if worker['conn'] is not None:
+                try:
+                    worker['conn'].send(('shutdown', None))
+                except (OSError, EOFError, BrokenPipeError):
+                    pass
+        for worker in workers.values():
+            process = worker['process']
+            process.join(timeout=5 if self._shutdown.is_set() else 1)
+            if process.is_alive():
+                process.kill()
+            process.join(timeout=5)
+            if process.exitcode:
+                self.last_exit_code = process.exitcode
+            elif self.last_exit_code is None:
+                self.last_exit_code = process.exitcode
+        for ring in self._event_rings:
+            self._drain_ring(ring)
+        self._close_rings()
+
+    def _close_rings(self):
+        for ring in self._event_rings:
+            ring.close()
+        self._event_rings = []
+        self._ring = None
+
+    # --- Événements du processus moteur ---
+
+    def _drain_ring(self, ring=None):
+        """Relayer les niveaux et résultats partiels de l'anneau"""
+        ring = ring or self._ring
+        while True:
+            data = ring.read()
+            if data is None:
+                return
+            kind, payload = data[:1], data[1:]
+            if kind == LEVEL_EVENT:
+                level = LEVEL.unpack(payload)[0]
+                self.audio_meter.history.append(level)
+                if self.on_level:
+                    self.on_level(level)
+            elif kind == PARTIAL_EVENT and self.on_partial:
+                self.on_partial(payload.decode('utf-8', errors='ignore'))
+
+    def _handle_heartbeat(self, name, payload):
+        """Miroir de l'état et utilisation du processus"""
+        worker = self._workers.get(name)
+        if worker is not None:
+            worker['last_heartbeat'] = time.monotonic()
+            worker['stats'] = {key: payload[key] for key in ('cpu_percent', 'busy_seconds', 'rtf')
+                               if key in payload}
+        # Chaque processus ne rapporte que ce qu'il mesure
+        if 'queue_depth' in payload:
+            self.audio_queue.depth = payload['queue_depth']
+        if 'last_speech_time' in payload:
+            self.last_speech_time = payload['last_speech_time']
+        if 'speech_counters' in payload:
+            self.remote_speech_counters = tuple(payload['speech_counters'])
+        if 'processed_audio_seconds' in payload:
+            self.busy_seconds = payload['busy_seconds']
+            self.processed_audio_seconds = payload['processed_audio_seconds']
+        if 'session_id' in payload:
+            self.session_id = payload['session_id']
+        if 'latency' in payload:
+            self.remote_latency = payload['latency']
+        if 'model' in payload:
+            self.remote_model = payload['model']
+        if 'recognizer' in payload:
+            self.remote_recognizer = payload['recognizer']
+        if 'memory' in payload:
+            self.remote_memory = payload['memory']
+
+    def _handle_event(self, name, message):
+        kind, payload = message
+        if kind == 'heartbeat':
+            self._handle_heartbeat(name, payload)
+        elif kind == 'final':
+            for ring in self._event_rings:
+                self._drain_ring(ring)  # Partiels d'abord, dans l'ordre
+            self.stats.increment_transcription(payload['text'])
+            if payload['is_emergency']:
+                self.alert_dispatcher.submit(payload)
+            if self.on_final:
+                self.on_final(payload)
+        elif kind == 'emergency':
+            self.alert_dispatcher.submit(payload)
+            if self.on_emergency:
+                self.on_emergency(payload)
+        elif kind == 'started':
+            if payload:
+                get_startup_monitor().mark('audio_stream')
+            else:
+                print(f"⚠️  Le processus {name} n'a pas démarré la reconnaissance")
+
+    def get_status(self):
+        """État des processus moteur"""
+        now = time.monotonic()
+        processes = {}
+        for name, worker in list(self._workers.items()):
+            process = worker['process']
+            processes[name] = {
+                'pid': process.pid,
+                'alive': process.is_alive(),
+                'heartbeat_age': round(now - worker['last_heartbeat'], 1) if worker['last_heartbeat'] else None,
+                **worker['stats']
+            }
+        first = next(iter(processes.values()), {})
+        return {
+            'mode': self.mode,
+            'pid': first.get('pid'),
+            'alive': bool(processes) and all(p['alive'] for p in processes.values()),
+            'restarts': self.restarts,
+            'last_exit_code': self.last_exit_code,
+            'heartbeat_age': first.get('heartbeat_age'),
+            'processes': processes,
+            'queue_depth': self.audio_queue.depth,
+            'rings': [ring.get_status() for ring in list(self._event_rings)],
+            'latency': self.remote_latency,
+            'model': self.remote_model,
+            'recognizer': self.remote_recognizer
+        }
+
+    def speech_counters(self):
+        """(secondes analysées, secondes de parole) du processus qui fait le VAD (dernier battement)"""
+        return self.remote_speech_counters
+
+    def get_recognizer_status(self):
+        """Reconnaisseur du processus décodeur (dernier battement)"""
+        return self.remote_recognizer
+
+    def memory_estimates(self):
+        """Estimations par composant du processus décodeur (dernier battement)"""
+        return self.remote_memory
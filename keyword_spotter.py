@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Module de détection rapide des mots d'urgence
+Second KaldiRecognizer restreint aux mots d'urgence (grammaire Vosk), analysé sur les résultats partiels
+"""
+
+import json
+import queue
+import threading
+import time
+from collections import deque
+
+import vosk
+
+from emergency_rules import SEVERITY_LEVELS
+from stats_manager import get_stats_manager
+
+
+class KeywordSpotter:
+    """Reconnaisseur léger en parallèle, alerte dès le résultat partiel"""
+
+    def __init__(self, model, rules, sample_rate=16000, dedup_seconds=5.0,
+                 max_queue_size=20):
+        self.model = model
+        self.rules = rules  # EmergencyRuleEngine (la grammaire suit ses rechargements)
+        self.phrases = []
+        self._rules_version = None
+        self.sample_rate = sample_rate
+        self.dedup_seconds = dedup_seconds
+
+        self.on_alert = None  # on_alert({'keywords': [...], 'severity': ..., 'source': ..., 'latency_ms': ...})
+
+        self._queue = queue.Queue(maxsize=max_queue_size)
+        self._thread = None
+        self._running = False
+        self._lock = threading.Lock()
+        self._last_alert = {}  # Mot-clé -> time.monotonic() de la dernière alerte
+
+        # Position dans le flux décodé -> instant de capture (calcul de latence)
+        self._fed_seconds = 0.0
+        self._block_times = deque(maxlen=200)
+
+        self.alert_count = 0
+        self.dropped_blocks = 0
+
+    def start(self):
+        """Démarrer le thread de détection"""
+        if self._running:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._loop, name='keyword-spotter', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Arrêter le thread de détection"""
+        self._running = False
+
+    def set_model(self, model):
+        """Nouveau modèle (remplacement à chaud): reconnaisseur reconstruit au prochain bloc"""
+        self.model = model
+        self._rules_version = None
+
+    def recycle(self):
+        """Reconnaisseur recréé entre deux énoncés: marqueur placé dans la file, après leurs blocs"""
+        try:
+            self._queue.put_nowait((None, None))
+        except queue.Full:
+            self._rules_version = None  # File pleine: reconstruit au prochain bloc
+
+    def feed(self, data, captured_at):
+        """Transmettre un bloc audio (ne bloque jamais le thread de reconnaissance)"""
+        try:
+            self._queue.put_nowait((data, captured_at))
+        except queue.Full:
+            self.dropped_blocks += 1
+
+    def _build_recognizer(self):
+        """Reconnaisseur dont la grammaire est limitée aux phrases des règles actives"""
+        self._rules_version = self.rules.version
+        self.phrases = sorted(set(p.lower() for p in self.rules.get_phrases()))
+        grammar = json.dumps(self.phrases + ['[unk]'], ensure_ascii=False)
+        rec = vosk.KaldiRecognizer(self.model, self.sample_rate, grammar)
+        rec.SetWords(True)
+        if hasattr(rec, 'SetPartialWords'):
+            rec.SetPartialWords(True)
+        # Les temps du nouveau reconnaisseur repartent de zéro
+        self._fed_seconds = 0.0
+        self._block_times.clear()
+        return rec
+
+    def _loop(self):
+        """Décoder avec la grammaire restreinte et analyser chaque résultat partiel"""
+        rec = self._build_recognizer()
+
+        while self._running:
+            try:
+                data, captured_at = self._queue.get(timeout=1)
+            except queue.Empty:
+                continue
+            if data is None:
+                rec = self._build_recognizer()  # Recyclage demandé par le moteur
+                continue
+
+            # Règles rechargées: nouvelle grammaire
+            self.rules.maybe_reload()
+            if self.rules.version != self._rules_version:
+                rec = self._build_recognizer()
+
+            self._fed_seconds += len(data) / 2 / self.sample_rate
+            self._block_times.append((self._fed_seconds, captured_at))
+
+            if rec.AcceptWaveform(data):
+                result = json.loads(rec.Result())
+                self._check_words(result.get('text', ''), result.get('result'), captured_at)
+            else:
+                partial = json.loads(rec.PartialResult())
+                self._check_words(partial.get('partial', ''), partial.get('partial_result'), captured_at)
+
+    def _check_words(self, text, words, captured_at):
+        """Chercher les phrases d'urgence dans le texte de la grammaire restreinte"""
+        if not text:
+            return
+        matches = self.rules.find_matches(text.replace('[unk]', ' '))
+        if not matches:
+            return
+
+        # Instant de capture de la fin du mot-clé (si Vosk fournit les temps partiels)
+        keyword_end_at = captured_at
+        if words:
+            matched_words = set(matches[0]['text'].lower().split())
+            keyword_ends = [w['end'] for w in words if w.get('word') in matched_words]
+            if keyword_ends:
+                keyword_end_at = self._capture_time_of(max(keyword_ends), captured_at)
+
+        self._alert(matches, 'spotter', keyword_end_at)
+
+    def _capture_time_of(self, stream_seconds, default):
+        """Instant de capture du bloc contenant la position stream_seconds"""
+        for block_end, captured_at in self._block_times:
+            if block_end >= stream_seconds:
+                return captured_at
+        return default
+
+    def check_text(self, text, captured_at, source='partial'):
+        """Analyser un texte du reconnaisseur principal (résultats partiels)"""
+        matches = self.rules.find_matches(text)
+        if matches:
+            self._alert(matches, source, captured_at)
+
+    def _alert(self, matches, source, keyword_end_at):
+        """Émettre une alerte, sauf si ces phrases viennent déjà d'en déclencher une"""
+        keywords = list(dict.fromkeys(m['phrase'] for m in matches))
+        severity = max((m['severity'] for m in matches), key=SEVERITY_LEVELS.get)
+        now = time.monotonic()
+        with self._lock:
+            fresh = [k for k in keywords if now - self._last_alert.get(k, 0) > self.dedup_seconds]
+            for keyword in fresh:
+                self._last_alert[keyword] = now
+            if not fresh:
+                return
+            self.alert_count += 1
+
+        latency = now - keyword_end_at
+        get_stats_manager().record_latency('emergency_alert', latency)
+        print(f"🚨 MOT D'URGENCE ({source}, {severity}): {fresh} en {latency * 1000:.0f} ms")
+
+        if self.on_alert:
+            self.on_alert({
+                'keywords': fresh,
+                'severity': severity,
+                'source': source,
+                'latency_ms': round(latency * 1000, 1)
+            })
+
+    def get_status(self):
+        """État du détecteur"""
+        return {
+            'running': self._running,
+            'phrases': len(self.phrases),
+            'rules_version': self._rules_version,
+            'alerts': self.alert_count,
+            'dropped_blocks': self.dropped_blocks
+        }
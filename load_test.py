@@ -0,0 +1,465 @@
+#!/usr/bin/env python3
+"""
+Test de charge de la diffusion Socket.IO de app.py (entièrement local)
+- Le serveur est app.py lui-même, lancé dans un sous-processus avec un reconnaisseur simulé à la
+  place de Vosk: résultats partiels et finals émis par le vrai chemin (emit_partial / emit_final)
+- N afficheurs simulés (clients Socket.IO) reçoivent les transcriptions; certains peuvent aussi
+  envoyer de l'audio PCM rejoué en temps réel (le reconnaisseur simulé en tire ses résultats)
+- Mesures: latence émission -> réception, diffusion complète (dernier afficheur servi), retard par
+  afficheur, retard audio -> résultat pour les flux, messages perdus, CPU et mémoire du serveur
+- Rapport par palier de clients, avec seuils de réussite (code de sortie 1 en cas d'échec)
+
+Client Socket.IO requis: pip install "python-socketio[client]"
+
+Usage:
+    python load_test.py --clients 1 5 10 20 40 --duration 30
+    python load_test.py --clients 10 --streams 2 --stream-pcm enregistrement.wav --recognizer-load 0.6
+    python load_test.py --clients 20 --json rapport.json --max-fanout-p99-ms 150
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+import urllib.request
+import wave
+
+import psutil
+
+DEFAULT_PORT = 5099      # Distinct du port de app.py (5001): un serveur réel peut tourner à côté
+SAMPLE_RATE = 16000
+BLOCK_MS = 60            # Blocs audio envoyés par les flux (comme le moteur)
+WARMUP_SECONDS = 2.0     # Connexions établies, mesures pas encore comptées
+SERVER_START_TIMEOUT = 300.0
+
+
+# --- Côté serveur: reconnaisseur simulé ---
+
+class FakeRecognizer:
+    """Remplace RecognitionEngine dans app.py: émet des résultats horodatés, sans micro ni modèle
+
+    Résultats synthétiques (partiel tous les partial_interval, final tous les final_interval) ou
+    tirés de l'audio reçu des flux. recognizer_load: part d'un coeur occupée par seconde d'audio
+    décodée (boucle active), pour reproduire la concurrence du décodeur avec la diffusion.
+    """
+
+    def __init__(self, partial_interval=0.1, final_interval=3.0, recognizer_load=0.0, synthetic=True):
+        self.partial_interval = partial_interval
+        self.final_interval = final_interval
+        self.recognizer_load = recognizer_load
+        self.synthetic = synthetic
+        self.is_running = False
+        self.on_partial = None
+        self.on_final = None
+        self.on_level = None
+        self.on_emergency = None
+        self._seq = 0
+        self._lock = threading.Lock()
+        self._streams = {}  # Flux -> secondes d'audio depuis le dernier partiel / final
+
+    def start(self):
+        if self.is_running:
+            return False
+        self.is_running = True
+        if self.synthetic:
+            threading.Thread(target=self._run, name='fake-recognizer', daemon=True).start()
+        return True
+
+    def stop(self):
+        self.is_running = False
+
+    def update_config(self, config):
+        pass
+
+    def _next_seq(self):
+        with self._lock:
+            self._seq += 1
+            return self._seq
+
+    def _busy(self, audio_seconds):
+        """Occuper le CPU comme le ferait le décodage de audio_seconds d'audio"""
+        until = time.perf_counter() + audio_seconds * self.recognizer_load
+        while time.perf_counter() < until:
+            pass
+
+    def _emit(self, final, stream='-', audio_sent_at=None):
+        seq = self._next_seq()
+        sent_at = time.time()
+        text = f"#{seq} @{sent_at:.6f} {stream}"
+        if not final:
+            self.on_partial(text)
+            return
+        self.on_final({'id': None, 'text': text, 'final': True, 'is_emergency': False,
+                       'emergency_words': [], 'severity': None, 'matches': [],
+                       'seq': seq, 'sent_at': sent_at, 'stream': stream, 'audio_sent_at': audio_sent_at})
+
+    def _run(self):
+        next_partial = next_final = time.monotonic()
+        while self.is_running:
+            now = time.monotonic()
+            if now >= next_final:
+                next_final += self.final_interval
+                self._emit(True)
+            elif now >= next_partial:
+                next_partial += self.partial_interval
+                self._busy(self.partial_interval)
+                self._emit(False)
+            time.sleep(max(0.0, min(next_partial, next_final) - time.monotonic()))
+
+    def feed(self, stream, pcm, sent_at):
+        """Bloc audio d'un flux (thread du gestionnaire Socket.IO)"""
+        seconds = len(pcm) / 2 / SAMPLE_RATE
+        self._busy(seconds)
+        with self._lock:
+            since_partial, since_final = self._streams.get(stream, (0.0, 0.0))
+            since_partial += seconds
+            since_final += seconds
+            final = since_final >= self.final_interval
+            partial = not final and since_partial >= self.partial_interval
+            self._streams[stream] = (0.0 if partial or final else since_partial, 0.0 if final else since_final)
+        if final:
+            self._emit(True, stream, sent_at)
+        elif partial:
+            self._emit(False, stream, sent_at)
+
+
+def serve(args):
+    """Processus serveur: app.py avec le reconnaisseur simulé"""
+    import app as server
+    from flask import request
+
+    # Préchauffage du modèle (lectures disque) terminé avant les mesures
+    server.warmer.wait(server.MODEL_PATH, timeout=SERVER_START_TIMEOUT)
+
+    fake = FakeRecognizer(args.partial_interval, args.final_interval, args.recognizer_load,
+                          synthetic=not args.no_synthetic)
+    fake.on_partial = server.emit_partial
+    fake.on_final = server.emit_final
+    server.engine = fake
+    server.model = 'simulé'
+
+    @server.socketio.on('audio_chunk')
+    def handle_audio_chunk(data):
+        fake.feed(data.get('stream') or request.sid, data['pcm'], data.get('sent_at'))
+
+    print(f"🧪 Serveur de test (reconnaisseur simulé) sur 127.0.0.1:{args.port}", flush=True)
+    server.socketio.run(server.app, host='127.0.0.1', port=args.port, allow_unsafe_werkzeug=True)
+
+
+# --- Côté clients: afficheurs simulés ---
+
+def read_pcm(path):
+    """PCM 16 bits mono 16 kHz (WAV ou brut) -> bytes"""
+    if path.lower().endswith('.wav'):
+        with wave.open(path, 'rb') as f:
+            if f.getsampwidth() != 2 or f.getnchannels() != 1 or f.getframerate() != SAMPLE_RATE:
+                raise ValueError(f"{path}: WAV 16 bits mono {SAMPLE_RATE} Hz attendu")
+            return f.readframes(f.getnframes())
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+class Measurements:
+    """Réceptions de tous les afficheurs (partagé entre leurs threads)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.recording = False
+        self.sent = {}          # seq -> instant d'émission (serveur)
+        self.receipts = {}      # seq -> [instants de réception]
+        self.latencies = {}     # Afficheur -> [ms]
+        self.stream_lags = []   # ms, bloc audio envoyé -> résultat final reçu par son émetteur
+        self.seen = {}          # Afficheur -> nombre de messages reçus
+        self.out_of_order = 0
+        self.first_seq = None   # Numéros émis pendant la mesure (le serveur les incrémente de 1)
+        self.last_seq = None
+        self._last_seq = {}
+
+    def add(self, client, seq, sent_at, received_at, own_audio_sent_at=None):
+        with self._lock:
+            if not self.recording:
+                return
+            if seq < self._last_seq.get(client, 0):
+                self.out_of_order += 1
+            self._last_seq[client] = seq
+            self.first_seq = seq if self.first_seq is None else min(self.first_seq, seq)
+            self.last_seq = seq if self.last_seq is None else max(self.last_seq, seq)
+            self.sent[seq] = sent_at
+            self.receipts.setdefault(seq, []).append(received_at)
+            self.latencies.setdefault(client, []).append((received_at - sent_at) * 1000)
+            self.seen[client] = self.seen.get(client, 0) + 1
+            if own_audio_sent_at is not None:
+                self.stream_lags.append((received_at - own_audio_sent_at) * 1000)
+
+
+class SimulatedDisplay:
+    """Un afficheur: client Socket.IO qui reçoit les transcriptions (et envoie un flux audio)"""
+
+    def __init__(self, name, url, measurements, transport=None, pcm=None):
+        import socketio
+
+        self.name = name
+        self.url = url
+        self.measurements = measurements
+        self.transports = [transport] if transport else None
+        self.pcm = pcm
+        self.sio = socketio.Client(reconnection=False)
+        self.sio.on('connect', lambda: self.sio.emit('start_recording'))  # Comme l'interface web
+        self.sio.on('transcription', self._on_transcription)
+        self._streaming = False
+
+    def connect(self):
+        self.sio.connect(self.url, transports=self.transports, wait_timeout=10)
+        if self.pcm:
+            self._streaming = True
+            threading.Thread(target=self._stream, name=f'{self.name}-stream', daemon=True).start()
+
+    def disconnect(self):
+        self._streaming = False
+        try:
+            self.sio.disconnect()
+        except Exception:
+            pass
+
+    def _on_transcription(self, data):
+        received_at = time.time()
+        try:
+            seq_text, sent_text, stream = data['text'].split(' ', 2)
+            seq, sent_at = int(seq_text[1:]), float(sent_text[1:])
+        except (KeyError, ValueError):
+            return  # Message d'un vrai moteur: ignoré
+        own = data.get('audio_sent_at') if data.get('final') and stream == self.name else None
+        self.measurements.add(self.name, seq, sent_at, received_at, own)
+
+    def _stream(self):
+        """PCM rejoué en boucle, au rythme réel (un bloc toutes les BLOCK_MS)"""
+        block = SAMPLE_RATE * BLOCK_MS // 1000 * 2
+        position = 0
+        next_send = time.monotonic()
+        while self._streaming:
+            chunk = self.pcm[position:position + block]
+            position = position + block if position + block < len(self.pcm) else 0
+            try:
+                self.sio.emit('audio_chunk', {'stream': self.name, 'sent_at': time.time(), 'pcm': chunk})
+            except Exception:
+                return  # Déconnecté
+            next_send += BLOCK_MS / 1000
+            time.sleep(max(0.0, next_send - time.monotonic()))
+
+
+# --- Orchestration ---
+
+def percentile(values, p):
+    if not values:
+        return None
+    values = sorted(values)
+    return round(values[min(len(values) - 1, int(p * len(values)))], 1)
+
+
+def start_server(args):
+    """Lancer ce script en mode serveur et attendre qu'il réponde"""
+    command = [sys.executable, os.path.abspath(__file__), '--serve', '--port', str(args.port),
+               '--partial-interval', str(args.partial_interval), '--final-interval', str(args.final_interval),
+               '--recognizer-load', str(args.recognizer_load)]
+    if args.streams and args.stream_pcm:
+        command.append('--no-synthetic')  # Résultats tirés de l'audio des flux
+    log = open(args.server_log, 'w') if args.server_log else subprocess.DEVNULL
+    process = subprocess.Popen(command, stdout=log, stderr=subprocess.STDOUT,
+                               cwd=os.path.dirname(os.path.abspath(__file__)))
+    deadline = time.monotonic() + SERVER_START_TIMEOUT
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Le serveur s'est arrêté (code {process.returncode}), voir --server-log")
+        try:
+            urllib.request.urlopen(f'http://127.0.0.1:{args.port}/status', timeout=1).read()
+            return process
+        except OSError:
+            time.sleep(0.5)
+    process.terminate()
+    raise RuntimeError("Le serveur ne répond pas")
+
+
+def run_level(args, n_clients, server):
+    """Un palier: n_clients afficheurs pendant args.duration secondes"""
+    measurements = Measurements()
+    pcm = read_pcm(args.stream_pcm) if args.stream_pcm else None
+    url = f'http://127.0.0.1:{args.port}'
+    displays = [SimulatedDisplay(f'afficheur-{i}', url, measurements, args.transport,
+                                 pcm if i < args.streams else None)
+                for i in range(n_clients)]
+    connect_errors = 0
+    for display in displays:
+        try:
+            display.connect()
+        except Exception as e:
+            connect_errors += 1
+            print(f"  ❌ {display.name}: connexion refusée ({e})")
+    time.sleep(WARMUP_SECONDS)
+
+    server_process = psutil.Process(server.pid)
+    server_process.cpu_percent(None)
+    own_process = psutil.Process()
+    own_process.cpu_percent(None)
+    rss_start = server_process.memory_info().rss
+    cpu_samples, rss_samples = [], []
+
+    measurements.recording = True
+    ends_at = time.monotonic() + args.duration
+    while time.monotonic() < ends_at:
+        time.sleep(1.0)
+        cpu_samples.append(server_process.cpu_percent(None))
+        rss_samples.append(server_process.memory_info().rss)
+    measurements.recording = False
+    own_cpu = own_process.cpu_percent(None)
+
+    for display in displays:
+        display.disconnect()
+
+    latencies = [value for values in measurements.latencies.values() for value in values]
+    fanout = [(max(times) - measurements.sent[seq]) * 1000 for seq, times in measurements.receipts.items()]
+    emitted = measurements.last_seq - measurements.first_seq + 1 if measurements.sent else 0
+    connected = n_clients - connect_errors
+    expected = emitted * connected
+    received = sum(measurements.seen.values())
+    worst_client, worst_p99 = None, None
+    for client, values in measurements.latencies.items():
+        p99 = percentile(values, 0.99)
+        if worst_p99 is None or p99 > worst_p99:
+            worst_client, worst_p99 = client, p99
+
+    return {
+        'clients': n_clients,
+        'streams': min(args.streams, n_clients) if pcm else 0,
+        'connect_errors': connect_errors,
+        'messages_emitted': emitted,
+        'messages_expected': expected,
+        'messages_received': received,
+        'lost_ratio': round(1 - received / expected, 4) if expected else 0.0,
+        'out_of_order': measurements.out_of_order,
+        'latency_ms': {'p50': percentile(latencies, 0.5), 'p90': percentile(latencies, 0.9),
+                       'p99': percentile(latencies, 0.99), 'max': percentile(latencies, 1.0)},
+        'fanout_ms': {'p50': percentile(fanout, 0.5), 'p99': percentile(fanout, 0.99)},
+        'worst_client': {'name': worst_client, 'p99_ms': worst_p99},
+        'stream_lag_ms': {'p50': percentile(measurements.stream_lags, 0.5),
+                          'p99': percentile(measurements.stream_lags, 0.99)},
+        'server_cpu_percent': {'mean': round(sum(cpu_samples) / len(cpu_samples), 1) if cpu_samples else None,
+                               'max': max(cpu_samples, default=None)},
+        'server_rss_mb': {'max': round(max(rss_samples, default=rss_start) / 1024 / 1024, 1),
+                          'growth': round((max(rss_samples, default=rss_start) - rss_start) / 1024 / 1024, 1)},
+        'load_generator_cpu_percent': round(own_cpu, 1)
+    }
+
+
+def check(result, args):
+    """Seuils de réussite: [(description, réussi)]"""
+    def below(value, limit):
+        return value is not None and value <= limit
+
+    checks = [
+        ("connexions sans erreur", result['connect_errors'] == 0),
+        (f"messages perdus <= {args.max_lost_ratio:.1%}", result['lost_ratio'] <= args.max_lost_ratio),
+        (f"diffusion complète p99 <= {args.max_fanout_p99_ms:.0f} ms",
+         below(result['fanout_ms']['p99'], args.max_fanout_p99_ms)),
+        (f"pire afficheur p99 <= {args.max_client_p99_ms:.0f} ms",
+         below(result['worst_client']['p99_ms'], args.max_client_p99_ms)),
+        (f"CPU serveur moyen <= {args.max_server_cpu:.0f}%",
+         below(result['server_cpu_percent']['mean'], args.max_server_cpu)),
+        (f"mémoire serveur <= {args.max_server_rss_mb:.0f} MB",
+         below(result['server_rss_mb']['max'], args.max_server_rss_mb))
+    ]
+    if result['streams']:
+        checks.append((f"retard audio -> résultat p99 <= {args.max_stream_lag_ms:.0f} ms",
+                       below(result['stream_lag_ms']['p99'], args.max_stream_lag_ms)))
+    return checks
+
+
+def print_result(result, checks):
+    latency, fanout = result['latency_ms'], result['fanout_ms']
+    print(f"\n👥 {result['clients']} afficheur(s), dont {result['streams']} avec flux audio")
+    print(f"  Messages: {result['messages_emitted']} émis, {result['messages_received']}/"
+          f"{result['messages_expected']} reçus ({result['lost_ratio']:.2%} perdus, "
+          f"{result['out_of_order']} dans le désordre)")
+    print(f"  Émission -> réception: p50 {latency['p50']} ms, p90 {latency['p90']} ms, "
+          f"p99 {latency['p99']} ms, max {latency['max']} ms")
+    print(f"  Diffusion complète (dernier afficheur): p50 {fanout['p50']} ms, p99 {fanout['p99']} ms")
+    print(f"  Pire afficheur: {result['worst_client']['name']} (p99 {result['worst_client']['p99_ms']} ms)")
+    if result['streams']:
+        print(f"  Audio envoyé -> résultat final: p50 {result['stream_lag_ms']['p50']} ms, "
+              f"p99 {result['stream_lag_ms']['p99']} ms")
+    print(f"  Serveur: CPU {result['server_cpu_percent']['mean']}% en moyenne "
+          f"(max {result['server_cpu_percent']['max']}%), RSS {result['server_rss_mb']['max']} MB "
+          f"(+{result['server_rss_mb']['growth']} MB)")
+    print(f"  Générateur de charge: CPU {result['load_generator_cpu_percent']}% (même machine)")
+    for description, passed in checks:
+        print(f"  {'✅' if passed else '❌'} {description}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Test de charge Socket.IO de app.py (reconnaisseur simulé)")
+    parser.add_argument('--clients', type=int, nargs='+', default=[1, 5, 10, 20],
+                        help="Nombre d'afficheurs, un palier par valeur")
+    parser.add_argument('--duration', type=float, default=30.0, help="Secondes de mesure par palier")
+    parser.add_argument('--streams', type=int, default=0, help="Afficheurs qui envoient aussi de l'audio")
+    parser.add_argument('--stream-pcm', default=None, help="Audio rejoué (WAV ou PCM brut, 16 bits mono 16 kHz)")
+    parser.add_argument('--transport', choices=('websocket', 'polling'), default=None)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--partial-interval', type=float, default=0.1, help="Secondes entre deux partiels")
+    parser.add_argument('--final-interval', type=float, default=3.0, help="Secondes entre deux finals")
+    parser.add_argument('--recognizer-load', type=float, default=0.0,
+                        help="Part d'un coeur occupée par le décodage simulé (ex: 0.6)")
+    parser.add_argument('--server-log', default=None, help="Fichier de sortie du serveur")
+    parser.add_argument('--json', default=None, help="Écrire le rapport JSON dans ce fichier")
+    # Seuils de réussite
+    parser.add_argument('--max-fanout-p99-ms', type=float, default=250.0)
+    parser.add_argument('--max-client-p99-ms', type=float, default=300.0)
+    parser.add_argument('--max-stream-lag-ms', type=float, default=500.0)
+    parser.add_argument('--max-lost-ratio', type=float, default=0.001)
+    parser.add_argument('--max-server-cpu', type=float, default=80.0, help="% d'un coeur")
+    parser.add_argument('--max-server-rss-mb', type=float, default=800.0)
+    parser.add_argument('--serve', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--no-synthetic', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args)
+        return
+    if args.streams and not args.stream_pcm:
+        parser.error("--streams demande --stream-pcm (audio à rejouer)")
+    try:
+        import socketio  # noqa: F401
+    except ImportError:
+        sys.exit('Client Socket.IO absent: pip install "python-socketio[client]"')
+
+    print(f"🧪 Test de charge: paliers {args.clients}, {args.duration:.0f}s chacun, port {args.port}")
+    server = start_server(args)
+    results, failed = [], False
+    try:
+        for n_clients in args.clients:
+            result = run_level(args, n_clients, server)
+            checks = check(result, args)
+            result['checks'] = [{'check': description, 'passed': passed} for description, passed in checks]
+            results.append(result)
+            print_result(result, checks)
+            failed = failed or not all(passed for _, passed in checks)
+    finally:
+        server.terminate()
+        try:
+            server.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            server.kill()
+
+    passing = [r['clients'] for r in results if all(c['passed'] for c in r['checks'])]
+    print(f"\n{'✅' if not failed else '❌'} Afficheurs servis dans les seuils: "
+          f"{max(passing) if passing else 'aucun palier'}")
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'arguments': {k: v for k, v in vars(args).items() if k not in ('serve', 'no_synthetic')},
+                       'results': results}, f, indent=2, ensure_ascii=False)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
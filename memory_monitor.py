@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""
+Module de surveillance de la mémoire sur les longues durées
+L'appareil tourne des semaines: la mémoire résidente (et PSS/privée via smaps_rollup) est
+échantillonnée en arrière-plan, sa tendance en MB/h calculée sur 1, 6 et 24 h, avec un
+avertissement quand elle croît durablement, bien avant l'intervention de l'OOM killer.
+
+À la demande: principaux allocateurs Python (tracemalloc, comparés à une référence) et
+estimations par composant (modèle, modèle de ponctuation, tampons, caches).
+tracemalloc ne voit que les allocations Python: Kaldi et torch (C++) n'apparaissent que
+dans la mémoire résidente et les estimations des composants.
+"""
+
+import gc
+import threading
+import time
+import tracemalloc
+from collections import deque
+
+import psutil
+
+from app_config import load_section, section_defaults
+from resource_manager import get_resource_manager
+
+CONFIG_FILE = "config.json"
+SMAPS_ROLLUP = "/proc/self/smaps_rollup"
+TREND_WINDOWS_HOURS = (1, 6, 24)
+
+# Valeurs par défaut, types et bornes: section "memory" de app_config.SECTIONS
+DEFAULT_MEMORY_POLICY = section_defaults('memory')
+
+
+def load_memory_policy(config_file=CONFIG_FILE):
+    """Politique de surveillance mémoire (section "memory" de config.json, validée au chargement)"""
+    return load_section('memory', config_file)
+
+
+def _mb(value):
+    return round(value / 1024 / 1024, 1)
+
+
+def read_smaps_rollup(path=SMAPS_ROLLUP):
+    """PSS, privée et partagée (MB) du processus, None hors Linux"""
+    try:
+        with open(path, 'r') as f:
+            lines = f.readlines()
+    except OSError:
+        return None
+    fields = {}
+    for line in lines[1:]:
+        parts = line.split()
+        if len(parts) >= 2 and parts[1].isdigit():
+            fields[parts[0].rstrip(':')] = int(parts[1]) * 1024
+    return {
+        'pss_mb': _mb(fields.get('Pss', 0)),
+        'private_mb': _mb(fields.get('Private_Clean', 0) + fields.get('Private_Dirty', 0)),
+        'shared_mb': _mb(fields.get('Shared_Clean', 0) + fields.get('Shared_Dirty', 0)),
+        'swap_mb': _mb(fields.get('Swap', 0))
+    }
+
+
+def linear_trend(points):
+    """Pente des moindres carrés de [(heures, MB)] en MB/h (None sans assez de points)"""
+    if len(points) < 3:
+        return None
+    n = len(points)
+    mean_x = sum(x for x, _ in points) / n
+    mean_y = sum(y for _, y in points) / n
+    variance = sum((x - mean_x) ** 2 for x, _ in points)
+    if variance == 0:
+        return None
+    return sum((x - mean_x) * (y - mean_y) for x, y in points) / variance
+
+
+class MemoryMonitor:
+    """Échantillons de mémoire, tendances, composants et tracemalloc à la demande"""
+
+    def __init__(self, policy=None):
+        self.policy = dict(DEFAULT_MEMORY_POLICY)
+        self.policy.update(policy or {})
+
+        interval = max(1.0, self.policy['interval_seconds'])
+        self.samples = deque(maxlen=max(10, int(self.policy['history_hours'] * 3600 / interval)))
+        self.components = {}   # Nom -> fonction retournant une estimation (dict)
+        self.warnings = deque(maxlen=20)
+        self._last_warning = 0.0
+        self._baseline = None  # Instantané tracemalloc de référence
+        self._baseline_at = None
+
+        self._process = psutil.Process()
+        self._thread = None
+        self._stop_event = threading.Event()
+
+    # --- Échantillonnage ---
+
+    def start(self):
+        """Démarrer l'échantillonnage (retourne False si désactivé ou déjà en cours)"""
+        if not self.policy['enabled'] or (self._thread and self._thread.is_alive()):
+            return False
+        if self.policy['trace_on_start']:
+            self.start_tracing()
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._loop, name='memory-monitor', daemon=True)
+        self._thread.start()
+        return True
+
+    def stop(self):
+        self._stop_event.set()
+
+    def _loop(self):
+        get_resource_manager().configure_thread('background')
+        while True:
+            try:
+                self.samples.append(self.sample())
+                self._check_growth()
+            except Exception as e:
+                print(f"Erreur de la surveillance mémoire: {e}")
+            if self._stop_event.wait(self.policy['interval_seconds']):
+                break
+
+    def sample(self):
+        """Mémoire du processus et de ses processus moteur"""
+        sample = {'time': time.time(), 'rss_mb': _mb(self._process.memory_info().rss)}
+        rollup = read_smaps_rollup()
+        if rollup:
+            sample.update(rollup)
+        children = 0
+        for child in self._process.children(recursive=True):
+            try:
+                children += child.memory_info().rss
+            except psutil.Error:
+                pass  # Processus terminé entre-temps
+        sample['children_rss_mb'] = _mb(children)
+        return sample
+
+    def trend(self, hours, key='rss_mb'):
+        """Tendance (MB/h) sur les `hours` dernières heures, et durée réellement couverte"""
+        if not self.samples:
+            return None, 0.0
+        now = self.samples[-1]['time']
+        points = [((s['time'] - now) / 3600, s[key]) for s in self.samples
+                  if now - s['time'] <= hours * 3600 and s.get(key) is not None]
+        span = -points[0][0] if points else 0.0
+        slope = linear_trend(points)
+        return (round(slope, 2) if slope is not None else None), round(span, 2)
+
+    def _check_growth(self):
+        """Avertir (au plus une fois par heure) d'une croissance durable de la mémoire"""
+        limit = self.policy['growth_warning_mb_per_hour']
+        for key in ('rss_mb', 'children_rss_mb'):
+            slope, span = self.trend(6, key)
+            if slope is None or span < self.policy['min_trend_hours'] or slope <= limit:
+                continue
+            now = time.time()
+            if now - self._last_warning < 3600:
+                return
+            self._last_warning = now
+            warning = {'time': now, 'metric': key, 'mb_per_hour': slope, 'span_hours': span,
+                       'current_mb': self.samples[-1][key]}
+            self.warnings.append(warning)
+            print(f"⚠️  Mémoire en hausse: {key} +{slope:.1f} MB/h sur {span:.1f} h "
+                  f"(actuellement {warning['current_mb']} MB)")
+            return
+
+    # --- Composants ---
+
+    def register_component(self, name, estimate):
+        """Déclarer un composant: estimate() retourne un dict (MB, tailles de caches...)"""
+        self.components[name] = estimate
+
+    def component_estimates(self):
+        estimates = {}
+        for name, estimate in list(self.components.items()):
+            try:
+                estimates[name] = estimate()
+            except Exception as e:
+                estimates[name] = {'error': str(e)}
+        return estimates
+
+    # --- tracemalloc ---
+
+    def start_tracing(self, frames=None):
+        """Tracer les allocations Python (coût: CPU et mémoire tant que le traçage est actif)"""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames or self.policy['tracemalloc_frames'])
+            print("🔍 tracemalloc démarré")
+        return True
+
+    def stop_tracing(self):
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+            print("🔍 tracemalloc arrêté")
+        self._baseline = None
+        self._baseline_at = None
+
+    def take_baseline(self):
+        """Instantané de référence: les rapports suivants montrent les allocations apparues depuis"""
+        self.start_tracing()
+        self._baseline = self._snapshot()
+        self._baseline_at = time.time()
+
+    def _snapshot(self):
+        return tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),  # Les rapports eux-mêmes
+            tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+            tracemalloc.Filter(False, '<unknown>')
+        ))
+
+    def top_allocators(self, limit=15, group_by='lineno'):
+        """Principaux allocateurs (depuis la référence si elle existe), vide sans traçage"""
+        if not tracemalloc.is_tracing():
+            return []
+        snapshot = self._snapshot()
+        if self._baseline is not None:
+            stats = snapshot.compare_to(self._baseline, group_by)
+        else:
+            stats = snapshot.statistics(group_by)
+
+        top = []
+        for stat in stats[:limit]:
+            location = [str(frame) for frame in stat.traceback] if group_by == 'traceback' \
+                else str(stat.traceback[0])
+            entry = {'location': location,
+                     'size_kb': round(stat.size / 1024, 1), 'count': stat.count}
+            if self._baseline is not None:
+                entry['size_diff_kb'] = round(stat.size_diff / 1024, 1)
+                entry['count_diff'] = stat.count_diff
+            top.append(entry)
+        return top
+
+    def tracing_status(self):
+        traced, peak = tracemalloc.get_traced_memory() if tracemalloc.is_tracing() else (0, 0)
+        return {
+            'tracing': tracemalloc.is_tracing(),
+            'frames': tracemalloc.get_traceback_limit() if tracemalloc.is_tracing() else None,
+            'traced_mb': _mb(traced),
+            'peak_mb': _mb(peak),
+            'baseline_at': self._baseline_at
+        }
+
+    # --- Rapports ---
+
+    def get_status(self):
+        """Résumé léger (statistiques, interface): mémoire courante et tendance sur 6 h"""
+        current = self.samples[-1] if self.samples else None
+        slope, span = self.trend(6)
+        return {
+            'enabled': self.policy['enabled'],
+            'rss_mb': current['rss_mb'] if current else None,
+            'children_rss_mb': current.get('children_rss_mb') if current else None,
+            'trend_mb_per_hour': slope,
+            'trend_span_hours': span,
+            'warnings': len(self.warnings)
+        }
+
+    def get_report(self, top=0, group_by='lineno'):
+        """Rapport complet: mesure immédiate, tendances, historique, composants, allocateurs"""
+        trends = {}
+        for hours in TREND_WINDOWS_HOURS:
+            trends[f'{hours}h'] = {key: dict(zip(('mb_per_hour', 'span_hours'), self.trend(hours, key)))
+                                   for key in ('rss_mb', 'pss_mb', 'children_rss_mb')}
+        # Historique réduit: au plus ~100 points (graphique)
+        samples = list(self.samples)
+        step = max(1, len(samples) // 100)
+        report = {
+            'enabled': self.policy['enabled'],
+            'interval_seconds': self.policy['interval_seconds'],
+            'current': self.sample(),
+            'trends': trends,
+            'history': [[round(s['time']), s['rss_mb'], s.get('children_rss_mb')] for s in samples[::step]],
+            'warnings': list(self.warnings),
+            'components': self.component_estimates(),
+            'gc': {'counts': gc.get_count(), 'objects': len(gc.get_objects())},
+            'tracemalloc': self.tracing_status()
+        }
+        if top:
+            report['tracemalloc']['top'] = self.top_allocators(top, group_by)
+        return report
+
+
+# Instance globale
+_memory_monitor_instance = None
+
+
+def get_memory_monitor(policy=None):
+    """Obtenir l'instance de la surveillance mémoire"""
+    global _memory_monitor_instance
+    if _memory_monitor_instance is None:
+        _memory_monitor_instance = MemoryMonitor(policy or load_memory_policy())
+    return _memory_monitor_instance
@@ -0,0 +1,434 @@
+#!/usr/bin/env python3
+"""
+Module de séries temporelles des mesures (CPU, température, file audio, facteur temps réel,
+part de parole, débit de transcription) sur le long terme
+Trois paliers de taille fixe, en tableaux compacts (array, 4 octets par valeur):
+- 1 s pendant une heure, 1 min pendant une semaine, 1 h pendant un an
+Chaque mesure met à jour les trois paliers à l'insertion (moyenne et maximum de l'intervalle):
+pas de tâche de réduction, pas de croissance mémoire.
+
+Persistance: un fichier à disposition fixe (en-tête puis tableaux); seules les cases modifiées
+depuis la dernière écriture sont réécrites (os.pwrite), pour ménager la carte SD.
+"""
+
+import array
+import json
+import math
+import os
+import sys
+import threading
+import time
+
+import psutil
+
+from app_config import load_section, section_defaults
+from resource_manager import get_resource_manager
+
+CONFIG_FILE = "config.json"
+FORMAT_VERSION = 2  # 2: effectifs de l'intervalle courant enregistrés
+HEADER_SIZE = 4096  # En-tête JSON complété par des espaces
+
+# (résolution en secondes, nombre de cases)
+TIERS = ((1, 3600), (60, 7 * 24 * 60), (3600, 365 * 24))
+
+# Mesures enregistrées chaque seconde (nom -> libellé)
+METRICS = {
+    'cpu_percent': 'CPU (%)',
+    'temperature': 'Température (°C)',
+    'queue_depth': 'File audio (blocs)',
+    'rtf': 'Facteur temps réel',
+    'speech_ratio': 'Part de parole',
+    'transcriptions_per_minute': 'Transcriptions / min',
+    'words_per_minute': 'Mots / min'
+}
+
+# Valeurs par défaut, types et bornes: section "metrics" de app_config.SECTIONS
+DEFAULT_METRICS_POLICY = section_defaults('metrics')
+
+NAN = float('nan')
+
+
+def load_metrics_policy(config_file=CONFIG_FILE):
+    """Politique des séries temporelles (section "metrics" de config.json, validée au chargement)"""
+    return load_section('metrics', config_file)
+
+
+class _Tier:
+    """Anneau de cases d'une résolution: numéro d'intervalle, moyenne et maximum par mesure"""
+
+    def __init__(self, resolution, slots, metrics):
+        self.resolution = resolution
+        self.slots = slots
+        self.buckets = array.array('q', [-1]) * slots  # Intervalle (temps // résolution) de chaque case
+        self.means = {name: array.array('f', [NAN]) * slots for name in metrics}
+        self.maxima = {name: array.array('f', [NAN]) * slots for name in metrics}
+        self.index = {name: i for i, name in enumerate(metrics)}
+        self.counts = array.array('q', [0]) * len(self.index)  # Mesures déjà moyennées dans l'intervalle courant
+        self.current = -1
+        self.dirty = set()
+
+    def add(self, timestamp, values):
+        bucket = int(timestamp // self.resolution)
+        if bucket < self.current:
+            return  # Horloge revenue en arrière: on ne réécrit pas le passé
+        slot = bucket % self.slots
+        if bucket != self.current:
+            self.current = bucket
+            self.buckets[slot] = bucket
+            for name in self.means:
+                self.means[name][slot] = NAN
+                self.maxima[name][slot] = NAN
+            self.counts[:] = array.array('q', [0]) * len(self.counts)
+        for name, value in values.items():
+            index = self.index.get(name)
+            if value is None or index is None:
+                continue
+            count = self.counts[index]
+            mean = self.means[name][slot]
+            self.means[name][slot] = value if count == 0 else mean + (value - mean) / (count + 1)
+            maximum = self.maxima[name][slot]
+            self.maxima[name][slot] = value if count == 0 or value > maximum else maximum
+            self.counts[index] = count + 1
+        self.dirty.add(slot)
+
+    def span_seconds(self):
+        return self.resolution * self.slots
+
+    def nbytes(self):
+        return self.slots * (8 + 8 * len(self.means))
+
+
+def _runs(slots):
+    """Cases modifiées regroupées en plages contiguës [début, fin["""
+    runs = []
+    for slot in sorted(slots):
+        if runs and runs[-1][1] == slot:
+            runs[-1][1] = slot + 1
+        else:
+            runs.append([slot, slot + 1])
+    return runs
+
+
+class MetricsStore:
+    """Séries temporelles à paliers fixes, persistées par écritures partielles"""
+
+    def __init__(self, path=None, metrics=tuple(METRICS), tiers=TIERS):
+        self.path = path
+        self.metrics = tuple(metrics)
+        self.tiers = [_Tier(resolution, slots, self.metrics) for resolution, slots in tiers]
+        self._lock = threading.Lock()
+        self._rewrite = False  # Fichier d'une autre disposition ou illisible: tout réécrire
+        self.saved_at = None
+        self.bytes_written = 0
+
+    # --- Insertion ---
+
+    def record(self, values, timestamp=None):
+        """Ajouter une mesure de chaque métrique (None = absente), tous les paliers à la fois"""
+        timestamp = time.time() if timestamp is None else timestamp
+        with self._lock:
+            for tier in self.tiers:
+                tier.add(timestamp, values)
+
+    # --- Requêtes ---
+
+    def query(self, metrics=None, start=None, end=None, resolution=None, max_points=None):
+        """Valeurs sur [start, end] (temps Unix) au palier le plus fin qui couvre la plage
+
+        Retourne {'resolution', 'start', 'end', 'times', 'series': {nom: {'mean': [...], 'max': [...]}}};
+        None pour les intervalles sans mesure. max_points regroupe encore les intervalles (graphiques).
+        """
+        now = time.time()
+        end = now if end is None else min(end, now)
+        start = end - 3600 if start is None else start
+        metrics = [name for name in (metrics or self.metrics) if name in self.metrics]
+        tier = self._pick_tier(now - start, resolution)
+
+        with self._lock:
+            first = max(int(start // tier.resolution), int(now // tier.resolution) - tier.slots + 1)
+            last = int(end // tier.resolution)
+            times, means, maxima = [], {name: [] for name in metrics}, {name: [] for name in metrics}
+            for bucket in range(first, last + 1):
+                slot = bucket % tier.slots
+                times.append(bucket * tier.resolution)
+                present = tier.buckets[slot] == bucket
+                for name in metrics:
+                    means[name].append(tier.means[name][slot] if present else NAN)
+                    maxima[name].append(tier.maxima[name][slot] if present else NAN)
+
+        step = math.ceil(len(times) / max_points) if max_points and len(times) > max_points else 1
+        series = {}
+        for name in metrics:
+            series[name] = {'mean': _regroup(means[name], step, _mean),
+                            'max': _regroup(maxima[name], step, max)}
+        return {
+            'resolution': tier.resolution * step,
+            'start': times[0] if times else start,
+            'end': end,
+            'times': times[::step],
+            'series': series
+        }
+
+    def _pick_tier(self, age_seconds, resolution=None):
+        if resolution is not None:
+            candidates = [tier for tier in self.tiers if tier.resolution >= resolution]
+            if candidates:
+                return candidates[0]
+        for tier in self.tiers:
+            if tier.span_seconds() >= age_seconds:
+                return tier
+        return self.tiers[-1]
+
+    def latest(self):
+        """Dernière valeur de chaque métrique (palier d'une seconde)"""
+        tier = self.tiers[0]
+        with self._lock:
+            if tier.current < 0:
+                return {}
+            slot = tier.current % tier.slots
+            return {name: _number(tier.means[name][slot]) for name in self.metrics}
+
+    # --- Persistance ---
+
+    def _header(self):
+        return {
+            'version': FORMAT_VERSION,
+            'byteorder': sys.byteorder,
+            'metrics': list(self.metrics),
+            'tiers': [[tier.resolution, tier.slots] for tier in self.tiers]
+        }
+
+    def _layout(self):
+        """Position dans le fichier de chaque tableau: [(tier, nom, tableau, position)]"""
+        layout = []
+        offset = HEADER_SIZE
+        for tier in self.tiers:
+            layout.append((tier, 'buckets', tier.buckets, offset))
+            offset += tier.slots * tier.buckets.itemsize
+            layout.append((tier, 'counts', tier.counts, offset))
+            offset += len(tier.counts) * tier.counts.itemsize
+            for name in self.metrics:
+                for kind, arrays in (('mean', tier.means), ('max', tier.maxima)):
+                    layout.append((tier, f'{name}.{kind}', arrays[name], offset))
+                    offset += tier.slots * arrays[name].itemsize
+        return layout
+
+    def load(self):
+        """Relire le fichier s'il a la même disposition (sinon il sera réécrit en entier)"""
+        if not self.path or not os.path.exists(self.path):
+            return False
+        try:
+            with open(self.path, 'rb') as f:
+                header = json.loads(f.read(HEADER_SIZE).decode('utf-8'))
+                if header != self._header():
+                    print(f"⚠️  Séries temporelles {self.path}: format différent, historique repris à zéro")
+                    self._reset()
+                    return False
+                loaded = []
+                for tier, _, values, offset in self._layout():
+                    f.seek(offset)
+                    data = array.array(values.typecode)
+                    data.fromfile(f, len(values))
+                    loaded.append((values, data))
+        except (OSError, ValueError, EOFError) as e:
+            print(f"⚠️  Séries temporelles {self.path} illisibles ({e}), historique repris à zéro")
+            self._reset()
+            return False
+        with self._lock:
+            for values, data in loaded:
+                values[:] = data
+            for tier in self.tiers:
+                tier.current = max(tier.buckets)
+                tier.dirty.clear()
+        return True
+
+    def _reset(self):
+        """Repartir de tableaux vides; la prochaine écriture remplace tout le fichier (en-tête compris)"""
+        with self._lock:
+            self.tiers = [_Tier(tier.resolution, tier.slots, self.metrics) for tier in self.tiers]
+            self._rewrite = True
+
+    def save(self):
+        """Écrire les cases modifiées (le fichier complet s'il n'existe pas encore ou n'a pas pu être relu)"""
+        if not self.path:
+            return 0
+        with self._lock:
+            dirty = [tier.dirty for tier in self.tiers]
+            for tier in self.tiers:
+                tier.dirty = set()
+            full = self._rewrite or not os.path.exists(self.path)
+            runs = {id(tier): [[0, tier.slots]] if full else _runs(dirty[i]) for i, tier in enumerate(self.tiers)}
+            # Valeurs avant numéros d'intervalle: une écriture interrompue laisse des cases invalides, pas fausses
+            values_writes, bucket_writes = [], []
+            for tier, name, values, offset in self._layout():
+                if name == 'counts':
+                    # Quelques octets, réécrits dès que le palier a changé
+                    if runs[id(tier)]:
+                        values_writes.append((offset, values.tobytes()))
+                    continue
+                writes = bucket_writes if name == 'buckets' else values_writes
+                for first, last in runs[id(tier)]:
+                    writes.append((offset + first * values.itemsize, values[first:last].tobytes()))
+
+        written = 0
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if full:
+                os.ftruncate(fd, 0)  # Pas de reste de l'ancienne disposition
+                header = json.dumps(self._header()).encode('utf-8')
+                os.pwrite(fd, header.ljust(HEADER_SIZE, b' '), 0)
+            for offset, data in values_writes + bucket_writes:
+                written += os.pwrite(fd, data, offset)
+            os.fsync(fd)
+            self._rewrite = False
+        except OSError as e:
+            print(f"⚠️  Séries temporelles non enregistrées: {e}")
+            for tier_index, tier in enumerate(self.tiers):
+                tier.dirty.update(dirty[tier_index])
+            return 0
+        finally:
+            os.close(fd)
+        self.saved_at = time.time()
+        self.bytes_written += written
+        return written
+
+    def get_status(self):
+        return {
+            'path': self.path,
+            'metrics': list(self.metrics),
+            'tiers': [{'resolution_seconds': tier.resolution, 'slots': tier.slots,
+                       'kb': round(tier.nbytes() / 1024, 1)} for tier in self.tiers],
+            'saved_at': self.saved_at,
+            'bytes_written': self.bytes_written
+        }
+
+
+def _number(value):
+    return None if math.isnan(value) else round(value, 3)
+
+
+def _mean(values):
+    return sum(values) / len(values)
+
+
+def _cpu_total(times):
+    # guest et guest_nice sont déjà comptés dans user et nice (Linux)
+    return sum(times) - getattr(times, 'guest', 0) - getattr(times, 'guest_nice', 0)
+
+
+def _cpu_idle(times):
+    return times.idle + getattr(times, 'iowait', 0)
+
+
+def _regroup(values, step, combine):
+    """Regrouper `step` intervalles consécutifs (intervalles vides ignorés)"""
+    result = []
+    for i in range(0, len(values), step):
+        present = [v for v in values[i:i + step] if not math.isnan(v)]
+        result.append(round(combine(present), 3) if present else None)
+    return result
+
+
+class MetricsRecorder:
+    """Mesure du moteur et du système chaque seconde, écriture périodique des séries"""
+
+    def __init__(self, engine, policy=None, stats=None):
+        self.policy = dict(DEFAULT_METRICS_POLICY)
+        self.policy.update(policy or {})
+        self.engine = engine
+        if stats is None:
+            from stats_manager import get_stats_manager
+            stats = get_stats_manager()
+        self.stats = stats
+        self.store = MetricsStore(self.policy['path'])
+
+        self._thread = None
+        self._stop_event = threading.Event()
+        self._previous = None
+
+    def start(self):
+        """Démarrer les mesures (retourne False si désactivé ou déjà en cours)"""
+        if not self.policy['enabled'] or (self._thread and self._thread.is_alive()):
+            return False
+        self.store.load()
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._loop, name='metrics-recorder', daemon=True)
+        self._thread.start()
+        return True
+
+    def stop(self):
+        """Arrêter les mesures et écrire les dernières cases"""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+        self.store.save()
+
+    def _loop(self):
+        get_resource_manager().configure_thread('background')
+        interval = self.policy['sample_interval']
+        next_save = time.monotonic() + self.policy['persist_interval']
+        self._previous = self._counters()
+        while not self._stop_event.wait(interval):
+            try:
+                self.store.record(self.sample())
+                if time.monotonic() >= next_save:
+                    next_save = time.monotonic() + self.policy['persist_interval']
+                    self.store.save()
+            except Exception as e:
+                print(f"Erreur des séries temporelles: {e}")
+
+    def _counters(self):
+        engine = self.engine
+        analyzed, speech = engine.speech_counters()
+        return {
+            'wall': time.monotonic(),
+            'cpu': psutil.cpu_times(),
+            'busy': engine.busy_seconds,
+            'audio': engine.processed_audio_seconds,
+            'analyzed': analyzed,
+            'speech': speech,
+            'transcriptions': self.stats.transcription_count,
+            'words': self.stats.word_count
+        }
+
+    def sample(self):
+        """Valeurs de la dernière période (compteurs différenciés ici, sans toucher aux mesures des autres)"""
+        current, previous = self._counters(), self._previous
+        self._previous = current
+        minutes = (current['wall'] - previous['wall']) / 60
+
+        cpu_total = _cpu_total(current['cpu']) - _cpu_total(previous['cpu'])
+        cpu_idle = _cpu_idle(current['cpu']) - _cpu_idle(previous['cpu'])
+        audio = current['audio'] - previous['audio']
+        analyzed = current['analyzed'] - previous['analyzed']
+        return {
+            'cpu_percent': 100 * (1 - cpu_idle / cpu_total) if cpu_total > 0 else None,
+            'temperature': self.stats.get_cpu_temperature(),
+            'queue_depth': self.engine.audio_queue.qsize(),
+            'rtf': (current['busy'] - previous['busy']) / audio if audio > 0 else None,
+            'speech_ratio': (current['speech'] - previous['speech']) / analyzed if analyzed > 0 else None,
+            'transcriptions_per_minute':
+                (current['transcriptions'] - previous['transcriptions']) / minutes if minutes > 0 else None,
+            'words_per_minute': (current['words'] - previous['words']) / minutes if minutes > 0 else None
+        }
+
+    def get_status(self):
+        status = self.store.get_status()
+        status.update({
+            'enabled': self.policy['enabled'],
+            'running': bool(self._thread and self._thread.is_alive()),
+            'latest': self.store.latest()
+        })
+        return status
+
+
+# Instance globale
+_recorder_instance = None
+
+
+def get_metrics_recorder(engine, policy=None, stats=None):
+    """Obtenir l'instance des séries temporelles"""
+    global _recorder_instance
+    if _recorder_instance is None:
+        _recorder_instance = MetricsRecorder(engine, policy or load_metrics_policy(), stats)
+    return _recorder_instance
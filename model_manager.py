@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Module de gestion des modèles Vosk
+Chargement en arrière-plan, mesure du temps de chargement et de la mémoire résidente,
+remplacement à chaud (les reconnaisseurs basculent à la fin de l'énoncé en cours).
+
+Partage entre processus (option, Linux): avec preload_before_fork, le modèle est préchargé
+dans le processus principal et les processus moteur, créés par fork, en héritent (pages
+partagées en copie sur écriture). Par défaut ils sont créés par spawn et chargent leur modèle:
+un fork après le démarrage des threads (chargement, Socket.IO, surveillance) peut hériter
+d'un verrou tenu par l'un d'eux et bloquer le processus moteur.
+"""
+
+import multiprocessing
+import os
+import threading
+import time
+from collections import deque
+
+import psutil
+import vosk
+
+from app_config import load_section, section_defaults
+from model_warmup import MODEL_PATH, get_model_warmer
+from startup_monitor import get_startup_monitor
+
+CONFIG_FILE = "config.json"
+
+# Valeurs par défaut, types et bornes: section "models" de app_config.SECTIONS
+# (le chemin du modèle vient de vosk.model_path)
+DEFAULT_MODEL_POLICY = dict(section_defaults('models'), model_path=MODEL_PATH)
+
+
+def load_model_policy(config_file=CONFIG_FILE):
+    """Politique des modèles (section "models") et chemin du modèle (vosk.model_path), validés au chargement"""
+    policy = load_section('models', config_file)
+    policy['model_path'] = load_section('vosk', config_file)['model_path']
+    return policy
+
+
+class ModelManager:
+    """Modèle actif, chargements en arrière-plan et remplacement à chaud"""
+
+    def __init__(self, policy=None):
+        self.policy = dict(DEFAULT_MODEL_POLICY)
+        self.policy.update(policy or {})
+
+        self.model = None
+        self.active_path = None
+        self.generation = 0        # Incrémenté à chaque nouveau modèle actif
+        self.loading_path = None
+        self.last_error = None
+        self.loads = {}            # Chemin -> mesures du dernier chargement
+        self.swaps = deque(maxlen=20)
+
+        self.on_swap = None  # on_swap({'from', 'to', 'time', ...})
+
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+        self._thread = None
+
+    # --- Chargement ---
+
+    def load(self, path=None):
+        """Charger un modèle et l'activer (bloquant), retourne le modèle ou None"""
+        path = path or self.policy['model_path']
+        if self.active_path == path and self.model is not None:
+            return self.model
+
+        # Préchauffage en cours: lectures séquentielles plus rapides que celles de Vosk
+        get_model_warmer().wait(path)
+
+        process = psutil.Process()
+        rss_before = process.memory_info().rss
+        started = time.perf_counter()
+        self.loading_path = path
+        try:
+            model = vosk.Model(path)
+        except Exception as e:
+            self.last_error = f"{path}: {e}"
+            print(f"❌ Échec du chargement du modèle {path}: {e}")
+            if self.model is None:
+                self._ready.set()  # Réveiller les moteurs en attente (sans modèle)
+            return None
+        finally:
+            self.loading_path = None
+        load_seconds = time.perf_counter() - started
+        rss_after = process.memory_info().rss
+
+        self.loads[path] = {
+            'load_seconds': round(load_seconds, 2),
+            # Estimation: d'autres threads allouent aussi pendant le chargement
+            'rss_delta_mb': round((rss_after - rss_before) / 1024 / 1024, 1),
+            'process_rss_mb': round(rss_after / 1024 / 1024, 1),
+            'loaded_at': time.time(),
+            'pid': os.getpid()
+        }
+        self.last_error = None
+        print(f"✅ Modèle {path} chargé en {load_seconds:.1f}s "
+              f"(+{self.loads[path]['rss_delta_mb']} MB résidents)")
+        self._activate(path, model)
+        return model
+
+    def load_async(self, path=None):
+        """Charger un modèle dans un thread (retourne False si un chargement est déjà en cours)"""
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return False
+            self._thread = threading.Thread(target=self.load, args=(path,), name='model-loader', daemon=True)
+            self._thread.start()
+        return True
+
+    def swap(self, path):
+        """Remplacer le modèle actif (chargé en arrière-plan, bascule à la fin de l'énoncé)"""
+        if not os.path.isdir(path):
+            self.last_error = f"{path}: dossier introuvable"
+            return False
+        if path == self.active_path:
+            return True
+        print(f"🔄 Remplacement du modèle demandé: {path}")
+        return self.load_async(path)
+
+    def _activate(self, path, model):
+        with self._lock:
+            previous = self.active_path
+            self.model = model
+            self.active_path = path
+            self.generation += 1
+        self._ready.set()
+        get_startup_monitor().mark('model_loaded')
+
+        if previous is not None:
+            event = {'from': previous, 'to': path, 'generation': self.generation, 'time': time.time()}
+            self.swaps.append(event)
+            if self.on_swap:
+                self.on_swap(event)
+
+    def wait_ready(self, timeout=None):
+        """Attendre le premier modèle actif (retourne le modèle, None après le délai)"""
+        self._ready.wait(timeout)
+        return self.model
+
+    def is_loading(self):
+        return bool(self._thread and self._thread.is_alive())
+
+    def process_start_method(self):
+        """'spawn' par défaut; 'fork' (hériter du modèle préchargé) seulement sur demande"""
+        if self.policy['preload_before_fork'] and 'fork' in multiprocessing.get_all_start_methods():
+            return 'fork'
+        return 'spawn'
+
+    # --- État ---
+
+    def get_status(self):
+        """Modèle actif, chargement en cours, mesures et remplacements"""
+        active = self.loads.get(self.active_path, {})
+        return {
+            'active_path': self.active_path,
+            'generation': self.generation,
+            'loading': self.loading_path,
+            'load_seconds': active.get('load_seconds'),
+            'rss_delta_mb': active.get('rss_delta_mb'),
+            'process_rss_mb': round(psutil.Process().memory_info().rss / 1024 / 1024, 1),
+            'loads': {path: dict(info) for path, info in self.loads.items()},
+            'recent_swaps': list(self.swaps)[-5:],
+            'last_error': self.last_error
+        }
+
+
+# Instance globale
+_model_manager_instance = None
+
+
+def get_model_manager(policy=None):
+    """Obtenir l'instance du gestionnaire de modèles"""
+    global _model_manager_instance
+    if _model_manager_instance is None:
+        _model_manager_instance = ModelManager(policy or load_model_policy())
+    return _model_manager_instance
@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+Module de préchauffage du modèle Vosk (cache de pages)
+Lit les fichiers du modèle séquentiellement (ou demande POSIX_FADV_WILLNEED) dans un thread,
+dès le lancement: le chargement par Vosk, fait de lectures aléatoires, trouve ensuite les
+pages en mémoire au lieu de les lire sur la carte SD.
+
+Un manifeste (taille, date, somme SHA-256 par fichier) évite de recalculer les sommes de
+contrôle des fichiers inchangés et signale les fichiers tronqués (coupure de courant).
+Uniquement la bibliothèque standard: importable avant numpy / vosk.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+
+from app_config import load_section, section_defaults
+from resource_manager import get_resource_manager
+from startup_monitor import get_startup_monitor
+
+CONFIG_FILE = "config.json"
+MODEL_PATH = section_defaults('vosk')['model_path']
+
+# Valeurs par défaut, types et bornes: section "warmup" de app_config.SECTIONS
+DEFAULT_WARMUP_POLICY = section_defaults('warmup')
+
+
+def load_warmup_policy(config_file=CONFIG_FILE):
+    """Politique de préchauffage (section "warmup") et chemin du modèle, validés au chargement"""
+    policy = load_section('warmup', config_file)
+    policy['model_path'] = load_section('vosk', config_file)['model_path']
+    return policy
+
+
+class ModelWarmer:
+    """Préchauffage des fichiers d'un modèle et manifeste d'intégrité"""
+
+    def __init__(self, policy=None):
+        self.policy = dict(DEFAULT_WARMUP_POLICY)
+        self.policy['model_path'] = MODEL_PATH
+        self.policy.update(policy or {})
+
+        self.model_path = None
+        self.files = []          # Mesures par fichier du dernier préchauffage
+        self.total_bytes = 0
+        self.total_seconds = 0.0
+        self.checksummed = 0
+        self.problems = []       # Fichiers modifiés / tronqués depuis le manifeste
+        self.error = None
+
+        self._thread = None
+        self._done = threading.Event()
+
+    def manifest_path(self, model_path):
+        if self.policy['manifest_file']:
+            return self.policy['manifest_file']
+        model_path = os.path.normpath(model_path)
+        return os.path.join(os.path.dirname(model_path), f".{os.path.basename(model_path)}.manifest.json")
+
+    # --- Préchauffage ---
+
+    def start(self, model_path=None):
+        """Préchauffer en arrière-plan (retourne False si désactivé ou déjà en cours)"""
+        if not self.policy['enabled'] or (self._thread and self._thread.is_alive()):
+            return False
+        self.model_path = model_path or self.policy['model_path']
+        if not os.path.isdir(self.model_path):
+            return False
+        self._done.clear()
+        self._thread = threading.Thread(target=self._run, name='model-warmup', daemon=True)
+        self._thread.start()
+        return True
+
+    def wait(self, model_path, timeout=None):
+        """Attendre la fin du préchauffage de ce modèle (s'il est en cours)"""
+        if self._thread is None or os.path.normpath(model_path) != os.path.normpath(self.model_path):
+            return True
+        return self._done.wait(self.policy['max_wait_before_load'] if timeout is None else timeout)
+
+    def _run(self):
+        # Hors du coeur du décodeur, priorité basse
+        get_resource_manager().configure_thread('background')
+        try:
+            self.warm_up(self.model_path)
+        except Exception as e:
+            self.error = str(e)
+            print(f"Erreur du préchauffage du modèle: {e}")
+        finally:
+            self._done.set()
+            get_startup_monitor().mark('model_warmed')
+
+    def warm_up(self, model_path):
+        """Lire chaque fichier du modèle, vérifier / mettre à jour le manifeste"""
+        manifest_path = self.manifest_path(model_path)
+        manifest = self._load_manifest(manifest_path)
+        verify = self.policy['verify']
+        method = self.policy['method']
+        chunk_size = self.policy['chunk_kb'] * 1024
+
+        self.files = []
+        self.problems = []
+        self.checksummed = 0
+        self.total_bytes = 0
+        updated = {}
+        started = time.perf_counter()
+        for relative_path, full_path in self._list_files(model_path):
+            stat = os.stat(full_path)
+            known = manifest.get(relative_path)
+            unchanged = known is not None and known['size'] == stat.st_size and \
+                known['mtime_ns'] == stat.st_mtime_ns
+            if known is not None and not unchanged:
+                self.problems.append({'file': relative_path, 'expected_size': known['size'],
+                                      'size': stat.st_size})
+                print(f"⚠️  Fichier du modèle modifié ou tronqué: {relative_path} "
+                      f"({known['size']} -> {stat.st_size} octets)")
+
+            hash_it = verify == 'always' or (verify == 'changed' and not unchanged)
+            file_started = time.perf_counter()
+            digest = self._warm_file(full_path, stat.st_size, method, chunk_size, hash_it)
+            seconds = time.perf_counter() - file_started
+
+            checksum = digest or (known['sha256'] if unchanged else None)
+            if known is not None and unchanged and digest and digest != known['sha256']:
+                self.problems.append({'file': relative_path, 'checksum_mismatch': True})
+                print(f"⚠️  Somme de contrôle différente: {relative_path}")
+            if digest:
+                self.checksummed += 1
+            updated[relative_path] = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha256': checksum}
+
+            self.total_bytes += stat.st_size
+            mb = stat.st_size / 1024 / 1024
+            self.files.append({
+                'file': relative_path,
+                'size_mb': round(mb, 2),
+                'seconds': round(seconds, 3),
+                'mb_per_second': round(mb / seconds, 1) if seconds > 0 else None,
+                'checksummed': bool(digest)
+            })
+            print(f"  🔥 {relative_path}: {mb:.1f} MB en {seconds:.2f}s")
+
+        self.total_seconds = time.perf_counter() - started
+        missing = sorted(set(manifest) - set(updated))
+        for relative_path in missing:
+            self.problems.append({'file': relative_path, 'missing': True})
+            print(f"⚠️  Fichier du modèle manquant: {relative_path}")
+
+        if updated != manifest:
+            self._save_manifest(manifest_path, updated)
+        print(f"🔥 Modèle préchauffé: {self.total_bytes / 1024 / 1024:.1f} MB en {self.total_seconds:.1f}s "
+              f"({method}, {self.checksummed} sommes de contrôle calculées)")
+
+    def _list_files(self, model_path):
+        """Fichiers du modèle dans l'ordre du disque le plus probable (chemin trié)"""
+        result = []
+        for root, dirs, files in os.walk(model_path):
+            dirs.sort()
+            for name in sorted(files):
+                full_path = os.path.join(root, name)
+                result.append((os.path.relpath(full_path, model_path), full_path))
+        return result
+
+    def _warm_file(self, path, size, method, chunk_size, hash_it):
+        """Amener le fichier dans le cache de pages, retourne sa somme SHA-256 si demandée"""
+        digest = hashlib.sha256() if hash_it else None
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            if hasattr(os, 'posix_fadvise'):
+                os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_SEQUENTIAL)
+                os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+            if method == 'read' or digest is not None:
+                # Lecture séquentielle en gros blocs dans un tampon réutilisé
+                buffer = bytearray(chunk_size)
+                view = memoryview(buffer)
+                with open(fd, 'rb', buffering=0, closefd=False) as f:
+                    while True:
+                        n = f.readinto(buffer)
+                        if not n:
+                            break
+                        if digest is not None:
+                            digest.update(view[:n])
+                view.release()
+        finally:
+            os.close(fd)
+        return digest.hexdigest() if digest is not None else None
+
+    # --- Manifeste ---
+
+    def _load_manifest(self, path):
+        if not os.path.exists(path):
+            return {}
+        try:
+            with open(path, 'r') as f:
+                return json.load(f).get('files', {})
+        except Exception as e:
+            print(f"⚠️  Manifeste du modèle illisible ({e}), reconstruit")
+            return {}
+
+    def _save_manifest(self, path, files):
+        """Écriture atomique (fichier temporaire puis renommage)"""
+        temporary = f"{path}.tmp"
+        try:
+            with open(temporary, 'w') as f:
+                json.dump({'updated_at': time.time(), 'files': files}, f, indent=1)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temporary, path)
+        except OSError as e:
+            print(f"⚠️  Manifeste du modèle non enregistré: {e}")
+
+    # --- État ---
+
+    def get_status(self):
+        """Durée du préchauffage, fichiers les plus lents et anomalies"""
+        slowest = sorted(self.files, key=lambda entry: entry['seconds'], reverse=True)[:10]
+        return {
+            'enabled': self.policy['enabled'],
+            'model_path': self.model_path,
+            'running': bool(self._thread and self._thread.is_alive()),
+            'method': self.policy['method'],
+            'total_mb': round(self.total_bytes / 1024 / 1024, 1),
+            'total_seconds': round(self.total_seconds, 2),
+            'files': len(self.files),
+            'checksummed': self.checksummed,
+            'slowest_files': slowest,
+            'problems': self.problems,
+            'error': self.error
+        }
+
+
+# Instance globale
+_warmer_instance = None
+
+
+def get_model_warmer(policy=None):
+    """Obtenir l'instance du préchauffage"""
+    global _warmer_instance
+    if _warmer_instance is None:
+        _warmer_instance = ModelWarmer(policy or load_warmup_policy())
+    return _warmer_instance
+
+
+def start_model_warmup():
+    """À appeler au tout début des points d'entrée"""
+    warmer = get_model_warmer()
+    warmer.start()
+    return warmer
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Module de régulation automatique de la qualité
+Coupe les étapes coûteuses quand l'appareil prend du retard, les rétablit quand la charge baisse
+"""
+
+import threading
+import time
+from collections import deque
+
+from app_config import load_section, section_defaults
+from stats_manager import get_stats_manager
+
+CONFIG_FILE = "config.json"
+
+# Paliers, du plus complet au plus économe (chaque palier ajoute ses coupures aux précédents)
+QUALITY_TIERS = [
+    {'name': 'full', 'overrides': {}, 'vad_aggressiveness': None},
+    {'name': 'basic_punctuation', 'overrides': {'enable_punctuation': False}, 'vad_aggressiveness': None},
+    {'name': 'no_denoise', 'overrides': {'enable_punctuation': False, 'enable_noise_reduction': False},
+     'vad_aggressiveness': None},
+    {'name': 'coarse_vad', 'overrides': {'enable_punctuation': False, 'enable_noise_reduction': False},
+     'vad_aggressiveness': 3}
+]
+
+# Valeurs par défaut, types et bornes: section "governor" de app_config.SECTIONS
+DEFAULT_GOVERNOR_POLICY = section_defaults('governor')
+
+
+def load_governor_policy(config_file=CONFIG_FILE):
+    """Politique du régulateur (section "governor" de config.json, validée au chargement)"""
+    return load_section('governor', config_file)
+
+
+class QualityGovernor:
+    """Choix du palier de qualité selon la file audio, le facteur temps réel, le CPU et la température"""
+
+    def __init__(self, engine, policy=None):
+        self.engine = engine
+        self.policy = dict(DEFAULT_GOVERNOR_POLICY)
+        self.policy.update(policy or {})
+        self.stats = get_stats_manager()
+
+        self.on_tier_change = None  # on_tier_change({'from', 'to', 'tier', 'reason', 'time', ...})
+
+        self.tier = 0
+        self.last_sample = {}
+        self.events = deque(maxlen=50)
+        self.tier_changes = 0
+        self.time_in_tier = {tier['name']: 0.0 for tier in QUALITY_TIERS}
+
+        self._pressure_count = 0
+        self._headroom_count = 0
+        self._tier_since = time.monotonic()
+        self._last_busy = 0.0
+        self._last_audio = 0.0
+        self._thread = None
+        self._stop_event = threading.Event()
+
+    def start(self):
+        """Démarrer la surveillance"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._loop, name='quality-governor', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Arrêter la surveillance et revenir à la qualité complète"""
+        self._stop_event.set()
+        self._apply(0, 'arrêt du régulateur')
+
+    def _loop(self):
+        self.stats.get_load_sample()  # Amorcer la mesure CPU (psutil compare à l'appel précédent)
+        self._last_busy = self.engine.busy_seconds
+        self._last_audio = self.engine.processed_audio_seconds
+        while not self._stop_event.wait(self.policy['interval_seconds']):
+            try:
+                self._evaluate(self._sample())
+            except Exception as e:
+                print(f"Erreur du régulateur de qualité: {e}")
+
+    def _sample(self):
+        """Mesures de la dernière période"""
+        busy = self.engine.busy_seconds
+        audio = self.engine.processed_audio_seconds
+        audio_delta = audio - self._last_audio
+        rtf = (busy - self._last_busy) / audio_delta if audio_delta > 0 else 0.0
+        self._last_busy, self._last_audio = busy, audio
+
+        load = self.stats.get_load_sample()
+        self.last_sample = {
+            'queue_depth': self.engine.audio_queue.qsize(),
+            'rtf': round(rtf, 3),
+            'cpu_percent': load['cpu_percent'],
+            'temperature': load['temperature']
+        }
+        return self.last_sample
+
+    def _pressure_reasons(self, sample, level):
+        """Mesures au-dessus des seuils (level='high') ou pas encore sous les seuils bas (level='low')"""
+        policy = self.policy
+        checks = [
+            ('queue', sample['queue_depth'], policy[f'queue_{level}']),
+            ('rtf', sample['rtf'], policy[f'rtf_{level}']),
+            ('cpu', sample['cpu_percent'], policy[f'cpu_{level}']),
+            ('temperature', sample['temperature'], policy[f'temperature_{level}'])
+        ]
+        return [f"{name}={value}" for name, value, limit in checks
+                if value is not None and value > limit]
+
+    def _evaluate(self, sample):
+        """Descendre sous pression, remonter avec de la marge (hystérésis + durée minimum)"""
+        if not self.engine.is_running:
+            return
+
+        pressure = self._pressure_reasons(sample, 'high')
+        no_headroom = self._pressure_reasons(sample, 'low')
+        self._pressure_count = self._pressure_count + 1 if pressure else 0
+        self._headroom_count = 0 if no_headroom else self._headroom_count + 1
+
+        dwelled = time.monotonic() - self._tier_since >= self.policy['min_dwell_seconds']
+        if self._pressure_count >= self.policy['degrade_after'] and self.tier < len(QUALITY_TIERS) - 1 \
+                and (dwelled or self.tier == 0):
+            self._apply(self.tier + 1, ', '.join(pressure))
+        elif self._headroom_count >= self.policy['upgrade_after'] and self.tier > 0 and dwelled:
+            self._apply(self.tier - 1, 'marge retrouvée')
+
+    def _apply(self, tier, reason):
+        """Appliquer un palier au moteur et publier l'événement"""
+        if tier == self.tier:
+            return
+        now = time.monotonic()
+        previous_tier = self.tier
+        previous = QUALITY_TIERS[previous_tier]
+        self.time_in_tier[previous['name']] += now - self._tier_since
+        self._tier_since = now
+        self._pressure_count = 0
+        self._headroom_count = 0
+
+        settings = QUALITY_TIERS[tier]
+        self.engine.quality_overrides = dict(settings['overrides'])
+
+        # VAD plus sélectif: moins d'audio envoyé au décodeur
+        # Palier sans réglage propre: agressivité de la configuration (profil)
+        aggressiveness = settings['vad_aggressiveness'] or self.engine.config.get('vad_aggressiveness', 1)
+        self.engine.vad.set_aggressiveness(aggressiveness)
+
+        event = {
+            'from': previous['name'],
+            'to': settings['name'],
+            'tier': tier,
+            'reason': reason,
+            'time': time.time(),
+            'sample': dict(self.last_sample)
+        }
+        self.tier = tier
+        self.tier_changes += 1
+        self.events.append(event)
+
+        arrow = '⬇️' if tier > previous_tier else '⬆️'
+        print(f"{arrow}  Qualité: {previous['name']} -> {settings['name']} ({reason})")
+        if self.on_tier_change:
+            self.on_tier_change(event)
+
+    def get_status(self):
+        """État du régulateur (palier, dernières mesures, temps passé par palier)"""
+        time_in_tier = dict(self.time_in_tier)
+        time_in_tier[QUALITY_TIERS[self.tier]['name']] += time.monotonic() - self._tier_since
+        return {
+            'enabled': self.policy['enabled'],
+            'running': bool(self._thread and self._thread.is_alive()),
+            'tier': self.tier,
+            'tier_name': QUALITY_TIERS[self.tier]['name'],
+            'tier_changes': self.tier_changes,
+            'time_in_tier_seconds': {name: round(seconds, 1) for name, seconds in time_in_tier.items()},
+            'last_sample': self.last_sample,
+            'recent_events': list(self.events)[-10:]
+        }
+
+
+# Instance globale
+_governor_instance = None
+
+
+def get_quality_governor(engine, policy=None):
+    """Obtenir l'instance du régulateur de qualité"""
+    global _governor_instance
+    if _governor_instance is None:
+        _governor_instance = QualityGovernor(engine, policy or load_governor_policy())
+    return _governor_instance
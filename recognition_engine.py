@@ -0,0 +1,677 @@
+#!/usr/bin/env python3
+"""
+Moteur de reconnaissance vocale partagé par app.py et app_desktop.py
+Capture, VAD, réduction de bruit, Vosk, ponctuation, urgence, sauvegarde
+"""
+
+import bisect
+import json
+import queue
+import threading
+import time
+from collections import deque
+
+import psutil
+import sounddevice as sd
+import vosk
+
+from audio_resampler import capture_device, negotiate_capture
+from audio_utils import (
+    VoiceActivityDetector,
+    NoiseReducer,
+    AudioLevelMeter,
+    SmartPunctuator,
+    EmergencyDetector
+)
+from alert_dispatcher import get_alert_dispatcher
+from audio_archive import get_audio_archiver
+from database import get_database
+from keyword_spotter import KeywordSpotter
+from resource_manager import get_resource_manager
+from startup_monitor import get_startup_monitor
+from stats_manager import get_stats_manager
+
+SAMPLE_RATE = 16000
+BLOCK_SIZE = 960  # 60ms - Compatible avec VAD (multiple de 480)
+MAX_QUEUE_SIZE = 10
+MAX_UTTERANCE_AUDIO_SECONDS = 60  # Au-delà, l'audio d'un énoncé n'est plus archivé
+
+# Fin d'énoncé forcée par le VAD (Vosk ne reçoit pas les silences et ne conclurait pas seul)
+ENDPOINT_SILENCE_MS = 600  # Silence après la parole avant FinalResult()
+VAD_HANGOVER_MS = 240      # Silence encore transmis à Vosk (fin des mots non coupée)
+
+# Nouvelle configuration appliquée entre deux énoncés, au plus tard après ce délai
+CONFIG_APPLY_MAX_DELAY = 10.0
+
+
+def accept_waveform(rec, data):
+    """AcceptWaveform sans copie pour les memoryview (mémoire partagée) si vosk l'accepte"""
+    global _accepts_buffers
+    if isinstance(data, memoryview):
+        if _accepts_buffers:
+            try:
+                return rec.AcceptWaveform(data)
+            except TypeError:
+                _accepts_buffers = False  # Version de vosk/cffi limitée aux bytes
+        data = bytes(data)
+    return rec.AcceptWaveform(data)
+
+
+_accepts_buffers = True
+
+
+class AudioTimeline:
+    """Conversion temps Vosk (audio réellement décodé) -> temps depuis le début de session
+
+    Le VAD retire les silences avant Vosk: les horodatages des mots sont donc
+    relatifs à l'audio décodé. On mémorise où commence chaque portion continue.
+    """
+
+    def __init__(self, sample_rate=SAMPLE_RATE):
+        self.sample_rate = sample_rate
+        self._fed_starts = [0]      # Début de chaque portion (échantillons décodés)
+        self._session_starts = [0]  # Début correspondant (échantillons de session)
+        self.fed_samples = 0
+
+    def add_fed(self, session_sample, n_samples):
+        """Déclarer un bloc décodé commençant à session_sample"""
+        expected = self._session_starts[-1] + (self.fed_samples - self._fed_starts[-1])
+        if session_sample != expected:
+            self._fed_starts.append(self.fed_samples)
+            self._session_starts.append(session_sample)
+        self.fed_samples += n_samples
+
+    def to_session_time(self, fed_seconds):
+        """Convertir un temps Vosk (secondes) en secondes depuis le début de session"""
+        fed_sample = int(fed_seconds * self.sample_rate)
+        i = bisect.bisect_right(self._fed_starts, fed_sample) - 1
+        session_sample = self._session_starts[i] + (fed_sample - self._fed_starts[i])
+        return session_sample / self.sample_rate
+
+    def trim(self):
+        """Oublier les portions antérieures à la dernière (appelé après un résultat final)"""
+        del self._fed_starts[:-1]
+        del self._session_starts[:-1]
+
+
+class Rechunker:
+    """Redécoupage des blocs capturés à la taille de traitement (modifiable sans rouvrir le flux)"""
+
+    def __init__(self, block_size):
+        self.block_bytes = block_size * 2
+        self._buffer = bytearray()
+
+    def set_block_size(self, block_size):
+        self.block_bytes = block_size * 2
+
+    def push(self, data, captured_at):
+        """Blocs complets (bytes, instant de capture de leur fin); le reste attend la capture suivante"""
+        if not self._buffer and len(data) == self.block_bytes:
+            yield data, captured_at  # Même taille qu'à la capture: aucune copie
+            return
+        self._buffer += data
+        while len(self._buffer) >= self.block_bytes:
+            block = bytes(self._buffer[:self.block_bytes])
+            del self._buffer[:self.block_bytes]
+            yield block, captured_at
+
+
+class AudioFrontEnd:
+    """Traitement d'un bloc avant le décodeur: niveau, VAD (fin d'énoncé), réduction de bruit"""
+
+    def __init__(self, config, sample_rate=SAMPLE_RATE, is_enabled=None):
+        self.config = config
+        self.sample_rate = sample_rate
+        self.is_enabled = is_enabled or (lambda key: self.config.get(key, True))
+
+        self.vad = VoiceActivityDetector(sample_rate=sample_rate,
+                                         aggressiveness=config.get('vad_aggressiveness', 1))
+        self.noise_reducer = NoiseReducer(sample_rate=sample_rate)
+        self.audio_meter = AudioLevelMeter()
+
+        self.last_speech_time = 0.0   # time.monotonic() du dernier bloc de parole
+        self.speech_end_at = None     # Instant de capture du dernier bloc de parole
+        self.silent_ms = 0.0
+        self.fed_since_endpoint = False  # De l'audio a été décodé depuis la dernière fin d'énoncé
+        self.analyzed_seconds = 0.0      # Audio analysé / reconnu comme parole (part de parole)
+        self.speech_seconds = 0.0
+
+    def apply_config(self, config):
+        """Nouvel instantané de configuration (entre deux blocs)"""
+        aggressiveness = config.get('vad_aggressiveness', 1)
+        # Seulement si le réglage change: le régulateur de qualité garde sinon la main sur le VAD
+        if aggressiveness != self.config.get('vad_aggressiveness', 1):
+            self.vad.set_aggressiveness(aggressiveness)
+        self.config = config
+
+    def analyze(self, data, captured_at):
+        """Niveau du bloc et décision: 'decode', 'skip' (silence) ou 'endpoint' (forcer le résultat final)"""
+        config = self.config
+        audio_level = self.audio_meter.get_level(data)
+        duration = len(data) / 2 / self.sample_rate
+        self.analyzed_seconds += duration
+
+        if not config.get('enable_vad', True):
+            self.last_speech_time = time.monotonic()
+            self.fed_since_endpoint = True
+            self.speech_seconds += duration
+            return audio_level, 'decode'
+
+        # VAD: Ne traiter que la parole (et le début du silence qui la suit)
+        if self.vad.is_speech(data):
+            self.speech_seconds += duration
+            self.silent_ms = 0.0
+            self.speech_end_at = captured_at
+            self.last_speech_time = time.monotonic()
+        else:
+            self.silent_ms += duration * 1000
+            if self.silent_ms > config.get('vad_hangover_ms', VAD_HANGOVER_MS):
+                # Silence prolongé: conclure l'énoncé sans attendre Vosk
+                if self.fed_since_endpoint and \
+                        self.silent_ms >= config.get('endpoint_silence_ms', ENDPOINT_SILENCE_MS):
+                    self.fed_since_endpoint = False
+                    return audio_level, 'endpoint'
+                return audio_level, 'skip'  # Ignorer le silence
+
+        self.fed_since_endpoint = True
+        return audio_level, 'decode'
+
+    def denoise(self, data):
+        """Réduction de bruit (si activée et non coupée par le régulateur)"""
+        if self.is_enabled('enable_noise_reduction'):
+            return self.noise_reducer.reduce_noise(data)
+        return data
+
+
+class RecognitionEngine:
+    """Pipeline de reconnaissance continue dans un thread dédié"""
+
+    def __init__(self, config, model=None, sample_rate=SAMPLE_RATE, block_size=BLOCK_SIZE,
+                 max_queue_size=MAX_QUEUE_SIZE, model_manager=None):
+        self.config = config  # Instantané immuable, remplacé entre deux blocs (update_config)
+        self.model = model
+        self.model_manager = model_manager  # Modèle fourni (et remplacé à chaud) par le gestionnaire
+        self._model_generation = None
+        self._warmed_up = False
+        audio = config.get('audio', {})
+        self.sample_rate = audio.get('sample_rate', sample_rate)
+        self.block_size = audio.get('block_size', block_size)
+        self.max_queue_size = max_queue_size
+        self.rechunker = Rechunker(self.block_size)
+        self._pending_config = None
+        self._pending_since = 0.0
+        self.capture = None  # Format du micro et conversion (à l'ouverture du flux)
+
+        self.audio_queue = queue.Queue()
+        self.is_running = False
+        self._thread = None
+
+        # Charge du décodeur (lue par le régulateur de qualité)
+        self.busy_seconds = 0.0
+        self.processed_audio_seconds = 0.0
+        self.quality_overrides = {}  # Étapes coupées par le régulateur (ex: {'enable_punctuation': False})
+
+        # Instances des utilitaires
+        self.front_end = AudioFrontEnd(config, self.sample_rate, is_enabled=self.is_enabled)
+        self.vad = self.front_end.vad
+        self.noise_reducer = self.front_end.noise_reducer
+        self.audio_meter = self.front_end.audio_meter
+        self.punctuator = SmartPunctuator()
+        self.emergency_detector = EmergencyDetector()
+        self.db = get_database()
+        self.stats = get_stats_manager()
+        self.alert_dispatcher = get_alert_dispatcher()
+
+        # Callbacks de l'interface (web ou bureau)
+        self.on_level = None    # on_level(level)
+        self.on_partial = None  # on_partial(text)
+        self.on_final = None    # on_final(dict)
+        self.on_emergency = None  # on_emergency(dict) - alerte rapide (mots-clés)
+
+        # Détection rapide des mots d'urgence (créée au démarrage)
+        self.keyword_spotter = None
+
+        # Session en cours
+        self.session_id = None
+        self._session_samples = 0
+        self.timeline = AudioTimeline(self.sample_rate)
+
+        # Reconnaisseur courant: âge et recyclages (mémoire bornée sur de longues sessions)
+        self._recognizer_created_at = time.monotonic()
+        self.recognizer_recycles = 0
+        self.recycle_events = deque(maxlen=10)
+
+        # Audio de l'énoncé en cours (archive audio optionnelle)
+        self._utterance_audio = []
+        self._utterance_bytes = 0
+
+    @property
+    def last_speech_time(self):
+        """time.monotonic() du dernier bloc de parole"""
+        return self.front_end.last_speech_time
+
+    def start(self):
+        """Démarrer la reconnaissance (retourne False si déjà en cours ou sans modèle)"""
+        if self.is_running or (self.model is None and self.model_manager is None):
+            return False
+        self.is_running = True
+        self._thread = threading.Thread(target=self._run, name='recognition', daemon=True)
+        self._thread.start()
+        return True
+
+    def stop(self):
+        """Arrêter la reconnaissance"""
+        self.is_running = False
+
+    def audio_callback(self, indata, frames, time_info, status):
+        """Callback pour capturer l'audio"""
+        if status:
+            print(f"Statut audio: {status}")
+
+        # Gestion intelligente de la queue (limite la taille)
+        if self.audio_queue.qsize() > self.max_queue_size:
+            try:
+                self.audio_queue.get_nowait()  # Supprimer le plus ancien
+            except queue.Empty:
+                pass
+
+        self.audio_queue.put((bytes(indata), time.monotonic()))
+
+    def update_config(self, config):
+        """Nouvel instantané (appelable depuis n'importe quel thread), appliqué au prochain point sûr"""
+        if self._pending_config is None:
+            self._pending_since = time.monotonic()
+        self._pending_config = config
+
+    def _apply_pending_config(self, force=False):
+        """Appliquer l'instantané en attente entre deux blocs, de préférence entre deux énoncés"""
+        config = self._pending_config
+        if config is None:
+            return False
+        if not force and self.front_end.fed_since_endpoint and \
+                time.monotonic() - self._pending_since < CONFIG_APPLY_MAX_DELAY:
+            return False
+        self._pending_config = None
+        self.front_end.apply_config(config)
+        self.config = config
+
+        # Taille de bloc: seul le redécoupage change, le flux audio reste ouvert
+        block_size = config.get('audio', {}).get('block_size', self.block_size)
+        if block_size != self.block_size:
+            self.block_size = block_size
+            self.rechunker.set_block_size(block_size)
+            print(f"  Blocs de traitement: {block_size * 1000 // self.sample_rate} ms")
+        return True
+
+    def _begin_session(self):
+        """Reconnaisseur, détecteur rapide et session de base de données (dans le thread du décodeur)"""
+        self._apply_pending_config(force=True)  # Début de session: point sûr
+        if self.model_manager is not None:
+            # Modèle encore en cours de chargement: attendre (la capture n'est pas encore ouverte)
+            self.model = self.model_manager.wait_ready()
+            self._model_generation = self.model_manager.generation
+            if self.model is None:
+                return None
+        rec = self._create_recognizer()
+
+        # Après le lancement du détecteur: ses threads n'héritent pas du coeur dédié
+        get_resource_manager().configure_thread('decoder')
+
+        self.session_id = self.db.start_session()
+        self._session_samples = 0
+        self.timeline = AudioTimeline(self.sample_rate)
+        return rec
+
+    def _new_recognizer(self):
+        """KaldiRecognizer neuf: ses horodatages repartent de zéro, la table de conversion aussi"""
+        rec = vosk.KaldiRecognizer(self.model, self.sample_rate)
+        rec.SetWords(True)
+        self._configure_endpointer(rec)
+        self.timeline = AudioTimeline(self.sample_rate)
+        self._recognizer_created_at = time.monotonic()
+        return rec
+
+    def _create_recognizer(self):
+        """Reconnaisseur principal et détecteur rapide pour le modèle courant"""
+        config = self.config
+        rec = self._new_recognizer()
+
+        if self.keyword_spotter:
+            self.keyword_spotter.set_model(self.model)
+        elif config.get('enable_emergency_detection', True) and config.get('enable_keyword_spotting', True):
+            self.keyword_spotter = KeywordSpotter(self.model, self.emergency_detector.rules,
+                                                  sample_rate=self.sample_rate)
+            self.keyword_spotter.on_alert = self._on_keyword_alert
+            self.keyword_spotter.start()
+        return rec
+
+    def _warm_up_features(self):
+        """Importer en arrière-plan les dépendances lourdes des options activées (flux déjà ouvert)"""
+        if self._warmed_up:
+            return
+        self._warmed_up = True
+
+        def warm_up():
+            get_resource_manager().configure_thread('background')
+            if self.config.get('enable_noise_reduction', True):
+                self.noise_reducer.load_backend()
+            if self.config.get('enable_punctuation', True):
+                self.punctuator._load_model()
+
+        threading.Thread(target=warm_up, name='feature-warm-up', daemon=True).start()
+
+    def _maybe_swap_model(self, rec):
+        """Basculer sur le nouveau modèle du gestionnaire, entre deux énoncés seulement"""
+        manager = self.model_manager
+        if manager is None or manager.generation == self._model_generation or self.front_end.fed_since_endpoint:
+            return rec
+        self.model = manager.model
+        self._model_generation = manager.generation
+        print(f"🔄 Reconnaisseur basculé sur {manager.active_path}")
+        return self._create_recognizer()
+
+    def _recycle_reason(self):
+        """Raison de recréer le reconnaisseur (audio décodé ou âge au-delà des limites), None sinon"""
+        audio_limit = self.config.get('recognizer_recycle_audio_seconds', 0)
+        decoded = self.timeline.fed_samples / self.sample_rate
+        if audio_limit and decoded >= audio_limit:
+            return f"{decoded:.0f}s d'audio décodé"
+        minutes_limit = self.config.get('recognizer_recycle_minutes', 0)
+        age_minutes = (time.monotonic() - self._recognizer_created_at) / 60
+        if minutes_limit and age_minutes >= minutes_limit:
+            return f"{age_minutes:.0f} min d'existence"
+        return None
+
+    def _maybe_recycle_recognizer(self, rec):
+        """Recréer le reconnaisseur entre deux énoncés (aucun mot en cours de décodage n'est perdu)"""
+        if self.front_end.fed_since_endpoint:
+            return rec
+        reason = self._recycle_reason()
+        if reason is None:
+            return rec
+
+        process = psutil.Process()
+        rss_before = process.memory_info().rss
+        started = time.perf_counter()
+        rec = self._new_recognizer()
+        if self.keyword_spotter:
+            self.keyword_spotter.recycle()
+        seconds = time.perf_counter() - started
+        rss_after = process.memory_info().rss
+
+        self.recognizer_recycles += 1
+        event = {
+            'time': time.time(),
+            'reason': reason,
+            'seconds': round(seconds, 3),
+            'rss_before_mb': round(rss_before / 1024 / 1024, 1),
+            'rss_after_mb': round(rss_after / 1024 / 1024, 1)
+        }
+        self.recycle_events.append(event)
+        print(f"♻️  Reconnaisseur recréé ({reason}) en {seconds * 1000:.0f} ms, "
+              f"RSS {event['rss_before_mb']} -> {event['rss_after_mb']} MB")
+        return rec
+
+    def speech_counters(self):
+        """(secondes analysées, secondes de parole) depuis le démarrage"""
+        return self.front_end.analyzed_seconds, self.front_end.speech_seconds
+
+    def get_recognizer_status(self):
+        """Âge, audio décodé et recyclages du reconnaisseur courant"""
+        return {
+            'age_minutes': round((time.monotonic() - self._recognizer_created_at) / 60, 1),
+            'decoded_seconds': round(self.timeline.fed_samples / self.sample_rate, 1),
+            'recycle_audio_seconds': self.config.get('recognizer_recycle_audio_seconds', 0),
+            'recycle_minutes': self.config.get('recognizer_recycle_minutes', 0),
+            'recycles': self.recognizer_recycles,
+            'recent_recycles': list(self.recycle_events)
+        }
+
+    def memory_estimates(self):
+        """Estimations par composant du moteur (le modèle Vosk est mesuré par le gestionnaire de modèles)"""
+        queued_blocks = self.audio_queue.qsize()
+        capture = self.capture
+        block_bytes = capture.capture_blocksize(self.block_size) * capture.channels * 2 if capture \
+            else self.block_size * 2
+        return {
+            'punctuation': self.punctuator.memory_estimate(),
+            'noise_reducer': self.noise_reducer.memory_estimate(),
+            'buffers': {
+                'utterance_audio_mb': round(self._utterance_bytes / 1024 / 1024, 3),
+                'audio_queue_blocks': queued_blocks,
+                'audio_queue_mb': round(queued_blocks * block_bytes / 1024 / 1024, 3),
+                'keyword_queue_blocks': self.keyword_spotter._queue.qsize() if self.keyword_spotter else 0
+            }
+        }
+
+    def _end_session(self):
+        """Arrêter le détecteur rapide et clore la session"""
+        if self.keyword_spotter:
+            self.keyword_spotter.stop()
+            self.keyword_spotter = None
+        self.db.end_session(self.session_id)
+
+    def _run(self):
+        """Boucle de reconnaissance vocale AMÉLIORÉE"""
+        rec = self._begin_session()
+        if rec is None:
+            print("❌ Aucun modèle disponible, reconnaissance arrêtée")
+            self.is_running = False
+            return
+
+        # Le flux garde la taille de bloc de son ouverture, le traitement suit la configuration
+        self.rechunker = Rechunker(self.block_size)
+        config = self.config
+        # Micro ouvert à sa fréquence et ses canaux natifs, converti ici (pas par ALSA)
+        device = capture_device(config.get('audio'))
+        capture = self.capture = negotiate_capture(self.sample_rate, config.get('audio'), device=device)
+        with sd.RawInputStream(
+            device=device,
+            samplerate=capture.capture_rate,
+            blocksize=capture.capture_blocksize(self.block_size),
+            dtype='int16',
+            channels=capture.channels,
+            callback=self.audio_callback
+        ):
+            get_startup_monitor().mark('audio_stream')
+            self._warm_up_features()
+            print("🎤 Reconnaissance vocale démarrée avec améliorations...")
+            print(f"  Capture: {capture.describe()}")
+            print(f"  VAD: {config.get('enable_vad', True)}")
+            print(f"  Réduction bruit: {config.get('enable_noise_reduction', True)}")
+            print(f"  Ponctuation: {config.get('enable_punctuation', True)}")
+            print(f"  Détection urgence: {config.get('enable_emergency_detection', True)}")
+
+            while self.is_running:
+                try:
+                    data, captured_at = self.audio_queue.get(timeout=1)
+                except queue.Empty:
+                    continue
+
+                started = time.perf_counter()
+                data = capture.convert(data)
+                self.busy_seconds += time.perf_counter() - started
+
+                for block, captured_at in self.rechunker.push(data, captured_at):
+                    # Points sûrs: nouveau modèle, reconnaisseur recyclé, nouvelle configuration
+                    rec = self._maybe_swap_model(rec)
+                    rec = self._maybe_recycle_recognizer(rec)
+                    self._apply_pending_config()
+                    self._process_block(rec, block, captured_at)
+
+        self._end_session()
+
+    def _process_block(self, rec, data, captured_at):
+        """Analyse, puis fin d'énoncé ou décodage d'un bloc de traitement"""
+        block_start = self._session_samples
+        n_samples = len(data) // 2
+        self._session_samples += n_samples
+        started = time.perf_counter()
+        try:
+            audio_level, action = self.front_end.analyze(data, captured_at)
+            if self.on_level:
+                self.on_level(audio_level)
+
+            if action == 'endpoint':
+                self._handle_final(json.loads(rec.FinalResult()), audio_level, 'vad')
+            elif action == 'decode':
+                self._decode_block(rec, data, self.front_end.denoise(data), block_start,
+                                   audio_level, captured_at)
+        finally:
+            # Facteur temps réel: temps de calcul / durée audio
+            self.busy_seconds += time.perf_counter() - started
+            self.processed_audio_seconds += n_samples / self.sample_rate
+
+    def _decode_block(self, rec, raw, data, block_start, audio_level, captured_at):
+        """Détection rapide, archive et décodage Vosk d'un bloc de parole (raw: avant débruitage)"""
+        config = self.config
+        n_samples = len(raw) // 2
+
+        # Recherche rapide des mots d'urgence, en parallèle du décodage principal
+        spotter = self.keyword_spotter
+        if spotter and config.get('enable_emergency_detection', True):
+            spotter.feed(bytes(raw), captured_at)
+
+        # Conserver l'audio brut de parole pour l'archive (simple ajout à une liste)
+        if config.get('enable_audio_archive', False):
+            self._keep_utterance_audio(bytes(raw))
+
+        # Reconnaissance Vosk
+        self.timeline.add_fed(block_start, n_samples)
+        if accept_waveform(rec, data):
+            self._handle_final(json.loads(rec.Result()), audio_level, 'vosk')
+        else:
+            partial = json.loads(rec.PartialResult())
+            if partial.get('partial'):
+                if spotter and config.get('enable_emergency_detection', True):
+                    spotter.check_text(partial['partial'], captured_at)
+                if self.on_partial:
+                    self.on_partial(partial['partial'])
+
+    def swap_model(self, path):
+        """Remplacer le modèle (chargé en arrière-plan, bascule à la fin de l'énoncé en cours)"""
+        if self.model_manager is None:
+            return False
+        return self.model_manager.swap(path)
+
+    def is_enabled(self, key):
+        """Option activée par l'utilisateur et non coupée par le régulateur de qualité"""
+        return self.config.get(key, True) and self.quality_overrides.get(key, True)
+
+    def _configure_endpointer(self, rec):
+        """Règles de fin d'énoncé de Vosk (selon la version de vosk installée)"""
+        mode = self.config.get('vosk_endpointer_mode')
+        endpointer_modes = getattr(vosk, 'EndpointerMode', None)
+        if mode and hasattr(rec, 'SetEndpointerMode') and endpointer_modes is not None:
+            rec.SetEndpointerMode(getattr(endpointer_modes, mode.upper()))
+            print(f"  Fin d'énoncé Vosk: mode {mode}")
+
+        # [t_start_max, t_end, t_max] en secondes
+        delays = self.config.get('vosk_endpointer_delays')
+        if delays and hasattr(rec, 'SetEndpointerDelays'):
+            rec.SetEndpointerDelays(*delays)
+            print(f"  Fin d'énoncé Vosk: délais {delays}")
+
+    def _on_keyword_alert(self, alert):
+        """Alerte rapide du détecteur de mots-clés"""
+        self.alert_dispatcher.submit(alert)
+        if self.on_emergency:
+            self.on_emergency(alert)
+
+    def _keep_utterance_audio(self, data):
+        """Accumuler l'audio de l'énoncé en cours (plafonné)"""
+        if self._utterance_bytes < MAX_UTTERANCE_AUDIO_SECONDS * self.sample_rate * 2:
+            self._utterance_audio.append(data)
+            self._utterance_bytes += len(data)
+
+    def _archive_utterance_audio(self, transcription_id):
+        """Confier l'audio de l'énoncé à l'archiveur (écriture hors de ce thread)"""
+        if self._utterance_audio and transcription_id is not None:
+            get_audio_archiver().submit(transcription_id, b''.join(self._utterance_audio))
+        self._utterance_audio = []
+        self._utterance_bytes = 0
+
+    def _handle_final(self, result, audio_level, trigger='vosk'):
+        """Post-traitement d'un résultat final (trigger: 'vosk' ou 'vad')"""
+        config = self.config
+        self.front_end.fed_since_endpoint = False
+        if not result.get('text'):
+            self._utterance_audio = []
+            self._utterance_bytes = 0
+            return
+
+        text = result['text']
+
+        # Horodatage des mots (relatif au début de session)
+        words = []
+        for word in result.get('result', []):
+            words.append({
+                'word': word['word'],
+                'start': self.timeline.to_session_time(word['start']),
+                'end': self.timeline.to_session_time(word['end']),
+                'conf': word.get('conf', 1.0)
+            })
+        self.timeline.trim()
+
+        # Ponctuation automatique
+        if self.is_enabled('enable_punctuation'):
+            # Ponctuation ML (avancée mais gourmande)
+            text = self.punctuator.add_punctuation(text)
+        else:
+            # Ponctuation basique (légère)
+            text = self.punctuator._basic_punctuation(text)
+
+        # Détection d'urgence (une seule passe de l'automate de règles)
+        matches = []
+        if config.get('enable_emergency_detection', True):
+            matches = self.emergency_detector.find_matches(text)
+        is_emergency = bool(matches)
+        emergency_words = list(dict.fromkeys(m['phrase'] for m in matches))
+        severity = EmergencyDetector.max_severity(matches)
+        if is_emergency:
+            print(f"⚠️ URGENCE DÉTECTÉE ({severity}): {emergency_words}")
+
+        # Sauvegarder dans la base de données
+        transcription_id = self.db.add_transcription(
+            text,
+            has_emergency=is_emergency,
+            emergency_words=emergency_words,
+            audio_level=audio_level,
+            words=words,
+            session_id=self.session_id,
+            min_word_conf=config.get('min_word_confidence', 0.0)
+        )
+
+        if config.get('enable_audio_archive', False):
+            self._archive_utterance_audio(transcription_id)
+
+        # Mettre à jour les statistiques
+        self.stats.increment_transcription(text, audio_level)
+
+        final = {
+            'id': transcription_id,
+            'text': text,
+            'final': True,
+            'is_emergency': is_emergency,
+            'emergency_words': emergency_words,
+            'severity': severity,
+            'matches': matches,
+            'start': words[0]['start'] if words else None,
+            'end': words[-1]['end'] if words else None
+        }
+
+        # Prévenir les aidants (envoi hors de ce thread)
+        if is_emergency:
+            self.alert_dispatcher.submit(final)
+
+        if self.on_final:
+            self.on_final(final)
+
+        # Mode mesure: latence fin de parole -> résultat final émis
+        speech_end_at = self.front_end.speech_end_at
+        if config.get('measure_endpoint_latency', False) and config.get('enable_vad', True) \
+                and speech_end_at is not None:
+            latency = time.monotonic() - speech_end_at
+            self.stats.record_latency('final_result', latency)
+            self.stats.record_latency(f'final_result_{trigger}', latency)
+            print(f"⏱️  Résultat final ({trigger}) {latency * 1000:.0f} ms après la fin de parole")
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Module de ré-décodage en tâche de fond
+Repasse les segments audio archivés dans un modèle Vosk plus grand quand l'appareil est inactif
+"""
+
+import json
+import os
+import threading
+import time
+
+import vosk
+
+from audio_archive import get_audio_archiver
+from audio_utils import EmergencyDetector, SmartPunctuator
+from database import get_database
+from resource_manager import get_resource_manager
+from stats_manager import get_stats_manager
+
+REDECODE_MODEL_PATH = "models/vosk-model-fr-0.22"
+CHUNK_SECONDS = 0.5  # Taille des morceaux envoyés au décodeur (points de pause)
+LOAD_RETRY_SECONDS = (60, 3600)  # Nouvel essai de chargement du modèle: attente initiale, maximum
+
+
+class RedecodeWorker:
+    """Ré-transcription basse priorité des segments archivés"""
+
+    def __init__(self, engine, model_path=REDECODE_MODEL_PATH, mode='annotate',
+                 idle_seconds=30, max_queue_depth=2, nice=19, sample_rate=16000):
+        self.engine = engine
+        self.model_path = model_path
+        self.model_name = os.path.basename(os.path.normpath(model_path))
+        self.mode = mode  # 'annotate' (texte ajouté) ou 'replace' (texte remplacé)
+        self.idle_seconds = idle_seconds
+        self.max_queue_depth = max_queue_depth
+        self.nice = nice
+        self.sample_rate = sample_rate
+
+        self.archiver = get_audio_archiver()
+        self.db = get_database()
+        self.stats = get_stats_manager()
+        self.punctuator = SmartPunctuator()
+        self.emergency_detector = EmergencyDetector() if mode == 'replace' else None
+
+        self.model = None
+        self._thread = None
+        self._stop_event = threading.Event()
+        self.state = 'stopped'
+        self.last_error = None
+        self._load_failures = 0
+
+    def start(self):
+        """Démarrer le thread de ré-décodage"""
+        if self._thread and self._thread.is_alive():
+            return
+        if not os.path.exists(self.model_path):
+            print(f"⚠️  Ré-décodage désactivé: modèle absent ({self.model_path})")
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._loop, name='redecoder', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Arrêter le thread de ré-décodage"""
+        self._stop_event.set()
+
+    def _should_pause(self):
+        """Pause si de la parole est en cours ou si la reconnaissance prend du retard"""
+        if time.monotonic() - self.engine.last_speech_time < self.idle_seconds:
+            return True
+        return self.engine.audio_queue.qsize() > self.max_queue_depth
+
+    def _loop(self):
+        """Attendre l'inactivité, puis traiter les segments en attente un par un"""
+        get_resource_manager().configure_thread('background', nice=self.nice)
+
+        while not self._stop_event.is_set():
+            if self._should_pause():
+                self.state = 'paused'
+                self._stop_event.wait(5)
+                continue
+
+            pending = self.archiver.get_pending_redecode(limit=10)
+            if not pending:
+                self.state = 'idle'
+                self._stop_event.wait(60)
+                continue
+
+            if self.model is None and not self._load_model():
+                continue
+
+            self.state = 'running'
+            for segment in pending:
+                if self._stop_event.is_set() or self._should_pause():
+                    break
+                try:
+                    self._redecode(segment['transcription_id'])
+                except Exception as e:
+                    print(f"Erreur de ré-décodage ({segment['transcription_id']}): {e}")
+                    self.archiver.mark_redecoded(segment['transcription_id'])
+
+    def _load_model(self):
+        """Charger le modèle; en cas d'échec, noter l'erreur et attendre avant de réessayer"""
+        self.state = 'loading'
+        print(f"📥 Chargement du modèle de ré-décodage {self.model_path}...")
+        try:
+            self.model = vosk.Model(self.model_path)
+        except Exception as e:
+            self._load_failures += 1
+            delay = min(LOAD_RETRY_SECONDS[0] * 2 ** (self._load_failures - 1), LOAD_RETRY_SECONDS[1])
+            self.state = 'error'
+            self.last_error = f"Chargement du modèle: {e}"
+            print(f"❌ Modèle de ré-décodage non chargé ({e}) - nouvel essai dans {delay:.0f}s")
+            self._stop_event.wait(delay)
+            return False
+        self._load_failures = 0
+        self.last_error = None
+        return True
+
+    def _redecode(self, transcription_id):
+        """Ré-décoder un segment (abandonné sans être marqué si une pause survient)"""
+        pcm = self.archiver.get_audio(transcription_id)
+        if pcm is None:
+            self.archiver.mark_redecoded(transcription_id)
+            return
+
+        started = time.monotonic()
+        rec = vosk.KaldiRecognizer(self.model, self.sample_rate)
+        rec.SetWords(True)
+        chunk_bytes = int(CHUNK_SECONDS * self.sample_rate) * 2
+        results = []
+        for offset in range(0, len(pcm), chunk_bytes):
+            if self._should_pause():
+                return  # Repris plus tard depuis le début
+            if rec.AcceptWaveform(pcm[offset:offset + chunk_bytes]):
+                results.append(json.loads(rec.Result()))
+        results.append(json.loads(rec.FinalResult()))
+
+        text = ' '.join(result['text'] for result in results if result.get('text'))
+        if text:
+            text = self.punctuator._basic_punctuation(text)
+            if self.mode == 'replace':
+                self._replace(transcription_id, text, [w for result in results for w in result.get('result', [])])
+            else:
+                self.db.set_redecoded_text(transcription_id, text, self.model_name)
+        self.archiver.mark_redecoded(transcription_id)
+
+        audio_seconds = len(pcm) / 2 / self.sample_rate
+        self.stats.record_redecode(audio_seconds, time.monotonic() - started)
+
+    def _replace(self, transcription_id, text, decoded_words):
+        """Remplacer le texte, l'horodatage des mots et l'indicateur d'urgence de la transcription"""
+        config = getattr(self.engine, 'config', {})
+
+        # Temps du nouveau décodage relatifs au début du segment: recalés sur le premier mot d'origine
+        words = None
+        original = self.db.get_word_timings(transcription_id)
+        if original and original['words'] and decoded_words:
+            shift = original['words'][0]['start'] - decoded_words[0]['start']
+            words = [{'word': w['word'], 'start': w['start'] + shift, 'end': w['end'] + shift,
+                      'conf': w.get('conf', 1.0)} for w in decoded_words]
+
+        # Mots d'urgence du nouveau texte, ajoutés aux anciens (pas de nouvelle alerte: énoncé passé)
+        emergency_words = None
+        if config.get('enable_emergency_detection', True):
+            matches = self.emergency_detector.find_matches(text)
+            emergency_words = list(dict.fromkeys(m['phrase'] for m in matches))
+
+        self.db.set_redecoded_text(transcription_id, text, self.model_name, replace=True,
+                                   words=words, emergency_words=emergency_words,
+                                   min_word_conf=config.get('min_word_confidence', 0.0))
+
+    def get_status(self):
+        """État du ré-décodage"""
+        return {
+            'state': self.state,
+            'model': self.model_name,
+            'mode': self.mode,
+            'last_error': self.last_error,
+            'pending': len(self.archiver.get_pending_redecode(limit=1000))
+        }
+
+
+# Instance globale
+_redecode_instance = None
+
+
+def get_redecode_worker(engine, **kwargs):
+    """Obtenir l'instance du ré-décodeur"""
+    global _redecode_instance
+    if _redecode_instance is None:
+        _redecode_instance = RedecodeWorker(engine, **kwargs)
+    return _redecode_instance
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Module de répartition des coeurs et des threads
+Décodeur sur un coeur dédié et prioritaire, tâches de fond sur les autres coeurs en basse priorité,
+pools de threads torch/BLAS plafonnés
+
+apply_thread_limits() doit être appelé avant l'import de numpy (les bibliothèques BLAS lisent
+leurs variables d'environnement au chargement).
+"""
+
+import os
+import sys
+import threading
+
+from app_config import load_section, section_defaults
+
+CONFIG_FILE = "config.json"
+
+# Valeurs par défaut, types et bornes: section "resources" de app_config.SECTIONS
+DEFAULT_RESOURCE_POLICY = section_defaults('resources')
+
+BLAS_ENV_VARS = ('OMP_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'MKL_NUM_THREADS', 'NUMEXPR_NUM_THREADS')
+
+
+def load_resource_policy(config_file=CONFIG_FILE):
+    """Politique de répartition (section "resources" de config.json, validée au chargement)"""
+    return load_section('resources', config_file)
+
+
+class ResourceManager:
+    """Affectation des threads aux coeurs et priorités selon leur rôle"""
+
+    def __init__(self, policy=None):
+        self.policy = dict(DEFAULT_RESOURCE_POLICY)
+        self.policy.update(policy or {})
+
+        try:
+            self.available_cores = sorted(os.sched_getaffinity(0))
+        except AttributeError:  # Hors Linux
+            self.available_cores = list(range(os.cpu_count() or 1))
+
+        decoder_cores = self.policy['decoder_cores']
+        if decoder_cores is None:
+            decoder_cores = self.available_cores[-1:] if len(self.available_cores) >= 3 else []
+        self.decoder_cores = [c for c in decoder_cores if c in self.available_cores]
+
+        dsp_cores = self.policy['dsp_cores']
+        if dsp_cores is None:
+            dsp_cores = self.available_cores[-2:-1] if len(self.available_cores) >= 4 else []
+        self.dsp_cores = [c for c in dsp_cores if c in self.available_cores and c not in self.decoder_cores]
+
+        # Les autres threads (Flask, Tk, spotter, psutil...) restent hors du coeur du décodeur
+        self.shared_cores = [c for c in self.available_cores if c not in self.decoder_cores] or self.available_cores
+        background_cores = self.policy['background_cores']
+        if background_cores is None:
+            background_cores = self.shared_cores
+        self.background_cores = [c for c in background_cores if c in self.available_cores] or self.shared_cores
+
+        self._lock = threading.Lock()
+        self.layout = {}  # Nom du thread -> {'role', 'cores', 'nice', 'notes'}
+        self.thread_limits = {}
+
+    # --- Pools de threads ---
+
+    def apply_thread_limits(self):
+        """Plafonner les pools BLAS/OpenMP (avant l'import de numpy)"""
+        if not self.policy['enabled']:
+            return
+        blas_threads = str(self.policy['blas_threads'])
+        for name in BLAS_ENV_VARS:
+            os.environ.setdefault(name, blas_threads)
+            self.thread_limits[name] = os.environ[name]
+        if 'numpy' in sys.modules:
+            self.thread_limits['warning'] = 'numpy déjà importé: limites BLAS peut-être sans effet'
+
+    def limit_torch_threads(self):
+        """Plafonner les threads de torch (appelé après le chargement du modèle de ponctuation)"""
+        torch = sys.modules.get('torch')
+        if torch is None or not self.policy['enabled']:
+            return
+        torch_threads = self.policy['torch_threads']
+        torch.set_num_threads(torch_threads)
+        try:
+            torch.set_num_interop_threads(torch_threads)
+        except RuntimeError:
+            pass  # Déjà fixé après le premier calcul parallèle
+        self.thread_limits['torch'] = torch.get_num_threads()
+
+    # --- Affinité et priorité ---
+
+    def apply_process_layout(self):
+        """Garder le processus (et les threads créés ensuite) hors des coeurs du décodeur"""
+        if not self.policy['enabled']:
+            return
+        self._set_affinity(0, self.shared_cores)
+
+    def configure_thread(self, role, nice=None):
+        """Affecter le thread courant: 'decoder' (coeur dédié, prioritaire), 'dsp' ou 'background'"""
+        if not self.policy['enabled']:
+            return
+        if role == 'decoder':
+            cores = self.decoder_cores or self.shared_cores
+            nice = self.policy['decoder_nice'] if nice is None else nice
+        elif role == 'dsp':
+            # Traitement du signal du mode 'split': prioritaire, à côté du décodeur
+            cores = self.dsp_cores or self.shared_cores
+            nice = self.policy['decoder_nice'] if nice is None else nice
+        else:
+            cores = self.background_cores
+            nice = self.policy['background_nice'] if nice is None else nice
+
+        thread_id = threading.get_native_id()
+        notes = []
+        if not self._set_affinity(thread_id, cores):
+            notes.append('affinité inchangée')
+        try:
+            # Sous Linux, nice s'applique par thread
+            os.setpriority(os.PRIO_PROCESS, thread_id, nice)
+        except (AttributeError, OSError) as e:
+            notes.append(f"nice inchangé ({e.__class__.__name__})")
+            try:
+                nice = os.getpriority(os.PRIO_PROCESS, thread_id)
+            except (AttributeError, OSError):
+                nice = None
+
+        with self._lock:
+            self.layout[threading.current_thread().name] = {
+                'role': role,
+                'cores': cores,
+                'nice': nice,
+                'notes': notes
+            }
+
+    def run_background(self, func, *args, **kwargs):
+        """Exécuter une tâche ponctuelle (export...) dans un thread basse priorité et attendre son résultat"""
+        result = {}
+
+        def target():
+            self.configure_thread('background')
+            try:
+                result['value'] = func(*args, **kwargs)
+            except Exception as e:
+                result['error'] = e
+
+        thread = threading.Thread(target=target, name=f"background-{getattr(func, '__name__', 'task')}")
+        thread.start()
+        thread.join()
+        if 'error' in result:
+            raise result['error']
+        return result.get('value')
+
+    def _set_affinity(self, pid, cores):
+        try:
+            os.sched_setaffinity(pid, cores)
+            return True
+        except (AttributeError, OSError):
+            return False
+
+    # --- Rapport ---
+
+    def get_layout(self):
+        """Répartition effective"""
+        with self._lock:
+            threads = {name: dict(entry) for name, entry in self.layout.items()}
+        return {
+            'enabled': self.policy['enabled'],
+            'available_cores': self.available_cores,
+            'decoder_cores': self.decoder_cores,
+            'dsp_cores': self.dsp_cores,
+            'shared_cores': self.shared_cores,
+            'background_cores': self.background_cores,
+            'thread_limits': dict(self.thread_limits),
+            'threads': threads
+        }
+
+    def report(self):
+        """Afficher la répartition au démarrage"""
+        if not self.policy['enabled']:
+            print("🧮 Répartition des coeurs désactivée")
+            return
+        print(f"🧮 Coeurs disponibles: {self.available_cores}")
+        print(f"  Décodeur: {self.decoder_cores or 'pas de coeur dédié'} (nice {self.policy['decoder_nice']})")
+        if self.dsp_cores:
+            print(f"  Traitement du signal (mode split): {self.dsp_cores}")
+        print(f"  Interface/serveur: {self.shared_cores}")
+        print(f"  Tâches de fond: {self.background_cores} (nice {self.policy['background_nice']})")
+        print(f"  Threads BLAS: {self.policy['blas_threads']}, torch: {self.policy['torch_threads']}")
+
+
+# Instance globale
+_resource_instance = None
+
+
+def get_resource_manager(policy=None):
+    """Obtenir l'instance du gestionnaire de ressources"""
+    global _resource_instance
+    if _resource_instance is None:
+        _resource_instance = ResourceManager(policy or load_resource_policy())
+    return _resource_instance
+
+
+def apply_thread_limits():
+    """À appeler en tête des points d'entrée, avant tout import de numpy"""
+    manager = get_resource_manager()
+    manager.apply_thread_limits()
+    return manager
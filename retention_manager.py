@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+Module de rétention et de compaction de la base de données
+Suppression par lots en arrière-plan, vacuum incrémental, surveillance disque
+
+Conversion d'une base existante au vacuum incrémental (service arrêté, VACUUM complet):
+    python retention_manager.py --enable-incremental-vacuum
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+
+import psutil
+
+from app_config import load_section, section_defaults
+from archive_manager import get_archive, archive_old_transcriptions
+from resource_manager import get_resource_manager
+
+CONFIG_FILE = "config.json"
+
+# Valeurs par défaut, types et bornes: section "retention" de app_config.SECTIONS
+DEFAULT_RETENTION_POLICY = section_defaults('retention')
+
+
+def load_retention_policy(config_file=CONFIG_FILE):
+    """Politique de rétention (section "retention" de config.json, validée au chargement)"""
+    return load_section('retention', config_file)
+
+
+class RetentionManager:
+    """Nettoyage planifié de la base de données en arrière-plan"""
+
+    def __init__(self, db, policy=None, archive=None):
+        self.db = db
+        self.policy = dict(DEFAULT_RETENTION_POLICY)
+        self.policy.update(policy or {})
+
+        # Les lectures de la base s'étendent aux archives
+        self.archive = archive
+        if archive is not None:
+            db.attach_archive(archive)
+
+        self._thread = None
+        self._stop_event = threading.Event()
+        self._run_lock = threading.Lock()
+
+        # État du dernier passage
+        self.last_run = None
+        self.last_reason = None
+        self.last_deleted = 0
+        self.last_archived = 0
+        self.total_archived = 0
+        self.total_deleted = 0
+        self.run_count = 0
+
+    def start(self):
+        """Démarrer le thread de maintenance"""
+        if not self.policy['enabled'] or (self._thread and self._thread.is_alive()):
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._loop, name='retention', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Arrêter le thread de maintenance"""
+        self._stop_event.set()
+
+    def _loop(self):
+        """Boucle: nettoyage planifié + vérification régulière du disque"""
+        get_resource_manager().configure_thread('background')
+        if not self.db.incremental_vacuum_enabled():
+            print("⚠️  Vacuum incrémental inactif: l'espace libéré reste dans le fichier "
+                  "(conversion hors service: python retention_manager.py --enable-incremental-vacuum)")
+
+        next_scheduled = time.time()
+        while not self._stop_event.is_set():
+            if self._disk_pressure():
+                self.run_once(reason='disk_pressure')
+            elif time.time() >= next_scheduled:
+                self.run_once(reason='scheduled')
+                next_scheduled = time.time() + self.policy['interval_seconds']
+
+            self._stop_event.wait(self.policy['disk_check_interval'])
+
+    def _disk_pressure(self):
+        """Vrai si l'espace libre passe sous le seuil configuré"""
+        try:
+            free_mb = psutil.disk_usage(self.policy['disk_path']).free / 1024 / 1024
+        except OSError:
+            return False
+        return free_mb < self.policy['min_free_disk_mb']
+
+    def run_once(self, reason='manual'):
+        """Appliquer la politique de rétention puis compacter"""
+        if not self._run_lock.acquire(blocking=False):
+            return 0  # Un passage est déjà en cours
+
+        try:
+            policy = self.policy
+            batch = {'batch_size': policy['batch_size'], 'pause': policy['batch_pause']}
+            deleted = 0
+            archived = 0
+
+            # 0. Archiver les mois révolus hors de la base chaude
+            if self.archive is not None:
+                archived = archive_old_transcriptions(
+                    self.db, self.archive, policy['archive_after_days'], **batch
+                )
+
+            # 1. Âge maximum (base chaude et archives)
+            if policy['days']:
+                deleted += self.db.delete_old_transcriptions(policy['days'], **batch)
+                if self.archive is not None:
+                    cutoff = (datetime.utcnow() - timedelta(days=policy['days'])).strftime('%Y-%m-%d %H:%M:%S')
+                    deleted += self.archive.delete_segments_before(cutoff)
+
+            # 2. Nombre maximum de lignes dans la base chaude
+            if policy['max_rows']:
+                excess = self.db.get_total_count(include_archive=False) - policy['max_rows']
+                if excess > 0:
+                    deleted += self.db.delete_oldest_transcriptions(excess, **batch)
+
+            # 3. Taille maximum, puis 4. pression disque: supprimer les plus anciennes
+            # lot par lot en rendant l'espace au système entre chaque lot
+            while self._over_size_limit() or (reason == 'disk_pressure' and self._disk_pressure()):
+                if self.db.get_total_count(include_archive=False) <= policy['min_keep_rows']:
+                    break
+                used_before = self.db.get_used_bytes()
+                removed = self.db.delete_oldest_transcriptions(policy['batch_size'], **batch)
+                if removed == 0:
+                    break
+                deleted += removed
+                self._compact()
+                self.db.checkpoint()  # Le WAL grossit à chaque lot: le vider avant de mesurer
+                if self.db.get_used_bytes() >= used_before:
+                    break  # Suppression sans effet sur la taille: ne pas vider la base pour rien
+
+            self._compact()
+            if deleted > 0 or archived > 0:
+                self.db.optimize()
+
+            self.last_run = datetime.now().isoformat()
+            self.last_reason = reason
+            self.last_deleted = deleted
+            self.last_archived = archived
+            self.total_deleted += deleted
+            self.total_archived += archived
+            self.run_count += 1
+
+            if archived > 0:
+                print(f"📦 Rétention ({reason}): {archived} transcriptions archivées")
+            if deleted > 0:
+                print(f"🧹 Rétention ({reason}): {deleted} transcriptions supprimées")
+            return deleted
+
+        except Exception as e:
+            print(f"Erreur lors de la rétention: {e}")
+            return 0
+        finally:
+            self._run_lock.release()
+
+    def _over_size_limit(self):
+        """Vrai si les données de la base dépassent max_bytes (pages utilisées: ni WAL ni pages libres)"""
+        max_bytes = self.policy['max_bytes']
+        return bool(max_bytes) and self.db.get_used_bytes() > max_bytes
+
+    def _compact(self):
+        """Vacuum incrémental par petites passes"""
+        free_pages = self.db.get_free_pages()
+        while free_pages > 0 and not self._stop_event.is_set():
+            self.db.incremental_vacuum(self.policy['vacuum_pages'])
+            time.sleep(self.policy['batch_pause'])
+            remaining = self.db.get_free_pages()
+            if remaining >= free_pages:
+                break  # Vacuum incrémental inactif sur cette base
+            free_pages = remaining
+
+    def get_status(self):
+        """État du service de rétention"""
+        return {
+            'enabled': self.policy['enabled'],
+            'running': bool(self._thread and self._thread.is_alive()),
+            'last_run': self.last_run,
+            'last_reason': self.last_reason,
+            'last_deleted': self.last_deleted,
+            'total_deleted': self.total_deleted,
+            'last_archived': self.last_archived,
+            'total_archived': self.total_archived,
+            'run_count': self.run_count,
+            'database_bytes': self.db.get_database_size(),
+            'archive': self.archive.get_status() if self.archive is not None else None
+        }
+
+
+# Instance globale
+_retention_instance = None
+
+
+def get_retention_manager(db, policy=None):
+    """Obtenir l'instance du service de rétention"""
+    global _retention_instance
+    if _retention_instance is None:
+        policy = policy or load_retention_policy()
+        archive = get_archive(policy.get('archive_dir', 'archives')) if policy.get('archive_enabled', True) else None
+        _retention_instance = RetentionManager(db, policy, archive)
+    return _retention_instance
+
+
+def enable_incremental_vacuum(db):
+    """Conversion hors service: VACUUM complet (verrou exclusif, environ deux fois la taille en libre)"""
+    size = db.get_database_size()
+    free = psutil.disk_usage(os.path.dirname(os.path.abspath(db.db_path))).free
+    if free < 2 * size:
+        print(f"❌ Espace libre insuffisant: {free // 1024 // 1024} MB pour une base de {size // 1024 // 1024} MB")
+        return False
+    if db.enable_incremental_vacuum():
+        print("🧹 Vacuum incrémental activé")
+    else:
+        print("Vacuum incrémental déjà actif")
+    return True
+
+
+if __name__ == '__main__':
+    from database import get_database
+    if '--enable-incremental-vacuum' in sys.argv:
+        sys.exit(0 if enable_incremental_vacuum(get_database()) else 1)
+    print(json.dumps(get_retention_manager(get_database()).get_status(), indent=2, ensure_ascii=False))
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Anneau de messages en mémoire partagée (multiprocessing.shared_memory)
+Un seul écrivain et un seul lecteur, cases de taille fixe, sans copie via Pipe
+
+Disposition: en-tête de 64 octets (compteurs écrits / lus / perdus), puis les cases
+(4 octets de longueur + contenu). Le contenu d'une case est écrit hors verrou (la case
+appartient à l'écrivain tant que le compteur d'écriture ne l'a pas dépassée); la longueur
+et les compteurs sont publiés et relus sous un verrou partagé entre processus. Le verrou
+sert de barrière mémoire (le contenu est visible avant le compteur, y compris sur ARM) et
+évite de lire un compteur de 8 octets à moitié écrit sur une plateforme 32 bits.
+Le verrou ne se transmet qu'au lancement du processus: passer ring.handle et s'attacher
+avec ShmRing.attach(handle).
+"""
+
+import multiprocessing
+import struct
+from multiprocessing import shared_memory
+
+HEADER_SIZE = 64
+SLOT_HEADER = struct.Struct('<I')
+COUNTER = struct.Struct('<Q')
+HEAD_OFFSET, TAIL_OFFSET, DROPPED_OFFSET = 0, 8, 16
+
+
+class ShmRing:
+    """File circulaire SPSC en mémoire partagée (messages perdus si la file est pleine)"""
+
+    def __init__(self, name=None, slots=256, slot_size=512, create=False, lock=None, context=None):
+        if create:
+            self.lock = lock if lock is not None else (context or multiprocessing).Lock()
+            size = HEADER_SIZE + slots * (SLOT_HEADER.size + slot_size)
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+            self.shm.buf[:HEADER_SIZE] = bytes(HEADER_SIZE)
+            # Géométrie recopiée dans l'en-tête pour le processus qui s'attache
+            struct.pack_into('<II', self.shm.buf, 24, slots, slot_size)
+        else:
+            if lock is None:
+                raise ValueError("s'attacher à un anneau demande son verrou (ShmRing.attach(ring.handle))")
+            self.lock = lock
+            self.shm = shared_memory.SharedMemory(name=name)
+            slots, slot_size = struct.unpack_from('<II', self.shm.buf, 24)
+        self.name = self.shm.name
+        self.slots = slots
+        self.slot_size = slot_size
+        self.owner = create
+        self._stride = SLOT_HEADER.size + slot_size
+
+    @classmethod
+    def attach(cls, handle):
+        """S'attacher depuis un autre processus à partir de ring.handle"""
+        name, lock = handle
+        return cls(name, lock=lock)
+
+    @property
+    def handle(self):
+        """(nom, verrou) à passer en argument du processus qui s'attache"""
+        return self.name, self.lock
+
+    def _counter(self, offset):
+        return COUNTER.unpack_from(self.shm.buf, offset)[0]
+
+    def _set_counter(self, offset, value):
+        COUNTER.pack_into(self.shm.buf, offset, value)
+
+    def _slot_offset(self, index):
+        return HEADER_SIZE + (index % self.slots) * self._stride
+
+    # --- Écrivain ---
+
+    def reserve(self):
+        """Case libre à remplir sur place (memoryview), None si la file est pleine"""
+        with self.lock:
+            head = self._counter(HEAD_OFFSET)
+            if head - self._counter(TAIL_OFFSET) >= self.slots:
+                self._set_counter(DROPPED_OFFSET, self._counter(DROPPED_OFFSET) + 1)
+                return None
+        start = self._slot_offset(head) + SLOT_HEADER.size
+        return self.shm.buf[start:start + self.slot_size]
+
+    def commit(self, length):
+        """Publier la case réservée (length octets utiles)"""
+        with self.lock:
+            head = self._counter(HEAD_OFFSET)
+            SLOT_HEADER.pack_into(self.shm.buf, self._slot_offset(head), length)
+            self._set_counter(HEAD_OFFSET, head + 1)
+
+    def write(self, data):
+        """Copier un message dans la prochaine case (False si perdu)"""
+        if len(data) > self.slot_size:
+            raise ValueError(f"message de {len(data)} octets > case de {self.slot_size}")
+        slot = self.reserve()
+        if slot is None:
+            return False
+        slot[:len(data)] = data
+        slot.release()
+        self.commit(len(data))
+        return True
+
+    # --- Lecteur ---
+
+    def peek(self):
+        """Prochain message sans copie (memoryview), None si vide; appeler release() ensuite"""
+        with self.lock:
+            tail = self._counter(TAIL_OFFSET)
+            if tail == self._counter(HEAD_OFFSET):
+                return None
+            offset = self._slot_offset(tail)
+            length = SLOT_HEADER.unpack_from(self.shm.buf, offset)[0]
+        start = offset + SLOT_HEADER.size
+        return self.shm.buf[start:start + length]
+
+    def release(self):
+        """Libérer la case lue par peek()"""
+        with self.lock:
+            self._set_counter(TAIL_OFFSET, self._counter(TAIL_OFFSET) + 1)
+
+    def read(self):
+        """Prochain message (copie en bytes), None si vide"""
+        view = self.peek()
+        if view is None:
+            return None
+        data = bytes(view)
+        view.release()
+        self.release()
+        return data
+
+    # --- État ---
+
+    def __len__(self):
+        with self.lock:
+            return self._counter(HEAD_OFFSET) - self._counter(TAIL_OFFSET)
+
+    @property
+    def dropped(self):
+        with self.lock:
+            return self._counter(DROPPED_OFFSET)
+
+    def get_status(self):
+        with self.lock:
+            head, tail, dropped = (self._counter(offset) for offset in (HEAD_OFFSET, TAIL_OFFSET, DROPPED_OFFSET))
+        return {
+            'name': self.name,
+            'slots': self.slots,
+            'slot_size': self.slot_size,
+            'pending': head - tail,
+            'written': head,
+            'dropped': dropped
+        }
+
+    def close(self):
+        """Détacher (et supprimer le segment si on l'a créé)"""
+        try:
+            self.shm.close()
+            if self.owner:
+                self.shm.unlink()
+        except (BufferError, FileNotFoundError):
+            pass
@@ -0,0 +1,333 @@
+#!/usr/bin/env python3
+"""
+Pipeline réparti sur deux processus (option engine_mode='split')
+- Traitement du signal: capture, niveau, VAD et réduction de bruit
+- Décodeur: Vosk, détection rapide, ponctuation, base de données
+Les blocs passent de l'un à l'autre par un anneau en mémoire partagée: écrits une seule fois
+dans la case par le processus de traitement, lus sur place (memoryview) par le décodeur.
+Chaque processus mesure son utilisation CPU et la rapporte dans ses battements.
+"""
+
+import os
+import queue
+import signal
+import struct
+import threading
+import time
+
+from app_config import MAX_BLOCK_SIZE
+from engine_process import (
+    EngineProcess, CpuMeter, HEARTBEAT_INTERVAL, LEVEL, LEVEL_EVENT, PARTIAL_EVENT,
+    load_worker_model, model_heartbeat, reset_inherited_state
+)
+from shm_ring import ShmRing
+
+SAMPLE_RATE = 16000
+BLOCK_SIZE = 960
+AUDIO_RING_SLOTS = 64  # ~3,8 s d'audio en blocs de 60 ms (cases dimensionnées pour MAX_BLOCK_SIZE)
+MAX_CAPTURE_QUEUE = 10
+
+# Bloc transmis au décodeur: en-tête puis audio brut, puis audio débruité (si différent)
+BLOCK_HEADER = struct.Struct('<cB2xdqIfdd')
+DECODE_BLOCK = b'D'    # Bloc de parole à décoder
+ENDPOINT_BLOCK = b'E'  # Fin d'énoncé détectée par le VAD: forcer le résultat final
+HAS_DENOISED = 1
+
+
+def _dsp_main(config, sample_rate, block_size, audio_ring_handle, level_ring_handle, conn):
+    """Point d'entrée du processus de traitement du signal"""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # Ctrl+C géré par le processus principal
+    reset_inherited_state()
+
+    import sounddevice as sd
+    from audio_resampler import capture_device, negotiate_capture
+    from recognition_engine import AudioFrontEnd, Rechunker, CONFIG_APPLY_MAX_DELAY
+    from resource_manager import get_resource_manager
+
+    audio_ring = ShmRing.attach(audio_ring_handle)
+    level_ring = ShmRing.attach(level_ring_handle)
+    overrides = {}
+    front_end = AudioFrontEnd(config, sample_rate,
+                              is_enabled=lambda key: front_end.config.get(key, True) and overrides.get(key, True))
+    rechunker = Rechunker(block_size)
+    pending_config = None
+    pending_since = 0.0
+    capture_queue = queue.Queue()
+
+    def audio_callback(indata, frames, time_info, status):
+        if status:
+            print(f"Statut audio: {status}")
+        if capture_queue.qsize() > MAX_CAPTURE_QUEUE:
+            try:
+                capture_queue.get_nowait()  # Supprimer le plus ancien
+            except queue.Empty:
+                pass
+        capture_queue.put((bytes(indata), time.monotonic()))
+
+    def publish(kind, data, denoised, block_start, audio_level, captured_at):
+        """Écrire le bloc directement dans la case de l'anneau (perdu si le décodeur est saturé)"""
+        slot = audio_ring.reserve()
+        if slot is None:
+            return
+        n_bytes = len(data)
+        flags = HAS_DENOISED if denoised is not data and len(denoised) == n_bytes else 0
+        BLOCK_HEADER.pack_into(slot, 0, kind, flags, captured_at, block_start, n_bytes, audio_level,
+                               front_end.speech_end_at or 0.0, front_end.last_speech_time)
+        offset = BLOCK_HEADER.size
+        slot[offset:offset + n_bytes] = data
+        if flags:
+            slot[offset + n_bytes:offset + 2 * n_bytes] = denoised
+            n_bytes *= 2
+        slot.release()
+        audio_ring.commit(BLOCK_HEADER.size + n_bytes)
+
+    get_resource_manager().configure_thread('dsp')
+    conn.send(('ready', os.getpid()))
+
+    stream = None
+    capture = None
+    session_samples = 0
+    busy_seconds = 0.0
+    processed_audio_seconds = 0.0
+    cpu_meter = CpuMeter()
+    next_heartbeat = 0.0
+    while True:
+        while conn.poll():
+            command, argument = conn.recv()
+            if command == 'start' and stream is None:
+                # Début de session: point sûr pour la configuration en attente
+                if pending_config is not None:
+                    front_end.apply_config(pending_config)
+                    block_size = pending_config.get('audio', {}).get('block_size', block_size)
+                    pending_config = None
+                rechunker = Rechunker(block_size)
+                # Micro ouvert à sa fréquence et ses canaux natifs, converti ici (pas par ALSA)
+                device = capture_device(front_end.config.get('audio'))
+                capture = negotiate_capture(sample_rate, front_end.config.get('audio'), device=device)
+                stream = sd.RawInputStream(device=device, samplerate=capture.capture_rate,
+                                           blocksize=capture.capture_blocksize(block_size), dtype='int16',
+                                           channels=capture.channels, callback=audio_callback)
+                stream.start()
+                session_samples = 0
+                conn.send(('started', True))
+                print(f"🎤 Capture et traitement du signal démarrés (processus séparé, {capture.describe()})")
+            elif command in ('stop', 'shutdown') and stream is not None:
+                stream.stop()
+                stream.close()
+                stream = None
+            elif command == 'config':
+                if pending_config is None:
+                    pending_since = time.monotonic()
+                pending_config = argument  # Appliqué entre deux blocs (entre deux énoncés si possible)
+            elif command == 'overrides':
+                overrides.clear()
+                overrides.update(argument)
+            elif command == 'vad':
+                front_end.vad.set_aggressiveness(argument)
+            if command == 'shutdown':
+                audio_ring.close()
+                level_ring.close()
+                return
+
+        try:
+            data, captured_at = capture_queue.get(timeout=HEARTBEAT_INTERVAL / 4)
+        except queue.Empty:
+            data = None
+
+        if data is not None:
+            started = time.perf_counter()
+            data = capture.convert(data)
+            busy_seconds += time.perf_counter() - started
+        blocks = rechunker.push(data, captured_at) if data is not None else ()
+        for data, captured_at in blocks:
+            if pending_config is not None and (not front_end.fed_since_endpoint or
+                                               time.monotonic() - pending_since >= CONFIG_APPLY_MAX_DELAY):
+                # Taille de bloc: seul le redécoupage change, le flux audio reste ouvert
+                front_end.apply_config(pending_config)
+                rechunker.set_block_size(pending_config.get('audio', {}).get('block_size', block_size))
+                pending_config = None
+
+            block_start = session_samples
+            n_samples = len(data) // 2
+            session_samples += n_samples
+            started = time.perf_counter()
+            audio_level, action = front_end.analyze(data, captured_at)
+            level_ring.write(LEVEL_EVENT + LEVEL.pack(audio_level))
+            if action == 'endpoint':
+                publish(ENDPOINT_BLOCK, b'', b'', block_start, audio_level, captured_at)
+            elif action == 'decode':
+                publish(DECODE_BLOCK, data, front_end.denoise(data), block_start, audio_level, captured_at)
+            busy_seconds += time.perf_counter() - started
+            processed_audio_seconds += n_samples / sample_rate
+
+        now = time.monotonic()
+        if now >= next_heartbeat:
+            next_heartbeat = now + HEARTBEAT_INTERVAL
+            conn.send(('heartbeat', {
+                'queue_depth': capture_queue.qsize() + len(audio_ring),
+                'last_speech_time': front_end.last_speech_time,
+                'speech_counters': (front_end.analyzed_seconds, front_end.speech_seconds),
+                'cpu_percent': cpu_meter.sample(),
+                'busy_seconds': round(busy_seconds, 3),
+                'rtf': round(busy_seconds / processed_audio_seconds, 3) if processed_audio_seconds else 0.0,
+                'ring_dropped': audio_ring.dropped
+            }))
+
+
+def _decoder_main(config, model_path, audio_ring_handle, partial_ring_handle, conn):
+    """Point d'entrée du processus décodeur"""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    reset_inherited_state()
+
+    import json
+    from recognition_engine import RecognitionEngine
+
+    audio_ring = ShmRing.attach(audio_ring_handle)
+    partial_ring = ShmRing.attach(partial_ring_handle)
+    send_lock = threading.Lock()
+
+    def send(message):
+        with send_lock:
+            conn.send(message)
+
+    def on_partial(text):
+        data = text.encode('utf-8')[:partial_ring.slot_size - 1]
+        partial_ring.write(PARTIAL_EVENT + data)
+
+    manager = load_worker_model(model_path)
+    if manager.model is None:
+        os._exit(1)
+    engine = RecognitionEngine(config, model_manager=manager)
+    engine.on_partial = on_partial
+    engine.on_final = lambda result: send(('final', result))
+    engine.on_emergency = lambda alert: send(('emergency', alert))
+    send(('ready', os.getpid()))
+
+    front_end = engine.front_end
+    rec = None
+    cpu_meter = CpuMeter()
+    next_heartbeat = 0.0
+    while True:
+        # Attente courte: les blocs arrivent toutes les 60 ms
+        if conn.poll(0 if len(audio_ring) else 0.005):
+            command, argument = conn.recv()
+            if command == 'start':
+                if rec is None:
+                    rec = engine._begin_session()
+                    engine.is_running = True
+                send(('started', True))
+            elif command in ('stop', 'shutdown') and rec is not None:
+                engine._end_session()
+                engine.is_running = False
+                rec = None
+            elif command == 'config':
+                engine.update_config(argument)
+            elif command == 'overrides':
+                engine.quality_overrides = argument
+            elif command == 'model':
+                engine.swap_model(argument)
+            if command == 'shutdown':
+                break
+
+        view = audio_ring.peek()
+        if view is not None:
+            kind, flags, captured_at, block_start, n_bytes, audio_level, speech_end_at, last_speech = \
+                BLOCK_HEADER.unpack_from(view, 0)
+            started = time.perf_counter()
+            try:
+                # Instants mesurés par le processus de traitement (latence de fin d'énoncé)
+                front_end.speech_end_at = speech_end_at or None
+                front_end.last_speech_time = last_speech
+                if rec is None:
+                    pass  # Bloc d'une session arrêtée
+                elif kind == ENDPOINT_BLOCK:
+                    engine._handle_final(json.loads(rec.FinalResult()), audio_level, 'vad')
+                else:
+                    # Nouveau modèle, reconnaisseur recyclé, nouvelle configuration: entre deux énoncés
+                    rec = engine._maybe_swap_model(rec)
+                    rec = engine._maybe_recycle_recognizer(rec)
+                    engine._apply_pending_config()
+                    front_end.fed_since_endpoint = True
+                    offset = BLOCK_HEADER.size
+                    raw = view[offset:offset + n_bytes]
+                    data = view[offset + n_bytes:offset + 2 * n_bytes] if flags & HAS_DENOISED else raw
+                    try:
+                        engine._decode_block(rec, raw, data, block_start, audio_level, captured_at)
+                    finally:
+                        data.release()
+                        raw.release()
+                    engine.processed_audio_seconds += n_bytes / 2 / engine.sample_rate
+            finally:
+                view.release()
+                audio_ring.release()
+                engine.busy_seconds += time.perf_counter() - started
+
+        now = time.monotonic()
+        if now >= next_heartbeat:
+            next_heartbeat = now + HEARTBEAT_INTERVAL
+            processed = engine.processed_audio_seconds
+            send(('heartbeat', {
+                'busy_seconds': engine.busy_seconds,
+                'processed_audio_seconds': processed,
+                'rtf': round(engine.busy_seconds / processed, 3) if processed else 0.0,
+                'session_id': engine.session_id,
+                'latency': engine.stats.get_latency_stats(),
+                'model': model_heartbeat(manager),
+                'recognizer': engine.get_recognizer_status(),
+                'memory': engine.memory_estimates(),
+                'cpu_percent': cpu_meter.sample()
+            }))
+
+    audio_ring.close()
+    partial_ring.close()
+
+
+class SplitEngineProcess(EngineProcess):
+    """Traitement du signal et décodage dans deux processus supervisés ensemble"""
+
+    mode = 'split'
+
+    def __init__(self, config, model_path, sample_rate=SAMPLE_RATE, block_size=BLOCK_SIZE,
+                 audio_slots=AUDIO_RING_SLOTS, **kwargs):
+        super().__init__(config, model_path, **kwargs)
+        audio = config.get('audio', {})
+        self.sample_rate = audio.get('sample_rate', sample_rate)
+        self.block_size = audio.get('block_size', block_size)
+        self.audio_slots = audio_slots
+        self._audio_ring = None
+
+    def _spawn(self):
+        """Anneau audio (traitement -> décodeur) et anneaux d'événements (-> interface)"""
+        # Cases à la taille maximale: un profil peut agrandir les blocs sans recréer l'anneau
+        block_bytes = max(self.block_size, MAX_BLOCK_SIZE) * 2
+        self._audio_ring = ShmRing(slots=self.audio_slots, slot_size=BLOCK_HEADER.size + 2 * block_bytes,
+                                   create=True, context=self.context)
+        level_ring = ShmRing(slots=self.ring_slots, slot_size=LEVEL.size + 1, create=True, context=self.context)
+        partial_ring = ShmRing(slots=self.ring_slots, slot_size=self.ring_slot_size, create=True,
+                               context=self.context)
+        self._ring = partial_ring
+        self._event_rings = [level_ring, partial_ring]
+
+        # Décodeur d'abord: le traitement du signal ne capture qu'une fois le modèle chargé
+        if not self._spawn_worker('decoder', _decoder_main,
+                                  (self.config, self.model_path, self._audio_ring.handle, partial_ring.handle),
+                                  commands=('start', 'stop', 'config', 'overrides', 'model', 'shutdown')):
+            return False
+        return self._spawn_worker('dsp', _dsp_main,
+                                  (self.config, self.sample_rate, self.block_size,
+                                   self._audio_ring.handle, level_ring.handle),
+                                  commands=('start', 'stop', 'config', 'overrides', 'vad', 'shutdown'),
+                                  timeout=30.0)
+
+    def _close_rings(self):
+        super()._close_rings()
+        if self._audio_ring is not None:
+            self._audio_ring.close()
+            self._audio_ring = None
+
+    def get_status(self):
+        status = super().get_status()
+        ring = self._audio_ring
+        status['audio_ring'] = ring.get_status() if ring is not None else None
+        return status
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Module de suivi du démarrage
+Instant de chaque phase (imports, modèle, micro, flux audio, premier mot), profil des imports
+et événements de disponibilité (remplacent les attentes fixes)
+
+À importer en premier par les points d'entrée: l'origine des temps est l'import de ce module.
+"""
+
+import builtins
+import sys
+import threading
+import time
+
+PROCESS_START = time.monotonic()
+AUDIO_DEVICE_TIMEOUT = 60.0  # Micro USB parfois détecté tardivement au démarrage du Pi
+AUDIO_DEVICE_RETRY = 0.5
+
+
+class StartupMonitor:
+    """Phases du démarrage et profil des imports"""
+
+    def __init__(self, started=PROCESS_START):
+        self.started = started
+        self.phases = {}     # Nom -> secondes depuis le lancement (premier passage)
+        self.imports = {}    # Module -> secondes (premier import, sous-modules inclus)
+        self._events = {}
+        self._lock = threading.Lock()
+        self._original_import = None
+
+    # --- Phases et disponibilité ---
+
+    def _event(self, name):
+        with self._lock:
+            if name not in self._events:
+                self._events[name] = threading.Event()
+            return self._events[name]
+
+    def mark(self, name):
+        """Phase atteinte (seul le premier passage compte), réveille les attentes"""
+        with self._lock:
+            if name in self.phases:
+                return
+            self.phases[name] = round(time.monotonic() - self.started, 3)
+        self._event(name).set()
+
+    def is_ready(self, name):
+        return name in self.phases
+
+    def wait_for(self, *names, timeout=None):
+        """Attendre plusieurs phases (False si le délai expire)"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for name in names:
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            if not self._event(name).wait(remaining):
+                return False
+        return True
+
+    def probe_audio_device(self, timeout=AUDIO_DEVICE_TIMEOUT):
+        """Chercher un micro en arrière-plan, phase 'audio_device' dès qu'il répond"""
+        def probe():
+            import sounddevice as sd
+            deadline = time.monotonic() + timeout
+            while time.monotonic() < deadline:
+                try:
+                    sd.query_devices(kind='input')
+                    self.mark('audio_device')
+                    return
+                except Exception:
+                    time.sleep(AUDIO_DEVICE_RETRY)
+            print("⚠️  Aucun micro détecté au démarrage")
+
+        threading.Thread(target=probe, name='audio-device-probe', daemon=True).start()
+
+    # --- Profil des imports ---
+
+    def start_import_profile(self):
+        """Mesurer la durée du premier import de chaque module (jusqu'à stop_import_profile)"""
+        if self._original_import is not None:
+            return
+        original = self._original_import = builtins.__import__
+        imports = self.imports
+
+        def timed_import(name, globals=None, locals=None, fromlist=(), level=0):
+            if level or name in sys.modules:
+                return original(name, globals, locals, fromlist, level)
+            started = time.perf_counter()
+            try:
+                return original(name, globals, locals, fromlist, level)
+            finally:
+                imports.setdefault(name, time.perf_counter() - started)
+
+        builtins.__import__ = timed_import
+
+    def stop_import_profile(self):
+        if self._original_import is not None:
+            builtins.__import__ = self._original_import
+            self._original_import = None
+
+    def slowest_imports(self, count=10):
+        ranked = sorted(self.imports.items(), key=lambda item: item[1], reverse=True)[:count]
+        return [{'module': name, 'seconds': round(seconds, 3)} for name, seconds in ranked]
+
+    # --- Rapport ---
+
+    def get_report(self):
+        """Phases (secondes depuis le lancement) et imports les plus lents"""
+        with self._lock:
+            phases = dict(sorted(self.phases.items(), key=lambda item: item[1]))
+        return {
+            'uptime_seconds': round(time.monotonic() - self.started, 1),
+            'phases': phases,
+            'slowest_imports': self.slowest_imports(),
+            'profiled_imports': len(self.imports)
+        }
+
+    def report(self):
+        """Afficher le déroulement du démarrage"""
+        report = self.get_report()
+        print("⏱️  Démarrage:")
+        for name, seconds in report['phases'].items():
+            print(f"  {name}: {seconds:.2f}s")
+        if report['slowest_imports']:
+            slowest = ', '.join(f"{i['module']} {i['seconds']:.2f}s" for i in report['slowest_imports'][:5])
+            print(f"  Imports les plus lents (sous-modules inclus): {slowest}")
+
+
+# Instance globale
+_startup_instance = None
+
+
+def get_startup_monitor():
+    """Obtenir l'instance du suivi du démarrage"""
+    global _startup_instance
+    if _startup_instance is None:
+        _startup_instance = StartupMonitor()
+    return _startup_instance
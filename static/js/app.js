@@ -7,6 +7,20 @@ let autoClearDelay = 30; // en secondes
 let autoClearTimer = null;
 let lastActivityTime = Date.now();
 
+// Rendu groupé (une mise à jour du DOM par image, rien quand l'onglet est caché)
+const MAX_HISTORY_ITEMS = 100;   // Entrées gardées dans le DOM
+const HISTORY_TRIM_BATCH = 20;   // Entrées retirées d'un coup au-delà du maximum
+const HISTORY_PAGE_SIZE = 30;    // Entrées plus anciennes chargées depuis /history au défilement
+let pendingPartial = null;       // Dernier texte partiel reçu (les précédents sont ignorés)
+let pendingFinals = [];          // Résultats finals à ajouter au prochain rendu
+let renderScheduled = false;
+let loadingOlder = false;
+let noOlderHistory = false;
+
+// Historique des mesures (/metrics), rafraîchi seulement quand les paramètres sont ouverts
+const CHART_REFRESH_MS = 10000;
+let chartTimer = null;
+
 // Éléments DOM
 const currentText = document.getElementById('currentText');
 const historyDiv = document.getElementById('transcriptionHistory');
@@ -21,6 +35,9 @@ const themeToggle = document.getElementById('themeToggle');
 const autoScrollCheckbox = document.getElementById('autoScroll');
 const autoClearDelaySelect = document.getElementById('autoClearDelay');
 const manualClearBtn = document.getElementById('manualClearBtn');
+const chartMetricSelect = document.getElementById('chartMetric');
+const chartRangeSelect = document.getElementById('chartRange');
+const metricsCanvas = document.getElementById('metricsChart');
 
 // Initialisation
 document.addEventListener('DOMContentLoaded', () => {
@@ -56,13 +73,31 @@ function initSocket() {
         if (data.final) {
             // Texte final
             if (data.text.trim()) {
-                addToHistory(data.text);
-                currentText.textContent = '';
+                pendingFinals.push(data);
+                // Onglet caché longtemps: ne garder que ce qui sera affiché
+                if (pendingFinals.length > MAX_HISTORY_ITEMS) {
+                    pendingFinals.splice(0, pendingFinals.length - MAX_HISTORY_ITEMS);
+                }
+                pendingPartial = '';
             }
         } else {
             // Texte en cours (partiel)
-            currentText.textContent = data.text;
+            pendingPartial = data.text;
         }
+        scheduleRender();
+    });
+
+    socket.on('emergency_alert', (data) => {
+        // Alerte rapide: flash visuel sans attendre le résultat final
+        console.warn('Urgence détectée:', data.keywords);
+        currentText.classList.remove('emergency-flash');
+        void currentText.offsetWidth; // Relancer l'animation
+        currentText.classList.add('emergency-flash');
+    });
+
+    socket.on('quality_tier', (data) => {
+        // Régulateur de qualité: étapes coûteuses coupées ou rétablies selon la charge
+        console.info(`Qualité: ${data.from} -> ${data.to} (${data.reason})`);
     });
 
     socket.on('recording_started', () => {
@@ -95,16 +130,19 @@ function initSocket() {
 
 // Événements des boutons
 function setupEventListeners() {
-    settingsBtn.addEventListener('click', () => settingsModal.style.display = 'block');
-    closeModal.addEventListener('click', () => settingsModal.style.display = 'none');
+    settingsBtn.addEventListener('click', openSettings);
+    closeModal.addEventListener('click', closeSettings);
 
     // Fermer le modal en cliquant en dehors
     window.addEventListener('click', (e) => {
         if (e.target === settingsModal) {
-            settingsModal.style.display = 'none';
+            closeSettings();
         }
     });
 
+    chartMetricSelect.addEventListener('change', loadMetricsChart);
+    chartRangeSelect.addEventListener('change', loadMetricsChart);
+
     // Paramètres
     fontSizeSlider.addEventListener('input', (e) => {
         const size = e.target.value;
@@ -130,8 +168,172 @@ function setupEventListeners() {
 
     manualClearBtn.addEventListener('click', () => {
         clearHistory();
-        settingsModal.style.display = 'none';
+        closeSettings();
     });
+
+    // Entrées plus anciennes chargées à la demande en bas de la liste
+    historyDiv.addEventListener('scroll', () => {
+        const nearBottom = historyDiv.scrollTop + historyDiv.clientHeight >= historyDiv.scrollHeight - 200;
+        if (nearBottom) {
+            loadOlderHistory();
+        }
+    }, { passive: true });
+}
+
+function openSettings() {
+    settingsModal.style.display = 'block';
+    loadMetricsChart();
+    chartTimer = setInterval(loadMetricsChart, CHART_REFRESH_MS);
+}
+
+function closeSettings() {
+    settingsModal.style.display = 'none';
+    clearInterval(chartTimer);
+    chartTimer = null;
+}
+
+// Historique des mesures
+async function loadMetricsChart() {
+    const metric = chartMetricSelect.value;
+    const points = Math.floor(metricsCanvas.width / 2);
+    try {
+        const response = await fetch(`/metrics?metrics=${metric}&range=${chartRangeSelect.value}&points=${points}`);
+        const data = await response.json();
+        drawMetricsChart(data.series[metric], data.resolution);
+    } catch (error) {
+        console.error('Erreur de chargement des mesures:', error);
+    }
+}
+
+function drawMetricsChart(series, resolution) {
+    const ctx = metricsCanvas.getContext('2d');
+    const width = metricsCanvas.width;
+    const height = metricsCanvas.height;
+    const margin = 16;
+    const style = getComputedStyle(document.body);
+    ctx.clearRect(0, 0, width, height);
+    ctx.font = '12px sans-serif';
+    ctx.fillStyle = style.color;
+
+    const present = series.max.filter((value) => value !== null);
+    if (!present.length) {
+        ctx.fillText('Pas encore de mesures', margin, height / 2);
+        return;
+    }
+    const top = Math.max(...present) || 1;
+    const count = Math.max(1, series.mean.length - 1);
+
+    // Segments continus seulement (pas de ligne à travers les intervalles sans mesure)
+    function drawLine(values, color, lineWidth) {
+        ctx.strokeStyle = color;
+        ctx.lineWidth = lineWidth;
+        ctx.beginPath();
+        let drawing = false;
+        values.forEach((value, i) => {
+            if (value === null) {
+                drawing = false;
+                return;
+            }
+            const x = i * (width - 1) / count;
+            const y = height - margin - value / top * (height - 2 * margin);
+            if (drawing) {
+                ctx.lineTo(x, y);
+            } else {
+                ctx.moveTo(x, y);
+                drawing = true;
+            }
+        });
+        ctx.stroke();
+    }
+
+    drawLine(series.max, '#F4B183', 1);
+    drawLine(series.mean, '#2E75B6', 2);
+    const step = resolution < 60 ? `${resolution} s` : resolution < 3600 ? `${resolution / 60} min` : `${resolution / 3600} h`;
+    ctx.fillText(`max ${top}`, 4, 12);
+    ctx.fillText(`pas: ${step}`, width - ctx.measureText(`pas: ${step}`).width - 4, 12);
+}
+
+// Rendu groupé
+function scheduleRender() {
+    if (renderScheduled || document.hidden) {
+        return; // Rendu au retour de l'onglet (visibilitychange)
+    }
+    renderScheduled = true;
+    requestAnimationFrame(render);
+}
+
+function render() {
+    renderScheduled = false;
+    if (document.hidden) {
+        return;
+    }
+
+    if (pendingFinals.length) {
+        // Un seul fragment inséré pour tous les résultats de l'image
+        const fragment = document.createDocumentFragment();
+        for (let i = pendingFinals.length - 1; i >= 0; i--) {
+            const data = pendingFinals[i];
+            fragment.appendChild(createHistoryItem(data.text, new Date(), data.id));
+        }
+        pendingFinals = [];
+        historyDiv.insertBefore(fragment, historyDiv.firstChild);
+        trimHistory();
+
+        // Défilement automatique vers le haut
+        if (autoScroll) {
+            historyDiv.scrollTop = 0;
+        }
+    }
+
+    if (pendingPartial !== null) {
+        currentText.textContent = pendingPartial;
+        pendingPartial = null;
+    }
+}
+
+function trimHistory() {
+    // Ne pas retirer ce que l'utilisateur est en train de relire plus bas
+    if (historyDiv.scrollTop > 0 && !autoScroll) {
+        return;
+    }
+    const count = historyDiv.childElementCount;
+    if (count <= MAX_HISTORY_ITEMS) {
+        return;
+    }
+    const keep = MAX_HISTORY_ITEMS - HISTORY_TRIM_BATCH;
+    for (let i = count; i > keep; i--) {
+        historyDiv.lastElementChild.remove();
+    }
+    noOlderHistory = false;
+}
+
+async function loadOlderHistory() {
+    if (loadingOlder || noOlderHistory) {
+        return;
+    }
+    const oldest = historyDiv.lastElementChild;
+    if (!oldest || !oldest.dataset.id) {
+        return;
+    }
+    loadingOlder = true;
+    try {
+        const response = await fetch(`/history?limit=${HISTORY_PAGE_SIZE}&before_id=${oldest.dataset.id}`);
+        const rows = await response.json();
+        if (rows.length < HISTORY_PAGE_SIZE) {
+            noOlderHistory = true;
+        }
+        const fragment = document.createDocumentFragment();
+        for (const row of rows) {
+            // Horodatage SQLite (CURRENT_TIMESTAMP) en UTC
+            const date = new Date(row.timestamp.replace(' ', 'T') + 'Z');
+            fragment.appendChild(createHistoryItem(row.text, date, row.id));
+        }
+        historyDiv.appendChild(fragment);
+    } catch (error) {
+        console.error('Erreur de chargement de l\'historique:', error);
+    } finally {
+        loadingOlder = false;
+    }
 }
 
 // Auto-effacement
@@ -170,16 +372,22 @@ function clearHistory(silent = false) {
     if (silent || confirm('Voulez-vous effacer tout l\'historique ?')) {
         historyDiv.innerHTML = '';
         currentText.textContent = '';
+        pendingFinals = [];
+        pendingPartial = null;
+        noOlderHistory = true; // Effacé volontairement: ne pas recharger les anciennes entrées
         resetAutoClearTimer();
     }
 }
 
-function addToHistory(text) {
+function createHistoryItem(text, date, id) {
     const p = document.createElement('p');
     p.textContent = text;
+    if (id !== undefined && id !== null) {
+        p.dataset.id = id;
+    }
 
     // Ajouter l'heure
-    const timestamp = new Date().toLocaleTimeString('fr-FR', {
+    const timestamp = date.toLocaleTimeString('fr-FR', {
         hour: '2-digit',
         minute: '2-digit'
     });
@@ -189,17 +397,7 @@ function addToHistory(text) {
     timeSpan.style.marginLeft = '10px';
     timeSpan.textContent = `[${timestamp}]`;
     p.appendChild(timeSpan);
-
-    // Ajouter en HAUT de l'historique (texte le plus récent en premier)
-    historyDiv.insertBefore(p, historyDiv.firstChild);
-
-    // Défilement automatique vers le haut
-    if (autoScroll) {
-        historyDiv.scrollTop = 0;
-    }
-
-    // Réinitialiser le timer d'auto-effacement
-    resetAutoClearTimer();
+    return p;
 }
 
 function updateStatus(text, active) {
@@ -278,6 +476,10 @@ async function checkStatus() {
 // Détection d'inactivité de la page (optionnel)
 // Redémarrer la reconnaissance si la page reprend le focus
 document.addEventListener('visibilitychange', () => {
+    if (!document.hidden) {
+        // Afficher d'un coup ce qui est arrivé pendant que l'onglet était caché
+        scheduleRender();
+    }
     if (!document.hidden && !isRecording) {
         console.log('Page redevenue visible, redémarrage de la reconnaissance');
         setTimeout(() => {
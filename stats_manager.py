@@ -28,6 +28,14 @@ class StatsManager:
         self.session_words = 0
         self.session_transcriptions = 0
 
+        # Latences mesurées (nom -> dernières valeurs en secondes)
+        self.latency_history = {}
+
+        # Ré-décodage en tâche de fond
+        self.redecode_count = 0
+        self.redecode_audio_seconds = 0.0
+        self.redecode_busy_seconds = 0.0
+
     def get_system_stats(self):
         """Obtenir les statistiques système"""
         try:
@@ -57,14 +65,9 @@ class StatsManager:
             }
 
             # Température (si disponible sur Raspberry Pi)
-            try:
-                temps = psutil.sensors_temperatures()
-                if 'cpu_thermal' in temps:
-                    stats['temperature'] = {
-                        'cpu': round(temps['cpu_thermal'][0].current, 1)
-                    }
-            except (AttributeError, KeyError):
-                pass
+            temperature = self.get_cpu_temperature()
+            if temperature is not None:
+                stats['temperature'] = {'cpu': round(temperature, 1)}
 
             return stats
 
@@ -76,6 +79,23 @@ class StatsManager:
                 'disk': {'percent': 0, 'free_gb': 0}
             }
 
+    def get_cpu_temperature(self):
+        """Température du SoC (capteur cpu_thermal du Raspberry Pi), None si absente"""
+        try:
+            temps = psutil.sensors_temperatures()
+            if 'cpu_thermal' in temps:
+                return temps['cpu_thermal'][0].current
+        except (AttributeError, KeyError):
+            pass
+        return None
+
+    def get_load_sample(self):
+        """Mesure de charge sans attente (CPU depuis l'appel précédent, température)"""
+        return {
+            'cpu_percent': psutil.cpu_percent(interval=None),
+            'temperature': self.get_cpu_temperature()
+        }
+
     def get_app_stats(self):
         """Obtenir les statistiques de l'application"""
         uptime_seconds = int(time.time() - self.start_time)
@@ -88,7 +108,10 @@ class StatsManager:
             'total_words': self.word_count,
             'error_count': self.error_count,
             'avg_words_per_transcription': round(self.word_count / self.transcription_count, 1) if self.transcription_count > 0 else 0,
-            'transcriptions_per_minute': round(self.transcription_count / (uptime_seconds / 60), 2) if uptime_seconds > 0 else 0
+            'transcriptions_per_minute': round(self.transcription_count / (uptime_seconds / 60), 2) if uptime_seconds > 0 else 0,
+            'redecoded_segments': self.redecode_count,
+            'redecoded_audio_seconds': round(self.redecode_audio_seconds, 1),
+            'redecode_speed': round(self.redecode_audio_seconds / self.redecode_busy_seconds, 2) if self.redecode_busy_seconds > 0 else 0
         }
 
     def get_audio_stats(self):
@@ -112,6 +135,7 @@ class StatsManager:
             'system': self.get_system_stats(),
             'app': self.get_app_stats(),
             'audio': self.get_audio_stats(),
+            'latency': self.get_latency_stats(),
             'timestamp': datetime.now().isoformat()
         }
 
@@ -124,6 +148,38 @@ class StatsManager:
         if audio_level > 0:
             self.audio_level_history.append(audio_level)
 
+    def record_redecode(self, audio_seconds, elapsed_seconds):
+        """Enregistrer un segment ré-décodé (débit = secondes d'audio par seconde de calcul)"""
+        self.redecode_count += 1
+        self.redecode_audio_seconds += audio_seconds
+        self.redecode_busy_seconds += elapsed_seconds
+
+    def record_latency(self, name, seconds):
+        """Enregistrer une mesure de latence (ex: 'emergency_alert', 'final_result')"""
+        if name not in self.latency_history:
+            self.latency_history[name] = deque(maxlen=500)
+        self.latency_history[name].append(seconds)
+
+    def get_latency_stats(self):
+        """Distribution des latences (ms): médiane, p90, p99, max"""
+        result = {}
+        for name, history in list(self.latency_history.items()):
+            values = sorted(history)
+            if not values:
+                continue
+
+            def percentile(p):
+                return round(values[min(len(values) - 1, int(p * len(values)))] * 1000, 1)
+
+            result[name] = {
+                'count': len(values),
+                'p50_ms': percentile(0.5),
+                'p90_ms': percentile(0.9),
+                'p99_ms': percentile(0.99),
+                'max_ms': round(values[-1] * 1000, 1)
+            }
+        return result
+
     def increment_error(self):
         """Incrémenter le compteur d'erreurs"""
         self.error_count += 1
@@ -0,0 +1,129 @@
+"""Validation de la configuration, profils et reprise des anciens réglages (app_config)"""
+
+import json
+
+import pytest
+
+from app_config import (PROFILES, ConfigError, ConfigStore, default_config, derive_snapshot,
+                        migrate_legacy, validate_config)
+
+
+def test_defaults_are_valid():
+    assert validate_config(default_config(), strict=True) == default_config()
+
+
+def test_values_converted():
+    data = validate_config({'vad_aggressiveness': 2.0, 'vosk_endpointer_delays': [5, 0.5, 20],
+                            'retention': {'batch_pause': 1}})
+    assert data['vad_aggressiveness'] == 2 and isinstance(data['vad_aggressiveness'], int)
+    assert data['vosk_endpointer_delays'] == (5.0, 0.5, 20.0)
+    assert isinstance(data['retention']['batch_pause'], float)
+
+
+@pytest.mark.parametrize('document, field', [
+    ({'vad_aggressiveness': 4}, 'vad_aggressiveness'),
+    ({'enable_vad': 'yes'}, 'enable_vad'),
+    ({'engine_mode': 'threads'}, 'engine_mode'),
+    ({'profile': 'turbo'}, 'profile'),
+    ({'vosk_endpointer_delays': [1, 2]}, 'vosk_endpointer_delays'),
+    ({'audio': {'sample_rate': 16000, 'block_size': 1000}}, 'audio.block_size'),  # Pas un multiple de 30 ms
+    ({'retention': {'days': '30'}}, 'retention.days'),
+    ({'retention': 30}, 'retention'),
+    ({'resources': {'decoder_cores': [1, 'x']}}, 'resources.decoder_cores'),
+    ({'resources': {'decoder_cores': [2048]}}, 'resources.decoder_cores'),
+    ({'alerts': {'sinks': ['mail']}}, 'alerts.sinks'),
+    ({'cluster': {'streams': []}}, 'cluster.streams'),
+])
+def test_invalid_values_rejected(document, field):
+    with pytest.raises(ConfigError) as error:
+        validate_config(document)
+    assert any(message.startswith(field) for message in error.value.errors)
+
+
+def test_errors_collected_together():
+    with pytest.raises(ConfigError) as error:
+        validate_config({'vad_aggressiveness': 9, 'theme': 'blue'})
+    assert len(error.value.errors) == 2
+
+
+def test_unknown_settings():
+    assert validate_config({'other_module': {'x': 1}, 'retention': {'legacy': True}})['retention'] == {'legacy': True}
+    with pytest.raises(ConfigError):
+        validate_config({'typo_setting': 1}, strict=True)
+    with pytest.raises(ConfigError):
+        validate_config({'retention': {'legacy': True}}, strict=True)
+
+
+def test_migrate_legacy():
+    document = {'ui': {'default_font_size': 80, 'default_theme': 'dark'}, 'theme': 'light',
+                'models': {'model_path': 'models/big', 'preload_before_fork': True}}
+    moved = migrate_legacy(document)
+    assert 'ui' not in document
+    assert document['font_size'] == 80
+    assert document['theme'] == 'light'  # Le réglage de la racine l'emporte
+    assert document['vosk'] == {'model_path': 'models/big'}
+    assert document['models'] == {'preload_before_fork': True}
+    assert len(moved) == 2
+
+
+def _store(tmp_path, document):
+    path = tmp_path / 'config.json'
+    path.write_text(json.dumps(document))
+    store = ConfigStore(str(path))
+    assert store.load()
+    return store
+
+
+def test_profile_then_explicit_settings(tmp_path):
+    store = _store(tmp_path, {})
+    snapshot = store.update({'profile': 'low-CPU'})
+    assert snapshot['profile'] == 'low-CPU'
+    assert snapshot['audio']['block_size'] == PROFILES['low-CPU']['audio']['block_size']
+    assert snapshot['audio']['sample_rate'] == 16000  # Le reste de la section est conservé
+
+    # Réglage explicite de la même requête appliqué après le profil: réglages personnalisés
+    snapshot = store.update({'profile': 'low-latency', 'enable_punctuation': True})
+    assert snapshot['audio']['block_size'] == 480
+    assert snapshot['enable_punctuation'] is True
+    assert snapshot['profile'] is None
+
+    with pytest.raises(ConfigError):
+        store.apply_profile('turbo')
+    assert store.snapshot['audio']['block_size'] == 480
+
+
+def test_profile_in_file_wins(tmp_path):
+    store = _store(tmp_path, {'profile': 'low-latency', 'enable_punctuation': True})
+    assert store.snapshot['enable_punctuation'] is False
+    assert store.snapshot['profile'] == 'low-latency'
+
+
+def test_invalid_file_keeps_snapshot(tmp_path):
+    store = _store(tmp_path, {'font_size': 80})
+    (tmp_path / 'config.json').write_text(json.dumps({'font_size': 5}))
+    assert not store.load()
+    assert store.snapshot['font_size'] == 80
+    assert store.last_error
+
+
+def test_restart_only_sections(tmp_path):
+    store = _store(tmp_path, {'app': {'port': 5002}})
+    assert store.restart_required == []
+    store.update({'retention': {'days': 10}, 'font_size': 70})
+    assert store.restart_required == ['retention']
+
+
+def test_restart_detected_when_file_matches_defaults(tmp_path):
+    store = _store(tmp_path, {})
+    store.update({'app': {'port': 5002}})
+    assert store.restart_required == ['app.port']
+
+
+def test_derive_snapshot(tmp_path):
+    store = _store(tmp_path, {})
+    derived = derive_snapshot(store.snapshot, {'audio': {'device': 'hw:1,0'}})
+    assert derived['audio']['device'] == 'hw:1,0'
+    assert derived['audio']['block_size'] == store.snapshot['audio']['block_size']
+    assert store.snapshot['audio']['device'] is None
+    with pytest.raises(ConfigError):
+        derive_snapshot(store.snapshot, {'audio': {'block_size': 1000}})
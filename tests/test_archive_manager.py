@@ -0,0 +1,92 @@
+"""Segments d'archive: pagination par id et reprise d'un archivage interrompu"""
+
+from archive_manager import TranscriptionArchive, archive_old_transcriptions
+from database import TranscriptionDatabase
+
+
+def _row(transcription_id, timestamp, text=None):
+    return {
+        'id': transcription_id,
+        'text': text or f'phrase {transcription_id}',
+        'timestamp': timestamp,
+        'has_emergency': False,
+        'emergency_words': [],
+        'audio_level': 10,
+        'word_count': 2
+    }
+
+
+def _ids(rows):
+    return [row['id'] for row in rows]
+
+
+def test_pages_by_id_across_overlapping_segments(tmp_path):
+    archive = TranscriptionArchive(str(tmp_path / 'archives'), block_rows=2)
+    # Horloge revenue en arrière: les plages d'id des deux mois se chevauchent
+    archive.write_segment('2026-01', [_row(1, '2026-01-05 10:00:00'), _row(2, '2026-01-06 10:00:00'),
+                                      _row(5, '2026-01-30 10:00:00')])
+    archive.write_segment('2026-02', [_row(3, '2026-02-01 10:00:00'), _row(4, '2026-02-02 10:00:00'),
+                                      _row(6, '2026-02-03 10:00:00')])
+
+    pages = []
+    before_id = None
+    while True:
+        page = archive.query_range(limit=2, before_id=before_id)
+        if not page:
+            break
+        pages.append(_ids(page))
+        before_id = page[-1]['id']
+    assert pages == [[6, 5], [4, 3], [2, 1]]
+
+
+def test_old_segment_rows_have_new_columns(tmp_path):
+    archive = TranscriptionArchive(str(tmp_path / 'archives'))
+    archive.write_segment('2026-01', [_row(1, '2026-01-05 10:00:00')])
+    row = archive.get_row(1)
+    assert row['text'] == 'phrase 1'
+    assert row['redecoded_text'] is None and row['session_id'] is None and row['words'] is None
+
+
+def _database(tmp_path, archive, timestamps):
+    db = TranscriptionDatabase(str(tmp_path / 'transcriptions.db'))
+    db.attach_archive(archive)
+    with db._get_connection() as conn:
+        for timestamp in timestamps:
+            cursor = conn.execute("INSERT INTO transcriptions (text, timestamp, word_count) VALUES ('a b', ?, 2)",
+                                  (timestamp,))
+            conn.execute("UPDATE transcriptions SET text = ? WHERE id = ?",
+                         (f'phrase {cursor.lastrowid}', cursor.lastrowid))
+        conn.commit()
+    return db
+
+
+def test_history_pages_continue_into_archive(tmp_path):
+    archive = TranscriptionArchive(str(tmp_path / 'archives'))
+    db = _database(tmp_path, archive, ['2020-01-10 10:00:00'] * 3)
+    archive_old_transcriptions(db, archive, pause=0)
+    db.add_transcription('récente 1')
+    db.add_transcription('récente 2')
+
+    first = db.get_recent_transcriptions(limit=3)
+    assert _ids(first) == [5, 4, 3]
+    assert _ids(db.get_recent_transcriptions(limit=3, before_id=first[-1]['id'])) == [2, 1]
+
+
+def test_interrupted_run_is_not_archived_twice(tmp_path):
+    archive = TranscriptionArchive(str(tmp_path / 'archives'))
+    db = _database(tmp_path, archive, ['2020-01-10 10:00:00', '2020-01-11 10:00:00', '2020-01-12 10:00:00'])
+
+    # Arrêt entre l'écriture du segment et la suppression du stock chaud
+    archive.write_segment('2020-01', db.get_transcriptions_for_month('2020-01')[:2])
+    assert archive.get_total_count() == 2
+
+    archived = archive_old_transcriptions(db, archive, pause=0)
+    assert archived == 3
+    assert archive.get_total_count() == 3
+    assert archive.get_status()['segments'] == 2
+    assert _ids(archive.query_range()) == [3, 2, 1]
+    assert db.get_total_count(include_archive=False) == 0
+
+    # Un nouveau passage ne réécrit rien
+    assert archive_old_transcriptions(db, archive, pause=0) == 0
+    assert archive.get_total_count() == 3
@@ -0,0 +1,85 @@
+"""Rééchantillonnage polyphase bloc par bloc (audio_resampler)"""
+
+import numpy as np
+import pytest
+
+from audio_resampler import CaptureConverter, PolyphaseResampler, downmix
+
+RATES = [(48000, 16000), (44100, 16000), (8000, 16000), (32000, 16000)]
+
+
+def _tone(rate, frequency, seconds=1.0, amplitude=8000.0):
+    t = np.arange(int(rate * seconds)) / rate
+    return (amplitude * np.sin(2 * np.pi * frequency * t)).astype(np.float32)
+
+
+def _blocks(samples, sizes):
+    start = 0
+    index = 0
+    while start < len(samples):
+        size = sizes[index % len(sizes)]
+        yield samples[start:start + size]
+        start += size
+        index += 1
+
+
+@pytest.mark.parametrize('in_rate, out_rate', RATES)
+def test_blocks_match_whole_signal(in_rate, out_rate):
+    samples = np.random.default_rng(0).standard_normal(in_rate).astype(np.float32) * 3000
+    whole = PolyphaseResampler(in_rate, out_rate).process(samples)
+
+    resampler = PolyphaseResampler(in_rate, out_rate)
+    # Tailles irrégulières, dont des blocs plus courts que le filtre et un bloc vide
+    pieces = [resampler.process(block) for block in _blocks(samples, [1, 441, 0, 1000, 37, 2880])]
+    blocked = np.concatenate(pieces)
+
+    assert len(blocked) == len(whole)
+    np.testing.assert_allclose(blocked, whole, rtol=1e-5, atol=1e-2)
+
+
+@pytest.mark.parametrize('in_rate, out_rate', RATES)
+def test_output_length(in_rate, out_rate):
+    resampler = PolyphaseResampler(in_rate, out_rate)
+    produced = sum(len(resampler.process(np.zeros(in_rate // 10, dtype=np.float32))) for _ in range(20))
+    assert abs(produced - 2 * out_rate) <= 1
+
+
+def test_reset_restarts_stream():
+    samples = _tone(48000, 440, 0.2)
+    resampler = PolyphaseResampler(48000, 16000)
+    first = resampler.process(samples)
+    resampler.process(_tone(48000, 1000, 0.1))
+    resampler.reset()
+    np.testing.assert_array_equal(resampler.process(samples), first)
+
+
+def _amplitude(signal, rate, frequency):
+    signal = signal[len(signal) // 4:]  # Sans la montée du filtre
+    t = np.arange(len(signal)) / rate
+    return 2 * abs(np.mean(signal * np.exp(-2j * np.pi * frequency * t)))
+
+
+def test_passband_kept_and_alias_rejected():
+    kept = PolyphaseResampler(48000, 16000).process(_tone(48000, 1000))
+    assert _amplitude(kept, 16000, 1000) == pytest.approx(8000, rel=0.01)
+
+    # 10 kHz n'existe pas à 16 kHz: replié sur 6 kHz sans filtre
+    aliased = PolyphaseResampler(48000, 16000).process(_tone(48000, 10000))
+    assert _amplitude(aliased, 16000, 6000) < 8000 * 1e-3
+
+
+def test_downmix():
+    stereo = np.array([100, 300, -200, 0], dtype=np.int16)
+    np.testing.assert_array_equal(downmix(stereo, 2), np.array([200, -100], dtype=np.float32))
+    assert downmix(stereo, 1).dtype == np.float32
+
+
+def test_capture_converter():
+    passthrough = CaptureConverter(16000, 1, 16000)
+    assert passthrough.convert(b'\x01\x02') == b'\x01\x02'
+
+    converter = CaptureConverter(48000, 2, 16000)
+    assert converter.capture_blocksize(960) == 2880
+    stereo = np.repeat(_tone(48000, 440, 0.06), 2).astype(np.int16)
+    output = np.frombuffer(converter.convert(stereo.tobytes()), dtype=np.int16)
+    assert abs(len(output) - 960) <= converter.resampler.taps
@@ -0,0 +1,95 @@
+"""Recherche des phrases d'urgence (emergency_rules)"""
+
+import json
+import os
+
+from emergency_rules import EmergencyRuleEngine, RuleAutomaton, normalize_token
+
+RULES = [
+    {'phrase': 'aide', 'severity': 'high'},
+    {'phrase': 'au secours', 'severity': 'critical'},
+    {'phrase': 'je suis tombée', 'severity': 'high'},
+    {'phrase': 'pompiers', 'severity': 'medium'},
+]
+
+
+def _phrases(matches):
+    return [m['phrase'] for m in matches]
+
+
+def test_normalize_token():
+    assert normalize_token('Tombées') == 'tombe'
+    assert normalize_token('tombée') == 'tombe'
+    assert normalize_token('Secours') == normalize_token('secour')
+    assert normalize_token('ÉLÈVE') == 'eleve'
+
+
+def test_punctuation():
+    matches = RuleAutomaton(RULES).search("À l'aide, vite!")
+    assert _phrases(matches) == ['aide']
+    assert matches[0]['text'] == 'aide'
+
+
+def test_accents_and_case():
+    assert _phrases(RuleAutomaton([{'phrase': 'électricité'}]).search('Plus d’ELECTRICITE ici')) == ['électricité']
+
+
+def test_plural_and_feminine():
+    automaton = RuleAutomaton(RULES)
+    assert _phrases(automaton.search('je suis tombées')) == ['je suis tombée']
+    assert _phrases(automaton.search('je suis tombé')) == ['je suis tombée']
+    assert _phrases(automaton.search('appelez le pompier')) == ['pompiers']
+
+
+def test_multi_word_phrase_single_span():
+    text = 'Au secours !'
+    matches = RuleAutomaton(RULES).search(text)
+    assert len(matches) == 1
+    match = matches[0]
+    assert match['phrase'] == 'au secours'
+    assert match['severity'] == 'critical'
+    assert (match['start'], match['end']) == (0, len('Au secours'))
+
+
+def test_offsets():
+    text = "Bonjour, j'ai besoin d'aide. Je suis tombée."
+    matches = RuleAutomaton(RULES).search(text)
+    assert _phrases(matches) == ['aide', 'je suis tombée']
+    for match in matches:
+        assert text[match['start']:match['end']] == match['text']
+    assert matches[1]['text'] == 'Je suis tombée'
+
+
+def test_whole_words_only():
+    automaton = RuleAutomaton(RULES)
+    assert automaton.search('aidez-moi') == []
+    assert automaton.search('au revoir') == []
+    assert automaton.search('il est suisse') == []
+
+
+def _write_rules(path, rules, mtime):
+    path.write_text(json.dumps({'rules': rules}), encoding='utf-8')
+    os.utime(path, (mtime, mtime))
+
+
+def test_hot_reload_on_mtime_change(tmp_path):
+    path = tmp_path / 'rules.json'
+    _write_rules(path, [{'phrase': 'aide'}], 1_000_000)
+    engine = EmergencyRuleEngine(rules_file=str(path), reload_interval=0)
+    assert engine.version == 1
+    assert _phrases(engine.find_matches('un incendie')) == []
+
+    _write_rules(path, [{'phrase': 'incendie', 'severity': 'critical'}], 1_000_010)
+    assert _phrases(engine.find_matches('un incendie')) == ['incendie']
+    assert engine.version == 2
+    assert engine.get_phrases() == ['incendie']
+
+
+def test_invalid_file_keeps_rules(tmp_path):
+    path = tmp_path / 'rules.json'
+    _write_rules(path, [{'phrase': 'aide'}], 1_000_000)
+    engine = EmergencyRuleEngine(rules_file=str(path), reload_interval=0)
+
+    _write_rules(path, [{'phrase': 'incendie', 'severity': 'urgent'}], 1_000_010)
+    assert _phrases(engine.find_matches('aide')) == ['aide']
+    assert engine.version == 1
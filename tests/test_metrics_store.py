@@ -0,0 +1,96 @@
+"""Aller-retour du fichier des séries temporelles (metrics_store)"""
+
+import time
+
+from metrics_store import MetricsStore
+
+TIERS = ((1, 60), (60, 10))
+
+
+def _store(path, metrics=('a',)):
+    return MetricsStore(path=str(path), metrics=metrics, tiers=TIERS)
+
+
+def _minute_ago():
+    return (int(time.time()) // 60 - 2) * 60
+
+
+def test_round_trip(tmp_path):
+    path = tmp_path / 'metrics.tsdb'
+    store = _store(path, ('a', 'b'))
+    now = time.time()
+    for i in range(30):
+        store.record({'a': i, 'b': 2.5 * i}, timestamp=now - 30 + i)
+    assert store.save() > 0
+
+    reloaded = _store(path, ('a', 'b'))
+    assert reloaded.load()
+    for resolution in (1, 60):
+        assert reloaded.query(start=now - 300, end=now, resolution=resolution)['series'] == \
+            store.query(start=now - 300, end=now, resolution=resolution)['series']
+    assert reloaded.latest() == store.latest()
+
+
+def test_partial_save_after_load(tmp_path):
+    path = tmp_path / 'metrics.tsdb'
+    store = _store(path)
+    now = time.time()
+    store.record({'a': 1.0}, timestamp=now - 20)
+    store.save()
+
+    store = _store(path)
+    assert store.load()
+    store.record({'a': 7.0}, timestamp=now - 5)
+    store.save()
+
+    reloaded = _store(path)
+    assert reloaded.load()
+    values = reloaded.query(start=now - 30, end=now, resolution=1)['series']['a']['mean']
+    assert 1.0 in values and 7.0 in values
+
+
+def test_layout_change_rewrites_file(tmp_path):
+    path = tmp_path / 'metrics.tsdb'
+    old = _store(path, ('a',))
+    old.record({'a': 1.0}, timestamp=time.time() - 10)
+    old.save()
+
+    store = _store(path, ('a', 'b'))
+    assert not store.load()
+    now = time.time()
+    store.record({'a': 3.0, 'b': 4.0}, timestamp=now - 1)
+    store.save()
+
+    reloaded = _store(path, ('a', 'b'))
+    assert reloaded.load()
+    series = reloaded.query(start=now - 30, end=now, resolution=1)['series']
+    assert series['a']['mean'].count(1.0) == 0
+    assert 3.0 in series['a']['mean'] and 4.0 in series['b']['mean']
+
+
+def test_corrupt_header_rewrites_file(tmp_path):
+    path = tmp_path / 'metrics.tsdb'
+    path.write_bytes(b'\x00not json' * 100)
+
+    store = _store(path)
+    assert not store.load()
+    store.record({'a': 2.0}, timestamp=time.time() - 1)
+    store.save()
+    assert _store(path).load()
+
+
+def test_restart_keeps_running_mean(tmp_path):
+    path = tmp_path / 'metrics.tsdb'
+    minute = _minute_ago()
+    store = _store(path)
+    store.record({'a': 10.0}, timestamp=minute + 1)
+    store.record({'a': 20.0}, timestamp=minute + 2)
+    store.save()
+
+    # Redémarrage dans la même minute
+    store = _store(path)
+    assert store.load()
+    store.record({'a': 60.0}, timestamp=minute + 3)
+    result = store.query(start=minute, end=minute + 59, resolution=60)
+    assert result['series']['a']['mean'][0] == 30.0
+    assert result['series']['a']['max'][0] == 60.0
@@ -0,0 +1,90 @@
+"""Attribution des flux aux moteurs du cluster (cluster.StreamAssignment)"""
+
+import pytest
+
+import cluster
+from cluster import StreamAssignment
+
+TIMEOUT = 10.0
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cluster.time, 'monotonic', clock)
+    return clock
+
+
+def _beat(assignment, name, streams=None, role='engine'):
+    assignment.update({'worker': name, 'role': role,
+                       'streams': {stream: {'claimed_at': claimed_at} for stream, claimed_at in (streams or {}).items()}})
+
+
+def test_owner_is_first_claimant(clock):
+    assignment = StreamAssignment(TIMEOUT)
+    _beat(assignment, 'engine-b', {'micro': 5.0})
+    _beat(assignment, 'engine-a', {'micro': 7.0})
+    assert assignment.owner('micro') == 'engine-b'
+
+    # Prise simultanée: le nom le plus petit l'emporte, le même dans chaque processus
+    _beat(assignment, 'engine-a', {'micro': 5.0})
+    assert assignment.owner('micro') == 'engine-a'
+
+
+def test_orphans_and_claimant(clock):
+    assignment = StreamAssignment(TIMEOUT)
+    assert assignment.claimant() is None
+    _beat(assignment, 'engine-1', {'micro': 1.0, 'salon': 2.0})
+    _beat(assignment, 'engine-2', {'cuisine': 3.0})
+    _beat(assignment, 'web-0', role='web')
+
+    assert assignment.orphans(['micro', 'salon', 'cuisine', 'chambre']) == ['chambre']
+    assert assignment.claimant() == 'engine-2'  # Le moins chargé, jamais un processus web
+
+
+def test_joining_engine_takes_nothing(clock):
+    assignment = StreamAssignment(TIMEOUT)
+    _beat(assignment, 'engine-2', {'micro': 1.0, 'salon': 2.0})
+    _beat(assignment, 'engine-1')
+    assert assignment.owner('micro') == 'engine-2'
+    assert assignment.owner('salon') == 'engine-2'
+    assert assignment.orphans(['micro', 'salon']) == []
+    assert assignment.claimant() == 'engine-1'
+
+
+def test_silent_engine_loses_its_streams(clock):
+    assignment = StreamAssignment(TIMEOUT)
+    _beat(assignment, 'engine-1', {'micro': 1.0})
+    clock.now += 5
+    _beat(assignment, 'engine-2')
+
+    clock.now += TIMEOUT - 4  # engine-1 muet depuis plus que le délai
+    assert assignment.owner('micro') is None
+    assert assignment.orphans(['micro']) == ['micro']
+    assert assignment.claimant() == 'engine-2'
+
+    # De retour avant d'être oublié avec le flux toujours ouvert: la prise la plus ancienne l'emporte,
+    # engine-2 le rend (un seul propriétaire, le même vu de chaque processus)
+    _beat(assignment, 'engine-2', {'micro': 20.0})
+    _beat(assignment, 'engine-1', {'micro': 1.0})
+    assert assignment.owner('micro') == 'engine-1'
+
+
+def test_leave_and_prune(clock):
+    assignment = StreamAssignment(TIMEOUT)
+    _beat(assignment, 'engine-1', {'micro': 1.0})
+    _beat(assignment, 'engine-2', {'salon': 1.0})
+    assignment.remove('engine-1')
+    assert assignment.owner('micro') is None
+
+    clock.now += TIMEOUT * 6 + 1
+    assignment.prune()
+    assert assignment.workers == {}